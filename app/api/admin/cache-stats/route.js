@@ -0,0 +1,28 @@
+import { getServerSession } from 'next-auth';
+import { NextResponse } from 'next/server';
+import { authOptions } from '@/lib/auth-options';
+import { configCacheStats, resetConfigCache } from '@/lib/config-cache';
+import { USER_ROLE } from '@/app/constants';
+
+// GET /api/admin/cache-stats
+// Hits, misses, hit rate and size of the base-rate and biz-model
+// configuration caches (lib/config-cache.js)
+export async function GET() {
+  const session = await getServerSession(authOptions);
+  if (!session || session.user.role !== USER_ROLE.ADMIN) {
+    return NextResponse.json({ error: 'Unauthorized - Admin only' }, { status: 403 });
+  }
+
+  return NextResponse.json(configCacheStats());
+}
+
+// DELETE /api/admin/cache-stats - empty the caches and reset their counters
+export async function DELETE() {
+  const session = await getServerSession(authOptions);
+  if (!session || session.user.role !== USER_ROLE.ADMIN) {
+    return NextResponse.json({ error: 'Unauthorized - Admin only' }, { status: 403 });
+  }
+
+  resetConfigCache();
+  return NextResponse.json({ message: 'Config cache reset' });
+}
@@ -0,0 +1,33 @@
+import { getServerSession } from 'next-auth';
+import { NextResponse } from 'next/server';
+import { authOptions } from '@/lib/auth-options';
+import { queryStatsSnapshot, resetQueryStats } from '@/lib/query-stats';
+import { USER_ROLE } from '@/app/constants';
+
+// GET /api/admin/query-stats?limit=50&route=/api/projects
+// Per-statement timings over the rolling window (lib/query-stats.js),
+// slowest total time first, plus database time per route and the
+// prepared-statement cache hits/misses of namedQuery() (lib/db.js)
+export async function GET(request) {
+  const session = await getServerSession(authOptions);
+  if (!session || session.user.role !== USER_ROLE.ADMIN) {
+    return NextResponse.json({ error: 'Unauthorized - Admin only' }, { status: 403 });
+  }
+
+  const { searchParams } = new URL(request.url);
+  const limit = parseInt(searchParams.get('limit')) || 50;
+  const route = searchParams.get('route');
+
+  return NextResponse.json(queryStatsSnapshot({ limit, route }));
+}
+
+// DELETE /api/admin/query-stats - start a fresh window (e.g. before a load test)
+export async function DELETE() {
+  const session = await getServerSession(authOptions);
+  if (!session || session.user.role !== USER_ROLE.ADMIN) {
+    return NextResponse.json({ error: 'Unauthorized - Admin only' }, { status: 403 });
+  }
+
+  resetQueryStats();
+  return NextResponse.json({ message: 'Query stats reset' });
+}
@@ -2,8 +2,113 @@ import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
 import { query } from '@/lib/db';
-import { PAYMENT_STATUS, USER_ROLE } from '@/app/constants';
+import { parseLimit, decodeCursor, paginate } from '@/lib/pagination';
 
+// Rows per query when streaming an export
+const EXPORT_BATCH_SIZE = 1000;
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+
+// Per payment type: the paged table and the names joined onto a page.
+// Both tables are paged newest first on (payment_date, id) (migration 028).
+const PAYMENT_SOURCES = {
+  customer: {
+    table: 'customer_payments',
+    select: `
+        SELECT page.*,
+               p.name as project_name,
+               c.name as customer_name,
+               u.name as created_by_name,
+               approver.name as approved_by_name
+        FROM page
+        LEFT JOIN projects p ON page.project_id = p.id
+        LEFT JOIN customers c ON page.customer_id = c.id
+        LEFT JOIN users u ON page.created_by = u.id
+        LEFT JOIN users approver ON page.approved_by = approver.id`
+  },
+  vendor: {
+    table: 'payments_out',
+    select: `
+        SELECT page.*, v.name as vendor_name, p.name as project_name, u.name as created_by_name
+        FROM page
+        LEFT JOIN vendors v ON page.vendor_id = v.id
+        LEFT JOIN projects p ON page.project_id = p.id
+        LEFT JOIN users u ON page.created_by = u.id`
+  }
+};
+
+// One page of payments after the cursor: the page is cut from the
+// (project_id,) payment_date, id index first, then the names are joined for
+// just those rows. from/to are inclusive dates.
+function pageQuery(source, { projectId, from, to }, cursor, limit) {
+  const values = [];
+  const param = (value) => {
+    values.push(value);
+    return `$${values.length}`;
+  };
+
+  const conditions = [];
+  if (cursor) {
+    conditions.push(`(x.payment_date, x.id) < (${param(cursor[0])}::timestamptz, ${param(cursor[1])}::int)`);
+  }
+  if (projectId) {
+    conditions.push(`x.project_id = ${param(projectId)}`);
+  }
+  if (from) {
+    conditions.push(`x.payment_date >= ${param(from)}::date`);
+  }
+  if (to) {
+    conditions.push(`x.payment_date < ${param(to)}::date + 1`);
+  }
+
+  const text = `
+        WITH page AS (
+          SELECT x.*, x.payment_date::text AS payment_date_key
+          FROM ${source.table} x
+          ${conditions.length > 0 ? `WHERE ${conditions.join(' AND ')}` : ''}
+          ORDER BY x.payment_date DESC, x.id DESC
+          LIMIT ${param(limit)}
+        )
+        ${source.select}
+        ORDER BY page.payment_date DESC, page.id DESC
+      `;
+  return query(text, values);
+}
+
+const paymentKey = payment => [payment.payment_date_key, payment.id];
+const withoutKey = ({ payment_date_key, ...payment }) => payment;
+
+// Every matching payment as one JSON object per line, fetched
+// EXPORT_BATCH_SIZE rows at a time so memory stays flat however long the
+// history is. Batches are separate keyset queries, not one snapshot.
+function exportStream(source, filters, cursor) {
+  const encoder = new TextEncoder();
+  let next = cursor;
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        const result = await pageQuery(source, filters, next, EXPORT_BATCH_SIZE + 1);
+        const { rows, has_more } = paginate(result.rows, EXPORT_BATCH_SIZE, paymentKey);
+        if (rows.length > 0) {
+          controller.enqueue(encoder.encode(rows.map(row => JSON.stringify(withoutKey(row))).join('\n') + '\n'));
+        }
+        if (has_more) {
+          next = paymentKey(rows[rows.length - 1]);
+        } else {
+          controller.close();
+        }
+      } catch (error) {
+        console.error('Export Error:', error);
+        controller.error(error);
+      }
+    }
+  });
+}
+
+// GET /api/all-payments?type=customer|vendor&limit=50&cursor=...
+//     &project_id=12&from=2026-04-01&to=2026-09-30   -> { payments, next_cursor, has_more }
+// GET /api/all-payments?type=customer&format=ndjson&...  -> application/x-ndjson export
+// Newest payment_date first; from/to are inclusive dates.
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
   if (!session) {
@@ -15,41 +120,44 @@ export async function GET(request, { params }) {
   if (!type) {
     return NextResponse.json({ error: "Invalid Request. Type parameter is missing." }, { status: 404 });
   }
+  const source = type === 'customer' ? PAYMENT_SOURCES.customer : PAYMENT_SOURCES.vendor;
 
-  try {
+  const filters = {
+    projectId: searchParams.get("project_id") || null,
+    from: searchParams.get("from") || null,
+    to: searchParams.get("to") || null
+  };
+  if (filters.projectId && !/^\d+$/.test(filters.projectId)) {
+    return NextResponse.json({ error: 'project_id must be a number' }, { status: 400 });
+  }
+  if ((filters.from && !DATE_PATTERN.test(filters.from)) || (filters.to && !DATE_PATTERN.test(filters.to))) {
+    return NextResponse.json({ error: 'from and to must be dates (YYYY-MM-DD)' }, { status: 400 });
+  }
 
-    if (type === 'customer') {
-      let queryText = `
-        SELECT cp.*, 
-               p.name as project_name, 
-               c.name as customer_name, 
-               u.name as created_by_name,
-               approver.name as approved_by_name
-        FROM customer_payments cp
-        LEFT JOIN projects p ON cp.project_id = p.id
-        LEFT JOIN customers c ON cp.customer_id = c.id
-        LEFT JOIN users u ON cp.created_by = u.id
-        LEFT JOIN users approver ON cp.approved_by = approver.id
-        ORDER BY cp.payment_date DESC
-      `;
-      const result = await query(queryText);
-      return NextResponse.json({ payments: result.rows });
-    } else {
-      let queryText = `
-        SELECT vp.*, v.name as vendor_name, p.name as project_name, u.name as created_by_name
-        FROM payments_out vp
-        LEFT JOIN vendors v ON vp.vendor_id = v.id
-        LEFT JOIN projects p ON vp.project_id = p.id
-        LEFT JOIN users u ON vp.created_by = u.id
-      `;
-      const result = await query(queryText);
-      return NextResponse.json({ payments: result.rows });
-    }
+  let cursor;
+  try {
+    cursor = decodeCursor(searchParams.get("cursor"), 2);
+  } catch (error) {
+    return NextResponse.json({ error: error.message }, { status: 400 });
+  }
 
+  if (searchParams.get("format") === 'ndjson') {
+    return new NextResponse(exportStream(source, filters, cursor), {
+      headers: {
+        'Content-Type': 'application/x-ndjson',
+        'Content-Disposition': `attachment; filename="${source.table}.ndjson"`
+      }
+    });
+  }
 
+  try {
+    const limit = parseLimit(searchParams);
+    const result = await pageQuery(source, filters, cursor, limit + 1);
+    const { rows, next_cursor, has_more } = paginate(result.rows, limit, paymentKey);
 
+    return NextResponse.json({ payments: rows.map(withoutKey), next_cursor, has_more });
   } catch (error) {
     console.error('API Error:', error);
     return NextResponse.json({ error: error.message }, { status: 500 });
   }
-}
\ No newline at end of file
+}
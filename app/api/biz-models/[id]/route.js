@@ -2,6 +2,7 @@ import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
 import { query } from '@/lib/db';
+import { invalidateBizModelRates } from '@/lib/config-cache';
 import { BIZMODEL_STATUS, USER_ROLE } from '@/app/constants';
 
 export async function GET(request, { params }) {
@@ -84,6 +85,7 @@ export async function PUT(request, { params }) {
          WHERE id = $2 RETURNING *`,
         [newStatus, bizModelId]
       );
+      invalidateBizModelRates();
 
       return NextResponse.json({
         bizModel: result.rows[0],
@@ -126,6 +128,7 @@ export async function PUT(request, { params }) {
     }
 
     const updatedModel = updateRes.rows[0];
+    invalidateBizModelRates();
 
     // ✅ 2. Update stages (if provided)
     if (Array.isArray(body.stages)) {
@@ -2,7 +2,17 @@ import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
 import { query } from '@/lib/db';
-import { ESTIMATION_STATUS, PAYMENT_STATUS } from '@/app/constants';
+
+// Totals are kept as per-shard deltas (migration 023); add the shards up
+const DASHBOARD_STATS_SQL = `
+  SELECT COUNT(*)::int as shards,
+         COALESCE(SUM(active_projects), 0) as active_projects,
+         COALESCE(SUM(total_project_value), 0) as total_project_value,
+         COALESCE(SUM(total_received), 0) as total_received,
+         COALESCE(SUM(total_paid), 0) as total_paid,
+         MAX(updated_at) as stats_updated_at, MIN(refreshed_at) as stats_refreshed_at
+  FROM dashboard_stats
+`;
 
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
@@ -17,16 +27,14 @@ export async function GET(request, { params }) {
 
     switch (output) {
       case "stats":
-        const stats = await query(`
-        SELECT 
-          (SELECT COUNT(*) FROM projects WHERE status = 'active') as active_projects,
-          (SELECT COALESCE(SUM(COALESCE(final_value)), 0) 
-           FROM project_estimations 
-           WHERE is_active = true) as total_project_value,
-          (SELECT COALESCE(SUM(amount), 0) FROM customer_payments WHERE status = $1) as total_received,
-          (SELECT COALESCE(SUM(amount), 0) FROM payments_out) as total_paid
-      `, [PAYMENT_STATUS.APPROVED]);
-        return NextResponse.json({ stats: stats.rows[0] });
+        // Maintained by triggers (migration 023); rebuilt if no shard exists yet
+        let stats = await query(DASHBOARD_STATS_SQL);
+        if (stats.rows[0].shards === 0) {
+          await query(`SELECT refresh_dashboard_stats()`);
+          stats = await query(DASHBOARD_STATS_SQL);
+        }
+        const { shards, ...totals } = stats.rows[0];
+        return NextResponse.json({ stats: totals });
       case "activities":
         const activities = await query(`
         SELECT * FROM activity_logs
@@ -1,7 +1,8 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { query, withTransaction } from '@/lib/db';
+import { invalidateProjectBaseRates } from '@/lib/config-cache';
 import { USER_ROLE } from '@/app/constants';
 
 export async function POST(request, { params }) {
@@ -106,17 +107,15 @@ export async function POST(request, { params }) {
     }
 
     // All checks passed, proceed with approval in a transaction
-    await query('BEGIN');
-
-    try {
+    await withTransaction(async (tx) => {
       // Step 1: Deactivate all base_rates for this project
-      await query(
+      await tx(
         'UPDATE project_base_rates SET active = false WHERE project_id = $1',
         [projectId]
       );
 
       // Step 2: Activate and approve this base_rate
-      await query(
+      await tx(
         `UPDATE project_base_rates SET
           status = 'approved',
           active = true,
@@ -127,27 +126,23 @@ export async function POST(request, { params }) {
       );
 
       // Step 3: Update project.base_rate_id
-      await query(
+      await tx(
         'UPDATE projects SET base_rate_id = $1 WHERE id = $2',
         [baseRateId, projectId]
       );
 
       // Step 4: Log activity
-      await query(
+      await tx(
         `INSERT INTO activity_logs (project_id, related_entity, actor_id, action, comment)
          VALUES ($1, $2, $3, $4, $5)`,
         [projectId, 'project_base_rates', session.user.id, 'approved', 'Approved base rate change request']
       );
+    });
+    invalidateProjectBaseRates(projectId);
 
-      await query('COMMIT');
-
-      return NextResponse.json({
-        message: 'Base rate request approved successfully'
-      });
-    } catch (error) {
-      await query('ROLLBACK');
-      throw error;
-    }
+    return NextResponse.json({
+      message: 'Base rate request approved successfully'
+    });
   } catch (error) {
     console.error('Error approving base rate:', error);
     return NextResponse.json(
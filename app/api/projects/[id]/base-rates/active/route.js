@@ -1,7 +1,7 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { getProjectBaseRates } from '@/lib/config-cache';
 
 // GET: Fetch active base_rate for a project
 export async function GET(request, { params }) {
@@ -13,21 +13,17 @@ export async function GET(request, { params }) {
   const { id: projectId } = params;
 
   try {
-    const result = await query(
-      `SELECT * FROM project_base_rates 
-       WHERE project_id = $1 AND active = true
-       LIMIT 1`,
-      [projectId]
-    );
+    // Cached, lib/config-cache.js
+    const baseRates = await getProjectBaseRates(projectId);
 
-    if (result.rows.length === 0) {
+    if (!baseRates?.rate) {
       return NextResponse.json(
         { error: 'No active base rate found for this project' },
         { status: 404 }
       );
     }
 
-    return NextResponse.json({ activeRate: result.rows[0] });
+    return NextResponse.json({ activeRate: baseRates.rate });
   } catch (error) {
     console.error('Error fetching active base rate:', error);
     return NextResponse.json(
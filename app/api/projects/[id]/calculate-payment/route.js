@@ -1,8 +1,9 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { PAYMENT_STATUS } from '@/app/constants';
+import { namedQuery } from '@/lib/db';
+import { getProjectBizModelRates } from '@/lib/config-cache';
+import { PROJECT_PAYMENT_TOTALS_SQL, paymentTotalsFromResult } from '@/lib/payment-totals';
 
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
@@ -15,19 +16,14 @@ export async function GET(request, { params }) {
     const projectId = params.id;
     const milestoneId = searchParams.get('milestone_id');
 
-    // Get project's BizModel to fetch category definitions
-    const projectRes = await query(`
-      SELECT p.biz_model_id, bm.category_rates
-      FROM projects p
-      JOIN biz_models bm ON p.biz_model_id = bm.id
-      WHERE p.id = $1
-    `, [projectId]);
+    // Get project's BizModel category definitions (cached, lib/config-cache.js)
+    const bizModelRates = await getProjectBizModelRates(projectId);
 
-    if (projectRes.rows.length === 0) {
+    if (!bizModelRates) {
       return NextResponse.json({ error: 'Project or BizModel not found' }, { status: 404 });
     }
 
-    const categoryRates = projectRes.rows[0].category_rates;
+    const categoryRates = bizModelRates.category_rates;
     const categories = categoryRates?.categories || [];
 
     if (categories.length === 0) {
@@ -35,7 +31,7 @@ export async function GET(request, { params }) {
     }
 
     // Get latest estimation with category breakdown
-    const estRes = await query(`
+    const estRes = await namedQuery('latest_estimation_breakdown', `
       SELECT id, category_breakdown, final_value
       FROM project_estimations
       WHERE project_id = $1
@@ -51,7 +47,7 @@ export async function GET(request, { params }) {
     const categoryBreakdown = estimation.category_breakdown || {};
 
     // Get milestone details with dynamic category percentages
-    const milestoneRes = await query(`
+    const milestoneRes = await namedQuery('milestone_percentages', `
       SELECT milestone_code, milestone_name, category_percentages
       FROM biz_model_milestones
       WHERE id = $1
@@ -68,7 +64,7 @@ export async function GET(request, { params }) {
     const categoryCalculations = {};
     let targetTotal = 0;
 
-    categories
+    [...categories]
       .sort((a, b) => (a.sort_order || 0) - (b.sort_order || 0))
       .forEach(category => {
         const categoryId = category.id;
@@ -87,14 +83,12 @@ export async function GET(request, { params }) {
         targetTotal += targetAmount;
       });
 
-    // Get total payments collected so far
-    const paymentsRes = await query(`
-      SELECT COALESCE(SUM(amount), 0) as collected_total
-      FROM customer_payments
-      WHERE project_id = $1 AND status = $2
-    `, [projectId, PAYMENT_STATUS.APPROVED]);
+    // Get total payments collected so far (maintained per project, lib/payment-totals.js)
+    const paymentTotals = paymentTotalsFromResult(
+      await namedQuery('project_payment_totals', PROJECT_PAYMENT_TOTALS_SQL, [projectId])
+    );
 
-    const collectedTotal = parseFloat(paymentsRes.rows[0].collected_total || 0);
+    const collectedTotal = paymentTotals.collected;
     const remainingTotal = Math.max(0, targetTotal - collectedTotal);
 
     return NextResponse.json({
@@ -1,8 +1,8 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { PAYMENT_STATUS } from '@/app/constants';
+import { projectPaymentTotals } from '@/lib/payment-totals';
+import { currentCounterValue, COUNTER } from '@/lib/counters';
 
 export async function POST(request, { params }) {
   const session = await getServerSession(authOptions);
@@ -12,25 +12,15 @@ export async function POST(request, { params }) {
   const body = await request.json();
   const project_id = params.id;
   const { final_value } = body;
-  // Get next version number
-  const versionRes = await query(
-    'SELECT COALESCE(MAX(version), 0) + 1 as next_version FROM project_estimations WHERE project_id = $1',
-    [project_id]
-  );
-  const nextVersion = versionRes.rows[0].next_version;
+  // Next version number (read only; allocated when the estimation is saved)
+  const nextVersion = await currentCounterValue(COUNTER.ESTIMATION_VERSION, project_id) + 1;
   // Only check if this is a revision (version > 1)
   if (nextVersion <= 1) {
     return NextResponse.json({ has_overpayment: false });
   }
 
   // Get total approved payments
-  const paymentsRes = await query(`
-        SELECT COALESCE(SUM(amount), 0) as total_collected
-        FROM customer_payments
-        WHERE project_id = $1 AND status = $2
-      `, [project_id, PAYMENT_STATUS.APPROVED]);
-
-  const totalCollected = parseFloat(paymentsRes.rows[0].total_collected || 0);
+  const { collected: totalCollected } = await projectPaymentTotals(project_id);
   const grandTotal = parseFloat(final_value);
 
   if (totalCollected > grandTotal) {
@@ -1,7 +1,8 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { withTransaction } from '@/lib/db';
+import { projectPaymentTotals } from '@/lib/payment-totals';
 import { DOCUMENT_TYPE, LEDGER_ENTRY_TYPE, PAYMENT_STATUS, USER_ROLE } from '@/app/constants';
 
 export async function PUT(request, { params }) {
@@ -53,15 +54,19 @@ export async function PUT(request, { params }) {
 
     values.push(paymentId);
 
-    const result = await query(
-      `UPDATE customer_payments SET ${updates.join(', ')} WHERE id = $${paramCounter} RETURNING *`,
-      values
-    );
-
-    if (body.status === PAYMENT_STATUS.APPROVED) {
+    // The status change, its ledger entry and the overpayment flag commit
+    // together; the project_payment_totals trigger (migration 027) adjusts
+    // the project's collected/pending totals inside the same transaction
+    const { payment, missingEstimation } = await withTransaction(async (tx) => {
+      const result = await tx(
+        `UPDATE customer_payments SET ${updates.join(', ')} WHERE id = $${paramCounter} RETURNING *`,
+        values
+      );
       const payment = result.rows[0];
 
-      console.log(body);
+      if (body.status !== PAYMENT_STATUS.APPROVED) {
+        return { payment };
+      }
 
       // Determine ledger entry type
       const entryType = body.document_type === DOCUMENT_TYPE.RECEIPT_REVERSAL ? LEDGER_ENTRY_TYPE.DEBIT : LEDGER_ENTRY_TYPE.CREDIT;
@@ -70,75 +75,64 @@ export async function PUT(request, { params }) {
           ? 'Receipt reversal approved by Finance'
           : 'Payment approved by Finance';
 
-
-      const ledgerCheck = await query(
+      const ledgerCheck = await tx(
         'SELECT id FROM project_ledger WHERE source_table = $1 AND source_id = $2',
         ['customer_payments', paymentId]
       );
 
       if (ledgerCheck.rows.length === 0) {
-        await query(
+        await tx(
           `INSERT INTO project_ledger (project_id, source_table, source_id, entry_type, amount, remarks)
             VALUES ($1, $2, $3, $4, $5, $6)`,
           [payment.project_id, 'customer_payments', paymentId, entryType, payment.amount, remarks]
         );
       }
 
-      // Get the latest estimation id
-      const latestEstRes = await query(
-        `SELECT e.id
+      // Get the latest estimation
+      const latestEstRes = await tx(
+        `SELECT e.id, e.final_value
           FROM project_estimations e
           WHERE e.project_id = $1
           ORDER BY e.version DESC
           LIMIT 1`, [payment.project_id]
-      )
-      if(latestEstRes.rows.length == 0) {
-        return NextResponse.json({ error: 'This project does not have a valid estimation' }, { status: 500 });
+      );
+      if (latestEstRes.rows.length == 0) {
+        return { payment, missingEstimation: true };
       }
       const estimationId = latestEstRes.rows[0].id;
 
       // Overpayment check
-      const paymentsRes = await query(
-        `SELECT COALESCE(SUM(amount), 0) as total_collected
-          FROM customer_payments
-          WHERE project_id = $1 AND status = $2`,
-        [payment.project_id, PAYMENT_STATUS.APPROVED]
-      );
-
-      const totalCollected = parseFloat(paymentsRes.rows[0].total_collected || 0);
+      const { collected: totalCollected } = await projectPaymentTotals(payment.project_id, tx);
+      const grandTotal = parseFloat(latestEstRes.rows[0].final_value);
+
+      if (totalCollected > grandTotal) {
+        const overpaymentAmount = totalCollected - grandTotal;
+
+        await tx(
+          `UPDATE project_estimations
+            SET has_overpayment = true,
+            overpayment_amount = $1
+            WHERE id = $2`,
+          [overpaymentAmount, estimationId]
+        );
+      } else {
+        await tx(
+          `UPDATE project_estimations
+            SET has_overpayment = false,
+            overpayment_amount = 0
+            WHERE id = $1`,
+          [estimationId]
+        );
+      }
 
-      const estRes = await query(
-        `SELECT final_value FROM project_estimations WHERE id = $1`,
-        [estimationId]
-      );
+      return { payment };
+    });
 
-      if (estRes.rows.length > 0) {
-        const grandTotal =
-          parseFloat(estRes.rows[0].final_value);
-
-        if (totalCollected > grandTotal) {
-          const overpaymentAmount = totalCollected - grandTotal;
-
-          await query(
-            `UPDATE project_estimations
-              SET has_overpayment = true,
-              overpayment_amount = $1
-              WHERE id = $2`,
-            [overpaymentAmount, estimationId]
-          );
-        } else {
-          await query(
-            `UPDATE project_estimations
-              SET has_overpayment = false,
-              overpayment_amount = 0
-              WHERE id = $1`,
-            [estimationId]
-          );
-        }
-      }
+    if (missingEstimation) {
+      return NextResponse.json({ error: 'This project does not have a valid estimation' }, { status: 500 });
     }
 
-    return NextResponse.json({ payment: result.rows[0] });
+    return NextResponse.json({ payment });
 
   } catch (error) {
     console.error('API Error:', error);
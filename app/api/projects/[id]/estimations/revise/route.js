@@ -0,0 +1,235 @@
+import { getServerSession } from 'next-auth';
+import { NextResponse } from 'next/server';
+import { authOptions } from '@/lib/auth-options';
+import { withTransaction } from '@/lib/db';
+import { ESTIMATION_ITEM_STATUS, ESTIMATION_STATUS } from '@/app/constants';
+import { calculateItemTotal, applyCategoryTotalsDelta } from '@/lib/calcUtils';
+import { insertEstimationItems, ESTIMATION_ITEM_COLUMNS } from '@/lib/estimation-items';
+import { projectPaymentTotals } from '@/lib/payment-totals';
+
+// Editable input fields of an estimation item (pricing columns are always recalculated)
+const ITEM_INPUT_FIELDS = [
+  'category', 'room_name', 'vendor_type', 'item_name', 'unit', 'width', 'height',
+  'quantity', 'unit_price', 'item_discount_percentage', 'discount_kg_charges_percentage',
+  'gst_percentage', 'status'
+];
+
+function normalizeItem(item) {
+  const quantity = item.unit === 'sqft' && item.width && item.height
+    ? parseFloat(item.width) * parseFloat(item.height)
+    : parseFloat(item.quantity) || 0;
+
+  return {
+    ...item,
+    quantity,
+    width: parseFloat(item.width) || null,
+    height: parseFloat(item.height) || null,
+    unit_price: parseFloat(item.unit_price) || 0,
+    item_discount_percentage: parseFloat(item.item_discount_percentage) || 0,
+    discount_kg_charges_percentage: parseFloat(item.discount_kg_charges_percentage) || 0,
+    status: item.status || ESTIMATION_ITEM_STATUS.QUEUED
+  };
+}
+
+function itemValues(item) {
+  return ESTIMATION_ITEM_COLUMNS.map(column => item[column] ?? null);
+}
+
+// Item ids arrive as numbers or numeric strings; anything else is NaN
+function parseItemId(id) {
+  return /^\d+$/.test(String(id).trim()) ? Number(id) : NaN;
+}
+
+function duplicates(ids) {
+  return [...new Set(ids.filter((id, idx) => ids.indexOf(id) !== idx))];
+}
+
+/**
+ * Delta revision of the active estimation
+ * Body: { added: [item], changed: [{ id, ...fields }], removed: [itemId], remarks }
+ * Only the listed items are re-priced and written; category_breakdown and the
+ * headline totals are adjusted by per-item deltas instead of a full recompute.
+ */
+export async function POST(request, { params }) {
+  const session = await getServerSession(authOptions);
+  if (!session) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const projectId = params.id;
+  const body = await request.json();
+  const added = body.added || [];
+  const changed = body.changed || [];
+  const removed = (body.removed || []).map(parseItemId);
+
+  if (added.length === 0 && changed.length === 0 && removed.length === 0) {
+    return NextResponse.json({ error: 'No item changes provided' }, { status: 400 });
+  }
+
+  const changedIds = changed.map(item => parseItemId(item.id));
+  if ([...changedIds, ...removed].some(Number.isNaN)) {
+    return NextResponse.json({ error: 'Item ids must be numeric' }, { status: 400 });
+  }
+
+  const repeated = [...duplicates(changedIds), ...duplicates(removed)];
+  if (repeated.length > 0) {
+    return NextResponse.json({
+      error: `Items listed more than once: ${repeated.join(', ')}`
+    }, { status: 400 });
+  }
+
+  if (changedIds.some(id => removed.includes(id))) {
+    return NextResponse.json({ error: 'An item cannot be both changed and removed' }, { status: 400 });
+  }
+
+  try {
+    return await withTransaction(async (tx) => {
+      // 1. Lock the active estimation and load base rates
+      const estimationRes = await tx(`
+        SELECT pe.*, pbr.category_rates, pbr.gst_percentage AS base_gst_percentage
+        FROM project_estimations pe
+        LEFT JOIN project_base_rates pbr ON pbr.project_id = pe.project_id AND pbr.active = true
+        WHERE pe.project_id = $1 AND pe.is_active = true
+        FOR UPDATE OF pe
+      `, [projectId]);
+
+      if (estimationRes.rows.length === 0) {
+        return NextResponse.json({ error: 'No active estimation found' }, { status: 404 });
+      }
+
+      const estimation = estimationRes.rows[0];
+      if (estimation.status !== ESTIMATION_STATUS.DRAFT) {
+        return NextResponse.json({
+          error: `Estimation is ${estimation.status}; upload a new version instead`
+        }, { status: 409 });
+      }
+
+      const baseRates = {
+        category_rates: estimation.category_rates,
+        gst_percentage: estimation.base_gst_percentage
+      };
+      if (!baseRates.category_rates || !baseRates.category_rates.categories) {
+        return NextResponse.json({ error: 'Project base rates not configured' }, { status: 400 });
+      }
+      const categories = baseRates.category_rates.categories;
+
+      // 2. Load only the rows being changed or removed
+      const touchedIds = [...changedIds, ...removed];
+      const currentById = new Map();
+      if (touchedIds.length > 0) {
+        const currentRes = await tx(`
+          SELECT ei.*, EXISTS (
+            SELECT 1 FROM purchase_request_estimation_links prel
+            WHERE prel.estimation_item_id = ei.id
+          ) AS has_pr_links
+          FROM estimation_items ei
+          WHERE ei.estimation_id = $1 AND ei.id = ANY($2::int[])
+        `, [estimation.id, touchedIds]);
+        currentRes.rows.forEach(row => currentById.set(row.id, row));
+      }
+
+      const missing = touchedIds.filter(id => !currentById.has(id));
+      if (missing.length > 0) {
+        return NextResponse.json({
+          error: `Items not found in active estimation: ${missing.join(', ')}`
+        }, { status: 404 });
+      }
+
+      // Deleting an item cascades to its PR links, so refuse instead
+      const linked = removed.filter(id => currentById.get(id).has_pr_links);
+      if (linked.length > 0) {
+        return NextResponse.json({
+          error: `Items linked to purchase requests cannot be removed: ${linked.join(', ')}`
+        }, { status: 409 });
+      }
+
+      // 3. Re-price only the added and changed items
+      const addedItems = added.map(item => {
+        const itemData = normalizeItem(item);
+        return { ...itemData, ...calculateItemTotal(itemData, baseRates) };
+      });
+
+      const changedItems = changed.map(item => {
+        const current = currentById.get(parseInt(item.id));
+        const merged = { id: current.id };
+        ITEM_INPUT_FIELDS.forEach(field => {
+          merged[field] = item[field] !== undefined ? item[field] : current[field];
+        });
+        const itemData = normalizeItem(merged);
+        return { ...itemData, ...calculateItemTotal(itemData, baseRates) };
+      });
+
+      const outgoing = [...changedIds, ...removed].map(id => currentById.get(id));
+      const incoming = [...changedItems, ...addedItems];
+      const totals = applyCategoryTotalsDelta(estimation, outgoing, incoming, categories);
+
+      // 4. Write only what changed
+      if (removed.length > 0) {
+        await tx(`
+          DELETE FROM estimation_items
+          WHERE estimation_id = $1 AND id = ANY($2::int[])
+        `, [estimation.id, removed]);
+      }
+
+      for (const item of changedItems) {
+        const assignments = ESTIMATION_ITEM_COLUMNS.map((column, idx) => `${column} = $${idx + 3}`).join(', ');
+        await tx(`
+          UPDATE estimation_items
+          SET ${assignments}, updated_at = NOW()
+          WHERE estimation_id = $1 AND id = $2
+        `, [estimation.id, item.id, ...itemValues(item)]);
+      }
+
+      if (addedItems.length > 0) {
+        await insertEstimationItems(estimation.id, addedItems, tx);
+      }
+
+      // 5. Overpayment check against the new final value
+      const { collected: totalCollected } = await projectPaymentTotals(projectId, tx);
+      const hasOverpayment = totalCollected > totals.final_value;
+      const overpaymentAmount = hasOverpayment ? totalCollected - totals.final_value : 0;
+
+      // 6. Apply the deltas to the estimation row
+      const updatedRes = await tx(`
+        UPDATE project_estimations
+        SET category_breakdown = $2,
+            items_value = $3, kg_charges = $4, items_discount = $5, kg_discount = $6,
+            discount = $7, gst_amount = $8, final_value = $9,
+            has_overpayment = $10, overpayment_amount = $11,
+            source = 'manual_edit',
+            remarks = COALESCE($12, remarks),
+            updated_at = NOW()
+        WHERE id = $1
+        RETURNING *
+      `, [
+        estimation.id,
+        JSON.stringify(totals.category_breakdown),
+        totals.items_value,
+        totals.kg_charges,
+        totals.items_discount,
+        totals.kg_discount,
+        totals.discount,
+        totals.gst_amount,
+        totals.final_value,
+        hasOverpayment,
+        overpaymentAmount,
+        body.remarks ?? null
+      ]);
+
+      return NextResponse.json({
+        estimation: updatedRes.rows[0],
+        items_added: addedItems.length,
+        items_changed: changedItems.length,
+        items_removed: removed.length,
+        ...(hasOverpayment && {
+          warning: 'overpayment_detected',
+          overpayment: { amount: overpaymentAmount }
+        })
+      });
+    });
+
+  } catch (error) {
+    console.error('API Error:', error);
+    return NextResponse.json({ error: error.message }, { status: 500 });
+  }
+}
@@ -1,8 +1,11 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { ESTIMATION_STATUS, PAYMENT_STATUS, ESTIMATION_ITEM_STATUS } from '@/app/constants';
+import { query, withTransaction } from '@/lib/db';
+import { ESTIMATION_STATUS, ESTIMATION_ITEM_STATUS } from '@/app/constants';
+import { nextCounterValue, COUNTER } from '@/lib/counters';
+import { projectPaymentTotals } from '@/lib/payment-totals';
+import { insertEstimationItems } from '@/lib/estimation-items';
 
 
 export async function POST(request) {
@@ -13,13 +16,6 @@ export async function POST(request) {
 
   const body = await request.json();
 
-  // Get next version number
-  const versionResult = await query(
-    'SELECT COALESCE(MAX(version), 0) + 1 as next_version FROM project_estimations WHERE project_id = $1',
-    [body.project_id]
-  );
-  const nextVersion = versionResult.rows[0].next_version;
-
   // Build category_breakdown JSONB from items
   const categoryBreakdown = body.category_breakdown || {};
 
@@ -32,86 +28,83 @@ export async function POST(request) {
   const gstAmount = parseFloat(body.gst_amount) || 0;
   const finalValue = parseFloat(body.final_value) || 0;
 
-  let hasOverpayment = false;
-  let overpaymentAmount = 0;
-  // Get total approved payments
-  const paymentsRes = await query(`
-      SELECT COALESCE(SUM(amount), 0) as total_collected
-      FROM customer_payments
-      WHERE project_id = $1 AND status = $2
-    `, [body.project_id, PAYMENT_STATUS.APPROVED]);
-
-  const totalCollected = parseFloat(paymentsRes.rows[0].total_collected || 0);
-
-  if (totalCollected > finalValue) {
-    hasOverpayment = true;
-    overpaymentAmount = totalCollected - finalValue;
-  }
+  // Normalise items up front; sqft quantities come from width x height
+  const items = (body.items || []).map(item => {
+    let finalQuantity = item.quantity;
+    if (item.unit === 'sqft' && item.width && item.height) {
+      finalQuantity = parseFloat(item.width) * parseFloat(item.height);
+    }
+    return {
+      category: item.category,
+      room_name: item.room_name,
+      vendor_type: item.vendor_type,
+      item_name: item.item_name,
+      unit: item.unit,
+      width: parseFloat(item.width) || null,
+      height: parseFloat(item.height) || null,
+      quantity: parseFloat(finalQuantity),
+      unit_price: parseFloat(item.unit_price),
+      subtotal: parseFloat(item.subtotal),
+      karighar_charges_percentage: parseFloat(item.karighar_charges_percentage),
+      karighar_charges_amount: parseFloat(item.karighar_charges_amount),
+      item_discount_percentage: parseFloat(item.item_discount_percentage),
+      item_discount_amount: parseFloat(item.item_discount_amount),
+      discount_kg_charges_percentage: parseFloat(item.discount_kg_charges_percentage),
+      discount_kg_charges_amount: parseFloat(item.discount_kg_charges_amount),
+      gst_percentage: parseFloat(item.gst_percentage),
+      gst_amount: parseFloat(item.gst_amount),
+      amount_before_gst: parseFloat(item.amount_before_gst),
+      item_total: parseFloat(item.item_total),
+      status: ESTIMATION_ITEM_STATUS.QUEUED
+    };
+  });
 
   try {
-
-
-    await query("BEGIN");
-    
-    // Make all existing estimations inactive before creating new one
-    await query(`
-        UPDATE project_estimations
-        SET is_active = false
-        WHERE project_id = $1 AND is_active = true
-      `, [body.project_id]);
-    
-    const result = await query(
-      `INSERT INTO project_estimations (
-      project_id, created_by, version,
-      category_breakdown,
-      items_value, kg_charges, items_discount, kg_discount, discount, gst_amount, 
-      final_value,
-      has_overpayment, overpayment_amount,
-      remarks
-    )
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14) RETURNING *`,
-      [
-        body.project_id, session.user.id, nextVersion, 
-        JSON.stringify(categoryBreakdown),
-        itemsValue, kgCharges, itemsDiscount, kgDiscount, discount, gstAmount,
-        finalValue,
-        hasOverpayment, overpaymentAmount,
-        body.remarks,
-      ]
-    );
-
-    // Add estimation items with all calculated fields including room_name, unit, width, height
-    if (body.items && body.items.length > 0) {
-      for (const item of body.items) {
-        // Calculate quantity based on unit type
-        let finalQuantity = item.quantity;
-        if (item.unit === 'sqft' && item.width && item.height) {
-          finalQuantity = parseFloat(item.width) * parseFloat(item.height);
-        }
-        await query(
-          `INSERT INTO estimation_items (
-          estimation_id, category, room_name, vendor_type, item_name, 
-          unit, width, height, quantity, unit_price,
-          subtotal, karighar_charges_percentage, karighar_charges_amount, item_discount_percentage, item_discount_amount, 
-          discount_kg_charges_percentage, discount_kg_charges_amount, gst_percentage, gst_amount, amount_before_gst, item_total,
-          status
-        )
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22)`,
-          [
-            result.rows[0].id, item.category, item.room_name, item.vendor_type, item.item_name,
-            item.unit, parseFloat(item.width) || null, parseFloat(item.height) || null, parseFloat(finalQuantity), parseFloat(item.unit_price),
-            parseFloat(item.subtotal), parseFloat(item.karighar_charges_percentage), parseFloat(item.karighar_charges_amount), parseFloat(item.item_discount_percentage), parseFloat(item.item_discount_amount),
-            parseFloat(item.discount_kg_charges_percentage), parseFloat(item.discount_kg_charges_amount), parseFloat(item.gst_percentage), parseFloat(item.gst_amount), parseFloat(item.amount_before_gst), parseFloat(item.item_total),
-            ESTIMATION_ITEM_STATUS.QUEUED
-          ]
-        );
-      }
-    }
+    const { estimation, hasOverpayment, overpaymentAmount } = await withTransaction(async (tx) => {
+      // Independent of each other: sent back to back without awaiting each
+      const [{ collected: totalCollected }, nextVersion] = await tx.pipeline([
+        () => projectPaymentTotals(body.project_id, tx),
+        () => nextCounterValue(COUNTER.ESTIMATION_VERSION, body.project_id, tx),
+        () => tx(`
+          UPDATE project_estimations
+          SET is_active = false
+          WHERE project_id = $1 AND is_active = true
+        `, [body.project_id])
+      ]);
+
+      const hasOverpayment = totalCollected > finalValue;
+      const overpaymentAmount = hasOverpayment ? totalCollected - finalValue : 0;
+
+      const result = await tx(
+        `INSERT INTO project_estimations (
+        project_id, created_by, version,
+        category_breakdown,
+        items_value, kg_charges, items_discount, kg_discount, discount, gst_amount, 
+        final_value,
+        has_overpayment, overpayment_amount,
+        remarks
+      )
+      VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14) RETURNING *`,
+        [
+          body.project_id, session.user.id, nextVersion, 
+          JSON.stringify(categoryBreakdown),
+          itemsValue, kgCharges, itemsDiscount, kgDiscount, discount, gstAmount,
+          finalValue,
+          hasOverpayment, overpaymentAmount,
+          body.remarks,
+        ]
+      );
+
+      // Add estimation items with one INSERT per batch instead of one per item
+      await insertEstimationItems(result.rows[0].id, items, tx);
+
+      return { estimation: result.rows[0], hasOverpayment, overpaymentAmount };
+    });
 
     // If overpayment detected, return warning
     if (hasOverpayment) {
       return NextResponse.json({
-        estimation: result.rows[0],
+        estimation,
         warning: 'overpayment_detected',
         overpayment: {
           amount: overpaymentAmount,
@@ -120,11 +113,9 @@ export async function POST(request) {
         }
       });
     }
-    await query("COMMIT");
-    return NextResponse.json({ estimation: result.rows[0] });
+    return NextResponse.json({ estimation });
 
   } catch (error) {
-    await query("ROLLBACK");
     console.error('API Error:', error);
     return NextResponse.json({ error: error.message }, { status: 500 });
   }
@@ -2,6 +2,7 @@ import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
 import { query } from '@/lib/db';
+import { getProjectBaseRates } from '@/lib/config-cache';
 import Papa from 'papaparse';
 import { ESTIMATION_ITEM_STATUS } from '@/app/constants';
 
@@ -14,20 +15,14 @@ export async function GET(request, { params }) {
   const projectId = params.id;
 
   try {
-    // Get project's base rates to determine categories
-    const projectRes = await query(`
-      SELECT p.id, p.name, pbr.category_rates
-      FROM projects p
-      LEFT JOIN project_base_rates pbr ON p.id = pbr.project_id AND pbr.active = 'true'
-      WHERE p.id = $1
-    `, [projectId]);
+    // Get project's base rates to determine categories (cached, lib/config-cache.js)
+    const baseRates = await getProjectBaseRates(projectId);
 
-    if (projectRes.rows.length === 0) {
+    if (!baseRates) {
       return NextResponse.json({ error: 'Project not found' }, { status: 404 });
     }
 
-    const project = projectRes.rows[0];
-    const categoryRates = project.category_rates;
+    const categoryRates = baseRates.rate?.category_rates;
 
     if (!categoryRates || !categoryRates.categories) {
       return NextResponse.json({ 
@@ -89,7 +84,7 @@ export async function GET(request, { params }) {
       }));
     } else {
       // Fallback to sample rows if no active estimation exists
-      dataRows = categoryRates.categories
+      dataRows = [...categoryRates.categories]
         .sort((a, b) => (a.sort_order || 0) - (b.sort_order || 0))
         .map(category => ({
           category: category.id,
@@ -1,24 +1,75 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { writeFile, mkdir } from 'fs/promises';
-import { existsSync } from 'fs';
+import { withTransaction } from '@/lib/db';
+import { getProjectBaseRates } from '@/lib/config-cache';
+import { mkdir, rename, rm } from 'fs/promises';
+import { existsSync, createReadStream, createWriteStream } from 'fs';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
 import path from 'path';
+import { randomUUID } from 'crypto';
 import Papa from 'papaparse';
-import { PAYMENT_STATUS, ESTIMATION_ITEM_STATUS } from '@/app/constants';
-import { calculateItemTotal, calculateCategoryTotals } from '@/lib/calcUtils';
-
-async function readUploadedFile(file) {
-  if (typeof file.arrayBuffer === 'function') {
-    const arrayBuffer = await file.arrayBuffer();
-    return Buffer.from(arrayBuffer);
-  }
-  const chunks = [];
-  for await (const chunk of file.stream()) {
-    chunks.push(chunk);
+import { ESTIMATION_ITEM_STATUS } from '@/app/constants';
+import { calculateItemTotal, createCategoryTotalsAccumulator } from '@/lib/calcUtils';
+import { insertEstimationItems, ESTIMATION_ITEM_BATCH_SIZE } from '@/lib/estimation-items';
+import { nextCounterValue, COUNTER } from '@/lib/counters';
+import { projectPaymentTotals } from '@/lib/payment-totals';
+
+const CSV_PARSE_CONFIG = {
+  header: true,
+  skipEmptyLines: true,
+  transformHeader: (header) => header.toLowerCase().trim()
+};
+
+async function saveUploadedFile(file, filePath) {
+  if (typeof file.stream === 'function') {
+    await pipeline(Readable.fromWeb(file.stream()), createWriteStream(filePath));
+    return;
   }
-  return Buffer.concat(chunks);
+  const arrayBuffer = await file.arrayBuffer();
+  await pipeline(Readable.from([Buffer.from(arrayBuffer)]), createWriteStream(filePath));
+}
+
+// Yields parsed CSV rows one at a time without holding the whole file in memory
+function streamCsvRows(filePath) {
+  return createReadStream(filePath, { encoding: 'utf-8' }).pipe(
+    Papa.parse(Papa.NODE_STREAM_INPUT, CSV_PARSE_CONFIG)
+  );
+}
+
+// Parses the whole file once without keeping rows, returning the row count
+// and every parse error (the row stream above does not surface them)
+function scanCsv(filePath) {
+  return new Promise((resolve, reject) => {
+    let rowCount = 0;
+    const errors = [];
+    Papa.parse(createReadStream(filePath, { encoding: 'utf-8' }), {
+      ...CSV_PARSE_CONFIG,
+      step: (results) => {
+        results.errors.forEach(error => errors.push({ ...error, row: rowCount }));
+        rowCount++;
+      },
+      complete: () => resolve({ rowCount, errors }),
+      error: reject
+    });
+  });
+}
+
+function normalizeRow(row) {
+  return {
+    category: row.category?.trim(),
+    room_name: row.room_name?.trim(),
+    item_name: row.item_name?.trim(),
+    quantity: parseFloat(row.quantity) || 0,
+    unit: row.unit?.toLowerCase().trim(),
+    unit_price: parseFloat(row.unit_price) || 0,
+    width: parseFloat(row.width) || null,
+    height: parseFloat(row.height) || null,
+    item_discount_percentage: parseFloat(row.item_discount_percentage) || 0,
+    discount_kg_charges_percentage: parseFloat(row.discount_kg_charges_percentage) || 0,
+    status: row.status?.trim() || ESTIMATION_ITEM_STATUS.QUEUED
+  };
 }
 
 export async function POST(request, { params }) {
@@ -39,221 +90,154 @@ export async function POST(request, { params }) {
       return NextResponse.json({ success: false, error: 'No file uploaded' }, { status: 400 });
     }
 
-    // Read file content
-    const buffer = await readUploadedFile(file);
-    const csvContent = buffer.toString('utf-8');
-
-    // Parse CSV
-    const parseResult = Papa.parse(csvContent, {
-      header: true,
-      skipEmptyLines: true,
-      transformHeader: (header) => header.toLowerCase().trim()
-    });
-
-    if (parseResult.errors.length > 0) {
-      return NextResponse.json({
-        success: false,
-        error: 'CSV parsing error',
-        errors: parseResult.errors
-      }, { status: 400 });
+    // Project base rates (cached, lib/config-cache.js)
+    const projectBaseRates = await getProjectBaseRates(projectId);
+    if (!projectBaseRates) {
+      return NextResponse.json({ success: false, error: 'Project not found' }, { status: 404 });
     }
 
-    const rows = parseResult.data;
+    const baseRates = {
+      category_rates: projectBaseRates.rate?.category_rates,
+      gst_percentage: projectBaseRates.rate?.gst_percentage
+    };
 
-    if (rows.length === 0) {
-      return NextResponse.json({ success: false, error: 'CSV file is empty' }, { status: 400 });
+    if (!baseRates.category_rates || !baseRates.category_rates.categories) {
+      return NextResponse.json({ success: false, error: 'Project base rates not configured' }, { status: 400 });
     }
 
-    // ===== BEGIN TRANSACTION =====
-    await query('BEGIN');
+    // 1. Stream the upload to a temporary name and validate it before a
+    //    version number is allocated. It is renamed to v{version}_upload.csv
+    //    only once the transaction commits and removed in every other case.
+    const projectDir = path.join(process.cwd(), 'uploads', 'estimations', projectId.toString());
+    if (!existsSync(projectDir)) {
+      await mkdir(projectDir, { recursive: true });
+    }
+    const tempPath = path.join(projectDir, `upload_${randomUUID()}.csv.tmp`);
+    let keepFile = false;
 
     try {
-      
-      // 2. Get project and base rates
-      const projectRes = await query(`
-        SELECT p.id, p.name, p.biz_model_id, pbr.category_rates, pbr.gst_percentage
-        FROM projects p
-        LEFT JOIN project_base_rates pbr ON p.id = pbr.project_id AND pbr.active = 'true'
-        WHERE p.id = $1
-      `, [projectId]);
+      await saveUploadedFile(file, tempPath);
 
-      if (projectRes.rows.length === 0) {
-        await query('ROLLBACK');
-        return NextResponse.json({ success: false, error: 'Project not found' }, { status: 404 });
+      // Reject malformed or empty files before touching the database
+      const scan = await scanCsv(tempPath);
+      if (scan.errors.length > 0) {
+        return NextResponse.json({ success: false, error: 'CSV parsing error', errors: scan.errors }, { status: 400 });
+      }
+      if (scan.rowCount === 0) {
+        return NextResponse.json({ success: false, error: 'CSV file is empty' }, { status: 400 });
       }
 
-      const project = projectRes.rows[0];
-      const baseRates = {
-        category_rates: project.category_rates,
-        gst_percentage: project.gst_percentage
-      };
-
-      if (!baseRates.category_rates || !baseRates.category_rates.categories) {
-        await query('ROLLBACK');
+      // One connection and a real transaction for the whole upload; an error
+      // anywhere rolls it back
+      try {
+        const outcome = await withTransaction(async (tx) => {
+          // 2. Next version number and deactivation of the current estimation,
+          //    sent back to back without awaiting each
+          const [nextVersion] = await tx.pipeline([
+            () => nextCounterValue(COUNTER.ESTIMATION_VERSION, projectId, tx),
+            () => tx(`
+              UPDATE project_estimations
+              SET is_active = false
+              WHERE project_id = $1 AND is_active = true
+            `, [projectId])
+          ]);
+
+          // 3. Create the new project_estimations record; totals are filled in
+          //    once every batch has been priced
+          const estimationRes = await tx(`
+            INSERT INTO project_estimations (
+              project_id, version, source, csv_file_path, uploaded_by,
+              is_active, status, created_at, updated_at
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())
+            RETURNING id
+          `, [
+            projectId,
+            nextVersion,
+            'csv_upload',
+            `uploads/estimations/${projectId}/v${nextVersion}_upload.csv`,
+            userId,
+            true,          // is_active
+            'draft'
+          ]);
+
+          const estimationId = estimationRes.rows[0].id;
+
+          // 4. Price and insert items in batches, accumulating category totals
+          const accumulator = createCategoryTotalsAccumulator(baseRates.category_rates.categories);
+          let batch = [];
+
+          const flush = async () => {
+            await insertEstimationItems(estimationId, batch, tx);
+            batch = [];
+          };
+
+          for await (const row of streamCsvRows(tempPath)) {
+            const itemData = normalizeRow(row);
+            const item = { ...itemData, ...calculateItemTotal(itemData, baseRates) };
+            accumulator.add(item);
+            batch.push(item);
+            if (batch.length >= ESTIMATION_ITEM_BATCH_SIZE) {
+              await flush();
+            }
+          }
+          if (batch.length > 0) {
+            await flush();
+          }
+
+          const totals = accumulator.result();
+
+          // 5. Check for overpayment
+          const { collected: totalCollected } = await projectPaymentTotals(projectId, tx);
+          const hasOverpayment = totalCollected > totals.final_value;
+          const overpaymentAmount = hasOverpayment ? totalCollected - totals.final_value : 0;
+
+          // 6. Store the totals on the estimation
+          await tx(`
+            UPDATE project_estimations
+            SET category_breakdown = $2, items_value = $3, kg_charges = $4,
+                items_discount = $5, kg_discount = $6, discount = $7, gst_amount = $8, final_value = $9,
+                has_overpayment = $10, overpayment_amount = $11
+            WHERE id = $1
+          `, [
+            estimationId,
+            JSON.stringify(totals.category_breakdown),
+            totals.items_value,
+            totals.kg_charges,
+            totals.items_discount,
+            totals.kg_discount,
+            totals.discount,
+            totals.gst_amount,
+            totals.final_value,
+            hasOverpayment,
+            overpaymentAmount
+          ]);
+
+          return {
+            success: true,
+            version: nextVersion,
+            estimation_id: estimationId,
+            items_count: accumulator.count,
+            final_value: totals.final_value
+          };
+        });
+
+        // 7. Committed: give the file its version name
+        await rename(tempPath, path.join(projectDir, `v${outcome.version}_upload.csv`));
+        keepFile = true;
+        return NextResponse.json(outcome);
+
+      } catch (error) {
+        console.error('Transaction error:', error);
         return NextResponse.json({
           success: false,
-          error: 'Project base rates not configured'
-        }, { status: 400 });
+          error: 'Failed to process upload',
+          message: error.message
+        }, { status: 500 });
       }
-
-      // 3. Get next version number
-      const versionRes = await query(`
-        SELECT COALESCE(MAX(version), 0) as max_version
-        FROM project_estimations
-        WHERE project_id = $1
-      `, [projectId]);
-      const nextVersion = versionRes.rows[0].max_version + 1;
-
-      // 4. Create uploads directory if not exists
-      const projectDir = path.join(process.cwd(), 'uploads', 'estimations', projectId.toString());
-      if (!existsSync(projectDir)) {
-        await mkdir(projectDir, { recursive: true });
+    } finally {
+      if (!keepFile) {
+        await rm(tempPath, { force: true });
       }
-
-      // 5. Save CSV file
-      const fileName = `v${nextVersion}_upload.csv`;
-      const filePath = path.join(projectDir, fileName);
-      const relativeFilePath = `uploads/estimations/${projectId}/${fileName}`;
-
-      await writeFile(filePath, csvContent);
-
-      // 6. Process and calculate items
-      const calculatedItems = [];
-      for (const row of rows) {
-        const itemData = {
-          category: row.category?.trim(),
-          room_name: row.room_name?.trim(),
-          item_name: row.item_name?.trim(),
-          quantity: parseFloat(row.quantity) || 0,
-          unit: row.unit?.toLowerCase().trim(),
-          unit_price: parseFloat(row.unit_price) || 0,
-          width: parseFloat(row.width) || null,
-          height: parseFloat(row.height) || null,
-          item_discount_percentage: parseFloat(row.item_discount_percentage) || 0,
-          discount_kg_charges_percentage: parseFloat(row.discount_kg_charges_percentage) || 0,
-          status: row.status?.trim() || ESTIMATION_ITEM_STATUS.QUEUED
-        };
-        const calculated = calculateItemTotal(itemData, baseRates);
-        calculatedItems.push({ ...itemData, ...calculated });
-      }      
-
-      // 7. Calculate totals
-      const totals = calculateCategoryTotals(calculatedItems, baseRates.category_rates.categories);
-      
-      // 8. Mark all previous versions as inactive
-      await query(`
-        UPDATE project_estimations
-        SET is_active = false
-        WHERE project_id = $1 AND is_active = true
-      `, [projectId]);
-
-      // 8.1 Check for overpayment
-      let hasOverpayment = false;
-      let overpaymentAmount = 0;
-      // Get total approved payments
-      const paymentsRes = await query(`
-            SELECT COALESCE(SUM(amount), 0) as total_collected
-            FROM customer_payments
-            WHERE project_id = $1 AND status = $2
-          `, [projectId, PAYMENT_STATUS.APPROVED]);
-
-      const totalCollected = parseFloat(paymentsRes.rows[0].total_collected || 0);
-
-      if (totalCollected > totals.final_value) {
-        hasOverpayment = true;
-        overpaymentAmount = totalCollected - totals.final_value;
-      }
-
-
-      // 9. Create new project_estimations record
-      const estimationRes = await query(`
-        INSERT INTO project_estimations (
-          project_id, version, source, csv_file_path, uploaded_by,
-          is_active, status,
-          category_breakdown, items_value, kg_charges, 
-          items_discount, kg_discount, discount, gst_amount, final_value,
-          created_at, updated_at, has_overpayment, overpayment_amount
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, NOW(), NOW(), $16, $17)
-        RETURNING id
-      `, [
-        projectId,
-        nextVersion,
-        'csv_upload',
-        relativeFilePath,
-        userId,
-        true,          // is_active
-        'draft',
-        JSON.stringify(totals.category_breakdown),
-        totals.items_value,
-        totals.kg_charges,
-        totals.items_discount,
-        totals.kg_discount,
-        totals.discount,
-        totals.gst_amount,
-        totals.final_value,
-        hasOverpayment,
-        overpaymentAmount
-      ]);
-
-      const estimationId = estimationRes.rows[0].id;
-
-      // 10. Insert estimation items
-      for (const item of calculatedItems) {
-        await query(`
-          INSERT INTO estimation_items (
-            estimation_id, category, room_name, item_name,
-            unit, width, height, quantity, unit_price, subtotal, 
-            karighar_charges_percentage, karighar_charges_amount,
-            item_discount_percentage, item_discount_amount, 
-            discount_kg_charges_percentage, discount_kg_charges_amount,
-            gst_percentage, amount_before_gst, gst_amount, item_total,
-            status, created_at, updated_at
-          ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, NOW(), NOW())
-        `, [
-          estimationId,
-          item.category,
-          item.room_name,
-          item.item_name,
-          item.unit,
-          item.width,
-          item.height,
-          item.quantity,
-          item.unit_price,
-          item.subtotal,
-          item.karighar_charges_percentage,
-          item.karighar_charges_amount,
-          item.item_discount_percentage,
-          item.item_discount_amount,
-          item.discount_kg_charges_percentage,
-          item.discount_kg_charges_amount,
-          item.gst_percentage,
-          item.amount_before_gst,
-          item.gst_amount,
-          item.item_total,
-          item.status
-        ]);
-      }
-
-      // ===== COMMIT TRANSACTION =====
-      await query('COMMIT');
-
-      return NextResponse.json({
-        success: true,
-        version: nextVersion,
-        estimation_id: estimationId,
-        items_count: calculatedItems.length,
-        final_value: totals.final_value
-      });
-
-    } catch (error) {
-      // ===== ROLLBACK ON ERROR =====
-      await query('ROLLBACK');
-      console.error('Transaction error:', error);
-      return NextResponse.json({
-        success: false,
-        error: 'Failed to process upload',
-        message: error.message
-      }, { status: 500 });
     }
 
   } catch (error) {
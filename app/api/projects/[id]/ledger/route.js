@@ -1,9 +1,12 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { LEDGER_ENTRY_TYPE } from '@/app/constants';
+import { namedQuery } from '@/lib/db';
+import { parseLimit, decodeCursor, paginate } from '@/lib/pagination';
 
+// GET /api/projects/[id]/ledger?limit=50&cursor=...
+// Latest entries first, one page at a time. running_balance is persisted on
+// project_ledger (migration 022) and next_cursor continues after the last entry.
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
   if (!session) {
@@ -14,57 +17,73 @@ export async function GET(request, { params }) {
   if(!projectId) {
     return NextResponse.json({ error: 'ProjectID is mandatory parameter' }, { status: 404 });
   }
-  const result = await query(`
-        SELECT pl.*, 
-               CASE 
-                 WHEN pl.source_table = 'customer_payments' THEN 'Customer Payment'
-                 WHEN pl.source_table = 'payments_out' THEN 'Vendor Payment'
-                 ELSE pl.source_table
-               END as transaction_type,
-               CASE
-                 WHEN pl.source_table = 'customer_payments' THEN (
-                   SELECT json_build_object(
-                     'customer_name', c.name, 
-                     'payment_type', cp.payment_type, 
+
+  const { searchParams } = new URL(request.url);
+  const limit = parseLimit(searchParams);
+
+  let cursor;
+  try {
+    cursor = decodeCursor(searchParams.get('cursor'), 2);
+  } catch (error) {
+    return NextResponse.json({ error: error.message }, { status: 400 });
+  }
+
+  try {
+    // Page first (index range scan on project_id, entry_date, id), then join
+    // the source rows for just that page
+    const result = await namedQuery('ledger_page', `
+          WITH page AS (
+            SELECT pl.*, pl.entry_date::text AS entry_date_key
+            FROM project_ledger pl
+            WHERE pl.project_id = $1
+              AND ($2::timestamptz IS NULL OR (pl.entry_date, pl.id) < ($2::timestamptz, $3::int))
+            ORDER BY pl.entry_date DESC, pl.id DESC
+            LIMIT $4
+          )
+          SELECT page.*,
+                 CASE
+                   WHEN page.source_table = 'customer_payments' THEN 'Customer Payment'
+                   WHEN page.source_table = 'payments_out' THEN 'Vendor Payment'
+                   ELSE page.source_table
+                 END as transaction_type,
+                 CASE
+                   WHEN page.source_table = 'customer_payments' THEN json_build_object(
+                     'customer_name', c.name,
+                     'payment_type', cp.payment_type,
                      'reference', cp.reference_number,
-                     'approved_by_name', u.name
+                     'approved_by_name', cu.name
                    )
-                   FROM customer_payments cp
-                   LEFT JOIN customers c ON cp.customer_id = c.id
-                   LEFT JOIN users u ON cp.approved_by = u.id
-                   WHERE cp.id = pl.source_id
-                 )
-                 WHEN pl.source_table = 'payments_out' THEN (
-                   SELECT json_build_object(
-                     'vendor_name', v.name, 
-                     'payment_stage', po.payment_stage, 
+                   WHEN page.source_table = 'payments_out' THEN json_build_object(
+                     'vendor_name', v.name,
+                     'payment_stage', po.payment_stage,
                      'reference', po.reference_number,
-                     'approved_by_name', u.name
+                     'approved_by_name', pu.name
                    )
-                   FROM payments_out po
-                   LEFT JOIN vendors v ON po.vendor_id = v.id
-                   LEFT JOIN users u ON po.created_by = u.id
-                   WHERE po.id = pl.source_id
-                 )
-               END as transaction_details
-        FROM project_ledger pl
-        WHERE pl.project_id = $1
-        ORDER BY pl.entry_date DESC, pl.id DESC
-      `, [projectId]);
+                 END as transaction_details
+          FROM page
+          LEFT JOIN customer_payments cp ON page.source_table = 'customer_payments' AND cp.id = page.source_id
+          LEFT JOIN customers c ON cp.customer_id = c.id
+          LEFT JOIN users cu ON cp.approved_by = cu.id
+          LEFT JOIN payments_out po ON page.source_table = 'payments_out' AND po.id = page.source_id
+          LEFT JOIN vendors v ON po.vendor_id = v.id
+          LEFT JOIN users pu ON po.created_by = pu.id
+          ORDER BY page.entry_date DESC, page.id DESC
+        `, [projectId, cursor?.[0] ?? null, cursor?.[1] ?? null, limit + 1]);
+
+    const { rows, next_cursor, has_more } = paginate(
+      result.rows,
+      limit,
+      entry => [entry.entry_date_key, entry.id]
+    );
 
-  // Calculate running balance
-  let runningBalance = 0;
-  const ledgerWithBalance = result.rows.map(entry => {
-    if (entry.entry_type === LEDGER_ENTRY_TYPE.CREDIT) {
-      runningBalance += parseFloat(entry.amount);
-    } else {
-      runningBalance -= parseFloat(entry.amount);
-    }
-    return {
+    const ledger = rows.map(({ entry_date_key, ...entry }) => ({
       ...entry,
-      running_balance: runningBalance
-    };
-  }).reverse(); // Reverse to show chronological order with running balance
+      running_balance: parseFloat(entry.running_balance)
+    }));
 
-  return NextResponse.json({ ledger: ledgerWithBalance.reverse() }); // Reverse back for latest first
-}
\ No newline at end of file
+    return NextResponse.json({ ledger, next_cursor, has_more });
+  } catch (error) {
+    console.error('API Error:', error);
+    return NextResponse.json({ error: error.message }, { status: 500 });
+  }
+}
@@ -1,7 +1,7 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { withTransaction } from '@/lib/db';
 import { USER_ROLE } from '@/app/constants';
 import { createNewPRVersion, canEditItem } from '@/lib/versioning-utils';
 
@@ -23,100 +23,94 @@ export async function PUT(request, { params }) {
   const body = await request.json();
 
   try {
-    await query('BEGIN');
+    return await withTransaction(async (tx) => {
+      // 1. Verify PR exists
+      const prCheck = await tx(`
+        SELECT id FROM purchase_requests
+        WHERE id = $1 AND project_id = $2
+      `, [prId, projectId]);
+
+      if (prCheck.rows.length === 0) {
+        return NextResponse.json({
+          error: 'Purchase request not found'
+        }, { status: 404 });
+      }
+
+      // 2. Validate that all items being edited are in 'pending' status
+      const itemsToEdit = body.items || [];
+      
+      if (itemsToEdit.length === 0) {
+        return NextResponse.json({
+          error: 'No items provided for editing'
+        }, { status: 400 });
+      }
+
+      // Get stable_item_ids from request
+      const stableItemIds = itemsToEdit.map(item => item.stable_item_id).filter(Boolean);
+      
+      if (stableItemIds.length === 0) {
+        return NextResponse.json({
+          error: 'Invalid items: missing stable_item_id'
+        }, { status: 400 });
+      }
+
+      // Check lifecycle status for all items
+      const statusCheck = await tx(`
+        SELECT stable_item_id, lifecycle_status
+        FROM purchase_request_items
+        WHERE stable_item_id = ANY($1::uuid[])
+        AND purchase_request_id = $2
+      `, [stableItemIds, prId]);
+
+      const nonEditableItems = statusCheck.rows.filter(
+        item => !canEditItem(item.lifecycle_status)
+      );
+
+      if (nonEditableItems.length > 0) {
+        return NextResponse.json({
+          error: `Cannot edit items with lifecycle status other than 'pending'`,
+          non_editable_items: nonEditableItems.map(i => ({
+            stable_item_id: i.stable_item_id,
+            lifecycle_status: i.lifecycle_status
+          }))
+        }, { status: 400 });
+      }
+
+      // 3. Create new version with updated items
+      const newVersion = await createNewPRVersion(
+        prId,
+        itemsToEdit,
+        session.user.id,
+        body.change_summary || `Edited ${itemsToEdit.length} item(s)`,
+        tx
+      );
+
+      // 4. Update PR header if provided
+      if (body.vendor_id || body.expected_delivery_date || body.notes) {
+        await tx(`
+          UPDATE purchase_requests
+          SET 
+            vendor_id = COALESCE($1, vendor_id),
+            expected_delivery_date = COALESCE($2, expected_delivery_date),
+            notes = COALESCE($3, notes),
+            updated_at = NOW()
+          WHERE id = $4
+        `, [
+          body.vendor_id || null,
+          body.expected_delivery_date || null,
+          body.notes || null,
+          prId
+        ]);
+      }
 
-    // 1. Verify PR exists
-    const prCheck = await query(`
-      SELECT id FROM purchase_requests
-      WHERE id = $1 AND project_id = $2
-    `, [prId, projectId]);
-
-    if (prCheck.rows.length === 0) {
-      await query('ROLLBACK');
-      return NextResponse.json({
-        error: 'Purchase request not found'
-      }, { status: 404 });
-    }
-
-    // 2. Validate that all items being edited are in 'pending' status
-    const itemsToEdit = body.items || [];
-    
-    if (itemsToEdit.length === 0) {
-      await query('ROLLBACK');
-      return NextResponse.json({
-        error: 'No items provided for editing'
-      }, { status: 400 });
-    }
-
-    // Get stable_item_ids from request
-    const stableItemIds = itemsToEdit.map(item => item.stable_item_id).filter(Boolean);
-    
-    if (stableItemIds.length === 0) {
-      await query('ROLLBACK');
-      return NextResponse.json({
-        error: 'Invalid items: missing stable_item_id'
-      }, { status: 400 });
-    }
-
-    // Check lifecycle status for all items
-    const statusCheck = await query(`
-      SELECT stable_item_id, lifecycle_status
-      FROM purchase_request_items
-      WHERE stable_item_id = ANY($1::uuid[])
-      AND purchase_request_id = $2
-    `, [stableItemIds, prId]);
-
-    const nonEditableItems = statusCheck.rows.filter(
-      item => !canEditItem(item.lifecycle_status)
-    );
-
-    if (nonEditableItems.length > 0) {
-      await query('ROLLBACK');
       return NextResponse.json({
-        error: `Cannot edit items with lifecycle status other than 'pending'`,
-        non_editable_items: nonEditableItems.map(i => ({
-          stable_item_id: i.stable_item_id,
-          lifecycle_status: i.lifecycle_status
-        }))
-      }, { status: 400 });
-    }
-
-    // 3. Create new version with updated items
-    const newVersion = await createNewPRVersion(
-      prId,
-      itemsToEdit,
-      session.user.id,
-      body.change_summary || `Edited ${itemsToEdit.length} item(s)`
-    );
-
-    // 4. Update PR header if provided
-    if (body.vendor_id || body.expected_delivery_date || body.notes) {
-      await query(`
-        UPDATE purchase_requests
-        SET 
-          vendor_id = COALESCE($1, vendor_id),
-          expected_delivery_date = COALESCE($2, expected_delivery_date),
-          notes = COALESCE($3, notes),
-          updated_at = NOW()
-        WHERE id = $4
-      `, [
-        body.vendor_id || null,
-        body.expected_delivery_date || null,
-        body.notes || null,
-        prId
-      ]);
-    }
-
-    await query('COMMIT');
-
-    return NextResponse.json({
-      success: true,
-      message: `Purchase request updated successfully`,
-      version: newVersion
+        success: true,
+        message: `Purchase request updated successfully`,
+        version: newVersion
+      });
     });
 
   } catch (error) {
-    await query('ROLLBACK');
     console.error('Error editing purchase request:', error);
     return NextResponse.json({
       error: 'Failed to edit purchase request',
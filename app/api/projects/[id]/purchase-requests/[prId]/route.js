@@ -1,8 +1,8 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-import { USER_ROLE } from '@/app/constants';
+import { query, withTransaction } from '@/lib/db';
+import { PURCHASE_REQUEST_STATUS, USER_ROLE } from '@/app/constants';
 
 // GET /api/projects/[id]/purchase-requests/[prId] - Get PR details with links
 export async function GET(request, { params }) {
@@ -112,42 +112,38 @@ export async function DELETE(request, { params }) {
   const { id: projectId, prId } = params;
 
   try {
-    await query('BEGIN');
-
-    // Check if PR exists
-    const prCheck = await query(`
-      SELECT id, status FROM purchase_requests
-      WHERE id = $1 AND project_id = $2
-    `, [prId, projectId]);
-
-    if (prCheck.rows.length === 0) {
-      await query('ROLLBACK');
-      return NextResponse.json({ error: 'Purchase request not found' }, { status: 404 });
-    }
-
-    // Update status to cancelled
-    await query(`
-      UPDATE purchase_requests
-      SET status = $1, updated_at = NOW()
-      WHERE id = $2
-    `, [PURCHASE_REQUEST_STATUS.CANCELLED, prId]);
-
-    // Also mark all items as cancelled
-    await query(`
-      UPDATE purchase_request_items
-      SET status = $1, updated_at = NOW()
-      WHERE purchase_request_id = $2
-    `, [PURCHASE_REQUEST_STATUS.CANCELLED, prId]);
-
-    await query('COMMIT');
-
-    return NextResponse.json({
-      success: true,
-      message: 'Purchase request cancelled successfully'
+    return await withTransaction(async (tx) => {
+      // Check if PR exists
+      const prCheck = await tx(`
+        SELECT id, status FROM purchase_requests
+        WHERE id = $1 AND project_id = $2
+      `, [prId, projectId]);
+
+      if (prCheck.rows.length === 0) {
+        return NextResponse.json({ error: 'Purchase request not found' }, { status: 404 });
+      }
+
+      // Update status to cancelled
+      await tx(`
+        UPDATE purchase_requests
+        SET status = $1, updated_at = NOW()
+        WHERE id = $2
+      `, [PURCHASE_REQUEST_STATUS.CANCELLED, prId]);
+
+      // Also mark all items as cancelled
+      await tx(`
+        UPDATE purchase_request_items
+        SET status = $1, updated_at = NOW()
+        WHERE purchase_request_id = $2
+      `, [PURCHASE_REQUEST_STATUS.CANCELLED, prId]);
+
+      return NextResponse.json({
+        success: true,
+        message: 'Purchase request cancelled successfully'
+      });
     });
 
   } catch (error) {
-    await query('ROLLBACK');
     console.error('Error deleting purchase request:', error);
     return NextResponse.json({
       error: 'Failed to delete purchase request',
@@ -1,10 +1,10 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { namedQuery } from '@/lib/db';
 
 // GET /api/projects/[id]/purchase-requests/available-items
-// Returns estimation items with fulfillment calculation via junction table
+// Returns estimation items with their maintained fulfillment quantities
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
   if (!session) {
@@ -15,7 +15,7 @@ export async function GET(request, { params }) {
 
   try {
     // Get active estimation for project
-    const estimationResult = await query(`
+    const estimationResult = await namedQuery('active_estimation_id', `
       SELECT id FROM project_estimations
       WHERE project_id = $1 AND is_active = true
       LIMIT 1
@@ -30,9 +30,9 @@ export async function GET(request, { params }) {
 
     const estimationId = estimationResult.rows[0].id;
 
-    // Calculate fulfilled quantity using junction table with weightage
-    // Separate confirmed and draft allocations
-    const items = await query(`
+    // Fulfilled quantities are maintained in estimation_item_fulfillment
+    // (migration 021); items without a row yet count as unfulfilled
+    const items = await namedQuery('available_items', `
       SELECT 
         ei.id,
         ei.category,
@@ -42,41 +42,13 @@ export async function GET(request, { params }) {
         ei.unit,
         ei.width,
         ei.height,
-        COALESCE(
-          SUM(
-            prel.linked_qty * prel.unit_purchase_request_item_weightage
-          ) FILTER (
-            WHERE pr.status = 'confirmed'
-          ), 
-          0
-        ) as confirmed_qty,
-        COALESCE(
-          SUM(
-            prel.linked_qty * prel.unit_purchase_request_item_weightage
-          ) FILTER (
-            WHERE pr.status = 'draft'
-          ), 
-          0
-        ) as draft_qty,
-        (
-          ei.quantity - COALESCE(
-            SUM(
-              prel.linked_qty * prel.unit_purchase_request_item_weightage
-            ) FILTER (
-              WHERE pr.status = 'confirmed'
-            ), 
-            0
-          )
-        ) as available_qty
+        COALESCE(eif.confirmed_qty, 0) as confirmed_qty,
+        COALESCE(eif.draft_qty, 0) as draft_qty,
+        COALESCE(eif.available_qty, ei.quantity) as available_qty
       FROM estimation_items ei
-      LEFT JOIN purchase_request_estimation_links prel 
-        ON ei.id = prel.estimation_item_id
-      LEFT JOIN purchase_request_items pri 
-        ON prel.purchase_request_item_id = pri.id
-      LEFT JOIN purchase_requests pr 
-        ON pri.purchase_request_id = pr.id
+      LEFT JOIN estimation_item_fulfillment eif 
+        ON eif.estimation_item_id = ei.id
       WHERE ei.estimation_id = $1
-      GROUP BY ei.id
       ORDER BY ei.category, ei.room_name, ei.item_name
     `, [estimationId]);
 
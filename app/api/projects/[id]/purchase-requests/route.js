@@ -1,9 +1,10 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
+import { query, withTransaction } from '@/lib/db';
 import { USER_ROLE } from '@/app/constants';
 import { calculateItemPricing, calculatePRTotals } from '@/lib/pricing-utils';
+import { nextCounterValue, COUNTER } from '@/lib/counters';
 
 // GET /api/projects/[id]/purchase-requests - List all purchase requests
 export async function GET(request, { params }) {
@@ -90,177 +91,173 @@ export async function POST(request, { params }) {
   const mode = body.mode || 'full_unit'; // 'full_unit', 'component', or 'direct'
 
   try {
-    await query('BEGIN');
+    return await withTransaction(async (tx) => {
+      // 1. Fetch GST percentage from active project_base_rates
+      const baseRateResult = await tx(`
+        SELECT gst_percentage FROM project_base_rates 
+        WHERE project_id = $1 AND active = true
+        LIMIT 1
+      `, [projectId]);
 
-    // 1. Fetch GST percentage from active project_base_rates
-    const baseRateResult = await query(`
-      SELECT gst_percentage FROM project_base_rates 
-      WHERE project_id = $1 AND active = true
-      LIMIT 1
-    `, [projectId]);
-    
-    const gstPercentage = baseRateResult.rows[0]?.gst_percentage || 0;
+      const gstPercentage = baseRateResult.rows[0]?.gst_percentage || 0;
 
-    // 2. Validate estimation exists (skip for direct mode)
-    if (mode !== 'direct') {
-      const estimationCheck = await query(`
-        SELECT id FROM project_estimations
-        WHERE id = $1 AND project_id = $2 AND is_active = true
-      `, [body.estimation_id, projectId]);
+      // 2. Validate estimation exists (skip for direct mode)
+      if (mode !== 'direct') {
+        const estimationCheck = await tx(`
+          SELECT id FROM project_estimations
+          WHERE id = $1 AND project_id = $2 AND is_active = true
+        `, [body.estimation_id, projectId]);
 
-      if (estimationCheck.rows.length === 0) {
-        await query('ROLLBACK');
-        return NextResponse.json({
-          error: 'Active estimation not found'
-        }, { status: 404 });
+        if (estimationCheck.rows.length === 0) {
+          return NextResponse.json({
+            error: 'Active estimation not found'
+          }, { status: 404 });
+        }
       }
-    }
 
-    // 3. Generate PR number
-    const prNumberResult = await query(`
-      SELECT COALESCE(MAX(CAST(SUBSTRING(pr_number FROM 'PR-${projectId}-(\\d+)') AS INTEGER)), 0) + 1 as next_seq
-      FROM purchase_requests
-      WHERE project_id = $1
-    `, [projectId]);
-    const nextSeq = prNumberResult.rows[0].next_seq;
-    const prNumber = `PR-${projectId}-${String(nextSeq).padStart(3, '0')}`;
+      // 3. Generate PR number
+      const nextSeq = await nextCounterValue(COUNTER.PR_NUMBER, projectId, tx);
+      const prNumber = `PR-${projectId}-${String(nextSeq).padStart(3, '0')}`;
 
-    // 4. Create purchase request (will update totals after items are created)
-    const status = body.status || 'draft'; // Default to draft
-    const prResult = await query(`
-      INSERT INTO purchase_requests (
-        pr_number, project_id, estimation_id, vendor_id, 
-        status, created_by, expected_delivery_date, notes,
-        created_at
-      ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
-      RETURNING id, pr_number
-    `, [
-      prNumber,
-      projectId,
-      mode === 'direct' ? null : body.estimation_id, // NULL for direct mode
-      body.vendor_id || null,
-      status,
-      session.user.id,
-      body.expected_delivery_date || null,
-      body.notes || null
-    ]);
+      // 4. Create purchase request (will update totals after items are created)
+      const status = body.status || 'draft'; // Default to draft
+      const prResult = await tx(`
+        INSERT INTO purchase_requests (
+          pr_number, project_id, estimation_id, vendor_id, 
+          status, created_by, expected_delivery_date, notes,
+          created_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
+        RETURNING id, pr_number
+      `, [
+        prNumber,
+        projectId,
+        mode === 'direct' ? null : body.estimation_id, // NULL for direct mode
+        body.vendor_id || null,
+        status,
+        session.user.id,
+        body.expected_delivery_date || null,
+        body.notes || null
+      ]);
 
-    const purchaseRequestId = prResult.rows[0].id;
+      const purchaseRequestId = prResult.rows[0].id;
 
-    // 5. Create purchase request items and links
-    const createdItems = []; // Track items for PR totals calculation
-    
-    if (mode === 'direct') {
-      // Direct mode: Create items without estimation links
-      for (const item of body.items) {
-        // Calculate pricing
-        const pricing = calculateItemPricing(
-          item.quantity,
-          item.unit_price,
-          gstPercentage
-        );
-        
-        await query(`
-          INSERT INTO purchase_request_items (
-            purchase_request_id, 
-            purchase_request_item_name,
-            category,
-            room_name,
-            quantity,
-            width,
-            height,
-            unit,
-            unit_price,
-            subtotal,
-            gst_percentage,
-            gst_amount,
-            amount_before_gst,
-            item_total,
-            is_direct_purchase,
-            version,
-            lifecycle_status,
+      // Items below are created at version 1; start the PR's version counter there
+      await nextCounterValue(COUNTER.PR_VERSION, purchaseRequestId, tx);
+
+      // 5. Create purchase request items and links
+      const createdItems = []; // Track items for PR totals calculation
+
+      if (mode === 'direct') {
+        // Direct mode: Create items without estimation links
+        // The inserts don't depend on each other: sent back to back
+        await tx.pipeline(body.items.map(item => {
+          // Calculate pricing
+          const pricing = calculateItemPricing(
+            item.quantity,
+            item.unit_price,
+            gstPercentage
+          );
+
+          createdItems.push(pricing);
+
+          return () => tx(`
+            INSERT INTO purchase_request_items (
+              purchase_request_id, 
+              purchase_request_item_name,
+              category,
+              room_name,
+              quantity,
+              width,
+              height,
+              unit,
+              unit_price,
+              subtotal,
+              gst_percentage,
+              gst_amount,
+              amount_before_gst,
+              item_total,
+              is_direct_purchase,
+              version,
+              lifecycle_status,
+              status,
+              created_at,
+              created_by
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, true, 1, 'pending', $15, NOW(), $16)
+          `, [
+            purchaseRequestId,
+            item.name,
+            item.category,
+            item.room_name || null,
+            item.quantity,
+            item.width || null,
+            item.height || null,
+            item.unit,
+            item.unit_price || null,
+            pricing.subtotal,
+            pricing.gst_percentage,
+            pricing.gst_amount,
+            pricing.amount_before_gst,
+            pricing.item_total,
             status,
-            created_at,
-            created_by
-          ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, true, 1, 'pending', $15, NOW(), $16)
-        `, [
-          purchaseRequestId,
-          item.name,
-          item.category,
-          item.room_name || null,
-          item.quantity,
-          item.width || null,
-          item.height || null,
-          item.unit,
-          item.unit_price || null,
-          pricing.subtotal,
-          pricing.gst_percentage,
-          pricing.gst_amount,
-          pricing.amount_before_gst,
-          pricing.item_total,
-          status,
-          session.user.id
-        ]);
-        
-        createdItems.push(pricing);
-      }
-    } else {
-      // Full unit / Component mode: Create items with estimation links
-      for (const item of body.items) {
-        // Calculate pricing
-        const pricing = calculateItemPricing(
-          item.quantity,
-          item.unit_price,
-          gstPercentage
-        );
-        
-        // Insert PR item
-        const prItemResult = await query(`
-          INSERT INTO purchase_request_items (
-            purchase_request_id, 
-            purchase_request_item_name, 
-            quantity,
-            width,
-            height,
-            unit,
-            unit_price,
-            subtotal,
-            gst_percentage,
-            gst_amount,
-            amount_before_gst,
-            item_total,
-            is_direct_purchase,
-            version,
-            lifecycle_status,
+            session.user.id
+          ]);
+        }));
+      } else {
+        // Full unit / Component mode: Create items with estimation links
+        for (const item of body.items) {
+          // Calculate pricing
+          const pricing = calculateItemPricing(
+            item.quantity,
+            item.unit_price,
+            gstPercentage
+          );
+
+          // Insert PR item
+          const prItemResult = await tx(`
+            INSERT INTO purchase_request_items (
+              purchase_request_id, 
+              purchase_request_item_name, 
+              quantity,
+              width,
+              height,
+              unit,
+              unit_price,
+              subtotal,
+              gst_percentage,
+              gst_amount,
+              amount_before_gst,
+              item_total,
+              is_direct_purchase,
+              version,
+              lifecycle_status,
+              status,
+              created_at,
+              created_by
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, false, 1, 'pending', $13, NOW(), $14)
+            RETURNING id, stable_item_id
+          `, [
+            purchaseRequestId,
+            item.name,
+            item.quantity,
+            item.width || null,
+            item.height || null,
+            item.unit,
+            item.unit_price || null,
+            pricing.subtotal,
+            pricing.gst_percentage,
+            pricing.gst_amount,
+            pricing.amount_before_gst,
+            pricing.item_total,
             status,
-            created_at,
-            created_by
-          ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, false, 1, 'pending', $13, NOW(), $14)
-          RETURNING id, stable_item_id
-        `, [
-          purchaseRequestId,
-          item.name,
-          item.quantity,
-          item.width || null,
-          item.height || null,
-          item.unit,
-          item.unit_price || null,
-          pricing.subtotal,
-          pricing.gst_percentage,
-          pricing.gst_amount,
-          pricing.amount_before_gst,
-          pricing.item_total,
-          status,
-          session.user.id
-        ]);
+            session.user.id
+          ]);
 
-        const prItemId = prItemResult.rows[0].id;
-        const stableItemId = prItemResult.rows[0].stable_item_id;
-        createdItems.push(pricing);
+          const prItemId = prItemResult.rows[0].id;
+          const stableItemId = prItemResult.rows[0].stable_item_id;
+          createdItems.push(pricing);
 
-        // Insert estimation links
-        for (const link of item.links) {
-          await query(`
+          // Insert estimation links
+          await tx.pipeline(item.links.map(link => () => tx(`
             INSERT INTO purchase_request_estimation_links (
               estimation_item_id,
               purchase_request_item_id,
@@ -279,33 +276,30 @@ export async function POST(request, { params }) {
             link.linked_qty,
             link.weightage,
             link.notes || null
-          ]);
+          ])));
         }
       }
-    }
-
-    // 6. Calculate and update PR totals
-    const prTotals = calculatePRTotals(createdItems);
-    await query(`
-      UPDATE purchase_requests
-      SET items_value = $1, gst_amount = $2, final_value = $3
-      WHERE id = $4
-    `, [prTotals.items_value, prTotals.gst_amount, prTotals.final_value, purchaseRequestId]);
 
-    await query('COMMIT');
+      // 6. Calculate and update PR totals
+      const prTotals = calculatePRTotals(createdItems);
+      await tx(`
+        UPDATE purchase_requests
+        SET items_value = $1, gst_amount = $2, final_value = $3
+        WHERE id = $4
+      `, [prTotals.items_value, prTotals.gst_amount, prTotals.final_value, purchaseRequestId]);
 
-    return NextResponse.json({
-      success: true,
-      purchase_request: {
-        id: purchaseRequestId,
-        pr_number: prNumber,
-        status: status,
-        items_count: body.items.length
-      }
+      return NextResponse.json({
+        success: true,
+        purchase_request: {
+          id: purchaseRequestId,
+          pr_number: prNumber,
+          status: status,
+          items_count: body.items.length
+        }
+      });
     });
 
   } catch (error) {
-    await query('ROLLBACK');
     console.error('Error creating purchase request:', error);
     return NextResponse.json({
       error: 'Failed to create purchase request',
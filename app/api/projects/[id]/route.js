@@ -2,7 +2,7 @@ import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
 import { query } from '@/lib/db';
-import { PAYMENT_STATUS } from '@/app/constants';
+import { projectPaymentTotals } from '@/lib/payment-totals';
 
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
@@ -34,11 +34,7 @@ export async function GET(request, { params }) {
         `, [projectId]);
 
   // Get payment summary (only approved payments)
-  const paymentsIn = await query(`
-          SELECT COALESCE(SUM(amount), 0) as total
-          FROM customer_payments
-          WHERE project_id = $1 AND status = $2
-        `, [projectId, PAYMENT_STATUS.APPROVED]);
+  const paymentTotals = await projectPaymentTotals(projectId);
 
   const paymentsOut = await query(`
           SELECT COALESCE(SUM(amount), 0) as total
@@ -49,7 +45,7 @@ export async function GET(request, { params }) {
   return NextResponse.json({
     project: result.rows[0],
     estimation: estResult.rows[0] || null,
-    payments_received: parseFloat(paymentsIn.rows[0]?.total || 0),
+    payments_received: paymentTotals.collected,
     payments_made: parseFloat(paymentsOut.rows[0]?.total || 0),
   });
 }
@@ -1,8 +1,23 @@
 import { getServerSession } from 'next-auth';
 import { NextResponse } from 'next/server';
 import { authOptions } from '@/lib/auth-options';
-import { query } from '@/lib/db';
-
+import { query, withTransaction } from '@/lib/db';
+import { parseLimit, decodeCursor, paginate } from '@/lib/pagination';
+import { invalidateProjectBaseRates } from '@/lib/config-cache';
+
+// Ids of projects whose code, location or customer name contains the filter.
+// Each branch is served by a trigram index (migration 024).
+const projectMatchSql = (param) => `
+  SELECT id FROM projects WHERE project_code ILIKE ${param} OR location ILIKE ${param}
+  UNION
+  SELECT mp.id FROM projects mp JOIN customers mc ON mp.customer_id = mc.id WHERE mc.name ILIKE ${param}
+`;
+
+// Below this many rows an exact COUNT(*) is cheap enough
+const EXACT_COUNT_THRESHOLD = 10000;
+
+// GET /api/projects?limit=20&cursor=...&filter=...   -> { projects, next_cursor, has_more }
+// GET /api/projects?output=count&filter=...          -> { total_records, estimated }
 export async function GET(request, { params }) {
   const session = await getServerSession(authOptions);
   if (!session) {
@@ -10,41 +25,71 @@ export async function GET(request, { params }) {
   }
 
   const { searchParams } = new URL(request.url);
-  const pageNo = Number(searchParams.get("page_no") || 1);
-  const pageSize = Number(searchParams.get("page_size") || 20);
-  const offset = (pageNo - 1) * pageSize;
-
   const filter = searchParams.get("filter")?.trim() || "";
   const filterValue = `%${filter}%`;
 
+  if (searchParams.get("output") === "count") {
+    return NextResponse.json(await countProjects(filter, filterValue));
+  }
+
+  const limit = parseLimit(searchParams, 20);
+
+  let cursor;
+  try {
+    cursor = decodeCursor(searchParams.get("cursor"), 2);
+  } catch (error) {
+    return NextResponse.json({ error: error.message }, { status: 400 });
+  }
 
+  const values = [cursor?.[0] ?? null, cursor?.[1] ?? null, limit + 1];
+  if (filter) {
+    values.push(filterValue);
+  }
   const result = await query(`
           SELECT 
             p.*,
+            p.created_at::text AS created_at_key,
             c.name AS customer_name,
             u.name AS created_by_name,
-            e.final_value,
-            COUNT(*) OVER() AS total_records
+            e.final_value
           FROM projects p
           LEFT JOIN customers c ON p.customer_id = c.id
           LEFT JOIN users u ON p.created_by = u.id
-          LEFT JOIN LATERAL (
-            SELECT final_value
-            FROM project_estimations 
-            WHERE project_id = p.id 
-            ORDER BY created_at DESC 
-            LIMIT 1
-          ) e ON TRUE 
-           WHERE 
-          ($3 = '' OR 
-            p.project_code ILIKE $4 OR 
-            c.name ILIKE $4 OR 
-            p.location ILIKE $4
-          )
-          ORDER BY p.created_at DESC
-          LIMIT $1 OFFSET $2
-        `, [pageSize, offset,filter, filterValue]);
-  return NextResponse.json({ projects: result.rows });
+          LEFT JOIN project_estimations e ON e.id = p.current_estimation_id
+          WHERE ($1::timestamptz IS NULL OR (p.created_at, p.id) < ($1::timestamptz, $2::int))
+          ${filter ? `AND p.id IN (${projectMatchSql('$4')})` : ''}
+          ORDER BY p.created_at DESC, p.id DESC
+          LIMIT $3
+        `, values);
+
+  const { rows, next_cursor, has_more } = paginate(
+    result.rows,
+    limit,
+    project => [project.created_at_key, project.id]
+  );
+
+  return NextResponse.json({
+    projects: rows.map(({ created_at_key, ...project }) => project),
+    next_cursor,
+    has_more
+  });
+}
+
+async function countProjects(filter, filterValue) {
+  if (!filter) {
+    const estimate = await query(`
+      SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = 'projects'::regclass
+    `);
+    const estimated = parseInt(estimate.rows[0]?.estimate ?? -1);
+    if (estimated >= EXACT_COUNT_THRESHOLD) {
+      return { total_records: estimated, estimated: true };
+    }
+    const exact = await query(`SELECT COUNT(*) AS total FROM projects`);
+    return { total_records: parseInt(exact.rows[0].total), estimated: false };
+  }
+
+  const exact = await query(`SELECT COUNT(*) AS total FROM (${projectMatchSql('$1')}) m`, [filterValue]);
+  return { total_records: parseInt(exact.rows[0].total), estimated: false };
 }
 
 export async function POST(request) {
@@ -90,70 +135,69 @@ export async function POST(request) {
   const initialStage = stageRes.rows[0].stage_code;
 
   try {
-    // Start transaction
-    await query('BEGIN');
-
-    // Step 1: Create project (without base_rate_id initially)
-    const projectResult = await query(
-      `INSERT INTO projects (project_code, customer_id, name, location, stage, biz_model_id, sales_order_id, created_by)
-       VALUES ($1, $2, $3, $4, $5, $6, $7, $8) RETURNING *`,
-      [projectCode, body.customer_id, body.name, body.location, initialStage, bizModelId, salesOrderId, session.user.id]
-    );
-
-    const newProject = projectResult.rows[0];
-
-    // Step 2: Fetch biz_model rates (category_rates JSONB)
-    const bizModelResult = await query(
-      `SELECT category_rates, gst_percentage FROM biz_models WHERE id = $1`,
-      [bizModelId]
-    );
-
-    if (bizModelResult.rows.length === 0) {
-      throw new Error('Business model not found');
-    }
-
-    const bizModel = bizModelResult.rows[0];
-
-    // Step 3: Create base_rate entry (approved and active) with category_rates
-    const baseRateResult = await query(
-      `INSERT INTO project_base_rates (
-        project_id,
-        category_rates,
-        gst_percentage,
-        status,
-        active,
-        created_by,
-        approved_by,
-        approved_at
-      ) VALUES ($1, $2, $3, $4, $5, $6, $7, now()) RETURNING id`,
-      [
-        newProject.id,
-        bizModel.category_rates,
-        bizModel.gst_percentage,
-        'approved',
-        true,
-        session.user.id,
-        session.user.id
-      ]
-    );
-
-    const baseRateId = baseRateResult.rows[0].id;
-
-    // Step 4: Update project with base_rate_id
-    await query(
-      'UPDATE projects SET base_rate_id = $1 WHERE id = $2',
-      [baseRateId, newProject.id]
-    );
-
-    // Step 5: Log activity
-    await query(
-      `INSERT INTO activity_logs (project_id, related_entity, actor_id, action, comment)
-       VALUES ($1, $2, $3, $4, $5)`,
-      [newProject.id, 'projects', session.user.id, 'created', `Project created: ${body.name}`]
-    );
-
-    // Commit transaction
-    await query('COMMIT');
+    const newProject = await withTransaction(async (tx) => {
+      // Step 1: Create project (without base_rate_id initially)
+      const projectResult = await tx(
+        `INSERT INTO projects (project_code, customer_id, name, location, stage, biz_model_id, sales_order_id, created_by)
+         VALUES ($1, $2, $3, $4, $5, $6, $7, $8) RETURNING *`,
+        [projectCode, body.customer_id, body.name, body.location, initialStage, bizModelId, salesOrderId, session.user.id]
+      );
+
+      const newProject = projectResult.rows[0];
+
+      // Step 2: Fetch biz_model rates (category_rates JSONB)
+      const bizModelResult = await tx(
+        `SELECT category_rates, gst_percentage FROM biz_models WHERE id = $1`,
+        [bizModelId]
+      );
+
+      if (bizModelResult.rows.length === 0) {
+        throw new Error('Business model not found');
+      }
+
+      const bizModel = bizModelResult.rows[0];
+
+      // Step 3: Create base_rate entry (approved and active) with category_rates
+      const baseRateResult = await tx(
+        `INSERT INTO project_base_rates (
+          project_id,
+          category_rates,
+          gst_percentage,
+          status,
+          active,
+          created_by,
+          approved_by,
+          approved_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, now()) RETURNING id`,
+        [
+          newProject.id,
+          bizModel.category_rates,
+          bizModel.gst_percentage,
+          'approved',
+          true,
+          session.user.id,
+          session.user.id
+        ]
+      );
+
+      const baseRateId = baseRateResult.rows[0].id;
+
+      // Step 4: Update project with base_rate_id
+      await tx(
+        'UPDATE projects SET base_rate_id = $1 WHERE id = $2',
+        [baseRateId, newProject.id]
+      );
+
+      // Step 5: Log activity
+      await tx(
+        `INSERT INTO activity_logs (project_id, related_entity, actor_id, action, comment)
+         VALUES ($1, $2, $3, $4, $5)`,
+        [newProject.id, 'projects', session.user.id, 'created', `Project created: ${body.name}`]
+      );
+
+      return newProject;
+    });
+    invalidateProjectBaseRates(newProject.id);
 
     // Return project with base_rate_id
     const finalProjectResult = await query(
@@ -163,8 +207,6 @@ export async function POST(request) {
 
     return NextResponse.json({ project: finalProjectResult.rows[0] });
   } catch (error) {
-    // Rollback on error
-    await query('ROLLBACK');
     console.error('Error creating project:', error);
     return NextResponse.json(
       { error: 'Failed to create project: ' + error.message },
@@ -2,6 +2,7 @@
 
 import { useProjectData } from '@/app/context/ProjectDataContext';
 import { Badge } from '@/components/ui/badge';
+import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { LEDGER_ENTRY_TYPE, PROJECT_STAGES } from '@/app/constants';
 import { formatCurrency, formatDate } from '@/lib/utils';
@@ -22,6 +23,8 @@ export default function ProjectLedgerPage() {
   
   const [ledger, setLedger] = useState([]);
   const [ledgerLoading, setLedgerLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { project, loading } = useProjectData();
 
   useEffect(() => {
@@ -41,6 +44,7 @@ export default function ProjectLedgerPage() {
       if (ledgerRes.ok) {
         const data = await ledgerRes.json();
         setLedger(data.ledger);
+        setNextCursor(data.next_cursor);
       }
     } catch (error) {
       console.error('Error fetching project legder data:', error);
@@ -50,6 +54,23 @@ export default function ProjectLedgerPage() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await fetch(`/api/projects/${projectId}/ledger?cursor=${encodeURIComponent(nextCursor)}`);
+      if (res.ok) {
+        const data = await res.json();
+        setLedger(prev => [...prev, ...data.ledger]);
+        setNextCursor(data.next_cursor);
+      }
+    } catch (error) {
+      console.error('Error fetching project legder data:', error);
+      toast.error('Failed to load project ledger data');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
 
   if (status === 'loading' || loading || ledgerLoading) {
     return (
@@ -122,6 +143,13 @@ export default function ProjectLedgerPage() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="flex justify-center pt-2">
+                <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </CardContent>
@@ -15,7 +15,6 @@ import {
   Filter
 } from 'lucide-react';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
-import KGPagination from '@/components/kg-pagination';
 
 export default function ProjectsPage() {
   const { data: session, status } = useSession();
@@ -25,9 +24,12 @@ export default function ProjectsPage() {
   const [searchTerm, setSearchTerm] = useState('');
   const [loading, setLoading] = useState(true);
 
-  const [pageNo, setPageNo] = useState(1);
   const [pageSize, setPageSize] = useState(20);
   const [totalRecords, setTotalRecords] = useState(0);
+  const [countEstimated, setCountEstimated] = useState(false);
+  // cursors[i] fetches page i + 1; the last entry is the next page's cursor
+  const [cursors, setCursors] = useState([null]);
+  const [pageIndex, setPageIndex] = useState(0);
 
   useEffect(() => {
     if (status === 'unauthenticated') {
@@ -38,20 +40,20 @@ export default function ProjectsPage() {
   }, [status, router]);
 
   useEffect(() => {
-    fetchProjects();
-  }, [pageNo, pageSize]);
+    searchProjects();
+  }, [pageSize]);
 
-  const fetchProjects = async () => {
+  const fetchProjects = async (index, knownCursors = cursors) => {
     try {
-      const res = await fetch(`/api/projects?page_size=${pageSize}&page_no=${pageNo}&filter=${searchTerm}`);
+      const params = new URLSearchParams({ limit: pageSize, filter: searchTerm });
+      if (knownCursors[index]) params.set('cursor', knownCursors[index]);
+      const res = await fetch(`/api/projects?${params}`);
       if (res.ok) {
         const data = await res.json();
         setProjects(data.projects);
         setFilteredProjects(data.projects);
-        if(data.projects.length > 0)
-          setTotalRecords(data.projects[0].total_records)
-        else
-          setTotalRecords(0);
+        setPageIndex(index);
+        setCursors([...knownCursors.slice(0, index + 1), ...(data.next_cursor ? [data.next_cursor] : [])]);
       }
     } catch (error) {
       console.error('Error fetching projects:', error);
@@ -60,6 +62,25 @@ export default function ProjectsPage() {
     }
   };
 
+  // Count is requested separately so paging never re-counts the filtered set
+  const fetchProjectCount = async () => {
+    try {
+      const res = await fetch(`/api/projects?output=count&filter=${encodeURIComponent(searchTerm)}`);
+      if (res.ok) {
+        const data = await res.json();
+        setTotalRecords(data.total_records);
+        setCountEstimated(data.estimated);
+      }
+    } catch (error) {
+      console.error('Error fetching project count:', error);
+    }
+  };
+
+  const searchProjects = () => {
+    fetchProjects(0, [null]);
+    fetchProjectCount();
+  };
+
 
   if (status === 'loading' || loading) {
     return (
@@ -105,7 +126,7 @@ export default function ProjectsPage() {
                   onChange={(e) => setSearchTerm(e.target.value)}
                   onKeyDown={(e) => {
                     if (e.key === "Enter")
-                      fetchProjects() 
+                      searchProjects()
                     }}
                   className="pl-10"
                 />
@@ -185,12 +206,28 @@ export default function ProjectsPage() {
                   </CardContent>
                 </Card>
               ))}
-              <KGPagination
-                totalRecords={totalRecords}
-                defaultPageSize={pageSize}
-                onChangeCallback={(pageNo, pageSize) => { setPageNo(pageNo) }}
-                className="justify-end"
-              />
+              <div className="flex items-center justify-end gap-4 mt-4">
+                <p className="text-sm text-muted-foreground">
+                  Page {pageIndex + 1} of {countEstimated ? '~' : ''}{Math.max(1, Math.ceil(totalRecords / pageSize))}
+                  {' '}({countEstimated ? '~' : ''}{totalRecords} projects)
+                </p>
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={pageIndex === 0}
+                  onClick={() => fetchProjects(pageIndex - 1)}
+                >
+                  Previous
+                </Button>
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={pageIndex + 1 >= cursors.length}
+                  onClick={() => fetchProjects(pageIndex + 1)}
+                >
+                  Next
+                </Button>
+              </div>
             </div>
           )}
         </div>
@@ -12,6 +12,9 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { Badge } from '@/components/ui/badge';
 import { FileText, Download, Printer, TrendingUp, TrendingDown, IndianRupee } from 'lucide-react';
 
+// Rows per page of the payment tables; exports stream every row (NDJSON)
+const PAYMENTS_PAGE_SIZE = 100;
+
 export default function ReportsPage() {
   const { data: session, status } = useSession();
   const router = useRouter();
@@ -24,125 +27,181 @@ export default function ReportsPage() {
     if (status === 'unauthenticated') {
       router.push('/auth/signin');
     } else if (status === 'authenticated') {
-      fetchData();
+      fetchProjects();
     }
   }, [status, router]);
 
-
   useEffect(() => {
-    if (!loading) {
+    if (status === 'authenticated') {
       generateReport();
-      return;
     }
-    // For selectedProject change
-    generateReport();
-  }, [selectedProject, loading]);
+  }, [selectedProject, status]);
 
-  const fetchData = async () => {
+  const fetchProjects = async () => {
     try {
-      const [projectsRes, statsRes, paymentsInRes, paymentsOutRes] = await Promise.all([
-        fetch(`/api/projects?page_no=1&page_size=10&filter=${encodeURIComponent('')}`),
-        fetch('/api/dashboard?output=stats'),
-        fetch('/api/all-payments?type=customer'),
-        fetch('/api/all-payments?type=vendor')
-      ]);
-
-
+      const projectsRes = await fetch(`/api/projects?limit=10&filter=${encodeURIComponent('')}`);
       if (projectsRes.ok) {
         const data = await projectsRes.json();
         setProjects(data.projects);
       }
-
-      if (statsRes.ok && paymentsInRes.ok && paymentsOutRes.ok) {
-        const stats = await statsRes.json();
-        const paymentsIn = await paymentsInRes.json();
-        const paymentsOut = await paymentsOutRes.json();
-
-        setReportData({
-          stats: stats.stats,
-          paymentsIn: paymentsIn.payments,
-          paymentsOut: paymentsOut.payments
-        });
-      }
     } catch (error) {
-      console.error('Error fetching data:', error);
-    } finally {
-      setLoading(false);
+      console.error('Error fetching projects:', error);
     }
   };
 
-  const generateReport = () => {
-
-    if (!reportData) return;
-    try {
+  // Query string for /api/all-payments with the current project filter
+  const paymentsQuery = (type, extra = {}) => {
+    const params = new URLSearchParams({ type, ...extra });
+    if (selectedProject !== 'all') {
+      params.set('project_id', selectedProject);
+    }
+    return `/api/all-payments?${params}`;
+  };
 
-      let filteredPaymentsIn = reportData.paymentsIn;
-      let filteredPaymentsOut = reportData.paymentsOut;
+  const fetchPaymentsPage = async (type, cursor) => {
+    const res = await fetch(paymentsQuery(type, {
+      limit: PAYMENTS_PAGE_SIZE,
+      ...(cursor ? { cursor } : {})
+    }));
+    if (!res.ok) {
+      throw new Error(`Failed to load ${type} payments`);
+    }
+    return res.json();
+  };
 
-      if (selectedProject !== 'all') {
-        const projectId = parseInt(selectedProject);
-        filteredPaymentsIn = reportData.paymentsIn.filter(p => p.project_id === projectId);
-        filteredPaymentsOut = reportData.paymentsOut.filter(p => p.project_id === projectId);
-      }
+  // Totals come from maintained aggregates (dashboard stats, or the project's
+  // payment summary) rather than from summing every payment row
+  const fetchTotals = async () => {
+    if (selectedProject === 'all') {
+      const statsRes = await fetch('/api/dashboard?output=stats');
+      const { stats } = await statsRes.json();
+      return {
+        stats,
+        totalIn: parseFloat(stats.total_received || 0),
+        totalOut: parseFloat(stats.total_paid || 0)
+      };
+    }
+    const [statsRes, projectRes] = await Promise.all([
+      fetch('/api/dashboard?output=stats'),
+      fetch(`/api/projects/${selectedProject}`)
+    ]);
+    const { stats } = await statsRes.json();
+    const project = await projectRes.json();
+    return {
+      stats,
+      totalIn: parseFloat(project.payments_received || 0),
+      totalOut: parseFloat(project.payments_made || 0)
+    };
+  };
 
-      const totalIn = filteredPaymentsIn.reduce((sum, p) => sum + parseFloat(p.amount), 0);
-      const totalOut = filteredPaymentsOut.reduce((sum, p) => sum + parseFloat(p.amount), 0);
+  const generateReport = async () => {
+    try {
+      const [totals, paymentsIn, paymentsOut] = await Promise.all([
+        fetchTotals(),
+        fetchPaymentsPage('customer'),
+        fetchPaymentsPage('vendor')
+      ]);
 
       setReportData({
-        ...reportData,
-        filteredPaymentsIn,
-        filteredPaymentsOut,
-        totalIn,
-        totalOut,
-        netPosition: totalIn - totalOut
+        stats: totals.stats,
+        filteredPaymentsIn: paymentsIn.payments,
+        filteredPaymentsOut: paymentsOut.payments,
+        cursorIn: paymentsIn.next_cursor,
+        cursorOut: paymentsOut.next_cursor,
+        totalIn: totals.totalIn,
+        totalOut: totals.totalOut,
+        netPosition: totals.totalIn - totals.totalOut
       });
     }
     catch (err) {
       console.log("Error generating report");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadMorePayments = async (type) => {
+    const customer = type === 'customer';
+    try {
+      const page = await fetchPaymentsPage(type, customer ? reportData.cursorIn : reportData.cursorOut);
+      setReportData(current => customer
+        ? { ...current, filteredPaymentsIn: [...current.filteredPaymentsIn, ...page.payments], cursorIn: page.next_cursor }
+        : { ...current, filteredPaymentsOut: [...current.filteredPaymentsOut, ...page.payments], cursorOut: page.next_cursor });
+    } catch (error) {
+      console.error('Error loading payments:', error);
+    }
+  };
+
+  // Every payment matching the project filter, read line by line from the
+  // NDJSON export instead of the paged table
+  const fetchAllPayments = async (type) => {
+    const res = await fetch(paymentsQuery(type, { format: 'ndjson' }));
+    if (!res.ok) {
+      throw new Error(`Failed to export ${type} payments`);
+    }
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    const payments = [];
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += value;
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (line) payments.push(JSON.parse(line));
+      }
     }
+    if (buffer) payments.push(JSON.parse(buffer));
+    return payments;
   };
 
-  const exportToCSV = (type) => {
+  const exportToCSV = async (type) => {
     if (!reportData) return;
 
     let data = [];
     let headers = [];
     let filename = '';
 
-    if (type === 'payments_in') {
-      headers = ['Date', 'Project', 'Customer', 'Type', 'Amount', 'Mode', 'Reference'];
-      data = reportData.filteredPaymentsIn.map(p => [
-        new Date(p.payment_date).toLocaleDateString('en-IN'),
-        p.project_name,
-        p.customer_name,
-        p.payment_type,
-        p.amount,
-        p.mode,
-        p.reference_number || ''
-      ]);
-      filename = `customer_payments_${Date.now()}.csv`;
-    } else if (type === 'payments_out') {
-      headers = ['Date', 'Project', 'Vendor', 'Stage', 'Amount', 'Mode', 'Reference'];
-      data = reportData.filteredPaymentsOut.map(p => [
-        new Date(p.payment_date).toLocaleDateString('en-IN'),
-        p.project_name,
-        p.vendor_name,
-        p.payment_stage,
-        p.amount,
-        p.mode || '',
-        p.reference_number || ''
-      ]);
-      filename = `vendor_payments_${Date.now()}.csv`;
-    } else if (type === 'summary') {
-      headers = ['Metric', 'Value'];
-      data = [
-        ['Total Received', reportData.totalIn],
-        ['Total Paid', reportData.totalOut],
-        ['Net Position', reportData.netPosition],
-        ['Active Projects', reportData.stats.active_projects],
-        ['Total Project Value', reportData.stats.total_project_value]
-      ];
-      filename = `financial_summary_${Date.now()}.csv`;
+    try {
+      if (type === 'payments_in') {
+        headers = ['Date', 'Project', 'Customer', 'Type', 'Amount', 'Mode', 'Reference'];
+        data = (await fetchAllPayments('customer')).map(p => [
+          new Date(p.payment_date).toLocaleDateString('en-IN'),
+          p.project_name,
+          p.customer_name,
+          p.payment_type,
+          p.amount,
+          p.mode,
+          p.reference_number || ''
+        ]);
+        filename = `customer_payments_${Date.now()}.csv`;
+      } else if (type === 'payments_out') {
+        headers = ['Date', 'Project', 'Vendor', 'Stage', 'Amount', 'Mode', 'Reference'];
+        data = (await fetchAllPayments('vendor')).map(p => [
+          new Date(p.payment_date).toLocaleDateString('en-IN'),
+          p.project_name,
+          p.vendor_name,
+          p.payment_stage,
+          p.amount,
+          p.mode || '',
+          p.reference_number || ''
+        ]);
+        filename = `vendor_payments_${Date.now()}.csv`;
+      } else if (type === 'summary') {
+        headers = ['Metric', 'Value'];
+        data = [
+          ['Total Received', reportData.totalIn],
+          ['Total Paid', reportData.totalOut],
+          ['Net Position', reportData.netPosition],
+          ['Active Projects', reportData.stats.active_projects],
+          ['Total Project Value', reportData.stats.total_project_value]
+        ];
+        filename = `financial_summary_${Date.now()}.csv`;
+      }
+    } catch (error) {
+      console.error('Error exporting payments:', error);
+      return;
     }
 
     const csvContent = [
@@ -244,7 +303,7 @@ export default function ReportsPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold text-green-600">{formatCurrency(reportData.totalIn)}</div>
-              <p className="text-xs text-muted-foreground mt-1">{reportData.filteredPaymentsIn?.length} transactions</p>
+              <p className="text-xs text-muted-foreground mt-1">Approved customer payments</p>
             </CardContent>
           </Card>
           <Card>
@@ -256,7 +315,7 @@ export default function ReportsPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold text-red-600">{formatCurrency(reportData.totalOut)}</div>
-              <p className="text-xs text-muted-foreground mt-1">{reportData.filteredPaymentsOut?.length} transactions</p>
+              <p className="text-xs text-muted-foreground mt-1">Vendor payments</p>
             </CardContent>
           </Card>
           <Card>
@@ -434,6 +493,13 @@ export default function ReportsPage() {
                       </tbody>
                     </table>
                   )}
+                  {reportData.cursorIn && (
+                    <div className="text-center p-3 border-t print:hidden">
+                      <Button variant="outline" size="sm" onClick={() => loadMorePayments('customer')}>
+                        Load more
+                      </Button>
+                    </div>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -495,6 +561,13 @@ export default function ReportsPage() {
                       </tbody>
                     </table>
                   )}
+                  {reportData.cursorOut && (
+                    <div className="text-center p-3 border-t print:hidden">
+                      <Button variant="outline" size="sm" onClick={() => loadMorePayments('vendor')}>
+                        Load more
+                      </Button>
+                    </div>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -0,0 +1,4 @@
+"""
+KG Interiors Finance - Python toolkit
+Bulk engines and tooling that mirror the JavaScript business logic in lib/.
+"""
@@ -0,0 +1,284 @@
+"""
+Pricing Micro-benchmarks
+Times the estimation and PR pricing functions of both engines across item
+counts and category counts:
+
+    item_total       calculateItemTotal per item   / calculate_item_totals
+    category_totals  calculateCategoryTotals       / calculate_category_totals
+    all_totals       calculateAllTotals            / calculate_all_totals
+    item_pricing     calculateItemPricing per item / calculate_item_pricing
+    pr_totals        calculatePRTotals             / calculate_pr_totals
+
+The JavaScript side runs in node via kg_finance/bench_pricing.mjs. Each run
+(results plus git commit, host and runtime versions) is appended to a JSONL
+history file; the median of every case is compared with the last run on the
+same host and increases beyond --threshold are reported as regressions.
+
+Usage:
+    python -m kg_finance.bench
+    python -m kg_finance.bench --items 10,1000 --categories 3 --engines python --no-save
+    python -m kg_finance.bench --fail-on-regression --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from kg_finance.pricing import (
+    calculate_all_totals,
+    calculate_category_totals,
+    calculate_item_pricing,
+    calculate_item_totals,
+    calculate_pr_totals,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JS_BENCH = os.path.join(REPO_ROOT, 'kg_finance', 'bench_pricing.mjs')
+
+DEFAULT_ITEMS = (10, 100, 1000, 10000, 100000)
+DEFAULT_CATEGORIES = (3, 8, 20)
+DEFAULT_MIN_TIME = 0.2  # seconds of repeats per case
+DEFAULT_MAX_REPEATS = 1000
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, 'benchmarks', 'pricing.jsonl')
+DEFAULT_THRESHOLD = 0.2  # +20% median time
+ENGINES = ('python', 'js')
+FUNCTIONS = ('item_total', 'category_totals', 'all_totals', 'item_pricing', 'pr_totals')
+PR_FUNCTIONS = ('item_pricing', 'pr_totals')
+
+UNITS = np.array(['sqft', 'no', 'lumpsum'], dtype=object)
+
+
+def make_base_rates(count):
+    """count synthetic categories (same shape as makeBaseRates in bench_pricing.mjs)"""
+    categories = [
+        {'id': f"cat_{i}", 'kg_percentage': 5 + i % 10, 'max_item_discount_percentage': 20,
+         'pay_to_vendor_directly': i % 4 == 3, 'sort_order': i + 1}
+        for i in range(count)
+    ]
+    return {'category_rates': {'categories': categories}, 'gst_percentage': '18.00'}
+
+
+def make_items(count, categories, rng):
+    """Estimation item columns for calculate_item_totals"""
+    unit = UNITS[rng.integers(len(UNITS), size=count)]
+    sqft = unit == 'sqft'
+    return {
+        'category': np.array([cat['id'] for cat in categories], dtype=object)[rng.integers(len(categories), size=count)],
+        'unit': unit,
+        'width': np.where(sqft, np.round(rng.random(count) * 100) / 10 + 1, np.nan),
+        'height': np.where(sqft, np.round(rng.random(count) * 80) / 10 + 1, np.nan),
+        'quantity': np.where(sqft, 0, rng.integers(1, 9, count)).astype(np.float64),
+        'unit_price': np.round(rng.random(count) * 5000) + 50,
+        'item_discount_percentage': np.where(rng.random(count) < 0.3, rng.integers(0, 20, count), 0).astype(np.float64),
+        'discount_kg_charges_percentage': np.where(rng.random(count) < 0.2, rng.integers(0, 30, count), 0).astype(np.float64),
+        'gst_percentage': np.where(rng.random(count) < 0.1, 12, np.nan),
+    }
+
+
+def make_pr_items(count, rng):
+    """(quantity, unit_price, gst_percentage) columns for calculate_item_pricing"""
+    quantity = rng.integers(1, 21, count).astype(np.float64)
+    unit_price = np.where(rng.random(count) < 0.1, np.nan, np.round(rng.random(count) * 500000) / 100)
+    return quantity, unit_price, np.full(count, 18.0)
+
+
+def measure(fn, min_time=DEFAULT_MIN_TIME, max_repeats=DEFAULT_MAX_REPEATS):
+    """Per-run seconds of fn, repeated until min_time has passed (at least 3 runs)"""
+    fn()  # warm-up
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < 3 or (time.perf_counter() < deadline and len(times) < max_repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _result(engine, name, items, categories, times):
+    times_ms = np.asarray(times) * 1000
+    median_ms = float(np.median(times_ms))
+    return {
+        'engine': engine, 'function': name, 'items': items, 'categories': categories,
+        'repeats': len(times_ms), 'min_ms': float(times_ms.min()), 'median_ms': median_ms,
+        'items_per_s': items / (median_ms / 1000) if median_ms > 0 else None,
+    }
+
+
+def run_python(items=DEFAULT_ITEMS, categories=DEFAULT_CATEGORIES, functions=FUNCTIONS,
+               min_time=DEFAULT_MIN_TIME, max_repeats=DEFAULT_MAX_REPEATS, seed=1):
+    """Benchmark the NumPy engine; one result dict per (function, items, categories)"""
+    rng = np.random.default_rng(seed)
+    results = []
+    for category_count in categories:
+        base_rates = make_base_rates(category_count)
+        category_list = base_rates['category_rates']['categories']
+        for item_count in items:
+            columns = make_items(item_count, category_list, rng)
+            priced = calculate_item_totals(columns, base_rates)
+            pr_columns = make_pr_items(item_count, rng)
+            priced_pr = calculate_item_pricing(*pr_columns)
+
+            benchmarks = {
+                'item_total': lambda: calculate_item_totals(columns, base_rates),
+                'category_totals': lambda: calculate_category_totals(priced, category_list),
+                'all_totals': lambda: calculate_all_totals(columns, base_rates),
+                'item_pricing': lambda: calculate_item_pricing(*pr_columns),
+                'pr_totals': lambda: calculate_pr_totals(priced_pr),
+            }
+            for name in functions:
+                # PR pricing has no categories; time it once per item count
+                per_category = name not in PR_FUNCTIONS
+                if not per_category and category_count != categories[0]:
+                    continue
+                times = measure(benchmarks[name], min_time, max_repeats)
+                results.append(_result('python', name, item_count, category_count if per_category else None, times))
+    return results
+
+
+def run_js(items=DEFAULT_ITEMS, categories=DEFAULT_CATEGORIES, functions=FUNCTIONS,
+           min_time=DEFAULT_MIN_TIME, max_repeats=DEFAULT_MAX_REPEATS, seed=1, node=None):
+    """Benchmark lib/calcUtils.js and lib/pricing-utils.js in node"""
+    node = node or shutil.which('node')
+    if not node:
+        raise RuntimeError('node not found on PATH')
+    command = [
+        node, '--no-warnings', JS_BENCH,
+        '--items', ','.join(map(str, items)),
+        '--categories', ','.join(map(str, categories)),
+        '--functions', ','.join(functions),
+        '--min-time', str(min_time),
+        '--max-repeats', str(max_repeats),
+        '--seed', str(seed),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_ROOT)
+    return json.loads(completed.stdout)
+
+
+def environment():
+    """Where and on what code a run happened"""
+    def output(command):
+        try:
+            return subprocess.run(command, capture_output=True, text=True, cwd=REPO_ROOT).stdout.strip() or None
+        except OSError:
+            return None
+
+    node = shutil.which('node')
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': output(['git', 'rev-parse', '--short', 'HEAD']),
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'node': output([node, '--version']) if node else None,
+    }
+
+
+def load_history(path):
+    """All earlier runs, oldest first"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path, run):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+
+
+def _case(result):
+    return result['engine'], result['function'], result['items'], result['categories']
+
+
+def find_regressions(current, previous, threshold=DEFAULT_THRESHOLD):
+    """Cases whose median time grew by more than threshold (fraction) since previous"""
+    before = {_case(r): r for r in previous}
+    regressions = []
+    for result in current:
+        old = before.get(_case(result))
+        if old and old['median_ms'] > 0:
+            change = result['median_ms'] / old['median_ms'] - 1
+            if change > threshold:
+                regressions.append({**dict(zip(('engine', 'function', 'items', 'categories'), _case(result))),
+                                    'before_ms': old['median_ms'], 'after_ms': result['median_ms'],
+                                    'change_pct': round(change * 100, 1)})
+    return regressions
+
+
+def print_results(results):
+    print(f"{'engine':<7} {'function':<16} {'items':>7} {'cats':>5} {'median ms':>11} {'items/s':>14}")
+    for r in results:
+        categories = r['categories'] if r['categories'] is not None else '-'
+        rate = f"{r['items_per_s']:,.0f}" if r['items_per_s'] else '-'
+        print(f"{r['engine']:<7} {r['function']:<16} {r['items']:>7} {categories:>5} {r['median_ms']:>11.4f} {rate:>14}")
+
+
+def _int_list(value):
+    return tuple(int(v) for v in value.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the JS and Python pricing engines')
+    parser.add_argument('--items', type=_int_list, default=DEFAULT_ITEMS, help='comma separated item counts')
+    parser.add_argument('--categories', type=_int_list, default=DEFAULT_CATEGORIES,
+                        help='comma separated category counts')
+    parser.add_argument('--functions', type=lambda v: tuple(v.split(',')), default=FUNCTIONS,
+                        help=f"subset of {','.join(FUNCTIONS)}")
+    parser.add_argument('--engines', type=lambda v: tuple(v.split(',')), default=ENGINES, help='python,js')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help='seconds per case')
+    parser.add_argument('--max-repeats', type=int, default=DEFAULT_MAX_REPEATS)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSONL file runs are appended to')
+    parser.add_argument('--no-save', action='store_true', help='do not append this run to the history')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='median slowdown (fraction) reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit 1 when a case regressed')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.functions) - set(FUNCTIONS) or set(args.engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown: {', '.join(sorted(unknown))}")
+
+    options = dict(items=args.items, categories=args.categories, functions=args.functions,
+                   min_time=args.min_time, max_repeats=args.max_repeats, seed=args.seed)
+    results = []
+    if 'python' in args.engines:
+        results += run_python(**options)
+    if 'js' in args.engines:
+        try:
+            results += run_js(**options)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Skipping JS engine: {getattr(e, 'stderr', None) or e}")
+
+    run = {**environment(), 'results': results}
+    print_results(results)
+
+    previous = [r for r in load_history(args.history) if r.get('host') == run['host']]
+    regressions = find_regressions(results, previous[-1]['results'], args.threshold) if previous else []
+    if previous:
+        print(f"\nCompared with {previous[-1].get('commit')} ({previous[-1]['timestamp']}):")
+        for r in regressions:
+            print(f"   ❌ {r['engine']} {r['function']} items={r['items']} categories={r['categories']}: "
+                  f"{r['before_ms']:.4f} -> {r['after_ms']:.4f} ms ({r['change_pct']:+.1f}%)")
+        if not regressions:
+            print(f"   ✅ no case slower by more than {args.threshold:.0%}")
+
+    if not args.no_save:
+        append_history(args.history, {**run, 'regressions': regressions})
+        print(f"Run appended to {args.history}")
+
+    return not (args.fail_on_regression and regressions)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,156 @@
+// Micro-benchmarks for the JavaScript pricing functions (driven by kg_finance/bench.py)
+//
+//   node kg_finance/bench_pricing.mjs --items 10,1000 --categories 3,20 --min-time 0.2
+//
+// Prints one JSON array of results on stdout, in the same shape bench.py
+// records for the Python engine.
+import { performance } from 'node:perf_hooks';
+import { calculateItemTotal, calculateCategoryTotals, calculateAllTotals } from '../lib/calcUtils.js';
+import { calculateItemPricing, calculatePRTotals } from '../lib/pricing-utils.js';
+
+const UNITS = ['sqft', 'no', 'lumpsum'];
+const PR_FUNCTIONS = ['item_pricing', 'pr_totals'];
+
+function parseArgs(argv) {
+  const args = { items: [10, 100, 1000], categories: [3], minTime: 0.2, maxRepeats: 1000, functions: null, seed: 1 };
+  for (let i = 0; i < argv.length; i += 2) {
+    const value = argv[i + 1];
+    switch (argv[i]) {
+      case '--items': args.items = value.split(',').map(Number); break;
+      case '--categories': args.categories = value.split(',').map(Number); break;
+      case '--min-time': args.minTime = Number(value); break;
+      case '--max-repeats': args.maxRepeats = Number(value); break;
+      case '--functions': args.functions = value.split(','); break;
+      case '--seed': args.seed = Number(value); break;
+      default: throw new Error(`Unknown argument ${argv[i]}`);
+    }
+  }
+  return args;
+}
+
+// mulberry32 - small deterministic PRNG so every run prices the same items
+function makeRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// Same shape as kg_finance.bench.make_base_rates
+function makeBaseRates(count) {
+  const categories = [];
+  for (let i = 0; i < count; i++) {
+    categories.push({
+      id: `cat_${i}`,
+      kg_percentage: 5 + (i % 10),
+      max_item_discount_percentage: 20,
+      pay_to_vendor_directly: i % 4 === 3,
+      sort_order: i + 1
+    });
+  }
+  return { category_rates: { categories }, gst_percentage: '18.00' };
+}
+
+function makeItems(count, categories, random) {
+  const items = [];
+  for (let i = 0; i < count; i++) {
+    const unit = UNITS[Math.floor(random() * UNITS.length)];
+    const sqft = unit === 'sqft';
+    items.push({
+      category: categories[Math.floor(random() * categories.length)].id,
+      unit,
+      width: sqft ? Math.round(random() * 100) / 10 + 1 : null,
+      height: sqft ? Math.round(random() * 80) / 10 + 1 : null,
+      quantity: sqft ? 0 : Math.floor(random() * 8) + 1,
+      unit_price: Math.round(random() * 5000) + 50,
+      item_discount_percentage: random() < 0.3 ? Math.floor(random() * 20) : 0,
+      discount_kg_charges_percentage: random() < 0.2 ? Math.floor(random() * 30) : 0,
+      gst_percentage: random() < 0.1 ? 12 : null
+    });
+  }
+  return items;
+}
+
+function makePRItems(count, random) {
+  const items = [];
+  for (let i = 0; i < count; i++) {
+    items.push({
+      quantity: Math.floor(random() * 20) + 1,
+      unit_price: random() < 0.1 ? null : Math.round(random() * 500000) / 100,
+      gst_percentage: 18
+    });
+  }
+  return items;
+}
+
+// Repeat fn until minTime has passed (at least 3 runs); returns per-run ms
+function measure(fn, minTime, maxRepeats) {
+  fn(); // warm-up, lets the JIT compile the hot path
+  const times = [];
+  const deadline = performance.now() + minTime * 1000;
+  while (times.length < 3 || (performance.now() < deadline && times.length < maxRepeats)) {
+    const start = performance.now();
+    fn();
+    times.push(performance.now() - start);
+  }
+  return times;
+}
+
+function summarize(times) {
+  const sorted = [...times].sort((a, b) => a - b);
+  return {
+    repeats: sorted.length,
+    min_ms: sorted[0],
+    median_ms: sorted[Math.floor(sorted.length / 2)]
+  };
+}
+
+function main() {
+  const args = parseArgs(process.argv.slice(2));
+  const random = makeRandom(args.seed);
+  const results = [];
+
+  for (const categoryCount of args.categories) {
+    const baseRates = makeBaseRates(categoryCount);
+    const categories = baseRates.category_rates.categories;
+
+    for (const itemCount of args.items) {
+      const items = makeItems(itemCount, categories, random);
+      const pricedItems = items.map(item => ({ ...item, ...calculateItemTotal(item, baseRates) }));
+      const prItems = makePRItems(itemCount, random);
+      const pricedPRItems = prItems.map(item => calculateItemPricing(item.quantity, item.unit_price, item.gst_percentage));
+
+      const benchmarks = {
+        item_total: () => items.map(item => calculateItemTotal(item, baseRates)),
+        category_totals: () => calculateCategoryTotals(pricedItems, categories),
+        all_totals: () => calculateAllTotals(items, baseRates),
+        item_pricing: () => prItems.map(item => calculateItemPricing(item.quantity, item.unit_price, item.gst_percentage)),
+        pr_totals: () => calculatePRTotals(pricedPRItems)
+      };
+
+      for (const [name, fn] of Object.entries(benchmarks)) {
+        if (args.functions && !args.functions.includes(name)) continue;
+        // PR pricing has no categories; time it once per item count
+        const perCategory = !PR_FUNCTIONS.includes(name);
+        if (!perCategory && categoryCount !== args.categories[0]) continue;
+        const stats = summarize(measure(fn, args.minTime, args.maxRepeats));
+        results.push({
+          engine: 'js',
+          function: name,
+          items: itemCount,
+          categories: perCategory ? categoryCount : null,
+          ...stats,
+          items_per_s: itemCount / (stats.median_ms / 1000)
+        });
+      }
+    }
+  }
+
+  process.stdout.write(JSON.stringify(results));
+}
+
+main();
@@ -0,0 +1,896 @@
+"""
+Synthetic Data Generator
+Production-scale fake data for benchmarks: BizModels with dynamic categories,
+stages and milestones, customers, vendors and projects, versioned estimations
+with thousands of items, purchase requests with estimation links and
+weightages, customer / vendor payments and their ledger entries.
+
+Rows are generated project by project (items with NumPy, priced with
+kg_finance.pricing) and streamed into the database with COPY in fixed-size
+batches, parents before children, so memory stays flat and millions of
+estimation_items load in minutes. Primary keys are reserved from each table's
+sequence in blocks, so children reference parents without a round trip.
+
+The trigger-maintained data (estimation_item_fulfillment, ledger running
+balances, projects.current_estimation_id, counters, dashboard_stats,
+project_payment_totals) is not updated row by row: those triggers are
+disabled while a chunk of projects loads, and the chunk is then backfilled
+with the same set-based SQL the migrations use. Each chunk commits on its own. Run it as the only writer.
+
+Volume is about projects x versions (1..max, 2 on average with the default 3)
+x items per estimation, e.g. --projects 10000 --items-per-estimation 250 for
+~5M estimation_items.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m kg_finance.datagen --projects 10000 \\
+        --items-per-estimation 250 [--max-versions 3] [--seed 42] [--chunk-projects 200]
+"""
+
+import argparse
+import io
+import json
+import math
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from kg_finance import db
+from kg_finance.pricing import calculate_all_totals
+
+DEFAULT_PROJECTS = 100
+DEFAULT_ITEMS_PER_ESTIMATION = 1000
+DEFAULT_MAX_VERSIONS = 3
+DEFAULT_BIZ_MODELS = 3
+DEFAULT_VENDORS = 50
+DEFAULT_CHUNK_PROJECTS = 200
+DEFAULT_BATCH_ROWS = 50000
+ID_BLOCK = 10000
+HISTORY_DAYS = 3 * 365
+
+# COPY column order per table, parents before children (flush order)
+TABLE_COLUMNS = {
+    'users': ('id', 'name', 'email', 'role', 'active', 'created_at'),
+    'vendors': ('id', 'name', 'vendor_type', 'contact_person', 'phone', 'email', 'gst_number',
+                'address', 'is_active', 'created_at'),
+    'biz_models': ('id', 'code', 'name', 'description', 'gst_percentage', 'category_rates',
+                   'status', 'is_active', 'created_at'),
+    'biz_model_stages': ('id', 'biz_model_id', 'stage_code', 'stage_name', 'sequence_order',
+                         'description'),
+    'biz_model_milestones': ('id', 'biz_model_id', 'milestone_code', 'milestone_name', 'direction',
+                             'stage_code', 'description', 'is_mandatory', 'sequence_order',
+                             'category_percentages'),
+    'customers': ('id', 'name', 'contact_person', 'phone', 'email', 'address', 'kyc_type',
+                  'business_type', 'created_at'),
+    'projects': ('id', 'project_code', 'customer_id', 'biz_model_id', 'name', 'location', 'stage',
+                 'status', 'sales_order_id', 'start_date', 'created_by', 'created_at'),
+    'project_base_rates': ('id', 'project_id', 'category_rates', 'gst_percentage', 'status', 'active',
+                           'created_by', 'approved_by', 'approved_at', 'created_at'),
+    'project_estimations': ('id', 'project_id', 'created_by', 'version', 'status', 'source',
+                            'csv_file_path', 'uploaded_by', 'is_active', 'category_breakdown',
+                            'items_value', 'kg_charges', 'items_discount', 'kg_discount', 'discount',
+                            'gst_amount', 'final_value', 'has_overpayment', 'overpayment_amount',
+                            'created_at', 'updated_at'),
+    'estimation_items': ('id', 'estimation_id', 'category', 'room_name', 'vendor_type', 'item_name',
+                         'unit', 'width', 'height', 'quantity', 'unit_price', 'subtotal',
+                         'karighar_charges_percentage', 'karighar_charges_amount',
+                         'item_discount_percentage', 'item_discount_amount',
+                         'discount_kg_charges_percentage', 'discount_kg_charges_amount',
+                         'gst_percentage', 'amount_before_gst', 'gst_amount', 'item_total',
+                         'status', 'created_at'),
+    'purchase_requests': ('id', 'pr_number', 'project_id', 'estimation_id', 'vendor_id', 'status',
+                          'created_by', 'expected_delivery_date', 'items_value', 'gst_amount',
+                          'final_value', 'created_at'),
+    'purchase_request_items': ('id', 'purchase_request_id', 'purchase_request_item_name', 'category',
+                               'room_name', 'quantity', 'width', 'height', 'unit', 'unit_price',
+                               'subtotal', 'gst_percentage', 'gst_amount', 'amount_before_gst',
+                               'item_total', 'is_direct_purchase', 'stable_item_id', 'version',
+                               'lifecycle_status', 'status', 'created_by', 'created_at'),
+    'purchase_request_estimation_links': ('id', 'estimation_item_id', 'purchase_request_item_id',
+                                          'stable_item_id', 'version', 'linked_qty',
+                                          'unit_purchase_request_item_weightage', 'created_at'),
+    'customer_payments': ('id', 'project_id', 'customer_id', 'milestone_id', 'payment_type', 'amount',
+                          'payment_date', 'mode', 'reference_number', 'remarks', 'status',
+                          'approved_by', 'approved_at', 'created_by', 'created_at'),
+    'payments_out': ('id', 'vendor_id', 'project_id', 'payment_stage', 'amount', 'payment_date',
+                     'mode', 'reference_number', 'remarks', 'created_by', 'created_at'),
+    'project_ledger': ('id', 'project_id', 'source_table', 'source_id', 'entry_type', 'amount',
+                       'entry_date', 'remarks'),
+}
+
+# Row triggers that maintain derived data (migrations 021-024, 027); disabled during
+# a chunk's COPY and replaced by DERIVE_SQL
+MAINTAINED_TRIGGERS = (
+    ('projects', 'projects_dashboard_stats'),
+    ('project_estimations', 'estimations_dashboard_stats'),
+    ('project_estimations', 'estimations_current_pointer'),
+    ('estimation_items', 'ei_insert_fulfillment'),
+    ('purchase_request_estimation_links', 'prel_refresh_fulfillment'),
+    ('customer_payments', 'customer_payments_dashboard_stats'),
+    ('customer_payments', 'customer_payments_payment_totals'),
+    ('payments_out', 'payments_out_dashboard_stats'),
+    ('project_ledger', 'project_ledger_balance'),
+)
+
+# Set-based backfill for projects id BETWEEN %(lo)s AND %(hi)s
+DERIVE_SQL = (
+    # projects and project_base_rates reference each other
+    """
+    UPDATE projects p
+    SET base_rate_id = pbr.id
+    FROM project_base_rates pbr
+    WHERE pbr.project_id = p.id AND pbr.active = true
+      AND p.id BETWEEN %(lo)s AND %(hi)s
+    """,
+    # Migration 024 backfill
+    """
+    UPDATE projects p
+    SET current_estimation_id = latest.id
+    FROM (
+        SELECT DISTINCT ON (project_id) project_id, id
+        FROM project_estimations
+        WHERE project_id BETWEEN %(lo)s AND %(hi)s
+        ORDER BY project_id, created_at DESC, id DESC
+    ) latest
+    WHERE latest.project_id = p.id
+    """,
+    # Migration 021 backfill
+    """
+    SELECT refresh_estimation_item_fulfillment(ARRAY(
+        SELECT ei.id
+        FROM estimation_items ei
+        JOIN project_estimations pe ON ei.estimation_id = pe.id
+        WHERE pe.project_id BETWEEN %(lo)s AND %(hi)s
+    ))
+    """,
+    # Migration 022 backfill
+    """
+    UPDATE project_ledger pl
+    SET running_balance = b.balance
+    FROM (
+        SELECT
+            id,
+            SUM(CASE WHEN LOWER(entry_type) = 'credit' THEN amount ELSE -amount END)
+              OVER (PARTITION BY project_id ORDER BY entry_date, id) AS balance
+        FROM project_ledger
+        WHERE project_id BETWEEN %(lo)s AND %(hi)s
+    ) b
+    WHERE pl.id = b.id
+    """,
+    # Migration 026 seeding
+    """
+    INSERT INTO counters (name, scope_id, value)
+    SELECT 'pr_number', project_id, COUNT(*)
+    FROM purchase_requests
+    WHERE project_id BETWEEN %(lo)s AND %(hi)s
+    GROUP BY project_id
+    ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value)
+    """,
+    """
+    INSERT INTO counters (name, scope_id, value)
+    SELECT 'estimation_version', project_id, MAX(version)
+    FROM project_estimations
+    WHERE project_id BETWEEN %(lo)s AND %(hi)s
+    GROUP BY project_id
+    ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value)
+    """,
+    """
+    INSERT INTO counters (name, scope_id, value)
+    SELECT 'pr_version', pri.purchase_request_id, MAX(pri.version)
+    FROM purchase_request_items pri
+    JOIN purchase_requests pr ON pri.purchase_request_id = pr.id
+    WHERE pr.project_id BETWEEN %(lo)s AND %(hi)s
+    GROUP BY pri.purchase_request_id
+    ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value)
+    """,
+    # Migration 023: the delta triggers were off, recompute the snapshot
+    "SELECT refresh_dashboard_stats()",
+    # Migration 027
+    "SELECT refresh_project_payment_totals(%(lo)s, %(hi)s)",
+)
+
+# Category configurations a BizModel draws from (same shape as biz_models.category_rates)
+CATEGORY_POOL = (
+    {'id': 'woodwork', 'category_name': 'Woodwork', 'kg_label': 'Design and Consultation',
+     'kg_percentage': 10, 'max_item_discount_percentage': 20, 'max_kg_discount_percentage': 50,
+     'pay_to_vendor_directly': False},
+    {'id': 'misc', 'category_name': 'Misc', 'kg_label': 'Service Charges',
+     'kg_percentage': 8, 'max_item_discount_percentage': 20, 'max_kg_discount_percentage': 40,
+     'pay_to_vendor_directly': False},
+    {'id': 'shopping', 'category_name': 'Shopping', 'kg_label': 'Shopping Charges',
+     'kg_percentage': 5, 'max_item_discount_percentage': 10, 'max_kg_discount_percentage': 30,
+     'pay_to_vendor_directly': True},
+    {'id': 'civil', 'category_name': 'Civil', 'kg_label': 'Supervision Charges',
+     'kg_percentage': 12, 'max_item_discount_percentage': 15, 'max_kg_discount_percentage': 40,
+     'pay_to_vendor_directly': False},
+    {'id': 'electrical', 'category_name': 'Electrical', 'kg_label': 'Service Charges',
+     'kg_percentage': 8, 'max_item_discount_percentage': 10, 'max_kg_discount_percentage': 30,
+     'pay_to_vendor_directly': False},
+)
+
+# Share of items per category (relative; renormalized over the chosen categories)
+CATEGORY_WEIGHTS = {'woodwork': 5, 'misc': 2, 'shopping': 2, 'civil': 1, 'electrical': 1}
+
+# (item_name, unit, min unit price, max unit price) per category
+ITEM_CATALOG = {
+    'woodwork': (
+        ('Modular kitchen base unit', 'sqft', 1200, 2400),
+        ('Wardrobe with loft', 'sqft', 1400, 2800),
+        ('TV unit', 'sqft', 1100, 2200),
+        ('False ceiling', 'sqft', 90, 180),
+        ('Study table', 'no', 8000, 25000),
+        ('Shoe rack', 'no', 6000, 15000),
+    ),
+    'misc': (
+        ('Wall painting', 'sqft', 18, 45),
+        ('Wallpaper', 'sqft', 60, 150),
+        ('Deep cleaning', 'lumpsum', 5000, 15000),
+        ('Curtain rods', 'no', 800, 2500),
+    ),
+    'shopping': (
+        ('Sofa set', 'no', 35000, 150000),
+        ('Dining table', 'no', 25000, 90000),
+        ('Pendant light', 'no', 2500, 12000),
+        ('Rug', 'no', 4000, 30000),
+    ),
+    'civil': (
+        ('Floor tiling', 'sqft', 110, 260),
+        ('Wall demolition', 'lumpsum', 10000, 40000),
+        ('Bathroom waterproofing', 'sqft', 45, 120),
+    ),
+    'electrical': (
+        ('Point wiring', 'no', 600, 1500),
+        ('Light fixtures', 'no', 900, 4000),
+        ('DB rewiring', 'lumpsum', 15000, 45000),
+    ),
+}
+
+ROOMS = ('Living Room', 'Kitchen', 'Master Bedroom', 'Kids Bedroom', 'Guest Bedroom',
+         'Dining', 'Foyer', 'Balcony', 'Bathroom', 'Study')
+CITIES = ('Bengaluru', 'Hyderabad', 'Chennai', 'Pune', 'Mumbai', 'Delhi', 'Kochi', 'Mysuru')
+FIRST_NAMES = ('Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Meera')
+LAST_NAMES = ('Sharma', 'Reddy', 'Iyer', 'Nair', 'Patel', 'Rao', 'Gupta', 'Menon', 'Kulkarni', 'Das')
+STAGES = (('ONBOARDING', 'Onboarding'), ('2D', '2D Design'), ('3D', '3D Design'),
+          ('EXEC', 'Execution'), ('HANDOVER', 'Handover'))
+# Inflow milestones (code, name, stage)
+INFLOW_MILESTONES = (('ADVANCE', 'Advance Payment', 'ONBOARDING'),
+                     ('DESIGN_SIGNOFF', 'Design Sign-off', '3D'),
+                     ('PRODUCTION', 'Production Start', 'EXEC'),
+                     ('HANDOVER', 'Handover', 'HANDOVER'))
+OUTFLOW_MILESTONES = (('VENDOR_ADVANCE', 'Vendor Advance', 'EXEC'),
+                      ('VENDOR_FINAL', 'Vendor Final Payment', 'HANDOVER'))
+USER_ROLES = ('admin', 'estimator', 'finance', 'sales', 'designer')
+VENDOR_TYPES = ('PI', 'Aristo', 'Other')
+PAYMENT_MODES = ('bank', 'upi', 'cheque', 'cash')
+PR_COMPONENTS = ('Carcass', 'Shutters', 'Hardware')
+
+
+class IdAllocator:
+    """
+    Primary keys for a table, reserved from its sequence ID_BLOCK at a time
+    One setval per block; ids left over at the end are ordinary sequence gaps.
+    """
+
+    def __init__(self, cursor, table, block=ID_BLOCK):
+        self.cursor = cursor
+        self.block = block
+        cursor.execute("""
+            SELECT column_default FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'id'
+        """, (table,))
+        row = cursor.fetchone()
+        match = re.search(r"nextval\('([^']+)'", row[0] or '') if row else None
+        if not match:
+            raise RuntimeError(f"{table}.id has no sequence default")
+        self.sequence = match.group(1)
+        self._next = 1
+        self._last = 0
+
+    def __call__(self):
+        if self._next > self._last:
+            self.cursor.execute("SELECT setval(%s, nextval(%s) + %s - 1)",
+                                (self.sequence, self.sequence, self.block))
+            self._last = self.cursor.fetchone()[0]
+            self._next = self._last - self.block + 1
+        value = self._next
+        self._next += 1
+        return value
+
+
+class SequenceIds:
+    """ids(table) -> next primary key, one IdAllocator per table"""
+
+    def __init__(self, cursor, block=ID_BLOCK):
+        self.cursor = cursor
+        self.block = block
+        self._allocators = {}
+
+    def __call__(self, table):
+        if table not in self._allocators:
+            self._allocators[table] = IdAllocator(self.cursor, table, self.block)
+        return self._allocators[table]()
+
+
+def _plain(values):
+    """Array -> list of Python scalars, NaN as None"""
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in np.asarray(values).tolist()]
+
+
+class CopyWriter:
+    """
+    Per-table CSV buffers, flushed with COPY once batch_rows rows are pending
+    Every flush writes the tables in TABLE_COLUMNS order, so a row's parent is
+    always in the database before the row itself.
+    """
+
+    def __init__(self, cursor, batch_rows=DEFAULT_BATCH_ROWS):
+        self.cursor = cursor
+        self.batch_rows = batch_rows
+        self.counts = Counter()
+        self._buffers = {}
+        self._pending = 0
+
+    def __call__(self, table, row):
+        if table not in self._buffers:
+            self._buffers[table] = io.StringIO()
+        self._buffers[table].write(db.copy_line([row.get(column) for column in TABLE_COLUMNS[table]]))
+        self.counts[table] += 1
+        self._pending += 1
+        if self._pending >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        for table in TABLE_COLUMNS:
+            if table not in self._buffers:
+                continue
+            db.copy_csv(self.cursor, table, TABLE_COLUMNS[table], self._buffers.pop(table))
+        self._pending = 0
+
+
+def _money(value):
+    """Math.round(value * 100) / 100 as in lib/pricing-utils.js"""
+    return math.floor(value * 100 + 0.5) / 100
+
+
+class DatasetGenerator:
+    """
+    Produces rows and hands each to emit(table, row_dict)
+
+    Args:
+        rng: numpy Generator (fixes the whole dataset for a given seed)
+        ids: ids(table) -> next primary key
+        emit: receives rows in dependency order (parents first)
+        items_per_estimation: mean item count of a project's first estimation
+        max_versions: estimations per project are uniform in 1..max_versions
+        now: end of the generated history
+    """
+
+    def __init__(self, rng, ids, emit, items_per_estimation=DEFAULT_ITEMS_PER_ESTIMATION,
+                 max_versions=DEFAULT_MAX_VERSIONS, now=None):
+        self.rng = rng
+        self.ids = ids
+        self.emit = emit
+        self.items_per_estimation = items_per_estimation
+        self.max_versions = max_versions
+        self.now = now or datetime.now(timezone.utc)
+        self.users = {}
+        self.vendor_ids = []
+        self.biz_models = []
+        self.customer_ids = []
+
+    # -- helpers --------------------------------------------------------
+
+    def _pick(self, values):
+        return values[int(self.rng.integers(len(values)))]
+
+    def _later(self, when, min_days, max_days):
+        """when + a random offset, never past now"""
+        return min(when + timedelta(days=float(self.rng.uniform(min_days, max_days))), self.now)
+
+    def _phone(self):
+        return f"+91 9{int(self.rng.integers(100000000, 999999999))}"
+
+    def _uuid(self):
+        return str(uuid.UUID(bytes=self.rng.bytes(16), version=4))
+
+    # -- shared reference data -----------------------------------------
+
+    def setup(self, biz_models=DEFAULT_BIZ_MODELS, customers=DEFAULT_PROJECTS, vendors=DEFAULT_VENDORS):
+        """Users, vendors, BizModels and customers shared by all projects"""
+        for role in USER_ROLES:
+            user_id = self.ids('users')
+            self.users[role] = user_id
+            self.emit('users', {
+                'id': user_id, 'name': f"Synthetic {role.title()}",
+                'email': f"synthetic.{role}.{user_id}@example.com", 'role': role,
+                'active': True, 'created_at': self.now - timedelta(days=HISTORY_DAYS + 30),
+            })
+
+        for _ in range(vendors):
+            vendor_id = self.ids('vendors')
+            self.vendor_ids.append(vendor_id)
+            self.emit('vendors', {
+                'id': vendor_id, 'name': f"{self._pick(LAST_NAMES)} Interiors Supply {vendor_id}",
+                'vendor_type': self._pick(VENDOR_TYPES), 'contact_person': self._pick(FIRST_NAMES),
+                'phone': self._phone(), 'email': f"vendor{vendor_id}@example.com",
+                'gst_number': f"29SYN{vendor_id:010d}", 'address': self._pick(CITIES),
+                'is_active': True, 'created_at': self.now - timedelta(days=HISTORY_DAYS + 30),
+            })
+
+        for index in range(biz_models):
+            self.biz_models.append(self.make_biz_model(index))
+
+        for _ in range(customers):
+            customer_id = self.ids('customers')
+            self.customer_ids.append(customer_id)
+            first, last = self._pick(FIRST_NAMES), self._pick(LAST_NAMES)
+            self.emit('customers', {
+                'id': customer_id, 'name': f"{first} {last}", 'contact_person': f"{first} {last}",
+                'phone': self._phone(), 'email': f"customer{customer_id}@example.com",
+                'address': self._pick(CITIES), 'kyc_type': self._pick(('aadhar', 'pan', 'none')),
+                'business_type': 'B2B' if self.rng.random() < 0.1 else 'B2C',
+                'created_at': self.now - timedelta(days=float(self.rng.uniform(0, HISTORY_DAYS))),
+            })
+
+    def make_biz_model(self, index):
+        """One published BizModel with 3-5 categories, stages and milestones"""
+        extra = self.rng.choice(np.arange(1, len(CATEGORY_POOL)), int(self.rng.integers(2, 5)), replace=False)
+        categories = [dict(CATEGORY_POOL[0], sort_order=1)] + [
+            dict(CATEGORY_POOL[i], sort_order=n + 2) for n, i in enumerate(sorted(extra))
+        ]
+        category_rates = {'categories': categories}
+        biz_model_id = self.ids('biz_models')
+        self.emit('biz_models', {
+            'id': biz_model_id, 'code': f"SYN_BM_{biz_model_id}", 'name': f"Synthetic Model {index + 1}",
+            'description': 'Synthetic benchmark BizModel', 'gst_percentage': 18,
+            'category_rates': json.dumps(category_rates), 'status': 'published', 'is_active': True,
+            'created_at': self.now - timedelta(days=HISTORY_DAYS + 30),
+        })
+
+        for order, (code, name) in enumerate(STAGES, start=1):
+            self.emit('biz_model_stages', {
+                'id': self.ids('biz_model_stages'), 'biz_model_id': biz_model_id,
+                'stage_code': code, 'stage_name': name, 'sequence_order': order, 'description': name,
+            })
+
+        # Cumulative percentages per category, reaching 100 at the last milestone;
+        # pay-to-vendor categories are only collected at the end
+        count = len(INFLOW_MILESTONES)
+        cumulative = {}
+        for cat in categories:
+            if cat['pay_to_vendor_directly']:
+                cumulative[cat['id']] = [0] * (count - 1) + [100]
+            else:
+                steps = np.sort(self.rng.choice(np.arange(5, 100, 5), count - 1, replace=False))
+                cumulative[cat['id']] = [int(s) for s in steps] + [100]
+
+        milestones = []
+        for order, (code, name, stage) in enumerate(INFLOW_MILESTONES):
+            milestone_id = self.ids('biz_model_milestones')
+            percentages = {cat_id: values[order] for cat_id, values in cumulative.items()}
+            milestones.append({'id': milestone_id, 'code': code, 'category_percentages': percentages})
+            self.emit('biz_model_milestones', {
+                'id': milestone_id, 'biz_model_id': biz_model_id, 'milestone_code': code,
+                'milestone_name': name, 'direction': 'inflow', 'stage_code': stage, 'description': name,
+                'is_mandatory': True, 'sequence_order': order + 1,
+                'category_percentages': json.dumps(percentages),
+            })
+        for order, (code, name, stage) in enumerate(OUTFLOW_MILESTONES, start=count + 1):
+            self.emit('biz_model_milestones', {
+                'id': self.ids('biz_model_milestones'), 'biz_model_id': biz_model_id,
+                'milestone_code': code, 'milestone_name': name, 'direction': 'outflow',
+                'stage_code': stage, 'description': name, 'is_mandatory': False,
+                'sequence_order': order, 'category_percentages': json.dumps({}),
+            })
+
+        return {'id': biz_model_id, 'category_rates': category_rates, 'gst_percentage': 18,
+                'milestones': milestones}
+
+    # -- estimation items (columnar) -------------------------------------
+
+    def make_items(self, categories, count):
+        """count random items as pricing columns plus descriptive columns"""
+        rng = self.rng
+        weights = np.array([CATEGORY_WEIGHTS.get(cat['id'], 1) for cat in categories], dtype=np.float64)
+        cat_idx = rng.choice(len(categories), count, p=weights / weights.sum())
+
+        # Catalog entries of every category laid end to end
+        catalogs = [ITEM_CATALOG.get(cat['id'], ITEM_CATALOG['misc']) for cat in categories]
+        entries = [entry for catalog in catalogs for entry in catalog]
+        sizes = np.array([len(catalog) for catalog in catalogs])
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        entry_idx = offsets[cat_idx] + np.floor(rng.random(count) * sizes[cat_idx]).astype(np.int64)
+
+        units = np.array([entry[1] for entry in entries], dtype=object)[entry_idx]
+        low = np.array([entry[2] for entry in entries], dtype=np.float64)[entry_idx]
+        high = np.array([entry[3] for entry in entries], dtype=np.float64)[entry_idx]
+        max_discount = np.array([cat.get('max_item_discount_percentage') or 0 for cat in categories],
+                                dtype=np.float64)[cat_idx]
+
+        is_sqft = units == 'sqft'
+        width = np.where(is_sqft, np.round(rng.uniform(2, 12, count), 1), np.nan)
+        height = np.where(is_sqft, np.round(rng.uniform(2, 9, count), 1), np.nan)
+        quantity = np.where(is_sqft, np.round(width * height, 2),
+                            np.where(units == 'no', rng.integers(1, 8, count), 1)).astype(np.float64)
+
+        item_discount = np.where(rng.random(count) < 0.3, np.floor(rng.random(count) * (max_discount + 1)), 0)
+        kg_discount = np.where(rng.random(count) < 0.2, rng.integers(0, 30, count), 0)
+
+        return {
+            'category': np.array([cat['id'] for cat in categories], dtype=object)[cat_idx],
+            'unit': units,
+            'width': width,
+            'height': height,
+            'quantity': quantity,
+            'unit_price': np.round(rng.uniform(low, high) / 10) * 10,
+            'item_discount_percentage': item_discount.astype(np.float64),
+            'discount_kg_charges_percentage': kg_discount.astype(np.float64),
+            'gst_percentage': np.full(count, np.nan),  # base rate
+            'room_name': np.array(ROOMS, dtype=object)[rng.integers(len(ROOMS), size=count)],
+            'item_name': np.array([entry[0] for entry in entries], dtype=object)[entry_idx],
+            'vendor_type': np.array(VENDOR_TYPES, dtype=object)[rng.integers(len(VENDOR_TYPES), size=count)],
+        }
+
+    def revise_items(self, columns, categories):
+        """Next version: ~10% repriced, ~3% dropped, ~5% new items"""
+        count = len(columns['category'])
+        keep = self.rng.random(count) >= 0.03
+        revised = {name: values[keep].copy() for name, values in columns.items()}
+        repriced = self.rng.random(len(revised['unit_price'])) < 0.1
+        revised['unit_price'] = np.where(
+            repriced, np.round(revised['unit_price'] * self.rng.uniform(0.9, 1.15, len(repriced)) / 10) * 10,
+            revised['unit_price'],
+        )
+        added = self.make_items(categories, max(1, int(count * 0.05)))
+        return {name: np.concatenate([revised[name], added[name]]) for name in revised}
+
+    # -- projects --------------------------------------------------------
+
+    def project(self):
+        """One project with its estimations, PRs, payments and ledger; returns its id"""
+        rng = self.rng
+        biz_model = self._pick(self.biz_models)
+        categories = biz_model['category_rates']['categories']
+        base_rates = {'category_rates': biz_model['category_rates'], 'gst_percentage': biz_model['gst_percentage']}
+        sales, estimator, finance = self.users['sales'], self.users['estimator'], self.users['finance']
+
+        project_id = self.ids('projects')
+        created_at = self.now - timedelta(days=float(rng.uniform(30, HISTORY_DAYS)))
+        customer_id = self._pick(self.customer_ids)
+        self.emit('projects', {
+            'id': project_id, 'project_code': f"KG-SYN-{project_id}", 'customer_id': customer_id,
+            'biz_model_id': biz_model['id'],
+            'name': f"{self._pick(LAST_NAMES)} Residence {self._pick(('2BHK', '3BHK', '4BHK', 'Villa'))}",
+            'location': self._pick(CITIES), 'stage': self._pick(STAGES)[0],
+            'status': 'active' if rng.random() < 0.85 else 'completed',
+            'sales_order_id': f"SO-SYN-{project_id}", 'start_date': created_at.date(),
+            'created_by': sales, 'created_at': created_at,
+        })
+        self.emit('project_base_rates', {
+            'id': self.ids('project_base_rates'), 'project_id': project_id,
+            'category_rates': json.dumps(biz_model['category_rates']),
+            'gst_percentage': biz_model['gst_percentage'], 'status': 'approved', 'active': True,
+            'created_by': sales, 'approved_by': sales, 'approved_at': created_at, 'created_at': created_at,
+        })
+
+        # Versioned estimations; only the last one is active
+        versions = int(rng.integers(1, self.max_versions + 1))
+        count = max(1, int(rng.normal(self.items_per_estimation, self.items_per_estimation * 0.2)))
+        columns = self.make_items(categories, count)
+        estimated_at = created_at
+        for version in range(1, versions + 1):
+            if version > 1:
+                columns = self.revise_items(columns, categories)
+            estimated_at = self._later(estimated_at, 1, 20)
+            active = version == versions
+            estimation = self._estimation(project_id, version, active, columns, base_rates, estimator, estimated_at)
+
+        # PRs decide the active items' status, but their rows may only be
+        # written after the items (a COPY round can start between any two rows)
+        pending = []
+        purchase_orders = self._purchase_requests(project_id, estimation, columns, base_rates, estimator,
+                                                  lambda table, row: pending.append((table, row)))
+        self._emit_estimation_items(estimation, columns)
+        for table, row in pending:
+            self.emit(table, row)
+
+        paid_at = self._customer_payments(project_id, customer_id, biz_model, estimation, finance)
+        self._vendor_payments(project_id, purchase_orders, finance, paid_at)
+        return project_id
+
+    def _estimation(self, project_id, version, active, columns, base_rates, user_id, when):
+        totals = calculate_all_totals(columns, base_rates)
+        estimation_id = self.ids('project_estimations')
+        self.emit('project_estimations', {
+            'id': estimation_id, 'project_id': project_id, 'created_by': user_id, 'version': version,
+            'status': 'draft' if active else 'finalized', 'source': 'csv_upload',
+            'csv_file_path': f"uploads/estimations/{project_id}/v{version}_upload.csv",
+            'uploaded_by': user_id, 'is_active': active,
+            'category_breakdown': json.dumps(totals['category_breakdown']),
+            'items_value': totals['items_value'], 'kg_charges': totals['kg_charges'],
+            'items_discount': totals['items_discount'], 'kg_discount': totals['kg_discount'],
+            'discount': totals['discount'], 'gst_amount': totals['gst_amount'],
+            'final_value': totals['final_value'], 'has_overpayment': False, 'overpayment_amount': 0,
+            'created_at': when, 'updated_at': when,
+        })
+        count = len(columns['category'])
+        estimation = {
+            'id': estimation_id, 'created_at': when, 'totals': totals, 'priced': totals['items'],
+            'item_ids': [self.ids('estimation_items') for _ in range(count)],
+            'item_status': ['Queued'] * count,
+        }
+        if not active:
+            self._emit_estimation_items(estimation, columns)
+        return estimation
+
+    def _emit_estimation_items(self, estimation, columns):
+        item_columns = TABLE_COLUMNS['estimation_items'][2:-2]  # id, estimation_id ... status, created_at
+        values = [_plain(columns[name] if name in columns else estimation['priced'][name])
+                  for name in item_columns]
+        for item_id, row, status in zip(estimation['item_ids'], zip(*values), estimation['item_status']):
+            self.emit('estimation_items', {
+                'id': item_id, 'estimation_id': estimation['id'], **dict(zip(item_columns, row)),
+                'status': status, 'created_at': estimation['created_at'],
+            })
+
+    def _purchase_requests(self, project_id, estimation, columns, base_rates, user_id, emit):
+        """
+        PRs over a random share of the active estimation's items
+        Most items become one PR item (weightage 1); some are split into
+        components that share the item (weightage 1/k each). Linked items of
+        non-cancelled PRs are marked 'PR Raised'. Rows go to emit; returns
+        the confirmed PRs.
+        """
+        rng = self.rng
+        count = len(estimation['item_ids'])
+        selected = np.flatnonzero(rng.random(count) < rng.uniform(0, 0.6))
+        gst_percentage = float(base_rates['gst_percentage'])
+        confirmed = []
+        sequence = 0
+        start = 0
+        while start < len(selected):
+            size = int(rng.integers(5, 40))
+            chunk = selected[start:start + size]
+            start += size
+
+            sequence += 1
+            pr_id = self.ids('purchase_requests')
+            status = self._pick(('confirmed',) * 15 + ('draft',) * 4 + ('cancelled',))
+            created_at = self._later(estimation['created_at'], 1, 60)
+            pr_items = []
+            for i in chunk:
+                quantity = float(columns['quantity'][i])
+                if quantity <= 0:
+                    continue
+                components = 1 if rng.random() < 0.85 else int(rng.integers(2, 4))
+                weightage = round(1 / components, 4)
+                for component in range(components):
+                    name = columns['item_name'][i]
+                    if components > 1:
+                        name = f"{name} - {PR_COMPONENTS[component]}"
+                    unit_price = _money(float(columns['unit_price'][i]) * 0.8 * weightage)
+                    pr_items.append(self._pr_item(pr_id, name, quantity, columns, i, unit_price,
+                                                  gst_percentage, status, user_id, created_at,
+                                                  link=(estimation['item_ids'][i], quantity, weightage)))
+                if status != 'cancelled':
+                    estimation['item_status'][i] = 'PR Raised'
+
+            if rng.random() < 0.05:
+                pr_items.append(self._pr_item(pr_id, 'Site consumables', 1.0, None, None,
+                                              _money(rng.uniform(2000, 20000)), gst_percentage,
+                                              status, user_id, created_at))
+
+            totals = {key: _money(sum(item[key] for item in pr_items))
+                      for key in ('subtotal', 'gst_amount', 'item_total')}
+            vendor_id = self._pick(self.vendor_ids)
+            emit('purchase_requests', {
+                'id': pr_id, 'pr_number': f"PR-{project_id}-{sequence:03d}", 'project_id': project_id,
+                'estimation_id': estimation['id'], 'vendor_id': vendor_id, 'status': status,
+                'created_by': user_id, 'expected_delivery_date': (created_at + timedelta(days=30)).date(),
+                'items_value': totals['subtotal'], 'gst_amount': totals['gst_amount'],
+                'final_value': totals['item_total'], 'created_at': created_at,
+            })
+            for item in pr_items:
+                link = item.pop('_link')
+                emit('purchase_request_items', item)
+                if link:
+                    emit('purchase_request_estimation_links', {
+                        'id': self.ids('purchase_request_estimation_links'), 'estimation_item_id': link[0],
+                        'purchase_request_item_id': item['id'], 'stable_item_id': item['stable_item_id'],
+                        'version': 1, 'linked_qty': link[1],
+                        'unit_purchase_request_item_weightage': link[2], 'created_at': created_at,
+                    })
+            if status == 'confirmed':
+                confirmed.append({'vendor_id': vendor_id, 'final_value': totals['item_total'],
+                                  'created_at': created_at})
+        return confirmed
+
+    def _pr_item(self, pr_id, name, quantity, columns, i, unit_price, gst_percentage, status,
+                 user_id, created_at, link=None):
+        """calculateItemPricing from lib/pricing-utils.js"""
+        subtotal = quantity * unit_price
+        gst_amount = subtotal * (gst_percentage / 100)
+        direct = columns is None
+        return {
+            'id': self.ids('purchase_request_items'), 'purchase_request_id': pr_id,
+            'purchase_request_item_name': name,
+            'category': 'misc' if direct else None, 'room_name': None,
+            'quantity': quantity,
+            'width': None if direct else columns['width'][i],
+            'height': None if direct else columns['height'][i],
+            'unit': 'lumpsum' if direct else columns['unit'][i],
+            'unit_price': unit_price, 'subtotal': _money(subtotal), 'gst_percentage': gst_percentage,
+            'gst_amount': _money(gst_amount), 'amount_before_gst': _money(subtotal),
+            'item_total': _money(subtotal + gst_amount), 'is_direct_purchase': direct,
+            'stable_item_id': self._uuid(), 'version': 1, 'lifecycle_status': 'pending',
+            'status': status, 'created_by': user_id, 'created_at': created_at, '_link': link,
+        }
+
+    def _customer_payments(self, project_id, customer_id, biz_model, estimation, user_id):
+        """
+        Milestone collections against the active estimation, in sequence
+        Each milestone collects its cumulative category target minus the
+        previous one (the calculate-payment rule); approved payments are
+        credited to the ledger. Returns the date of the last payment.
+        """
+        rng = self.rng
+        breakdown = estimation['totals']['category_breakdown']
+        milestones = biz_model['milestones']
+        reached = int(rng.integers(0, len(milestones) + 1))
+        paid_at = estimation['created_at']
+        previous_target = 0.0
+        for milestone in milestones[:reached]:
+            target = sum(float(breakdown[cat]['total']) * float(pct) / 100
+                         for cat, pct in milestone['category_percentages'].items() if cat in breakdown)
+            amount = _money(target - previous_target)
+            previous_target = target
+            if amount <= 0:
+                continue
+            if rng.random() < 0.2:
+                amount = _money(amount * rng.uniform(0.5, 1))
+
+            payment_id = self.ids('customer_payments')
+            paid_at = self._later(paid_at, 3, 45)
+            status = self._pick(('approved',) * 18 + ('pending', 'rejected'))
+            approved = status == 'approved'
+            self.emit('customer_payments', {
+                'id': payment_id, 'project_id': project_id, 'customer_id': customer_id,
+                'milestone_id': milestone['id'], 'payment_type': milestone['code'], 'amount': amount,
+                'payment_date': paid_at, 'mode': self._pick(PAYMENT_MODES),
+                'reference_number': f"SYN-RCPT-{payment_id}", 'remarks': f"{milestone['code']} collection",
+                'status': status, 'approved_by': user_id if approved else None,
+                'approved_at': paid_at if approved else None, 'created_by': user_id, 'created_at': paid_at,
+            })
+            if approved:
+                self.emit('project_ledger', {
+                    'id': self.ids('project_ledger'), 'project_id': project_id,
+                    'source_table': 'customer_payments', 'source_id': payment_id, 'entry_type': 'credit',
+                    'amount': amount, 'entry_date': paid_at, 'remarks': f"Payment received: {milestone['code']}",
+                })
+        return paid_at
+
+    def _vendor_payments(self, project_id, purchase_orders, user_id, after):
+        """Advance and (sometimes) final payments on confirmed PRs, debited to the ledger"""
+        rng = self.rng
+        for order in purchase_orders:
+            if rng.random() < 0.3 or order['final_value'] <= 0:
+                continue
+            advance = _money(order['final_value'] * rng.uniform(0.3, 0.5))
+            stages = [('advance', advance)]
+            if rng.random() < 0.5:
+                stages.append(('final', _money(order['final_value'] - advance)))
+            paid_at = max(order['created_at'], after)
+            for stage, amount in stages:
+                if amount <= 0:
+                    continue
+                payment_id = self.ids('payments_out')
+                paid_at = self._later(paid_at, 1, 30)
+                self.emit('payments_out', {
+                    'id': payment_id, 'vendor_id': order['vendor_id'], 'project_id': project_id,
+                    'payment_stage': stage, 'amount': amount, 'payment_date': paid_at,
+                    'mode': self._pick(PAYMENT_MODES), 'reference_number': f"SYN-VPAY-{payment_id}",
+                    'remarks': f"Vendor {stage} payment", 'created_by': user_id, 'created_at': paid_at,
+                })
+                self.emit('project_ledger', {
+                    'id': self.ids('project_ledger'), 'project_id': project_id,
+                    'source_table': 'payments_out', 'source_id': payment_id, 'entry_type': 'debit',
+                    'amount': amount, 'entry_date': paid_at, 'remarks': f"Vendor {stage} payment",
+                })
+
+
+def _set_maintained_triggers(cursor, enabled):
+    action = 'ENABLE' if enabled else 'DISABLE'
+    for table, trigger in MAINTAINED_TRIGGERS:
+        cursor.execute(f"ALTER TABLE {table} {action} TRIGGER {trigger}")
+
+
+def generate(conn, projects=DEFAULT_PROJECTS, items_per_estimation=DEFAULT_ITEMS_PER_ESTIMATION,
+             max_versions=DEFAULT_MAX_VERSIONS, biz_models=DEFAULT_BIZ_MODELS, customers=None,
+             vendors=DEFAULT_VENDORS, seed=None, chunk_projects=DEFAULT_CHUNK_PROJECTS,
+             batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """
+    Load a synthetic dataset
+
+    Reference data commits first, then projects in chunks of chunk_projects;
+    each chunk is loaded with the maintained triggers off and backfilled
+    before it commits. progress(done, total) is called after every chunk.
+
+    Returns:
+        Counter of rows written per table
+    """
+    cursor = conn.cursor()
+    writer = CopyWriter(cursor, batch_rows)
+    generator = DatasetGenerator(np.random.default_rng(seed), SequenceIds(cursor), writer,
+                                 items_per_estimation=items_per_estimation, max_versions=max_versions)
+    try:
+        generator.setup(biz_models=biz_models, customers=customers or max(1, int(projects * 0.9)),
+                        vendors=vendors)
+        writer.flush()
+        conn.commit()
+
+        done = 0
+        while done < projects:
+            _set_maintained_triggers(cursor, enabled=False)
+            project_ids = [generator.project() for _ in range(min(chunk_projects, projects - done))]
+            writer.flush()
+            for sql in DERIVE_SQL:
+                cursor.execute(sql, {'lo': min(project_ids), 'hi': max(project_ids)})
+            _set_maintained_triggers(cursor, enabled=True)
+            conn.commit()
+
+            done += len(project_ids)
+            if progress:
+                progress(done, projects)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return writer.counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load a synthetic production-scale dataset')
+    parser.add_argument('--projects', type=int, default=DEFAULT_PROJECTS)
+    parser.add_argument('--items-per-estimation', type=int, default=DEFAULT_ITEMS_PER_ESTIMATION,
+                        help='mean items in a project\'s first estimation')
+    parser.add_argument('--max-versions', type=int, default=DEFAULT_MAX_VERSIONS,
+                        help='estimation versions per project are uniform in 1..N')
+    parser.add_argument('--biz-models', type=int, default=DEFAULT_BIZ_MODELS)
+    parser.add_argument('--customers', type=int, help='default: 90%% of --projects')
+    parser.add_argument('--vendors', type=int, default=DEFAULT_VENDORS)
+    parser.add_argument('--seed', type=int, help='fix the generated data')
+    parser.add_argument('--chunk-projects', type=int, default=DEFAULT_CHUNK_PROJECTS,
+                        help='projects per committed chunk')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='rows per COPY round')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        print(f"   {done}/{total} projects ({time.perf_counter() - started:.1f}s)", flush=True)
+
+    conn = db.connect()
+    try:
+        counts = generate(conn, projects=args.projects, items_per_estimation=args.items_per_estimation,
+                          max_versions=args.max_versions, biz_models=args.biz_models,
+                          customers=args.customers, vendors=args.vendors, seed=args.seed,
+                          chunk_projects=args.chunk_projects, batch_rows=args.batch_rows,
+                          progress=progress)
+    finally:
+        conn.close()
+
+    print(f"✅ Synthetic dataset loaded in {time.perf_counter() - started:.1f}s")
+    for table in TABLE_COLUMNS:
+        if counts[table]:
+            print(f"   {table:<36} {counts[table]:>12,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
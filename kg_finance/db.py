@@ -0,0 +1,191 @@
+"""
+Shared Database Access
+One thread-safe psycopg2 connection pool per process for the toolkit and the
+backend test / simulation scripts, so a run reuses a handful of SSL
+connections instead of opening one per helper call.
+
+The DSN comes from the environment (DATABASE_URL, same variable as the
+Next.js app). Pool size is DB_POOL_MAX (default 10).
+
+Usage:
+    from kg_finance import db
+
+    conn = db.connect()          # pooled; conn.close() returns it to the pool
+    ...
+    conn.close()
+
+    with db.connection() as conn:    # commit on success, rollback on error
+        ...
+
+    with db.connect() as conn:       # same, like a psycopg2 connection
+        ...
+
+    for row in db.iter_rows(conn, "SELECT * FROM estimation_items"):
+        ...                          # server-side cursor, bounded memory
+
+    buf = io.StringIO()
+    buf.write(db.copy_line([1, None, '']))     # NULL and '' kept apart
+    db.copy_csv(cursor, 'estimation_items', ('id', 'width', 'room_name'), buf)
+"""
+
+import atexit
+import math
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_POOL_MAX = 10
+DEFAULT_ITERSIZE = 2000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def database_url():
+    """DSN from DATABASE_URL"""
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        raise RuntimeError('DATABASE_URL is not set')
+    return url
+
+
+def get_pool():
+    """Process-wide ThreadedConnectionPool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                max_conn = int(os.environ.get('DB_POOL_MAX', DEFAULT_POOL_MAX))
+                _pool = ThreadedConnectionPool(1, max_conn, database_url())
+    return _pool
+
+
+def close_pool():
+    """Close every pooled connection (registered with atexit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+atexit.register(close_pool)
+
+
+class PooledConnection:
+    """
+    psycopg2 connection borrowed from the pool
+    Behaves like the connection itself; close() hands it back to the pool
+    instead of closing the socket, rolling back anything left uncommitted.
+    As a context manager it commits on a clean exit and rolls back on an
+    exception (like psycopg2), then returns the connection to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if not self.closed:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        self._pool.putconn(conn, close=broken)
+
+
+def connect():
+    """Borrow a connection from the pool"""
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+@contextmanager
+def connection():
+    """Pooled connection that commits on success and rolls back on error"""
+    conn = connect()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def iter_rows(conn, sql, params=None, itersize=DEFAULT_ITERSIZE, cursor_factory=None):
+    """
+    Stream a large result through a named (server-side) cursor
+    Rows are fetched itersize at a time, so memory stays flat regardless of
+    table size. Must be consumed inside the connection's transaction.
+    """
+    name = f"kg_{uuid.uuid4().hex}"
+    cursor = conn.cursor(name=name, cursor_factory=cursor_factory)
+    cursor.itersize = itersize
+    try:
+        cursor.execute(sql, params)
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def copy_field(value):
+    """
+    One field of COPY ... (FORMAT csv) input
+    None (and NaN) is a bare empty field, which COPY loads as NULL; everything
+    else is quoted, so '' stays an empty string. csv.QUOTE_NONNUMERIC cannot be
+    used for this: it writes None as "" too, which COPY reads as ''.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if hasattr(value, 'item'):  # numpy scalars
+        return copy_field(value.item())
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_line(values):
+    """One COPY csv row, newline included"""
+    return ','.join(copy_field(value) for value in values) + '\n'
+
+
+def copy_csv(cursor, table, columns, buf):
+    """COPY the copy_line rows in buf into table"""
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
@@ -0,0 +1,248 @@
+"""
+Estimation CSV Bulk Loader
+Python counterpart of app/api/projects/[id]/estimations/upload/route.js for
+the archived uploads in uploads/estimations/<project_id>/vN_upload.csv.
+
+Rows are read in fixed-size batches, priced with kg_finance.pricing and
+streamed into estimation_items with COPY, so memory stays bounded by the
+batch size and tens of thousands of rows load in a few seconds.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m kg_finance.estimation_loader \\
+        uploads/estimations/12/v3_upload.csv [--project-id 12] [--user-id 1] [--batch-size 5000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+from pathlib import Path
+
+from kg_finance import db
+from kg_finance.pricing import (
+    CategoryTotalsAccumulator,
+    calculate_item_totals,
+    items_to_columns,
+    js_parse_float,
+)
+
+ESTIMATION_ITEM_STATUS_QUEUED = 'Queued'
+PAYMENT_STATUS_APPROVED = 'approved'
+DEFAULT_BATCH_SIZE = 5000
+
+# Column order used for COPY (matches the upload route's INSERT)
+COPY_COLUMNS = (
+    'estimation_id', 'category', 'room_name', 'item_name',
+    'unit', 'width', 'height', 'quantity', 'unit_price', 'subtotal',
+    'karighar_charges_percentage', 'karighar_charges_amount',
+    'item_discount_percentage', 'item_discount_amount',
+    'discount_kg_charges_percentage', 'discount_kg_charges_amount',
+    'gst_percentage', 'amount_before_gst', 'gst_amount', 'item_total',
+    'status',
+)
+
+PRICED_COLUMNS = (
+    'subtotal',
+    'karighar_charges_percentage', 'karighar_charges_amount',
+    'item_discount_percentage', 'item_discount_amount',
+    'discount_kg_charges_percentage', 'discount_kg_charges_amount',
+    'gst_percentage', 'amount_before_gst', 'gst_amount', 'item_total',
+)
+
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _number_or(value, default):
+    """JS `parseFloat(value) || default`"""
+    parsed = js_parse_float(value)
+    return default if math.isnan(parsed) or parsed == 0 else parsed
+
+
+def normalize_row(row):
+    """Same field handling as the upload route"""
+    unit = row.get('unit')
+    return {
+        'category': _strip(row.get('category')),
+        'room_name': _strip(row.get('room_name')),
+        'item_name': _strip(row.get('item_name')),
+        'quantity': _number_or(row.get('quantity'), 0),
+        'unit': unit.lower().strip() if isinstance(unit, str) else unit,
+        'unit_price': _number_or(row.get('unit_price'), 0),
+        'width': _number_or(row.get('width'), None),
+        'height': _number_or(row.get('height'), None),
+        'item_discount_percentage': _number_or(row.get('item_discount_percentage'), 0),
+        'discount_kg_charges_percentage': _number_or(row.get('discount_kg_charges_percentage'), 0),
+        'status': _strip(row.get('status')) or ESTIMATION_ITEM_STATUS_QUEUED,
+    }
+
+
+def read_csv_batches(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield normalized rows in lists of at most batch_size"""
+    with open(path, newline='', encoding='utf-8') as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if header is None:
+            return
+        # transformHeader: header.toLowerCase().trim()
+        header = [name.lower().strip() for name in header]
+
+        batch = []
+        for values in reader:
+            # skipEmptyLines
+            if not values or all(v == '' for v in values):
+                continue
+            batch.append(normalize_row(dict(zip(header, values))))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def copy_items(cursor, estimation_id, rows, priced):
+    """Stream one batch of priced rows into estimation_items with COPY"""
+    buf = io.StringIO()
+    for i, row in enumerate(rows):
+        buf.write(db.copy_line(
+            [estimation_id]
+            + [row['category'], row['room_name'], row['item_name'], row['unit']]
+            + [row['width'], row['height'], row['quantity'], row['unit_price']]
+            + [float(priced[name][i]) for name in PRICED_COLUMNS]
+            + [row['status']]
+        ))
+    db.copy_csv(cursor, 'estimation_items', COPY_COLUMNS, buf)
+
+
+def project_id_from_path(path):
+    """uploads/estimations/<project_id>/vN_upload.csv -> project_id"""
+    return int(Path(path).parent.name)
+
+
+def load_estimation_csv(conn, path, project_id=None, user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load an archived estimation CSV as the project's new active version
+
+    Returns:
+        dict with estimation_id, version, items_count and final_value
+    """
+    project_id = project_id if project_id is not None else project_id_from_path(path)
+    relative_path = os.path.relpath(path) if os.path.isabs(path) else str(path)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT p.id, pbr.category_rates, pbr.gst_percentage
+            FROM projects p
+            LEFT JOIN project_base_rates pbr ON p.id = pbr.project_id AND pbr.active = 'true'
+            WHERE p.id = %s
+        """, (project_id,))
+        project = cursor.fetchone()
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+
+        base_rates = {'category_rates': project[1], 'gst_percentage': project[2]}
+        if not base_rates['category_rates'] or not base_rates['category_rates'].get('categories'):
+            raise ValueError('Project base rates not configured')
+        categories = base_rates['category_rates']['categories']
+
+        # Same allocation as lib/counters.js nextCounterValue
+        cursor.execute("""
+            INSERT INTO counters (name, scope_id, value)
+            VALUES ('estimation_version', %s, 1)
+            ON CONFLICT (name, scope_id) DO UPDATE SET value = counters.value + 1, updated_at = NOW()
+            RETURNING value
+        """, (project_id,))
+        version = cursor.fetchone()[0]
+
+        cursor.execute("""
+            UPDATE project_estimations
+            SET is_active = false
+            WHERE project_id = %s AND is_active = true
+        """, (project_id,))
+
+        # Totals are filled in once every batch has been priced
+        cursor.execute("""
+            INSERT INTO project_estimations (
+                project_id, version, source, csv_file_path, uploaded_by,
+                is_active, status, created_at, updated_at
+            ) VALUES (%s, %s, 'csv_upload', %s, %s, true, 'draft', NOW(), NOW())
+            RETURNING id
+        """, (project_id, version, relative_path, user_id))
+        estimation_id = cursor.fetchone()[0]
+
+        accumulator = CategoryTotalsAccumulator(categories)
+        for rows in read_csv_batches(path, batch_size):
+            priced = calculate_item_totals(items_to_columns(rows), base_rates)
+            accumulator.add(priced)
+            copy_items(cursor, estimation_id, rows, priced)
+
+        if accumulator.count == 0:
+            raise ValueError('CSV file is empty')
+
+        totals = accumulator.result()
+
+        cursor.execute("""
+            SELECT COALESCE(SUM(amount), 0)
+            FROM customer_payments
+            WHERE project_id = %s AND status = %s
+        """, (project_id, PAYMENT_STATUS_APPROVED))
+        total_collected = float(cursor.fetchone()[0])
+        has_overpayment = total_collected > totals['final_value']
+        overpayment_amount = total_collected - totals['final_value'] if has_overpayment else 0
+
+        cursor.execute("""
+            UPDATE project_estimations
+            SET category_breakdown = %s,
+                items_value = %s, kg_charges = %s, items_discount = %s, kg_discount = %s,
+                discount = %s, gst_amount = %s, final_value = %s,
+                has_overpayment = %s, overpayment_amount = %s
+            WHERE id = %s
+        """, (
+            json.dumps(totals['category_breakdown']),
+            totals['items_value'], totals['kg_charges'], totals['items_discount'],
+            totals['kg_discount'], totals['discount'], totals['gst_amount'], totals['final_value'],
+            has_overpayment, overpayment_amount,
+            estimation_id,
+        ))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return {
+        'project_id': project_id,
+        'estimation_id': estimation_id,
+        'version': version,
+        'items_count': accumulator.count,
+        'final_value': totals['final_value'],
+    }
+
+
+def main(argv=None):
+    """Load one or more archived estimation CSVs"""
+    parser = argparse.ArgumentParser(description='Bulk-load archived estimation CSV uploads')
+    parser.add_argument('paths', nargs='+', help='uploads/estimations/<project_id>/vN_upload.csv')
+    parser.add_argument('--project-id', type=int, help='Override the project id taken from the path')
+    parser.add_argument('--user-id', type=int, help='Recorded as uploaded_by')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        for path in args.paths:
+            result = load_estimation_csv(conn, path, args.project_id, args.user_id, args.batch_size)
+            print(f"✅ {path}: project {result['project_id']} v{result['version']} "
+                  f"({result['items_count']} items, ₹{result['final_value']:,.2f})")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
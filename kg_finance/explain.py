@@ -0,0 +1,787 @@
+"""
+EXPLAIN Plan Regression Suite
+Extracts the parameterised SQL that app/api/**/route.js and lib/*.js pass to
+query(), namedQuery() or a withTransaction tx, runs
+each statement with EXPLAIN (ANALYZE, BUFFERS) against a database (normally
+the kg_finance.datagen dataset) and records plan shape, rows, buffers and
+timings.
+
+Extraction is static: template literals, strings built up with +=, ternary
+interpolations (the non-empty branch, i.e. the widest variant) and
+same-file SQL helper functions are resolved; SQL assembled at run time
+(e.g. SET clauses from updates.join()) is listed as skipped with the reason.
+Parameters are bound from a sample project (by default the one with the
+largest active estimation) by parameter name - projectId, milestone_id,
+limit, cursor ... - and otherwise from the type Postgres infers at PREPARE.
+Every statement runs inside a transaction that is rolled back, so
+INSERT/UPDATE/DELETE are analyzed without changing data.
+
+Flags:
+    seq_scan      Seq Scan on a table with more than --large-table rows
+    plan_changed  plan shape differs from the baseline
+    slower        execution time grew by more than --threshold
+    more_buffers  shared buffers touched grew by more than --threshold
+    error         the statement failed (and did not in the baseline)
+
+Usage:
+    python -m kg_finance.explain --list
+    python -m kg_finance.explain --json plans.json
+    python -m kg_finance.explain --baseline plans.json --fail
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIRS = ('app/api', 'lib')
+SKIP_FILES = ('lib/db.js',)  # query() itself
+CONSTANTS_FILE = 'app/constants.js'
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+DEFAULT_LARGE_TABLE = 10000  # rows
+DEFAULT_THRESHOLD = 0.5  # +50%
+DEFAULT_TIMEOUT_MS = 60000
+MIN_SLOWDOWN_MS = 1.0  # ignore changes below timer noise
+MIN_BUFFER_GROWTH = 100  # blocks
+
+# Parameter expression (lowercased, alphanumerics only) -> sample key, first match wins
+PARAM_RULES = (
+    (r'cursor', 'cursor'),
+    (r'limit', 'limit'),
+    (r'offset', 'offset'),
+    (r'filter|search', 'filter'),
+    (r'estimationitem', 'estimation_item_id'),
+    (r'estimation', 'estimation_id'),
+    (r'milestone', 'milestone_id'),
+    (r'baserate', 'base_rate_id'),
+    (r'bizmodel', 'biz_model_id'),
+    (r'prid$|purchaserequestid|purchaserequest$', 'purchase_request_id'),
+    (r'invoice', 'invoice_id'),
+    (r'boq', 'vendor_boq_id'),
+    (r'paymentid', 'customer_payment_id'),
+    (r'vendor', 'vendor_id'),
+    (r'customer', 'customer_id'),
+    (r'project', 'project_id'),
+    (r'user|session|actor|approvedby|createdby', 'user_id'),
+)
+
+# Route folder -> what params.id means there
+ROUTE_ID_KEYS = {
+    'projects': 'project_id',
+    'vendors': 'vendor_id',
+    'customers': 'customer_id',
+    'biz-models': 'biz_model_id',
+}
+
+FIXED_SAMPLES = {'cursor': None, 'limit': 51, 'offset': 0, 'filter': '%a%'}
+
+# Sample ids, resolved in order; later queries may use earlier keys
+SAMPLE_SQL = (
+    ('project_id', """
+        SELECT pe.project_id FROM project_estimations pe
+        WHERE pe.is_active = true
+        ORDER BY (SELECT COUNT(*) FROM estimation_items ei WHERE ei.estimation_id = pe.id) DESC
+        LIMIT 1
+    """),
+    ('estimation_id', "SELECT id FROM project_estimations WHERE project_id = %(project_id)s AND is_active = true LIMIT 1"),
+    ('estimation_item_id', "SELECT id FROM estimation_items WHERE estimation_id = %(estimation_id)s LIMIT 1"),
+    ('milestone_id', """
+        SELECT m.id FROM biz_model_milestones m JOIN projects p ON p.biz_model_id = m.biz_model_id
+        WHERE p.id = %(project_id)s AND m.direction = 'inflow'
+        ORDER BY m.sequence_order DESC LIMIT 1
+    """),
+    ('biz_model_id', "SELECT biz_model_id FROM projects WHERE id = %(project_id)s"),
+    ('customer_id', "SELECT customer_id FROM projects WHERE id = %(project_id)s"),
+    ('user_id', "SELECT created_by FROM projects WHERE id = %(project_id)s"),
+    ('base_rate_id', "SELECT id FROM project_base_rates WHERE project_id = %(project_id)s AND active = true LIMIT 1"),
+    ('purchase_request_id', "SELECT id FROM purchase_requests WHERE project_id = %(project_id)s ORDER BY id DESC LIMIT 1"),
+    ('vendor_id', """
+        SELECT vendor_id FROM purchase_requests
+        WHERE project_id = %(project_id)s AND vendor_id IS NOT NULL LIMIT 1
+    """),
+    ('customer_payment_id', "SELECT id FROM customer_payments WHERE project_id = %(project_id)s ORDER BY id DESC LIMIT 1"),
+    ('invoice_id', "SELECT id FROM project_invoices WHERE project_id = %(project_id)s ORDER BY id DESC LIMIT 1"),
+    ('vendor_boq_id', "SELECT id FROM vendor_boqs WHERE project_id = %(project_id)s LIMIT 1"),
+)
+
+# Fallback parameter values by the type Postgres inferred
+TYPE_DEFAULTS = {
+    'integer': '1', 'bigint': '1', 'smallint': '1', 'numeric': '1', 'double precision': '1', 'real': '1',
+    'boolean': 'true', 'date': 'today',
+    'timestamp with time zone': 'now', 'timestamp without time zone': 'now',
+    'json': '{}', 'jsonb': '{}', 'uuid': '00000000-0000-0000-0000-000000000000',
+}
+TEXT_DEFAULT = 'explain'
+
+
+class DynamicSQL(Exception):
+    """SQL (or a piece of it) that is only known at run time"""
+
+
+# -- JavaScript scanning ------------------------------------------------------
+
+_OPEN = {'(': ')', '[': ']', '{': '}'}
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*$')
+_PLACEHOLDER = re.compile(r'\$(\d+)')
+
+
+def _skip_string(src, i):
+    """Index just past the '...' / "..." string starting at i"""
+    quote = src[i]
+    i += 1
+    while src[i] != quote:
+        i += 2 if src[i] == '\\' else 1
+    return i + 1
+
+
+def _read_template(src, i):
+    """Parse the template literal at i -> ([('text', s) | ('expr', s)], end)"""
+    parts, text = [], []
+    i += 1
+    while src[i] != '`':
+        if src[i] == '\\':
+            text.append(src[i + 1])
+            i += 2
+        elif src.startswith('${', i):
+            expr, i = _read_balanced(src, i + 1)
+            parts.append(('text', ''.join(text)))
+            parts.append(('expr', expr[1:-1].strip()))
+            text = []
+        else:
+            text.append(src[i])
+            i += 1
+    parts.append(('text', ''.join(text)))
+    return [part for part in parts if part != ('text', '')], i + 1
+
+
+def _read_balanced(src, i):
+    """Text of the bracketed expression starting at src[i] and the index after it"""
+    stack, start = [], i
+    while True:
+        ch = src[i]
+        if ch in '\'"':
+            i = _skip_string(src, i)
+            continue
+        if ch == '`':
+            _, i = _read_template(src, i)
+            continue
+        if src.startswith('//', i):
+            i = src.index('\n', i)
+            continue
+        if src.startswith('/*', i):
+            i = src.index('*/', i) + 2
+            continue
+        if ch in _OPEN:
+            stack.append(_OPEN[ch])
+        elif stack and ch == stack[-1]:
+            stack.pop()
+            if not stack:
+                return src[start:i + 1], i + 1
+        i += 1
+
+
+def _strip_comments(text):
+    """JS source without // and /* */ comments (strings and templates kept)"""
+    out, i = [], 0
+    while i < len(text):
+        ch = text[i]
+        if ch in '\'"`':
+            end = _skip_string(text, i) if ch != '`' else _read_template(text, i)[1]
+            out.append(text[i:end])
+            i = end
+        elif text.startswith('//', i):
+            i = text.find('\n', i) if '\n' in text[i:] else len(text)
+        elif text.startswith('/*', i):
+            i = text.index('*/', i) + 2
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def split_top_level(text, separator=','):
+    """Split a JS expression list on separators outside brackets and strings"""
+    text = _strip_comments(text)
+    pieces, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if ch in '\'"':
+            i = _skip_string(text, i)
+            continue
+        if ch == '`':
+            _, i = _read_template(text, i)
+            continue
+        if ch in _OPEN:
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            pieces.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    pieces.append(text[start:].strip())
+    return [piece for piece in pieces if piece]
+
+
+def _split_ternary(expr):
+    """'a ? b : c' -> (a, b, c) at the top level, else None"""
+    depth, question, i = 0, None, 0
+    while i < len(expr):
+        ch = expr[i]
+        if ch in '\'"':
+            i = _skip_string(expr, i)
+            continue
+        if ch == '`':
+            _, i = _read_template(expr, i)
+            continue
+        if ch in _OPEN:
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        elif depth == 0 and ch == '?' and expr[i + 1:i + 2] not in ('.', '?') and expr[i - 1] != '?':
+            if question is None:
+                question = i
+        elif depth == 0 and ch == ':' and question is not None:
+            return expr[:question].strip(), expr[question + 1:i].strip(), expr[i + 1:].strip()
+        i += 1
+    return None
+
+
+class SourceFile:
+    """One JS file: its text plus what the resolver needs to look up"""
+
+    def __init__(self, path, root=REPO_ROOT, constants=None):
+        self.path = os.path.relpath(path, root).replace(os.sep, '/')
+        with open(path, encoding='utf-8') as f:
+            self.src = f.read()
+        self.constants = constants or {}
+
+    def line_of(self, pos):
+        return self.src.count('\n', 0, pos) + 1
+
+    def declaration(self, name, before):
+        """(value text, end) of the last `const|let|var name = value` before a position"""
+        found = None
+        for match in re.finditer(rf'\b(?:const|let|var)\s+{re.escape(name)}\s*=\s*', self.src[:before]):
+            found = match
+        if not found:
+            return None
+        return self._value_at(found.end())
+
+    def _value_at(self, i):
+        """The single JS value (literal, bracketed expression or arrow function) at i"""
+        ch = self.src[i]
+        if ch == '`':
+            _, end = _read_template(self.src, i)
+        elif ch in '\'"':
+            end = _skip_string(self.src, i)
+        elif ch in _OPEN:
+            _, end = _read_balanced(self.src, i)
+            arrow = re.match(r'\s*=>\s*', self.src[end:])
+            if ch == '(' and arrow:
+                _, end = self._value_at(end + arrow.end())
+        else:
+            end = re.match(r'[^;\n]*', self.src[i:]).end() + i
+        return self.src[i:end].strip(), end
+
+    def appends(self, name, start, end, operator):
+        """Values appended between start and end with name += v / name.push(v)"""
+        pattern = rf'\b{re.escape(name)}\s*\+=\s*' if operator == '+=' else rf'\b{re.escape(name)}\.push\('
+        values = []
+        for match in re.finditer(pattern, self.src[start:end]):
+            pos = start + match.end()
+            if operator == '+=':
+                values.append(self._value_at(pos)[0])
+            else:
+                args, _ = _read_balanced(self.src, pos - 1)
+                values.extend(split_top_level(args[1:-1]))
+        return values
+
+
+def _resolve_string(expr, source, before, bindings=None):
+    """SQL text of a JS string expression, or raise DynamicSQL"""
+    expr = expr.strip()
+    bindings = bindings or {}
+    if expr.startswith('`'):
+        parts, end = _read_template(expr, 0)
+        if end != len(expr):
+            raise DynamicSQL(expr)
+        return ''.join(value if kind == 'text' else _resolve_interpolation(value, source, before, bindings)
+                       for kind, value in parts)
+    if expr[:1] in '\'"':
+        end = _skip_string(expr, 0)
+        if end != len(expr):
+            raise DynamicSQL(expr)
+        return re.sub(r'\\(.)', r'\1', expr[1:-1])
+    if expr in bindings:
+        return bindings[expr]
+    if _IDENTIFIER.match(expr):
+        declared = source.declaration(expr, before)
+        if declared is None:
+            raise DynamicSQL(expr)
+        value, end = declared
+        try:
+            text = _resolve_string(value, source, before, bindings)
+            return text + ''.join(_resolve_string(extra, source, before, bindings)
+                                  for extra in source.appends(expr, end, before, '+='))
+        except DynamicSQL:
+            raise DynamicSQL(expr) from None
+    raise DynamicSQL(expr)
+
+
+def _resolve_interpolation(expr, source, before, bindings):
+    """${...} inside SQL: ternaries take the non-empty branch, helpers are inlined"""
+    ternary = _split_ternary(expr)
+    if ternary:
+        _, when_true, when_false = ternary
+        for branch in (when_true, when_false):
+            text = _resolve_string(branch, source, before, bindings)
+            if text.strip():
+                return text
+        return ''
+
+    call = re.match(r'([A-Za-z_$][\w$]*)\((.*)\)$', expr, re.S)
+    if call:
+        declared = source.declaration(call.group(1), before)
+        helper = declared and re.match(r'\((.*?)\)\s*=>\s*(`.*`)$', declared[0], re.S)
+        if not helper:
+            raise DynamicSQL(expr)
+        names = split_top_level(helper.group(1))
+        args = [_resolve_string(arg, source, before, bindings) for arg in split_top_level(call.group(2))]
+        return _resolve_string(helper.group(2), source, before, {**bindings, **dict(zip(names, args))})
+
+    return _resolve_string(expr, source, before, bindings)
+
+
+def _param_expressions(expr, source, before):
+    """Parameter expressions of a query() call, or None when unknown"""
+    if expr is None:
+        return []
+    if expr.startswith('['):
+        return split_top_level(expr[1:-1])
+    if _IDENTIFIER.match(expr):
+        declared = source.declaration(expr, before)
+        if declared and declared[0].startswith('['):
+            value, end = declared
+            return split_top_level(value[1:-1]) + source.appends(expr, end, before, 'push')
+    return None
+
+
+def normalize_sql(sql):
+    """Whitespace-collapsed SQL, the identity of a statement"""
+    return ' '.join(sql.split())
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def statement_kind(sql):
+    """First keyword, upper case (comments stripped)"""
+    text = re.sub(r'--[^\n]*|/\*.*?\*/', ' ', sql, flags=re.S).strip()
+    match = re.match(r'\(*\s*([A-Za-z]+)', text)
+    return match.group(1).upper() if match else ''
+
+
+def load_constants(root=REPO_ROOT):
+    """NAME.KEY -> value for the string constants exported from app/constants.js"""
+    path = os.path.join(root, CONSTANTS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        src = f.read()
+    constants = {}
+    for block in re.finditer(r'export const (\w+)\s*=\s*\{(.*?)\}', src, re.S):
+        for key, value in re.findall(r'[\'"]?([\w]+)[\'"]?\s*:\s*[\'"]([^\'"]*)[\'"]', block.group(2)):
+            constants[f"{block.group(1)}.{key}"] = value
+    return constants
+
+
+def _route_key(path):
+    """Sample key that params.id stands for in this route file"""
+    parts = path.split('/')
+    for i, part in enumerate(parts[:-1]):
+        if parts[i + 1] == '[id]':
+            return ROUTE_ID_KEYS.get(part)
+    return None
+
+
+def _call_arguments(source):
+    """(position, [sql, params, ...]) for each query(), namedQuery(name, ...) and tx() statement"""
+    for match in re.finditer(r'(?<![\w$])((?:\w+\.)?query|namedQuery|tx)\(', source.src):
+        if re.search(r'function\s+$', source.src[:match.start()]):
+            continue
+        args_text, _ = _read_balanced(source.src, match.end() - 1)
+        args = split_top_level(args_text[1:-1])
+        if match.group(1) == 'namedQuery':
+            args = args[1:]
+        yield match.start(), args
+
+
+def extract_file(path, root=REPO_ROOT, constants=None):
+    """Statements passed to query(), namedQuery() or a withTransaction tx in one JS file"""
+    source = SourceFile(path, root, constants)
+    statements = []
+    for position, args in _call_arguments(source):
+        if not args:
+            continue
+        statement = {'file': source.path, 'line': source.line_of(position), 'route_key': _route_key(source.path)}
+        try:
+            sql = _resolve_string(args[0], source, position)
+        except DynamicSQL as e:
+            statement.update(id=None, sql=None, kind=None, params=None, skip=f"dynamic SQL: {str(e)[:80]}")
+            statements.append(statement)
+            continue
+        kind = statement_kind(sql)
+        if kind in TRANSACTION_CONTROL:
+            continue
+        params = _param_expressions(args[1] if len(args) > 1 else None, source, position)
+        statement.update(
+            id=fingerprint(sql), sql=sql.strip(), kind=kind, params=params,
+            skip=None if kind in EXPLAINABLE else f"not DML ({kind})",
+        )
+        statements.append(statement)
+    return statements
+
+
+def extract_statements(root=REPO_ROOT, source_dirs=SOURCE_DIRS):
+    """Every statement in the routes and lib, one entry per distinct SQL text"""
+    constants = load_constants(root)
+    by_id, statements = {}, []
+    for source_dir in source_dirs:
+        for dirpath, _, filenames in sorted(os.walk(os.path.join(root, source_dir))):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if not filename.endswith('.js') or os.path.relpath(path, root) in SKIP_FILES:
+                    continue
+                for statement in extract_file(path, root, constants):
+                    location = f"{statement['file']}:{statement['line']}"
+                    if statement['id'] and statement['id'] in by_id:
+                        by_id[statement['id']]['locations'].append(location)
+                        continue
+                    statement['locations'] = [location]
+                    if statement['id']:
+                        by_id[statement['id']] = statement
+                    statements.append(statement)
+    return statements
+
+
+# -- Binding and running ------------------------------------------------------
+
+def resolve_samples(conn, project_id=None):
+    """Sample ids for parameter binding, all taken from one project"""
+    import psycopg2
+
+    samples = dict(FIXED_SAMPLES)
+    if project_id is not None:
+        samples['project_id'] = project_id
+    cursor = conn.cursor()
+    for key, sql in SAMPLE_SQL:
+        if key in samples:
+            continue
+        try:
+            cursor.execute(sql, samples)
+            row = cursor.fetchone()
+        except psycopg2.Error:
+            row = None  # table missing in this schema
+        conn.rollback()
+        samples[key] = row[0] if row else None
+    return samples
+
+
+def _literal(expr, constants):
+    """Value of a literal JS parameter expression, or raise KeyError"""
+    expr = expr.strip()
+    if re.fullmatch(r'-?\d+(\.\d+)?', expr):
+        return expr
+    if expr[:1] in '\'"' and _skip_string(expr, 0) == len(expr):
+        return expr[1:-1]
+    if expr in ('null', 'undefined'):
+        return None
+    if expr in ('true', 'false'):
+        return expr
+    if expr in constants:
+        return constants[expr]
+    raise KeyError(expr)
+
+
+def sample_key(expr, route_key=None):
+    """
+    Sample key a parameter expression refers to, or None
+    The last property names the value (estimation.project_id is a project
+    id); a bare .id or [n] is qualified by the property before it.
+    """
+    expr = re.split(r'\|\||\?\?', expr)[0].strip()
+    if expr in ('id', 'params.id') and route_key:
+        return route_key
+    segments = re.split(r'\??\.', expr)
+    name = segments[-1]
+    if len(segments) > 1 and (name == 'id' or name.startswith('[')):
+        name = segments[-2] + name
+    name = re.sub(r'[^a-z0-9]', '', name.lower())
+    for pattern, key in PARAM_RULES:
+        if re.search(pattern, name):
+            return key
+    return None
+
+
+def bind_params(statement, types, samples, constants=None):
+    """Text values (None for NULL) for each $n, as node-pg would send them"""
+    expressions = statement['params'] or []
+    values = []
+    for index, param_type in enumerate(types):
+        expr = expressions[index] if index < len(expressions) else ''
+        try:
+            values.append(_literal(expr, constants or {}))
+            continue
+        except KeyError:
+            pass
+        key = sample_key(expr, statement.get('route_key')) if expr else None
+        if key == 'filter' and param_type not in ('text', 'character varying'):
+            key = None
+        if key in samples and (samples[key] is not None or key in FIXED_SAMPLES):
+            value = samples[key]
+            values.append(None if value is None else str(value))
+        elif param_type.endswith('[]'):
+            values.append('{}')
+        else:
+            values.append(TYPE_DEFAULTS.get(param_type, TEXT_DEFAULT))
+    return values
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _walk(child)
+
+
+def plan_shape(node):
+    """Node types with their relation/index, nested: 'Limit > Sort > Seq Scan(projects)'"""
+    label = node['Node Type']
+    target = node.get('Index Name') or node.get('Relation Name')
+    if target:
+        label += f"({target})"
+    children = [plan_shape(child) for child in node.get('Plans', [])]
+    if len(children) == 1:
+        return f"{label} > {children[0]}"
+    if children:
+        return f"{label} > [{', '.join(children)}]"
+    return label
+
+
+def summarize_plan(explained, table_rows=None):
+    """The numbers worth keeping from EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)"""
+    top = explained[0]
+    plan = top['Plan']
+    table_rows = table_rows or {}
+    seq_scans = [
+        {'relation': node['Relation Name'],
+         'rows': int(node.get('Actual Rows', 0) * node.get('Actual Loops', 1)),
+         'table_rows': table_rows.get(node['Relation Name'])}
+        for node in _walk(plan) if node['Node Type'] == 'Seq Scan'
+    ]
+    return {
+        'shape': plan_shape(plan),
+        'execution_ms': round(top.get('Execution Time', 0.0), 3),
+        'planning_ms': round(top.get('Planning Time', 0.0), 3),
+        'trigger_ms': round(sum(t.get('Time', 0.0) for t in top.get('Triggers', [])), 3),
+        'rows': plan.get('Actual Rows'),
+        'estimated_rows': plan.get('Plan Rows'),
+        'shared_hit': plan.get('Shared Hit Blocks', 0),
+        'shared_read': plan.get('Shared Read Blocks', 0),
+        'temp_written': plan.get('Temp Written Blocks', 0),
+        'seq_scans': seq_scans,
+    }
+
+
+def table_sizes(cursor):
+    """relation -> estimated rows (pg_class.reltuples)"""
+    cursor.execute("""
+        SELECT c.relname, c.reltuples::bigint FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind IN ('r', 'p', 'm') AND n.nspname = current_schema()
+    """)
+    return dict(cursor.fetchall())
+
+
+def explain_statement(conn, statement, samples, constants=None, timeout_ms=DEFAULT_TIMEOUT_MS):
+    """
+    EXPLAIN ANALYZE one statement with bound parameters, then roll back
+    Returns (raw explain JSON, bound values); raises the database error.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        cursor.execute(f"PREPARE kg_explain AS {statement['sql']}")
+        cursor.execute("SELECT parameter_types::text[] FROM pg_prepared_statements WHERE name = 'kg_explain'")
+        types = cursor.fetchone()[0] or []
+        values = bind_params(statement, types, samples, constants)
+        arguments = f"({', '.join(['%s'] * len(values))})" if values else ''
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE kg_explain{arguments}", values)
+        explained = cursor.fetchone()[0]
+        if isinstance(explained, str):
+            explained = json.loads(explained)
+        return explained, values
+    finally:
+        conn.rollback()
+        # Prepared statements outlive the transaction
+        cursor.execute('DEALLOCATE ALL')
+        conn.rollback()
+
+
+def flag_statement(result, baseline=None, large_table=DEFAULT_LARGE_TABLE, threshold=DEFAULT_THRESHOLD):
+    """Problems with one statement's result, optionally against its baseline result"""
+    flags = []
+    if result.get('error'):
+        if not (baseline and baseline.get('error')):
+            flags.append(f"error: {result['error']}")
+        return flags
+    plan = result.get('plan')
+    if not plan:
+        return flags
+
+    for scan in plan['seq_scans']:
+        if (scan['table_rows'] or 0) > large_table:
+            flags.append(f"seq_scan: {scan['relation']} (~{scan['table_rows']:,} rows)")
+
+    before = (baseline or {}).get('plan')
+    if before:
+        if plan['shape'] != before['shape']:
+            flags.append(f"plan_changed: {before['shape']}  =>  {plan['shape']}")
+        old_ms, new_ms = before['execution_ms'], plan['execution_ms']
+        if new_ms - old_ms > MIN_SLOWDOWN_MS and new_ms > old_ms * (1 + threshold):
+            flags.append(f"slower: {old_ms:.2f} -> {new_ms:.2f} ms")
+        old_buffers = before['shared_hit'] + before['shared_read']
+        new_buffers = plan['shared_hit'] + plan['shared_read']
+        if new_buffers - old_buffers > MIN_BUFFER_GROWTH and new_buffers > old_buffers * (1 + threshold):
+            flags.append(f"more_buffers: {old_buffers:,} -> {new_buffers:,} blocks")
+    return flags
+
+
+def run(conn, statements, project_id=None, baseline=None, large_table=DEFAULT_LARGE_TABLE,
+        threshold=DEFAULT_THRESHOLD, timeout_ms=DEFAULT_TIMEOUT_MS, constants=None, progress=None):
+    """EXPLAIN every explainable statement; returns the report dict"""
+    samples = resolve_samples(conn, project_id)
+    sizes = table_sizes(conn.cursor())
+    conn.rollback()
+    before = {s['id']: s for s in (baseline or {}).get('statements', []) if s.get('id')}
+
+    results = []
+    for n, statement in enumerate(statements, 1):
+        result = {key: statement.get(key) for key in ('id', 'kind', 'locations', 'sql', 'params', 'skip')}
+        if not statement['skip']:
+            try:
+                explained, values = explain_statement(conn, statement, samples, constants, timeout_ms)
+                result['values'] = values
+                result['plan'] = summarize_plan(explained, sizes)
+            except Exception as e:
+                result['error'] = str(e).strip().splitlines()[0]
+            result['flags'] = flag_statement(result, before.get(statement['id']), large_table, threshold)
+        results.append(result)
+        if progress:
+            progress(n, len(statements), result)
+
+    explained = [r for r in results if 'plan' in r]
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'samples': {k: v for k, v in samples.items() if k not in FIXED_SAMPLES},
+        'summary': {
+            'statements': len(results),
+            'explained': len(explained),
+            'skipped': sum(1 for r in results if r['skip']),
+            'errors': sum(1 for r in results if r.get('error')),
+            'flagged': sum(1 for r in results if r.get('flags')),
+            'execution_ms': round(sum(r['plan']['execution_ms'] for r in explained), 3),
+        },
+        'statements': results,
+    }
+
+
+def print_report(report):
+    print("=" * 80)
+    print("🔍 EXPLAIN PLAN REPORT")
+    print("=" * 80)
+    slowest = sorted((r for r in report['statements'] if 'plan' in r),
+                     key=lambda r: r['plan']['execution_ms'], reverse=True)
+    print(f"{'ms':>10} {'buffers':>10} {'rows':>8}  statement")
+    for r in slowest[:15]:
+        plan = r['plan']
+        print(f"{plan['execution_ms']:>10.2f} {plan['shared_hit'] + plan['shared_read']:>10,} "
+              f"{plan['rows'] or 0:>8}  {r['locations'][0]}")
+
+    flagged = [r for r in report['statements'] if r.get('flags')]
+    if flagged:
+        print(f"\n⚠️  {len(flagged)} statements flagged:")
+        for r in flagged:
+            print(f"   {r['locations'][0]} [{r['id']}]")
+            for flag in r['flags']:
+                print(f"      - {flag}")
+
+    summary = report['summary']
+    print(f"\nStatements: {summary['statements']}, explained: {summary['explained']}, "
+          f"skipped: {summary['skipped']}, errors: {summary['errors']}, flagged: {summary['flagged']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EXPLAIN ANALYZE the SQL used by the API routes')
+    parser.add_argument('--root', default=REPO_ROOT, help='repository root')
+    parser.add_argument('--list', action='store_true', help='only list the extracted statements')
+    parser.add_argument('--match', help='only statements whose location or SQL contains this text')
+    parser.add_argument('--project-id', type=int, help='sample project (default: largest active estimation)')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fractional growth of time/buffers flagged as a regression')
+    parser.add_argument('--large-table', type=int, default=DEFAULT_LARGE_TABLE,
+                        help='flag sequential scans on tables with more rows than this')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT_MS, help='statement timeout, ms')
+    parser.add_argument('--fail', action='store_true', help='exit 1 when any statement is flagged')
+    args = parser.parse_args(argv)
+
+    statements = extract_statements(args.root)
+    if args.match:
+        statements = [s for s in statements
+                      if args.match in ' '.join(s['locations']) or args.match in (s['sql'] or '')]
+
+    if args.list:
+        for s in statements:
+            status = f"skipped ({s['skip']})" if s['skip'] else f"{s['kind']}, params: {s['params']}"
+            print(f"{s['id'] or '-':<12}  {s['locations'][0]:<70} {status}")
+        return True
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    from kg_finance import db
+
+    def progress(done, total, result):
+        status = result['skip'] and 'skipped' or result.get('error') and 'error' or \
+            f"{result['plan']['execution_ms']:.1f} ms"
+        print(f"[{done}/{total}] {result['locations'][0]}: {status}")
+
+    with db.connection() as conn:
+        report = run(conn, statements, args.project_id, baseline, args.large_table, args.threshold,
+                     args.timeout, load_constants(args.root), progress)
+    if args.baseline:
+        report['baseline'] = args.baseline
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.json}")
+
+    return not (args.fail and report['summary']['flagged'])
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
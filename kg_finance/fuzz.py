@@ -0,0 +1,316 @@
+"""
+Pricing Differential Fuzzer
+Prices large numbers of random estimation and purchase request items with
+both lib/calcUtils.js + lib/pricing-utils.js (in node) and the NumPy engine
+(kg_finance.pricing) and reports every divergence.
+
+Items mix sqft and unit quantities, item and KG discounts, GST overrides
+(including the falsy 0 / '' cases), pay_to_vendor_directly categories and
+values sent as numbers or as Postgres NUMERIC strings. Batches are generated
+from (seed, batch index), spread over a process pool and each worker keeps
+one node process (kg_finance/fuzz_pricing.mjs) for its batches.
+
+A paise divergence is a difference of at least half a paisa in any item
+amount or total; smaller float differences (only possible in the unrounded
+category_breakdown sums) are counted separately. Every divergence can be
+replayed with --replay SEED:BATCH.
+
+Usage:
+    python -m kg_finance.fuzz --items 5000000 --workers 8 --json fuzz.json
+    python -m kg_finance.fuzz --replay 1:42
+"""
+
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from kg_finance.pricing import (
+    BREAKDOWN_FIELDS,
+    calculate_all_totals,
+    calculate_item_pricing,
+    calculate_pr_totals,
+    items_to_columns,
+    pr_items_to_columns,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JS_WORKER = os.path.join(REPO_ROOT, 'kg_finance', 'fuzz_pricing.mjs')
+
+DEFAULT_ITEMS = 1_000_000
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_MAX_EXAMPLES = 20
+HALF_PAISA = 0.005
+
+ITEM_FIELDS = ('subtotal', 'karighar_charges_amount', 'item_discount_amount', 'discount_kg_charges_amount',
+               'amount_before_gst', 'gst_amount', 'item_total')
+TOTAL_FIELDS = ('items_value', 'kg_charges', 'items_discount', 'kg_discount', 'discount', 'gst_amount', 'final_value')
+PR_FIELDS = ('subtotal', 'gst_amount', 'amount_before_gst', 'item_total')
+PR_TOTAL_FIELDS = ('items_value', 'gst_amount', 'final_value')
+
+UNITS = ('sqft', 'sqft', 'no', 'lumpsum', 'rft', 'set')
+BASE_GST = ('18.00', 18, '12', 5, 28, '0.00')
+GST_OVERRIDES = (0, '0', '0.00', '', 5, 12, '18.00', 28, 18.5)
+PR_GST = (18, '18.00', None, 0, 5, 12, 28, '')
+
+
+def _js_value(rng, value, decimals=2):
+    """value as a JS number or, a third of the time, a NUMERIC string"""
+    if rng.random() < 1 / 3:
+        return f"{value:.{decimals}f}"
+    return float(round(value, decimals)) if decimals else int(value)
+
+
+def _pick(rng, values):
+    return values[int(rng.integers(len(values)))]
+
+
+def make_base_rates(rng):
+    categories = []
+    for i in range(int(rng.integers(1, 11))):
+        kg = _pick(rng, (0, 5, 8, 10, 12.5, 15, 20, 25)) if rng.random() < 0.8 else float(rng.uniform(0, 30))
+        categories.append({
+            'id': f"cat_{i}",
+            'category_name': f"Category {i}",
+            'kg_percentage': _js_value(rng, kg),
+            'max_item_discount_percentage': 30,
+            'pay_to_vendor_directly': bool(rng.random() < 0.25),
+            'sort_order': i + 1,
+        })
+    return {'category_rates': {'categories': categories}, 'gst_percentage': _pick(rng, BASE_GST)}
+
+
+def make_item(rng, categories):
+    unit = _pick(rng, UNITS)
+    price = 0 if rng.random() < 0.02 else 10 ** rng.uniform(0, 6)
+    item = {
+        'category': _pick(rng, categories)['id'],
+        'unit': unit,
+        'quantity': _js_value(rng, rng.uniform(0.1, 50), int(rng.integers(0, 3))) if rng.random() < 0.97 else 0,
+        'unit_price': _js_value(rng, price, int(rng.integers(0, 3))),
+        'item_discount_percentage': 0 if rng.random() < 0.7 else _js_value(rng, rng.uniform(0, 100)),
+        'discount_kg_charges_percentage': 0 if rng.random() < 0.8 else _js_value(rng, rng.uniform(0, 100)),
+        'gst_percentage': None if rng.random() < 0.7 else _pick(rng, GST_OVERRIDES),
+    }
+    if unit == 'sqft':
+        width, height = rng.uniform(0.5, 20), rng.uniform(0.5, 12)
+        item['width'] = None if rng.random() < 0.01 else _js_value(rng, width, int(rng.integers(0, 3)))
+        item['height'] = _js_value(rng, height, int(rng.integers(0, 3)))
+    else:
+        item['width'] = item['height'] = None
+    return item
+
+
+def make_pr_item(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        price = None
+    elif roll < 0.1:
+        price = _pick(rng, (0, '0.00', ''))
+    else:
+        price = _js_value(rng, 10 ** rng.uniform(0, 5))
+    quantity = None if rng.random() < 0.01 else _js_value(rng, rng.uniform(0.1, 100), int(rng.integers(0, 3)))
+    return {'quantity': quantity, 'unit_price': price, 'gst_percentage': _pick(rng, PR_GST)}
+
+
+def make_batch(seed, index, size=DEFAULT_BATCH_SIZE):
+    """One reproducible batch: base rates, estimation items and PR items"""
+    rng = np.random.default_rng([seed, index])
+    base_rates = make_base_rates(rng)
+    categories = base_rates['category_rates']['categories']
+    return {
+        'base_rates': base_rates,
+        'items': [make_item(rng, categories) for _ in range(size)],
+        'pr_items': [make_pr_item(rng) for _ in range(max(1, size // 5))],
+    }
+
+
+def price_python(batch):
+    """Price a batch with kg_finance.pricing"""
+    result = calculate_all_totals(items_to_columns(batch['items']), batch['base_rates'])
+    pr_priced = calculate_item_pricing(**pr_items_to_columns(batch['pr_items']))
+    return {
+        'items': {field: result['items'][field] for field in ITEM_FIELDS},
+        'totals': {key: value for key, value in result.items() if key != 'items'},
+        'pr_items': {field: pr_priced[field] for field in PR_FIELDS},
+        'pr_totals': calculate_pr_totals(pr_priced),
+    }
+
+
+class NodePricer:
+    """A node process running fuzz_pricing.mjs, one batch per request line"""
+
+    def __init__(self, node=None):
+        node = node or shutil.which('node')
+        if not node:
+            raise RuntimeError('node not found on PATH')
+        self.process = subprocess.Popen(
+            [node, '--no-warnings', JS_WORKER], cwd=REPO_ROOT, text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def __call__(self, batch):
+        self.process.stdin.write(json.dumps({**batch, 'item_fields': ITEM_FIELDS}) + '\n')
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError('node pricing worker exited')
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"JS pricing failed: {response['error']}")
+        return response
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+
+
+def _as_float(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _differences(py, js):
+    """(paise divergence mask, sub-paisa mask) for two float arrays; NaN == NaN"""
+    py, js = np.asarray(py, dtype=np.float64), np.asarray(js, dtype=np.float64)
+    same = (py == js) | (np.isnan(py) & np.isnan(js))
+    with np.errstate(invalid='ignore'):
+        paise = ~same & ~(np.abs(py - js) < HALF_PAISA)
+    return paise, ~same & ~paise
+
+
+def compare(py, js):
+    """Every differing value: [{'kind', 'where', 'field', 'index', 'python', 'js'}]"""
+    found = []
+
+    def check(where, field, py_values, js_values):
+        py_values = np.atleast_1d(np.asarray(py_values, dtype=np.float64))
+        js_values = _as_float(js_values if isinstance(js_values, list) else [js_values])
+        paise, small = _differences(py_values, js_values)
+        for kind, mask in (('paise', paise), ('float', small)):
+            for i in np.flatnonzero(mask):
+                found.append({'kind': kind, 'where': where, 'field': field, 'index': int(i),
+                              'python': float(py_values[i]), 'js': float(js_values[i])})
+
+    for field in ITEM_FIELDS:
+        check('items', field, py['items'][field], js['items'][field])
+    for field in TOTAL_FIELDS:
+        check('totals', field, py['totals'][field], js['totals'][field])
+    for category_id, breakdown in py['totals']['category_breakdown'].items():
+        for key, _ in BREAKDOWN_FIELDS:
+            check('category_breakdown', f"{category_id}.{key}", breakdown[key],
+                  js['totals']['category_breakdown'][category_id][key])
+    for field in PR_FIELDS:
+        check('pr_items', field, py['pr_items'][field], js['pr_items'][field])
+    for field in PR_TOTAL_FIELDS:
+        check('pr_totals', field, py['pr_totals'][field], js['pr_totals'][field])
+    return found
+
+
+_pricer = None
+
+
+def _worker_pricer():
+    global _pricer
+    if _pricer is None:
+        _pricer = NodePricer()
+        atexit.register(_pricer.close)
+    return _pricer
+
+
+def run_batch(task):
+    """Generate, price twice and compare one batch (pool worker)"""
+    seed, index, size, max_examples = task
+    batch = make_batch(seed, index, size)
+    differences = compare(price_python(batch), _worker_pricer()(batch))
+    examples = []
+    for difference in differences[:max_examples]:
+        source = {'items': batch['items'], 'pr_items': batch['pr_items']}.get(difference['where'])
+        examples.append({**difference, 'batch': f"{seed}:{index}",
+                         'input': source[difference['index']] if source else None,
+                         'base_rates': batch['base_rates'] if difference['where'] != 'pr_items' else None})
+    return {
+        'items': len(batch['items']),
+        'pr_items': len(batch['pr_items']),
+        'paise': sum(1 for d in differences if d['kind'] == 'paise'),
+        'float': sum(1 for d in differences if d['kind'] == 'float'),
+        'examples': examples,
+    }
+
+
+def fuzz(items=DEFAULT_ITEMS, batch_size=DEFAULT_BATCH_SIZE, workers=None, seed=1,
+         max_examples=DEFAULT_MAX_EXAMPLES, progress=None):
+    """Run the fuzzer; returns the report dict"""
+    batches = max(1, -(-items // batch_size))
+    tasks = [(seed, index, batch_size, max_examples) for index in range(batches)]
+    report = {'seed': seed, 'batches': batches, 'batch_size': batch_size,
+              'items': 0, 'pr_items': 0, 'paise': 0, 'float': 0, 'examples': []}
+    started = time.time()
+
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+        for done, result in enumerate(pool.imap_unordered(run_batch, tasks), 1):
+            for key in ('items', 'pr_items', 'paise', 'float'):
+                report[key] += result[key]
+            room = max_examples - len(report['examples'])
+            report['examples'].extend(result['examples'][:room])
+            if progress:
+                progress(done, batches, report)
+
+    report['seconds'] = round(time.time() - started, 1)
+    return report
+
+
+def print_report(report):
+    print("=" * 80)
+    print("🎲 PRICING DIFFERENTIAL FUZZ (lib/calcUtils.js + lib/pricing-utils.js vs kg_finance.pricing)")
+    print("=" * 80)
+    print(f"Seed {report['seed']}: {report['items']:,} estimation items, {report['pr_items']:,} PR items "
+          f"in {report['batches']} batches ({report['seconds']}s)")
+    print(f"Paise divergences: {report['paise']}")
+    print(f"Sub-paisa float differences: {report['float']}")
+    for example in report['examples']:
+        print(f"   [{example['kind']}] batch {example['batch']} {example['where']}[{example['index']}]."
+              f"{example['field']}: python={example['python']!r} js={example['js']!r}")
+        if example['input'] is not None:
+            print(f"      input: {json.dumps(example['input'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Differential fuzzing of the JS and Python pricing engines')
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS, help='estimation items to price')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all CPUs)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-examples', type=int, default=DEFAULT_MAX_EXAMPLES)
+    parser.add_argument('--replay', metavar='SEED:BATCH', help='re-run a single batch from a report')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        seed, index = (int(part) for part in args.replay.split(':'))
+        result = run_batch((seed, index, args.batch_size, args.max_examples))
+        report = {'seed': seed, 'batches': 1, 'batch_size': args.batch_size, 'seconds': 0, **result}
+    else:
+        def progress(done, total, report):
+            if done % max(1, total // 20) == 0 or done == total:
+                print(f"[{done}/{total}] {report['items']:,} items, {report['paise']} paise divergences")
+
+        report = fuzz(args.items, args.batch_size, args.workers, args.seed, args.max_examples, progress)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    return report['paise'] == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,43 @@
+// JavaScript side of the pricing differential fuzzer (driven by kg_finance/fuzz.py)
+//
+// Reads one JSON batch per line on stdin:
+//   { base_rates, items, pr_items, item_fields }
+// and answers with one JSON line priced by lib/calcUtils.js and lib/pricing-utils.js:
+//   { items: { field: [values] }, totals: {...}, pr_items: { field: [values] }, pr_totals: {...} }
+// NaN comes back as null (JSON), as it would from the API.
+import { createInterface } from 'node:readline';
+import { calculateAllTotals } from '../lib/calcUtils.js';
+import { calculateItemPricing, calculatePRTotals } from '../lib/pricing-utils.js';
+
+const PR_FIELDS = ['subtotal', 'gst_amount', 'amount_before_gst', 'item_total'];
+
+function columns(rows, fields) {
+  const out = {};
+  for (const field of fields) {
+    out[field] = rows.map(row => row[field]);
+  }
+  return out;
+}
+
+function priceBatch({ base_rates, items, pr_items, item_fields }) {
+  const { items: priced, ...totals } = calculateAllTotals(items, base_rates);
+  const prPriced = pr_items.map(item => calculateItemPricing(item.quantity, item.unit_price, item.gst_percentage));
+  return {
+    items: columns(priced, item_fields),
+    totals,
+    pr_items: columns(prPriced, PR_FIELDS),
+    pr_totals: calculatePRTotals(prPriced)
+  };
+}
+
+const lines = createInterface({ input: process.stdin, crlfDelay: Infinity });
+for await (const line of lines) {
+  if (!line.trim()) continue;
+  let response;
+  try {
+    response = priceBatch(JSON.parse(line));
+  } catch (error) {
+    response = { error: error.message };
+  }
+  process.stdout.write(JSON.stringify(response) + '\n');
+}
@@ -0,0 +1,426 @@
+"""
+Async HTTP Load Generator
+Drives the API routes the backend test scripts exercise one request at a
+time (calculate-payment, purchase-requests/available-items, ledger,
+dashboard, projects, estimation upload) with many requests in flight.
+
+Two modes:
+    --concurrency N   closed loop: N workers, each sends its next request as
+                      soon as the previous one answers
+    --rate R          open loop: Poisson arrivals at R requests/s regardless of
+                      how fast the server answers (capped by --max-in-flight);
+                      latency counts from the scheduled send time, so a
+                      stalled server shows up as latency, not as fewer requests
+
+Per endpoint the report has p50/p95/p99 latency, a latency histogram,
+throughput, status codes and error rate (exceptions and HTTP >= 400). --json
+writes it for comparing runs; --baseline prints the change against an
+earlier --json file.
+
+Target projects (with their inflow milestones and categories) come from
+DATABASE_URL via kg_finance.db, or from --project-id. Requests carry the
+next-auth session cookie from --cookie / KG_SESSION_COOKIE. 'upload' posts a
+generated estimation CSV, creating a new estimation version per request, so
+it only runs when named explicitly. Requires aiohttp.
+
+Usage:
+    python -m kg_finance.loadtest --base-url http://localhost:3000/api --concurrency 32 --duration 60
+    python -m kg_finance.loadtest dashboard=1 projects=3 ledger=2 --rate 200 --json after.json \\
+        --baseline before.json
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+COOKIE_ENV = 'KG_SESSION_COOKIE'
+DEFAULT_BASE_URL = 'http://localhost:3000/api'
+DEFAULT_DURATION = 30
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MAX_IN_FLIGHT = 256
+DEFAULT_TIMEOUT = 30
+DEFAULT_TARGETS = 200
+DEFAULT_UPLOAD_ROWS = 200
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+UPLOAD_COLUMNS = ('category', 'room_name', 'item_name', 'unit', 'width', 'height', 'quantity',
+                  'unit_price', 'item_discount_percentage', 'discount_kg_charges_percentage')
+
+TARGETS_SQL = """
+    SELECT p.id, pbr.category_rates,
+           ARRAY(
+               SELECT m.id FROM biz_model_milestones m
+               WHERE m.biz_model_id = p.biz_model_id AND m.direction = 'inflow'
+               ORDER BY m.sequence_order
+           ) AS milestone_ids
+    FROM projects p
+    JOIN project_base_rates pbr ON pbr.project_id = p.id AND pbr.active = true
+    WHERE EXISTS (SELECT 1 FROM project_estimations pe WHERE pe.project_id = p.id AND pe.is_active = true)
+      {project_filter}
+    ORDER BY random()
+    LIMIT %s
+"""
+
+
+def _pick(rng, values):
+    return values[int(rng.integers(len(values)))]
+
+
+def upload_csv(target, rng, rows=DEFAULT_UPLOAD_ROWS):
+    """Estimation CSV in the upload route's format, using the project's categories"""
+    from kg_finance.datagen import DatasetGenerator
+
+    columns = DatasetGenerator(rng, ids=None, emit=None).make_items(target['categories'], rows)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(UPLOAD_COLUMNS)
+    for i in range(rows):
+        writer.writerow(['' if isinstance(columns[name][i], float) and math.isnan(columns[name][i])
+                         else columns[name][i] for name in UPLOAD_COLUMNS])
+    return buf.getvalue().encode()
+
+
+# Endpoint name -> request builder(target, rng)
+ENDPOINTS = {
+    'calculate-payment': lambda target, rng: {
+        'method': 'GET', 'path': f"/projects/{target['project_id']}/calculate-payment",
+        'params': {'milestone_id': _pick(rng, target['milestone_ids'])} if target['milestone_ids'] else {},
+    },
+    'available-items': lambda target, rng: {
+        'method': 'GET', 'path': f"/projects/{target['project_id']}/purchase-requests/available-items",
+    },
+    'ledger': lambda target, rng: {
+        'method': 'GET', 'path': f"/projects/{target['project_id']}/ledger", 'params': {'limit': 50},
+    },
+    'dashboard': lambda target, rng: {
+        'method': 'GET', 'path': '/dashboard', 'params': {'output': 'stats'},
+    },
+    'projects': lambda target, rng: {
+        'method': 'GET', 'path': '/projects', 'params': {'limit': 20},
+    },
+    'upload': lambda target, rng: {
+        'method': 'POST', 'path': f"/projects/{target['project_id']}/estimations/upload",
+        'file': ('load_test_upload.csv', upload_csv(target, rng)),
+    },
+}
+DEFAULT_ENDPOINTS = ['calculate-payment', 'available-items', 'ledger', 'dashboard', 'projects']
+
+
+def parse_mix(specs):
+    """['ledger=2', 'dashboard'] -> {'ledger': 2.0, 'dashboard': 1.0}"""
+    mix = {}
+    for spec in specs or DEFAULT_ENDPOINTS:
+        name, _, weight = spec.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] <= 0:
+            raise ValueError(f"weight of {name} must be positive")
+    return mix
+
+
+def load_targets(project_ids=None, limit=DEFAULT_TARGETS):
+    """Projects with an active estimation, their inflow milestones and categories"""
+    from kg_finance import db
+
+    project_filter = 'AND p.id = ANY(%s)' if project_ids else ''
+    params = ([list(project_ids)] if project_ids else []) + [limit]
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(TARGETS_SQL.format(project_filter=project_filter), params)
+        rows = cursor.fetchall()
+    return [
+        {'project_id': project_id,
+         'categories': (category_rates or {}).get('categories') or [],
+         'milestone_ids': list(milestone_ids or [])}
+        for project_id, category_rates, milestone_ids in rows
+    ]
+
+
+class Planner:
+    """Next (endpoint, request) by weighted random choice over the mix and targets"""
+
+    def __init__(self, mix, targets, rng):
+        if not targets:
+            raise ValueError('no target projects (need projects with an active estimation)')
+        self.names = list(mix)
+        weights = np.array([mix[name] for name in self.names], dtype=np.float64)
+        self.probabilities = weights / weights.sum()
+        self.targets = targets
+        self.rng = rng
+
+    def __call__(self):
+        name = self.names[int(self.rng.choice(len(self.names), p=self.probabilities))]
+        return name, ENDPOINTS[name](_pick(self.rng, self.targets), self.rng)
+
+
+class Recorder:
+    """Latency samples, status codes and errors per endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = Counter()
+        self.error_samples = {}
+
+    def record(self, name, seconds, status=None, error=None):
+        self.latencies.setdefault(name, []).append(seconds)
+        self.statuses.setdefault(name, Counter())[str(status) if status is not None else 'exception'] += 1
+        if error is not None or status is None or status >= 400:
+            self.errors[name] += 1
+            self.error_samples.setdefault(name, error or f"HTTP {status}")
+
+    def summary(self, wall_seconds):
+        """Report dict: per endpoint and overall"""
+        endpoints = {
+            name: summarize(self.latencies[name], self.errors[name], wall_seconds,
+                            self.statuses[name], self.error_samples.get(name))
+            for name in sorted(self.latencies)
+        }
+        every = [s for samples in self.latencies.values() for s in samples]
+        statuses = sum(self.statuses.values(), Counter())
+        overall = summarize(every, sum(self.errors.values()), wall_seconds, statuses)
+        return {'endpoints': endpoints, 'overall': overall}
+
+
+def histogram(latencies_ms):
+    """Counts per LATENCY_BUCKETS_MS bucket (upper bound inclusive) plus overflow"""
+    edges = np.array(LATENCY_BUCKETS_MS, dtype=np.float64)
+    counts = np.bincount(np.searchsorted(edges, latencies_ms, side='left'), minlength=len(edges) + 1)
+    labels = [f"<={edge}" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+    return dict(zip(labels, (int(c) for c in counts)))
+
+
+def summarize(latencies, errors, wall_seconds, statuses, error_sample=None):
+    """Count, throughput, error rate, latency percentiles (ms) and histogram"""
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    count = len(latencies_ms)
+    summary = {
+        'requests': count,
+        'errors': int(errors),
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        'statuses': dict(sorted(statuses.items())),
+    }
+    if count:
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        summary['latency_ms'] = {
+            'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2),
+            'mean': round(float(latencies_ms.mean()), 2), 'max': round(float(latencies_ms.max()), 2),
+        }
+        summary['histogram_ms'] = histogram(latencies_ms)
+    if error_sample:
+        summary['error_sample'] = error_sample
+    return summary
+
+
+async def run_closed_loop(send, plan, recorder, concurrency, duration, clock=time.perf_counter):
+    """concurrency workers sending back to back until duration has passed"""
+    deadline = clock() + duration
+
+    async def worker():
+        while clock() < deadline:
+            name, request = plan()
+            started = clock()
+            status, error = await send(request)
+            recorder.record(name, clock() - started, status, error)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open_loop(send, plan, recorder, rate, duration, max_in_flight, rng, clock=time.perf_counter):
+    """
+    Poisson arrivals at rate/s for duration seconds
+    Latency is measured from each request's scheduled time, so waiting for a
+    free slot (max_in_flight) or a slow event loop counts against the server.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = []
+
+    async def fire(name, request, scheduled):
+        async with slots:
+            status, error = await send(request)
+        recorder.record(name, clock() - scheduled, status, error)
+
+    start = clock()
+    offset = float(rng.exponential(1 / rate))
+    while offset < duration:
+        delay = start + offset - clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name, request = plan()
+        tasks.append(asyncio.ensure_future(fire(name, request, start + offset)))
+        offset += float(rng.exponential(1 / rate))
+    await asyncio.gather(*tasks)
+
+
+def http_sender(session, base_url):
+    """
+    send(request) -> (status, error) over an aiohttp session
+    request: method, path, optional params, json body, or multipart 'form'
+    fields plus 'files' ({field: (filename, bytes, content_type)}); 'file' is
+    shorthand for a CSV in the 'file' field.
+    """
+    import aiohttp
+
+    async def send(request):
+        data = None
+        files = dict(request.get('files', {}))
+        if 'file' in request:
+            files['file'] = (*request['file'], 'text/csv')
+        if files or 'form' in request:
+            data = aiohttp.FormData()
+            for name, value in request.get('form', {}).items():
+                data.add_field(name, value)
+            for name, (filename, content, content_type) in files.items():
+                data.add_field(name, content, filename=filename, content_type=content_type)
+        try:
+            async with session.request(request['method'], base_url + request['path'],
+                                       params=request.get('params'), data=data, json=request.get('json'),
+                                       allow_redirects=False) as response:
+                await response.read()
+                return response.status, None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+    return send
+
+
+async def run(base_url, plan, concurrency=None, rate=None, duration=DEFAULT_DURATION,
+              max_in_flight=DEFAULT_MAX_IN_FLIGHT, cookie=None, timeout=DEFAULT_TIMEOUT, rng=None):
+    """One load run against base_url; returns (recorder, wall_seconds)"""
+    import aiohttp
+
+    headers = {'Cookie': cookie} if cookie else {}
+    connector = aiohttp.TCPConnector(limit=concurrency or max_in_flight)
+    recorder = Recorder()
+    async with aiohttp.ClientSession(connector=connector, headers=headers,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        send = http_sender(session, base_url.rstrip('/'))
+        started = time.perf_counter()
+        if rate:
+            await run_open_loop(send, plan, recorder, rate, duration, max_in_flight,
+                                rng or np.random.default_rng())
+        else:
+            await run_closed_loop(send, plan, recorder, concurrency or DEFAULT_CONCURRENCY, duration)
+        return recorder, time.perf_counter() - started
+
+
+def compare(current, baseline):
+    """Per endpoint change of p50/p95/p99, throughput and error rate vs a baseline report"""
+    changes = {}
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        row = {}
+        for key in ('p50', 'p95', 'p99'):
+            old, new = before.get('latency_ms', {}).get(key), now.get('latency_ms', {}).get(key)
+            if old and new is not None:
+                row[f"{key}_ms"] = {'before': old, 'after': new, 'change_pct': round((new - old) / old * 100, 1)}
+        for key in ('throughput_rps', 'error_rate'):
+            row[key] = {'before': before.get(key), 'after': now.get(key)}
+        changes[name] = row
+    return changes
+
+
+def print_report(report, changes=None):
+    """Per-endpoint table plus totals (and deltas when a baseline was given)"""
+    print("=" * 96)
+    print("📈 LOAD TEST SUMMARY")
+    print("=" * 96)
+    print(f"{'endpoint':<20} {'requests':>9} {'rps':>9} {'errors':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+    for name, summary in rows:
+        latency = summary.get('latency_ms', {})
+        print(f"{name:<20} {summary['requests']:>9} {summary['throughput_rps']:>9.1f} "
+              f"{summary['error_rate']:>8.2%} {latency.get('p50', 0):>10.1f} "
+              f"{latency.get('p95', 0):>10.1f} {latency.get('p99', 0):>10.1f}")
+        if summary.get('error_sample'):
+            print(f"   first error: {summary['error_sample']}")
+
+    if changes:
+        print("\nChange vs baseline (p95):")
+        for name, row in changes.items():
+            if 'p95_ms' in row:
+                p95 = row['p95_ms']
+                print(f"   {name:<20} {p95['before']:>10.1f} -> {p95['after']:>10.1f} ms ({p95['change_pct']:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Async load test for the API routes')
+    parser.add_argument('endpoints', nargs='*', metavar='ENDPOINT[=WEIGHT]',
+                        help=f"{', '.join(ENDPOINTS)} (default: {' '.join(DEFAULT_ENDPOINTS)})")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='API base, e.g. http://localhost:3000/api')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--concurrency', type=int, help=f"closed loop workers (default {DEFAULT_CONCURRENCY})")
+    mode.add_argument('--rate', type=float, help='open loop arrivals per second')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='seconds')
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help='open loop cap')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='per request, seconds')
+    parser.add_argument('--project-id', type=int, action='append', help='target project (repeatable)')
+    parser.add_argument('--targets', type=int, default=DEFAULT_TARGETS, help='projects sampled from the DB')
+    parser.add_argument('--cookie', default=os.environ.get(COOKIE_ENV),
+                        help=f"Cookie header with the next-auth session (default ${COOKIE_ENV})")
+    parser.add_argument('--seed', type=int, help='fix the request sequence')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.endpoints)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rng = np.random.default_rng(args.seed)
+    targets = load_targets(args.project_id, args.targets)
+    plan = Planner(mix, targets, rng)
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    recorder, wall_seconds = asyncio.run(run(
+        args.base_url, plan, concurrency=args.concurrency, rate=args.rate, duration=args.duration,
+        max_in_flight=args.max_in_flight, cookie=args.cookie, timeout=args.timeout, rng=rng,
+    ))
+
+    report = {
+        'started_at': started_at,
+        'base_url': args.base_url,
+        'mode': 'open' if args.rate else 'closed',
+        'concurrency': None if args.rate else (args.concurrency or DEFAULT_CONCURRENCY),
+        'rate': args.rate,
+        'duration': args.duration,
+        'wall_seconds': round(wall_seconds, 3),
+        'mix': mix,
+        'targets': len(targets),
+        **recorder.summary(wall_seconds),
+    }
+
+    changes = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            changes = compare(report, json.load(f))
+        report['baseline'] = {'file': args.baseline, 'changes': changes}
+
+    print_report(report, changes)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+    return report['overall']['errors'] == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,263 @@
+"""
+Portfolio Payment Target Engine
+Batch version of app/api/projects/[id]/calculate-payment/route.js.
+
+Loads every project, its latest estimation, the inflow milestones of its
+BizModel and its approved collections in four set-based reads, then
+computes target / collected / expected amounts for every project x milestone
+at once instead of four round trips per (project, milestone) call.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m kg_finance.payments [--project-id 12 ...] [--csv targets.csv]
+"""
+
+import argparse
+import csv
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from kg_finance import db
+from kg_finance.pricing import js_parse_float, js_to_fixed2
+
+PAYMENT_STATUS_APPROVED = 'approved'
+
+PROJECTS_SQL = """
+    SELECT p.id, p.project_code, p.biz_model_id, bm.category_rates
+    FROM projects p
+    JOIN biz_models bm ON p.biz_model_id = bm.id
+    {where}
+    ORDER BY p.id
+"""
+
+# Same "latest estimation" rule as the route (newest by created_at)
+ESTIMATIONS_SQL = """
+    SELECT DISTINCT ON (project_id) project_id, id, category_breakdown, final_value
+    FROM project_estimations
+    {where}
+    ORDER BY project_id, created_at DESC
+"""
+
+MILESTONES_SQL = """
+    SELECT id, biz_model_id, milestone_code, milestone_name, category_percentages
+    FROM biz_model_milestones
+    WHERE biz_model_id = ANY(%s) AND direction = 'inflow'
+    ORDER BY biz_model_id, sequence_order
+"""
+
+COLLECTED_SQL = """
+    SELECT project_id, COALESCE(SUM(amount), 0) AS collected_total
+    FROM customer_payments
+    WHERE status = %s {project_filter}
+    GROUP BY project_id
+"""
+
+
+def _number(value):
+    """JS `value || 0` for JSONB numbers/strings"""
+    parsed = js_parse_float(value)
+    return 0.0 if np.isnan(parsed) else parsed
+
+
+def load_portfolio(conn, project_ids=None):
+    """
+    Read everything the calculation needs in four queries
+    The per-project reads stream through server-side cursors (db.iter_rows),
+    so the whole portfolio is never buffered as one result set.
+
+    Args:
+        conn: psycopg2 connection
+        project_ids: optional list of project ids (default: all projects)
+
+    Returns:
+        dict with projects, estimations, milestones (by biz model) and collected totals
+    """
+    if project_ids:
+        ids = [int(pid) for pid in project_ids]
+        project_rows = db.iter_rows(conn, PROJECTS_SQL.format(where='WHERE p.id = ANY(%s)'), (ids,))
+    else:
+        project_rows = db.iter_rows(conn, PROJECTS_SQL.format(where=''))
+    projects = [
+        {'id': row[0], 'project_code': row[1], 'biz_model_id': row[2], 'category_rates': row[3] or {}}
+        for row in project_rows
+    ]
+    ids = [p['id'] for p in projects]
+    biz_model_ids = sorted({p['biz_model_id'] for p in projects})
+
+    estimations = {
+        row[0]: {'id': row[1], 'category_breakdown': row[2] or {}, 'final_value': float(row[3] or 0)}
+        for row in db.iter_rows(conn, ESTIMATIONS_SQL.format(where='WHERE project_id = ANY(%s)'), (ids,))
+    }
+
+    collected = {
+        row[0]: float(row[1])
+        for row in db.iter_rows(
+            conn,
+            COLLECTED_SQL.format(project_filter='AND project_id = ANY(%s)'),
+            (PAYMENT_STATUS_APPROVED, ids),
+        )
+    }
+
+    # One row per inflow milestone of the BizModels in use; small
+    cursor = conn.cursor()
+    try:
+        cursor.execute(MILESTONES_SQL, (biz_model_ids,))
+        milestones = defaultdict(list)
+        for row in cursor.fetchall():
+            milestones[row[1]].append({
+                'id': row[0],
+                'milestone_code': row[2],
+                'milestone_name': row[3],
+                'category_percentages': row[4] or {},
+            })
+    finally:
+        cursor.close()
+
+    return {
+        'projects': projects,
+        'estimations': estimations,
+        'milestones': dict(milestones),
+        'collected': collected,
+    }
+
+
+def _targets_for_biz_model(categories, projects, estimations, milestones, collected):
+    """Compute the project x milestone grid for projects sharing one BizModel"""
+    # Stable sort by sort_order, same as the route
+    categories = sorted(categories, key=lambda c: c.get('sort_order') or 0)
+
+    # P x C category totals and M x C cumulative percentages
+    totals = np.array([
+        [_number((estimations[p['id']]['category_breakdown'].get(c['id']) or {}).get('total')) for c in categories]
+        for p in projects
+    ], dtype=np.float64).reshape(len(projects), len(categories))
+    percentages = np.array([
+        [_number(m['category_percentages'].get(c['id'])) for c in categories]
+        for m in milestones
+    ], dtype=np.float64).reshape(len(milestones), len(categories))
+
+    # Accumulate category by category so the float sum matches the JS loop
+    category_targets = totals[:, None, :] * percentages[None, :, :] / 100
+    target_total = np.zeros((len(projects), len(milestones)))
+    for c in range(len(categories)):
+        target_total += category_targets[:, :, c]
+
+    collected_total = np.array([collected.get(p['id'], 0.0) for p in projects])[:, None]
+    expected_total = np.maximum(0, target_total - collected_total)
+
+    rounded_targets = js_to_fixed2(category_targets)
+    target_total_r = js_to_fixed2(target_total)
+    collected_r = js_to_fixed2(np.broadcast_to(collected_total, target_total.shape))
+    expected_r = js_to_fixed2(expected_total)
+
+    results = []
+    for pi, project in enumerate(projects):
+        for mi, milestone in enumerate(milestones):
+            results.append({
+                'project_id': project['id'],
+                'project_code': project['project_code'],
+                'milestone_id': milestone['id'],
+                'milestone_type': 'regular',
+                'milestone_code': milestone['milestone_code'],
+                'milestone_name': milestone['milestone_name'],
+                'categories': {
+                    c['id']: {
+                        'category_name': c.get('category_name'),
+                        'sort_order': c.get('sort_order') or 0,
+                        'total': float(totals[pi, ci]),
+                        'target_percentage': float(percentages[mi, ci]),
+                        'target_amount': float(rounded_targets[pi, mi, ci]),
+                    }
+                    for ci, c in enumerate(categories)
+                },
+                'target_total': float(target_total_r[pi, mi]),
+                'collected_total': float(collected_r[pi, mi]),
+                'expected_total': float(expected_r[pi, mi]),
+            })
+    return results
+
+
+def compute_payment_targets(portfolio):
+    """
+    Compute calculate-payment responses for every project x inflow milestone
+
+    Returns:
+        dict with 'targets' (one API-shaped record per project x milestone)
+        and 'skipped' (project_id, reason) for projects the route would reject
+    """
+    estimations = portfolio['estimations']
+    skipped = []
+
+    # Group projects by BizModel; each group shares categories and milestones
+    groups = defaultdict(list)
+    for project in portfolio['projects']:
+        categories = project['category_rates'].get('categories') or []
+        if not categories:
+            skipped.append((project['id'], 'No categories defined in BizModel'))
+        elif project['id'] not in estimations:
+            skipped.append((project['id'], 'No estimation found'))
+        elif not portfolio['milestones'].get(project['biz_model_id']):
+            skipped.append((project['id'], 'Milestone not found'))
+        else:
+            groups[project['biz_model_id']].append(project)
+
+    targets = []
+    for biz_model_id, projects in groups.items():
+        # Every project in the group was joined to the same biz_models row
+        categories = projects[0]['category_rates'].get('categories') or []
+        targets.extend(_targets_for_biz_model(
+            categories,
+            projects,
+            estimations,
+            portfolio['milestones'][biz_model_id],
+            portfolio['collected'],
+        ))
+
+    targets.sort(key=lambda t: (t['project_id'], t['milestone_id']))
+    return {'targets': targets, 'skipped': skipped}
+
+
+def write_csv(targets, out):
+    """Write one row per project x milestone"""
+    writer = csv.writer(out)
+    writer.writerow([
+        'project_id', 'project_code', 'milestone_id', 'milestone_code',
+        'target_total', 'collected_total', 'expected_total',
+    ])
+    for t in targets:
+        writer.writerow([
+            t['project_id'], t['project_code'], t['milestone_id'], t['milestone_code'],
+            f"{t['target_total']:.2f}", f"{t['collected_total']:.2f}", f"{t['expected_total']:.2f}",
+        ])
+
+
+def main(argv=None):
+    """Compute payment targets for the whole portfolio"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--project-id', type=int, action='append', help='Limit to these projects')
+    parser.add_argument('--csv', help='Write results to this CSV file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        portfolio = load_portfolio(conn, args.project_id)
+    finally:
+        conn.close()
+
+    result = compute_payment_targets(portfolio)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as fh:
+            write_csv(result['targets'], fh)
+    else:
+        write_csv(result['targets'], sys.stdout)
+
+    for project_id, reason in result['skipped']:
+        print(f"⚠️  Project {project_id} skipped: {reason}", file=sys.stderr)
+
+    return result
+
+
+if __name__ == '__main__':
+    main()
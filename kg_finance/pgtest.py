@@ -0,0 +1,301 @@
+"""
+Hermetic Local Postgres
+Throwaway PostgreSQL for tests. A template database is built once from
+schema.sql plus migrations/*.sql, and every test gets a fresh clone of it via
+CREATE DATABASE ... TEMPLATE (a file-level copy, milliseconds for this schema),
+so tests run offline, in parallel and without cleaning up after themselves.
+
+The server is KG_TEST_PG_URL (admin DSN of any local or CI Postgres) if set,
+otherwise a private cluster started with initdb/pg_ctl in a temp directory,
+listening only on a Unix socket with fsync off. initdb refuses to run as root,
+so under root (e.g. in a container) the cluster runs as the postgres user, or
+nobody if there is none.
+
+Templates are named after a hash of the SQL files, so an unchanged schema is
+reused across runs on a long-lived server and an edited migration triggers a
+rebuild. schema.sql is a dump taken after migration 010, so by default it is
+followed by tests/schema_bootstrap.sql (test-only fix-ups, never run against a
+real database) and migrations 011 onwards. KG_TEST_SCHEMA replaces schema.sql
+and the bootstrap (e.g. with a fresh `pg_dump --schema-only`);
+KG_TEST_MIGRATIONS_FROM skips migrations numbered below it (ones the base dump
+already contains).
+
+Usage:
+    from kg_finance import pgtest
+
+    with pgtest.server() as admin_dsn:
+        template = pgtest.ensure_template(admin_dsn, pgtest.schema_files())
+        dsn = pgtest.clone(admin_dsn, template, 'kg_test_1')
+        ...
+        pgtest.drop(admin_dsn, 'kg_test_1')
+"""
+
+import glob
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+SERVER_ENV = 'KG_TEST_PG_URL'
+SCHEMA_ENV = 'KG_TEST_SCHEMA'
+MIGRATIONS_FROM_ENV = 'KG_TEST_MIGRATIONS_FROM'
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# First migration not already contained in schema.sql
+SCHEMA_MIGRATIONS_FROM = 11
+
+# Durability is irrelevant for a throwaway cluster
+SERVER_OPTIONS = "-c fsync=off -c synchronous_commit=off -c full_page_writes=off -c listen_addresses=''"
+
+# Accounts a local cluster runs as when started by root, first existing one wins
+SERVER_USERS = ('postgres', 'nobody')
+
+
+def schema_files(root=REPO_ROOT, schema=None, migrations_from=None):
+    """Base schema followed by migrations/NNN_*.sql in number order"""
+    schema = schema or os.environ.get(SCHEMA_ENV)
+    if schema:
+        base = [schema]
+        default_from = 0
+    else:
+        base = [os.path.join(root, 'schema.sql'), os.path.join(root, 'tests', 'schema_bootstrap.sql')]
+        default_from = SCHEMA_MIGRATIONS_FROM
+    if migrations_from is None:
+        migrations_from = int(os.environ.get(MIGRATIONS_FROM_ENV, default_from))
+
+    migrations = []
+    for path in glob.glob(os.path.join(root, 'migrations', '*.sql')):
+        match = re.match(r'(\d+)_', os.path.basename(path))
+        if match and int(match.group(1)) >= migrations_from:
+            migrations.append((int(match.group(1)), path))
+    return base + [path for _, path in sorted(migrations)]
+
+
+def fingerprint(files):
+    """Short hash of the file names and contents"""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def find_bindir():
+    """Directory holding initdb/pg_ctl/psql, or None"""
+    pg_ctl = shutil.which('pg_ctl')
+    if pg_ctl:
+        return os.path.dirname(pg_ctl)
+    if shutil.which('pg_config'):
+        bindir = subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True).stdout.strip()
+        if os.path.exists(os.path.join(bindir, 'pg_ctl')):
+            return bindir
+    candidates = glob.glob('/usr/lib/postgresql/*/bin/pg_ctl')
+    candidates.sort(key=lambda path: int(re.search(r'/(\d+)/bin', path).group(1)))
+    return os.path.dirname(candidates[-1]) if candidates else None
+
+
+def available():
+    """True if a server is configured or one can be started locally"""
+    return bool(os.environ.get(SERVER_ENV)) or find_bindir() is not None
+
+
+def server_user():
+    """pwd entry to run a local cluster as, or None when not running as root"""
+    if not hasattr(os, 'geteuid') or os.geteuid() != 0:
+        return None
+    import pwd
+
+    for name in SERVER_USERS:
+        try:
+            return pwd.getpwnam(name)
+        except KeyError:
+            continue
+    raise RuntimeError(f"running as root and no {' or '.join(SERVER_USERS)} user to run PostgreSQL as; "
+                       f"create one or set {SERVER_ENV}")
+
+
+def dsn_for(admin_dsn, dbname):
+    """Same server and credentials, different database"""
+    from psycopg2.extensions import make_dsn
+
+    return make_dsn(admin_dsn, dbname=dbname)
+
+
+class LocalCluster:
+    """Private initdb cluster in a temp directory"""
+
+    def __init__(self, bindir=None):
+        self.bindir = bindir or find_bindir()
+        if not self.bindir:
+            raise RuntimeError(f"PostgreSQL binaries not found; install them or set {SERVER_ENV}")
+        self.user = server_user()
+        self.base_dir = None
+
+    def _run(self, tool, *args):
+        options = {}
+        if self.user:
+            options = {'user': self.user.pw_uid, 'group': self.user.pw_gid, 'extra_groups': [],
+                       'cwd': self.base_dir}
+        result = subprocess.run([os.path.join(self.bindir, tool), *args], capture_output=True, text=True,
+                                **options)
+        if result.returncode != 0:
+            raise RuntimeError(f"{tool} failed: {result.stderr.strip() or result.stdout.strip()}")
+
+    @property
+    def data_dir(self):
+        return os.path.join(self.base_dir, 'data')
+
+    def dsn(self, dbname='postgres'):
+        return f"dbname={dbname} user=postgres host={self.base_dir}"
+
+    @property
+    def running(self):
+        return self.base_dir is not None and os.path.exists(os.path.join(self.data_dir, 'postmaster.pid'))
+
+    def start(self):
+        self.base_dir = tempfile.mkdtemp(prefix='kg_pg_')
+        try:
+            if self.user:
+                os.chown(self.base_dir, self.user.pw_uid, self.user.pw_gid)
+            self._run('initdb', '-D', self.data_dir, '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--no-sync')
+            self._run('pg_ctl', '-D', self.data_dir, '-l', os.path.join(self.base_dir, 'server.log'), '-w',
+                      '-o', f"-k {self.base_dir} {SERVER_OPTIONS}", 'start')
+        except Exception:
+            # Clean up without replacing the error that explains why start failed
+            self.stop(ignore_errors=True)
+            raise
+        return self.dsn()
+
+    def stop(self, ignore_errors=False):
+        """Stop the server if it got as far as starting and remove the cluster"""
+        if self.base_dir is None:
+            return
+        try:
+            if self.running:
+                self._run('pg_ctl', '-D', self.data_dir, '-m', 'immediate', '-w', 'stop')
+        except RuntimeError:
+            if not ignore_errors:
+                raise
+        finally:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+            self.base_dir = None
+
+
+@contextmanager
+def server():
+    """Admin DSN of KG_TEST_PG_URL, or of a local cluster for the duration"""
+    url = os.environ.get(SERVER_ENV)
+    if url:
+        yield url
+        return
+    cluster = LocalCluster()
+    dsn = cluster.start()
+    try:
+        yield dsn
+    finally:
+        cluster.stop()
+
+
+def _admin(admin_dsn):
+    import psycopg2
+
+    conn = psycopg2.connect(admin_dsn)
+    conn.autocommit = True  # CREATE/DROP DATABASE cannot run in a transaction
+    return conn
+
+
+def apply_sql(dsn, path):
+    """
+    Run one SQL file, stopping at the first error
+    psql is used when available (pg_dump output may contain psql meta-commands);
+    otherwise the file is sent as a single psycopg2 statement batch.
+    """
+    bindir = find_bindir()
+    psql = os.path.join(bindir, 'psql') if bindir else shutil.which('psql')
+    if psql and os.path.exists(psql):
+        result = subprocess.run([psql, '-X', '-q', '-v', 'ON_ERROR_STOP=1', '-d', dsn, '-f', path],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{os.path.basename(path)}: {result.stderr.strip()}")
+        return
+
+    import psycopg2
+
+    with open(path) as f:
+        sql = f.read()
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True  # migrations manage their own BEGIN/COMMIT
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+    except psycopg2.Error as e:
+        raise RuntimeError(f"{os.path.basename(path)}: {e}") from e
+    finally:
+        conn.close()
+
+
+def ensure_template(admin_dsn, files):
+    """
+    Name of a template database holding the given schema, building it if needed
+    The build happens under a temporary name and is renamed only once every file
+    applied, so a failed build never leaves a half-migrated template behind. An
+    advisory lock keeps concurrent sessions (e.g. pytest-xdist) from racing.
+    """
+    from psycopg2 import sql
+
+    name = f"kg_template_{fingerprint(files)}"
+    building = f"{name}_build"
+    conn = _admin(admin_dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", (name,))
+            try:
+                cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s AND datistemplate", (name,))
+                if cursor.fetchone():
+                    return name
+
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(building)))
+                cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE template0 ENCODING 'UTF8'")
+                               .format(sql.Identifier(building)))
+                build_dsn = dsn_for(admin_dsn, building)
+                for path in files:
+                    apply_sql(build_dsn, path)
+
+                cursor.execute(sql.SQL("ALTER DATABASE {} RENAME TO {}")
+                               .format(sql.Identifier(building), sql.Identifier(name)))
+                cursor.execute(sql.SQL("ALTER DATABASE {} IS_TEMPLATE true").format(sql.Identifier(name)))
+                return name
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+    finally:
+        conn.close()
+
+
+def clone(admin_dsn, template, name):
+    """Create database name as a copy of template; returns its DSN"""
+    from psycopg2 import sql
+
+    conn = _admin(admin_dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}")
+                           .format(sql.Identifier(name), sql.Identifier(template)))
+    finally:
+        conn.close()
+    return dsn_for(admin_dsn, name)
+
+
+def drop(admin_dsn, name):
+    """Drop a cloned database, disconnecting any leftover sessions"""
+    from psycopg2 import sql
+
+    conn = _admin(admin_dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+    finally:
+        conn.close()
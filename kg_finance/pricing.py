@@ -0,0 +1,372 @@
+"""
+Vectorized Pricing Engine for Estimation Items
+Columnar NumPy port of lib/calcUtils.js - prices whole estimations in one pass.
+calculate_item_pricing / calculate_pr_totals port lib/pricing-utils.js.
+
+Every step matches calculateItemTotal / calculateCategoryTotals, including
+JavaScript's toFixed(2) rounding, so bulk re-pricing produces the same
+numbers the API would have stored.
+"""
+
+import numpy as np
+
+# Numeric input columns (everything except category and unit)
+NUMERIC_COLUMNS = (
+    'width',
+    'height',
+    'quantity',
+    'unit_price',
+    'item_discount_percentage',
+    'discount_kg_charges_percentage',
+    'gst_percentage',
+)
+
+# Per-category accumulators in category_breakdown (same keys as calcUtils.js)
+BREAKDOWN_FIELDS = (
+    ('subtotal', 'subtotal'),
+    ('item_discount_amount', 'item_discount_amount'),
+    ('karighar_charges_amount', 'karighar_charges_amount'),
+    ('discount_kg_charges_amount', 'discount_kg_charges_amount'),
+    ('amount_before_gst', 'amount_before_gst'),
+    ('gst_amount', 'gst_amount'),
+    ('total', 'item_total'),
+)
+
+_SPLITTER = 134217729.0  # 2**27 + 1, Veltkamp split constant
+
+
+def js_parse_float(value):
+    """Mimic JavaScript parseFloat for a single scalar (None/'' -> NaN)"""
+    if value is None or isinstance(value, bool):
+        return float('nan')
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    text = str(value).strip()
+    # parseFloat reads the longest numeric prefix
+    end = len(text)
+    while end > 0:
+        try:
+            return float(text[:end])
+        except ValueError:
+            end -= 1
+    return float('nan')
+
+
+def js_to_fixed2(values):
+    """
+    Vectorized parseFloat(x.toFixed(2))
+
+    toFixed rounds the exact binary value half away from zero, whereas
+    np.round(x, 2) rounds the inexact product x * 100 half to even. The
+    rounding error of x * 100 is recovered exactly (Dekker two-product)
+    so ties and near-ties are resolved the same way V8 does.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    ax = np.abs(x)
+
+    scaled = ax * 100.0
+    # Exact error of the product: ax * 100 == scaled + err
+    split = _SPLITTER * ax
+    hi = split - (split - ax)
+    lo = ax - hi
+    err = (hi * 100.0 - scaled) + lo * 100.0
+
+    floor = np.floor(scaled)
+    diff = (scaled - floor) - 0.5
+    round_up = (diff > 0) | ((diff == 0) & (err >= 0))
+    rounded = (floor + round_up) / 100.0
+
+    with np.errstate(invalid='ignore'):
+        return np.where(np.isfinite(x), np.copysign(rounded, x), x)
+
+
+def js_round2(values):
+    """
+    Vectorized Math.round(x * 100) / 100
+
+    Math.round rounds halves towards +Infinity; floor(y + 0.5) would also
+    round 0.49999999999999994 up, so the fraction is compared instead.
+    """
+    scaled = np.asarray(values, dtype=np.float64) * 100.0
+    floor = np.floor(scaled)
+    return (floor + (scaled - floor >= 0.5)) / 100.0
+
+
+def js_sum(values, start=0.0):
+    """Left-to-right float64 sum (np.sum uses pairwise summation)"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return float(start)
+    return float(np.cumsum(np.concatenate(([start], values)))[-1])
+
+
+def items_to_columns(items):
+    """
+    Convert estimation item dicts (API payloads or DB rows) into columns
+
+    gst_percentage follows calcUtils.js truthiness: a falsy value (None, 0,
+    '') falls back to the base rate and is stored as NaN, while strings such
+    as '0' coming back from Postgres NUMERIC columns are kept.
+    """
+    columns = {
+        'category': np.array([item.get('category') for item in items], dtype=object),
+        'unit': np.array([item.get('unit') for item in items], dtype=object),
+    }
+    for name in NUMERIC_COLUMNS:
+        if name == 'gst_percentage':
+            continue
+        columns[name] = np.array(
+            [js_parse_float(item.get(name)) for item in items], dtype=np.float64
+        )
+
+    gst = []
+    for item in items:
+        value = item.get('gst_percentage')
+        gst.append(js_parse_float(value) if value not in (None, '', 0, False) else float('nan'))
+    columns['gst_percentage'] = np.array(gst, dtype=np.float64)
+
+    return columns
+
+
+def _category_index(category_column, categories):
+    """Map each item's category id to its position in categories"""
+    positions = {cat['id']: idx for idx, cat in enumerate(categories)}
+    uniques, inverse = np.unique(np.asarray(category_column, dtype=object).astype(str), return_inverse=True)
+
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for idx, category_id in enumerate(uniques):
+        if category_id not in positions:
+            raise ValueError(f"Category {category_id} not found in base rates")
+        lookup[idx] = positions[category_id]
+
+    return lookup[inverse]
+
+
+def calculate_item_totals(columns, base_rates):
+    """
+    Vectorized calculateItemTotal over columnar estimation items
+
+    Args:
+        columns: dict of equal-length arrays (see items_to_columns)
+        base_rates: {'category_rates': {'categories': [...]}, 'gst_percentage': ...}
+
+    Returns:
+        dict of float64 arrays keyed like the calcUtils.js result, plus
+        'category_index' (position of each item's category)
+    """
+    categories = (base_rates.get('category_rates') or {}).get('categories') or []
+    cat_idx = _category_index(columns['category'], categories)
+
+    kg_rates = np.array([js_parse_float(c.get('kg_percentage')) for c in categories], dtype=np.float64)
+    pay_direct = np.array([bool(c.get('pay_to_vendor_directly')) for c in categories], dtype=bool)
+
+    def column(name):
+        return np.asarray(columns[name], dtype=np.float64)
+
+    is_sqft = np.asarray(columns['unit'], dtype=object) == 'sqft'
+    quantity = np.where(is_sqft, column('width') * column('height'), column('quantity'))
+    unit_price = column('unit_price')
+    item_discount_pct = column('item_discount_percentage')
+    kg_percentage = kg_rates[cat_idx]
+    kg_discount_pct = column('discount_kg_charges_percentage')
+
+    # NaN marks items without their own GST rate (see items_to_columns)
+    gst_column = column('gst_percentage')
+    gst_percentage = np.where(
+        np.isnan(gst_column), js_parse_float(base_rates.get('gst_percentage')), gst_column
+    )
+
+    # Step 1: Calculate subtotal
+    subtotal = quantity * unit_price
+
+    # Step 2: Apply item discount (BEFORE KG charges)
+    item_discount_amount = (subtotal * item_discount_pct) / 100
+    discounted_subtotal = subtotal - item_discount_amount
+
+    # Step 3: Calculate KG charges
+    kg_charges_gross = (subtotal * kg_percentage) / 100
+
+    # Step 4: Apply KG discount (ON KG charges only)
+    kg_discount_amount = (kg_charges_gross * kg_discount_pct) / 100
+    kg_charges_net = kg_charges_gross - kg_discount_amount
+
+    # Step 5: Amount before GST - only KG charges are billed when the
+    # customer pays the vendor directly
+    amount_before_gst = np.where(
+        pay_direct[cat_idx], kg_charges_net, discounted_subtotal + kg_charges_net
+    )
+
+    # Step 6: Calculate GST
+    gst_amount = (amount_before_gst * gst_percentage) / 100
+
+    # Step 7: Final item total
+    item_total = amount_before_gst + gst_amount
+
+    return {
+        'category_index': cat_idx,
+        'subtotal': js_to_fixed2(subtotal),
+        'karighar_charges_percentage': js_to_fixed2(kg_percentage),
+        'karighar_charges_amount': js_to_fixed2(kg_charges_gross),
+        'item_discount_percentage': js_to_fixed2(item_discount_pct),
+        'item_discount_amount': js_to_fixed2(item_discount_amount),
+        'discount_kg_charges_percentage': js_to_fixed2(kg_discount_pct),
+        'discount_kg_charges_amount': js_to_fixed2(kg_discount_amount),
+        # calcUtils.js returns this one as a toFixed(2) string; the numeric
+        # value is what lands in estimation_items.gst_percentage
+        'gst_percentage': js_to_fixed2(gst_percentage),
+        'gst_amount': js_to_fixed2(gst_amount),
+        'amount_before_gst': js_to_fixed2(amount_before_gst),
+        'item_total': js_to_fixed2(item_total),
+    }
+
+
+class CategoryTotalsAccumulator:
+    """
+    Running calculateCategoryTotals for items priced in batches
+
+    Sums continue left to right across batches, so streaming an estimation
+    through add() gives the same floats as pricing it in one piece.
+    """
+
+    HEADLINE_SOURCES = (
+        'subtotal',
+        'karighar_charges_amount',
+        'item_discount_amount',
+        'discount_kg_charges_amount',
+        'gst_amount',
+        'item_total',
+    )
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.count = 0
+        self._breakdown = np.zeros((len(BREAKDOWN_FIELDS), len(categories)))
+        self._totals = dict.fromkeys(self.HEADLINE_SOURCES, 0.0)
+
+    def add(self, priced):
+        """Accumulate one batch (output of calculate_item_totals)"""
+        cat_idx = np.asarray(priced['category_index'], dtype=np.int64)
+        self.count += len(cat_idx)
+
+        for c in np.unique(cat_idx):
+            mask = cat_idx == c
+            for f, (_, source) in enumerate(BREAKDOWN_FIELDS):
+                self._breakdown[f, c] = js_sum(priced[source][mask], start=self._breakdown[f, c])
+
+        for key in self.HEADLINE_SOURCES:
+            self._totals[key] = js_sum(priced[key], start=self._totals[key])
+
+    def result(self):
+        """Category breakdown and headline totals so far"""
+        category_breakdown = {
+            cat['id']: {key: float(self._breakdown[f, idx]) for f, (key, _) in enumerate(BREAKDOWN_FIELDS)}
+            for idx, cat in enumerate(self.categories)
+        }
+        totals = self._totals
+        items_discount = totals['item_discount_amount']
+        kg_discount = totals['discount_kg_charges_amount']
+
+        return {
+            'category_breakdown': category_breakdown,
+            'items_value': float(js_to_fixed2(totals['subtotal'])),
+            'kg_charges': float(js_to_fixed2(totals['karighar_charges_amount'])),
+            'items_discount': float(js_to_fixed2(items_discount)),
+            'kg_discount': float(js_to_fixed2(kg_discount)),
+            'discount': float(js_to_fixed2(items_discount + kg_discount)),
+            'gst_amount': float(js_to_fixed2(totals['gst_amount'])),
+            'final_value': float(js_to_fixed2(totals['item_total'])),
+        }
+
+
+def calculate_category_totals(priced, categories):
+    """
+    Vectorized calculateCategoryTotals
+
+    Args:
+        priced: output of calculate_item_totals
+        categories: category configurations (category_rates.categories)
+
+    Returns:
+        dict with category_breakdown and the headline totals
+    """
+    accumulator = CategoryTotalsAccumulator(categories)
+    accumulator.add(priced)
+    return accumulator.result()
+
+
+def calculate_all_totals(columns, base_rates):
+    """
+    Vectorized calculateAllTotals - item-level pricing plus aggregates
+
+    Returns:
+        dict with 'items' (priced columns) and the category/overall totals
+    """
+    categories = (base_rates.get('category_rates') or {}).get('categories') or []
+    priced = calculate_item_totals(columns, base_rates)
+    totals = calculate_category_totals(priced, categories)
+    return {'items': priced, **totals}
+
+
+def pr_items_to_columns(items):
+    """
+    Convert purchase request item dicts into calculate_item_pricing arguments
+
+    has_price follows pricing-utils.js truthiness: None, '' and 0 mean "no
+    price" (null amounts) but a NUMERIC string such as '0.00' is truthy and
+    prices the item at zero.
+    """
+    def column(name):
+        return np.array([js_parse_float(item.get(name)) for item in items], dtype=np.float64)
+
+    return {
+        'quantity': column('quantity'),
+        'unit_price': column('unit_price'),
+        'gst_percentage': column('gst_percentage'),
+        'has_price': np.array(
+            [item.get('unit_price') not in (None, '', 0, False) for item in items], dtype=bool
+        ),
+    }
+
+
+def calculate_item_pricing(quantity, unit_price, gst_percentage=0, has_price=None):
+    """
+    Vectorized calculateItemPricing for purchase request items
+
+    Items without a unit price (NaN or 0) get NaN amounts where the JS
+    function returns null. has_price overrides that test for inputs where
+    JS truthiness differs from the numeric value (see pr_items_to_columns).
+    """
+    price = np.nan_to_num(np.asarray(unit_price, dtype=np.float64), nan=0.0)
+    qty = np.nan_to_num(np.asarray(quantity, dtype=np.float64), nan=0.0)
+    gst = np.nan_to_num(np.broadcast_to(np.asarray(gst_percentage, dtype=np.float64), price.shape), nan=0.0)
+    if has_price is None:
+        priced = price != 0
+    else:
+        priced = np.broadcast_to(np.asarray(has_price, dtype=bool), price.shape)
+
+    subtotal = qty * price
+    gst_amount = subtotal * (gst / 100)
+
+    def amount(values):
+        return np.where(priced, js_round2(values), np.nan)
+
+    return {
+        'subtotal': amount(subtotal),
+        'gst_percentage': gst,
+        'gst_amount': amount(gst_amount),
+        'amount_before_gst': amount(subtotal),
+        'item_total': amount(subtotal + gst_amount),
+    }
+
+
+def calculate_pr_totals(priced):
+    """Vectorized calculatePRTotals - NaN (null) amounts are skipped"""
+    def total(values):
+        values = np.asarray(values, dtype=np.float64)
+        return float(js_round2(js_sum(values[~np.isnan(values)])))
+
+    return {
+        'items_value': total(priced['subtotal']),
+        'gst_amount': total(priced['gst_amount']),
+        'final_value': total(priced['item_total']),
+    }
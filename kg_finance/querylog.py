@@ -0,0 +1,158 @@
+"""
+Query Log Analyzer
+Summarises the JSON query lines lib/query-stats.js writes to the server log
+({"type": "slow_query" | "query", "route", "fingerprint", "duration_ms", ...})
+into the statements and routes that dominate database time.
+
+With the default DB_QUERY_LOG=slow only slow queries are logged, so calls
+and totals cover slow executions only; run the server with DB_QUERY_LOG=all
+for complete numbers. Lines that are not query records are ignored, so the
+raw server log can be fed in directly.
+
+Usage:
+    python -m kg_finance.querylog server.log
+    python -m kg_finance.querylog server.log --sort p99 --top 20
+    kubectl logs deploy/web | python -m kg_finance.querylog - --route /api/projects --json top.json
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+RECORD_TYPES = ('query', 'slow_query')
+SORT_KEYS = {'total': 'total_ms', 'calls': 'calls', 'p99': 'p99_ms', 'mean': 'mean_ms'}
+DEFAULT_TOP = 15
+
+
+def parse_line(line):
+    """Query record in a log line (possibly behind a log prefix), or None"""
+    start = line.find('{')
+    if start < 0:
+        return None
+    try:
+        record = json.loads(line[start:])
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or record.get('type') not in RECORD_TYPES:
+        return None
+    return record
+
+
+def read_records(lines, route=None):
+    """Query records from log lines, optionally for one route"""
+    for line in lines:
+        record = parse_line(line)
+        if record and (route is None or record.get('route') == route):
+            yield record
+
+
+def summarize(records):
+    """Per-statement and per-route totals, calls and latency percentiles"""
+    durations = defaultdict(list)
+    statements = {}
+    route_time = defaultdict(float)
+    route_calls = defaultdict(int)
+    statement_routes = defaultdict(lambda: defaultdict(float))
+    errors = defaultdict(int)
+    slow_only = True
+
+    for record in records:
+        fingerprint = record['fingerprint']
+        duration = float(record['duration_ms'])
+        route = record.get('route') or 'unknown'
+        durations[fingerprint].append(duration)
+        statements.setdefault(fingerprint, record.get('statement', ''))
+        statement_routes[fingerprint][route] += duration
+        route_time[route] += duration
+        route_calls[route] += 1
+        errors[fingerprint] += bool(record.get('error'))
+        slow_only = slow_only and record['type'] == 'slow_query'
+
+    total_time = sum(route_time.values())
+    rows = []
+    for fingerprint, values in durations.items():
+        values = np.asarray(values)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        total = float(values.sum())
+        rows.append({
+            'fingerprint': fingerprint,
+            'statement': statements[fingerprint],
+            'calls': len(values),
+            'errors': errors[fingerprint],
+            'total_ms': round(total, 3),
+            'share': round(total / total_time, 4) if total_time else 0.0,
+            'mean_ms': round(float(values.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(values.max()), 3),
+            'routes': {route: round(ms, 3) for route, ms in
+                       sorted(statement_routes[fingerprint].items(), key=lambda item: -item[1])},
+        })
+
+    routes = [
+        {'route': route, 'calls': route_calls[route], 'total_ms': round(ms, 3),
+         'share': round(ms / total_time, 4) if total_time else 0.0}
+        for route, ms in sorted(route_time.items(), key=lambda item: -item[1])
+    ]
+    return {'slow_only': bool(rows) and slow_only, 'total_ms': round(total_time, 3),
+            'statements': rows, 'routes': routes}
+
+
+def top_statements(summary, sort='total', top=DEFAULT_TOP):
+    key = SORT_KEYS[sort]
+    return sorted(summary['statements'], key=lambda row: row[key], reverse=True)[:top]
+
+
+def print_summary(summary, sort='total', top=DEFAULT_TOP):
+    print("=" * 100)
+    print(f"🐢 TOP STATEMENTS BY {sort.upper()}")
+    print("=" * 100)
+    if summary['slow_only']:
+        print("(slow-query log only - set DB_QUERY_LOG=all for complete call counts)")
+    print(f"{'total ms':>12} {'share':>7} {'calls':>8} {'p50':>9} {'p99':>9} {'max':>9}  fingerprint  statement")
+    for row in top_statements(summary, sort, top):
+        print(f"{row['total_ms']:>12.1f} {row['share']:>7.1%} {row['calls']:>8} {row['p50_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}  {row['fingerprint']}  {row['statement'][:60]}")
+        print(f"{'':>60}routes: {', '.join(list(row['routes'])[:3])}")
+
+    print(f"\n{'total ms':>12} {'share':>7} {'calls':>8}  route")
+    for route in summary['routes'][:top]:
+        print(f"{route['total_ms']:>12.1f} {route['share']:>7.1%} {route['calls']:>8}  {route['route']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarise lib/query-stats.js query logs')
+    parser.add_argument('logs', nargs='+', help="log files ('-' for stdin)")
+    parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    parser.add_argument('--route', help='only queries issued by this route, e.g. /api/projects')
+    parser.add_argument('--json', help='write the full summary to this file')
+    args = parser.parse_args(argv)
+
+    def lines():
+        for path in args.logs:
+            if path == '-':
+                yield from sys.stdin
+            else:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    yield from f
+
+    summary = summarize(read_records(lines(), args.route))
+    if not summary['statements']:
+        print("No query records found")
+        return False
+
+    print_summary(summary, args.sort, args.top)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.json}")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
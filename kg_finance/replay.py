@@ -0,0 +1,262 @@
+"""
+Traffic Replay
+Replays API traffic captured by lib/traffic-capture.js (TRAFFIC_CAPTURE=on)
+against a server at 1x, 5x, 10x or any --speed while keeping the recorded
+inter-arrival pattern: request i is sent (t_i - t_0) / speed seconds after
+the start whether or not earlier requests have answered, and its latency
+counts from that scheduled time, as in kg_finance.loadtest's open loop.
+--since/--until pick a window such as the morning rush (ISO times, UTC
+unless an offset is given).
+
+Captures keep ids and numbers but mask free text and personal fields, so the
+target should hold a restored snapshot (or kg_finance.datagen data) with the
+same ids. Writes are replayed unless --reads-only; uploads only with
+--uploads, which sends placeholder files of the recorded size. Requests carry
+the next-auth session cookie from --cookie / KG_SESSION_COOKIE. The report is
+per route template (/api/projects/[id]/ledger) in kg_finance.loadtest's
+format plus how far sends fell behind the schedule. Requires aiohttp.
+
+Usage:
+    python -m kg_finance.replay server.log --since 2026-10-14T08:30 --until 2026-10-14T10:30 --speed 5
+    kubectl logs deploy/web | python -m kg_finance.replay - --speed 10 --reads-only --json after.json \\
+        --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from kg_finance.loadtest import COOKIE_ENV, DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, Recorder, compare, http_sender
+
+DEFAULT_BASE_URL = 'http://localhost:3000'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+UPLOAD_FILENAME = 'replay_upload.csv'
+
+
+def parse_line(line):
+    """Traffic record in a log line (possibly behind a log prefix), or None"""
+    start = line.find('{')
+    if start < 0:
+        return None
+    try:
+        record = json.loads(line[start:])
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or record.get('type') != 'traffic':
+        return None
+    return record
+
+
+def parse_time(value):
+    """ISO time -> epoch ms (UTC when no offset is given)"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() * 1000
+
+
+def read_records(lines, since=None, until=None, reads_only=False, uploads=False, routes=None):
+    """Traffic records in arrival order, filtered by window, method, uploads and route prefix"""
+    start = parse_time(since) if since else None
+    end = parse_time(until) if until else None
+    records = []
+    for line in lines:
+        record = parse_line(line)
+        if not record:
+            continue
+        if (start is not None and record['t'] < start) or (end is not None and record['t'] >= end):
+            continue
+        if reads_only and record['method'] not in READ_METHODS:
+            continue
+        if 'form' in record and not uploads:
+            continue
+        if routes and not any(record['path'].startswith(prefix) for prefix in routes):
+            continue
+        records.append(record)
+    records.sort(key=lambda record: record['t'])
+    return records
+
+
+def route_template(path):
+    """/api/projects/12/ledger -> /api/projects/[id]/ledger"""
+    return re.sub(r'/\d+(?=/|$)', '/[id]', path)
+
+
+def build_request(record):
+    """loadtest.http_sender request for a captured record"""
+    request = {'method': record['method'], 'path': record['path'], 'params': record.get('query') or None}
+    if 'form' in record:
+        request['form'], request['files'] = {}, {}
+        for name, value in record['form'].items():
+            if isinstance(value, dict) and value.get('file'):
+                request['files'][name] = (UPLOAD_FILENAME, b'x' * value['size'],
+                                          value.get('content_type') or 'application/octet-stream')
+            else:
+                request['form'][name] = str(value)
+    elif 'body' in record:
+        request['json'] = record['body']
+    return request
+
+
+def schedule(records, speed=1.0):
+    """[(offset seconds, route template, request)] keeping inter-arrival times / speed"""
+    if not records:
+        return []
+    first = records[0]['t']
+    return [((record['t'] - first) / 1000 / speed, route_template(record['path']), build_request(record))
+            for record in records]
+
+
+async def run_schedule(send, plan, recorder, max_in_flight=DEFAULT_MAX_IN_FLIGHT, clock=time.perf_counter):
+    """
+    Send every planned request at its offset; returns the send lag in seconds
+    Latency is measured from the scheduled time, so a request waiting for a
+    free slot (max_in_flight) counts against the server.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    lags = []
+    tasks = []
+
+    async def fire(name, request, scheduled):
+        async with slots:
+            lags.append(clock() - scheduled)
+            status, error = await send(request)
+        recorder.record(name, clock() - scheduled, status, error)
+
+    start = clock()
+    for offset, name, request in plan:
+        delay = start + offset - clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(fire(name, request, start + offset)))
+    await asyncio.gather(*tasks)
+    return lags
+
+
+async def replay(base_url, plan, max_in_flight=DEFAULT_MAX_IN_FLIGHT, cookie=None, timeout=DEFAULT_TIMEOUT):
+    """Replay plan against base_url; returns (recorder, lags, wall_seconds)"""
+    import aiohttp
+
+    headers = {'Cookie': cookie} if cookie else {}
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+    recorder = Recorder()
+    async with aiohttp.ClientSession(connector=connector, headers=headers,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        send = http_sender(session, base_url.rstrip('/'))
+        started = time.perf_counter()
+        lags = await run_schedule(send, plan, recorder, max_in_flight)
+        return recorder, lags, time.perf_counter() - started
+
+
+def lag_summary(lags):
+    """p50/p99/max of how late requests were sent (ms)"""
+    if not lags:
+        return {}
+    lags_ms = np.asarray(lags, dtype=np.float64) * 1000
+    p50, p99 = np.percentile(lags_ms, [50, 99])
+    return {'p50': round(float(p50), 2), 'p99': round(float(p99), 2), 'max': round(float(lags_ms.max()), 2)}
+
+
+def print_report(report, changes=None):
+    """Per-route table plus totals (and p95 deltas when a baseline was given)"""
+    print("=" * 110)
+    print(f"⏩ TRAFFIC REPLAY x{report['speed']:g}: {report['requests']} requests, "
+          f"{report['captured_seconds']:.0f}s captured in {report['wall_seconds']:.0f}s")
+    print("=" * 110)
+    print(f"{'route':<46} {'requests':>9} {'rps':>8} {'errors':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+    for name, summary in rows:
+        latency = summary.get('latency_ms', {})
+        print(f"{name:<46} {summary['requests']:>9} {summary['throughput_rps']:>8.1f} "
+              f"{summary['error_rate']:>8.2%} {latency.get('p50', 0):>10.1f} "
+              f"{latency.get('p95', 0):>10.1f} {latency.get('p99', 0):>10.1f}")
+        if summary.get('error_sample'):
+            print(f"   first error: {summary['error_sample']}")
+    lag = report['send_lag_ms']
+    if lag:
+        print(f"\nSend lag behind schedule: p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms")
+
+    if changes:
+        print("\nChange vs baseline (p95):")
+        for name, row in changes.items():
+            if 'p95_ms' in row:
+                p95 = row['p95_ms']
+                print(f"   {name:<46} {p95['before']:>10.1f} -> {p95['after']:>10.1f} ms ({p95['change_pct']:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay captured API traffic against a server')
+    parser.add_argument('logs', nargs='+', help="capture/server logs ('-' for stdin)")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='server root, e.g. http://localhost:3000')
+    parser.add_argument('--speed', type=float, default=1.0, help='time compression, e.g. 1, 5 or 10')
+    parser.add_argument('--since', help='first arrival to replay (ISO time)')
+    parser.add_argument('--until', help='replay arrivals before this time (ISO time)')
+    parser.add_argument('--route', action='append', help='only paths starting with this prefix (repeatable)')
+    parser.add_argument('--reads-only', action='store_true', help='skip POST/PUT/PATCH/DELETE')
+    parser.add_argument('--uploads', action='store_true', help='replay multipart uploads with placeholder files')
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='per request, seconds')
+    parser.add_argument('--cookie', default=os.environ.get(COOKIE_ENV),
+                        help=f"Cookie header with the next-auth session (default ${COOKIE_ENV})")
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error('--speed must be positive')
+
+    def lines():
+        for path in args.logs:
+            if path == '-':
+                yield from sys.stdin
+            else:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    yield from f
+
+    records = read_records(lines(), args.since, args.until, args.reads_only, args.uploads, args.route)
+    if not records:
+        print("No traffic records found")
+        return False
+
+    plan = schedule(records, args.speed)
+    print(f"Replaying {len(plan)} requests over {plan[-1][0]:.1f}s at x{args.speed:g} against {args.base_url}")
+    started_at = datetime.now(timezone.utc).isoformat()
+    recorder, lags, wall_seconds = asyncio.run(replay(
+        args.base_url, plan, max_in_flight=args.max_in_flight, cookie=args.cookie, timeout=args.timeout,
+    ))
+
+    report = {
+        'started_at': started_at,
+        'base_url': args.base_url,
+        'speed': args.speed,
+        'captured_from': records[0].get('ts'),
+        'captured_seconds': round((records[-1]['t'] - records[0]['t']) / 1000, 3),
+        'requests': len(plan),
+        'wall_seconds': round(wall_seconds, 3),
+        'send_lag_ms': lag_summary(lags),
+        **recorder.summary(wall_seconds),
+    }
+
+    changes = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            changes = compare(report, json.load(f))
+        report['baseline'] = {'file': args.baseline, 'changes': changes}
+
+    print_report(report, changes)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+    return report['overall']['errors'] == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,338 @@
+"""
+Parallel Backend Test Runner
+Discovers the test_* functions in the backend_test*.py / payment test scripts
+and runs independent ones concurrently in a process pool instead of one after
+another as each script's main() does.
+
+Each worker process gets its own data namespace (KG_TEST_NAMESPACE); scripts
+suffix the codes of the rows they create with namespaced() so two workers never
+create, read back or clean up each other's data. A script can declare:
+
+    RUNNER_SETUP = ['test_database_setup']        # run once, before the pool
+    RUNNER_CHAINS = [('test_create', 'test_get')] # kept in order on one worker
+
+Setup failures skip the rest of that suite, as main() used to exit early.
+
+The scripts call the API at KG_TEST_BASE_URL (--base-url). With --hermetic the
+run gets its own database cloned from the schema template (kg_finance.pgtest)
+instead of DATABASE_URL, starts the app with --server-cmd against that clone
+so the API and the scripts see the same data, and drops it afterwards.
+
+Usage:
+    python -m kg_finance.test_runner --workers 8 --base-url http://localhost:3000
+    python -m kg_finance.test_runner --hermetic --server-cmd 'yarn start'
+    python -m kg_finance.test_runner pr payment dynamic --json results.json
+"""
+
+import argparse
+import importlib
+import inspect
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, redirect_stdout
+from urllib.parse import urlparse
+
+from kg_finance import db, pgtest
+
+NAMESPACE_ENV = 'KG_TEST_NAMESPACE'
+BASE_URL_ENV = 'KG_TEST_BASE_URL'
+DEFAULT_WORKERS = 4
+DEFAULT_HERMETIC_BASE_URL = 'http://localhost:3000'
+SERVER_START_TIMEOUT = 180
+
+# Suite name -> script module (run from the repository root)
+SUITES = {
+    'invoices': 'backend_test',
+    'pr': 'backend_test_pr',
+    'payment': 'payment_calculation_test',
+    'dynamic': 'backend_test_dynamic_categories',
+}
+DEFAULT_SUITES = ['pr', 'payment', 'dynamic']
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def namespace():
+    """Data namespace of the current worker ('' outside the runner)"""
+    return os.environ.get(NAMESPACE_ENV, '')
+
+
+def namespaced(code):
+    """Suffix a test fixture code with the worker namespace"""
+    ns = namespace()
+    return f"{code}_{ns}" if ns else code
+
+
+def discover(module):
+    """test_* functions defined in a module, in source order"""
+    tests = [
+        func for name, func in inspect.getmembers(module, inspect.isfunction)
+        if name.startswith('test_') and func.__module__ == module.__name__
+    ]
+    tests.sort(key=lambda func: func.__code__.co_firstlineno)
+    return [func.__name__ for func in tests]
+
+
+def plan(module):
+    """
+    Split a suite into (setup, units)
+    setup runs serially before the pool; each unit is a tuple of test names
+    that one worker runs in order. Tests outside a chain are units of one.
+    """
+    names = discover(module)
+    setup = [name for name in getattr(module, 'RUNNER_SETUP', []) if name in names]
+    chains = [tuple(name for name in chain if name in names)
+              for chain in getattr(module, 'RUNNER_CHAINS', [])]
+
+    chained = {name for chain in chains for name in chain}
+    units = []
+    for name in names:
+        if name in setup:
+            continue
+        chain = next((c for c in chains if c and c[0] == name), None)
+        if chain:
+            units.append(chain)
+        elif name not in chained:
+            units.append((name,))
+    return setup, units
+
+
+def run_unit(module_name, names):
+    """
+    Run tests in order in the current process
+    Output is captured per test; an exception or sys.exit counts as a failure.
+    Returns one result dict per test.
+    """
+    module = importlib.import_module(module_name)
+    results = []
+    for name in names:
+        buffer = io.StringIO()
+        started = time.perf_counter()
+        error = None
+        try:
+            with redirect_stdout(buffer):
+                passed = bool(getattr(module, name)())
+        except BaseException as e:  # SystemExit from a script helper included
+            passed = False
+            error = f"{type(e).__name__}: {e}"
+        results.append({
+            'suite_module': module_name,
+            'test': name,
+            'passed': passed,
+            'seconds': round(time.perf_counter() - started, 3),
+            'namespace': namespace(),
+            'worker_pid': os.getpid(),
+            'error': error,
+            'output': buffer.getvalue(),
+        })
+    return results
+
+
+def _init_worker(run_id):
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.environ[NAMESPACE_ENV] = f"{run_id}w{os.getpid()}"
+
+
+def run(suites, workers=DEFAULT_WORKERS):
+    """Run the given suites; returns (results, wall_seconds)"""
+    run_id = uuid.uuid4().hex[:6]
+    started = time.perf_counter()
+    results = []
+    units = []
+
+    # Setup tests run here, serially, under their own namespace
+    os.environ[NAMESPACE_ENV] = f"{run_id}setup"
+    for suite in suites:
+        module_name = SUITES[suite]
+        setup, suite_units = plan(importlib.import_module(module_name))
+        setup_results = run_unit(module_name, setup)
+        for result in setup_results:
+            result['suite'] = suite
+        results.extend(setup_results)
+        if all(result['passed'] for result in setup_results):
+            units.extend((suite, module_name, unit) for unit in suite_units)
+        else:
+            for unit in suite_units:
+                results.extend({
+                    'suite': suite, 'suite_module': module_name, 'test': name,
+                    'passed': False, 'seconds': 0.0, 'namespace': None,
+                    'worker_pid': None, 'error': 'skipped: setup failed', 'output': '',
+                } for name in unit)
+    del os.environ[NAMESPACE_ENV]
+
+    # Pooled connections must not be shared with forked workers; each worker
+    # opens its own pool on first use
+    db.close_pool()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(run_id,)) as pool:
+        futures = {pool.submit(run_unit, module_name, unit): suite
+                   for suite, module_name, unit in units}
+        for future in as_completed(futures):
+            for result in future.result():
+                result['suite'] = futures[future]
+                results.append(result)
+
+    order = {(suite, name): i for i, (suite, _, unit) in enumerate(units) for name in unit}
+    results.sort(key=lambda r: (suites.index(r['suite']), order.get((r['suite'], r['test']), -1)))
+    return results, time.perf_counter() - started
+
+
+@contextmanager
+def _environ(**values):
+    """Set environment variables for the duration, restoring the old values"""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def app_server(command, base_url, database_url, timeout=SERVER_START_TIMEOUT):
+    """
+    Run the app (shell command, e.g. 'yarn start') against database_url
+    Waits until base_url answers any HTTP request; PORT is taken from base_url.
+    The server's process group is terminated on exit.
+    """
+    env = dict(os.environ, DATABASE_URL=database_url)
+    port = urlparse(base_url).port
+    if port:
+        env['PORT'] = str(port)
+    process = subprocess.Popen(command, shell=True, cwd=REPO_ROOT, env=env, start_new_session=True)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"server command exited with status {process.returncode}: {command}")
+            try:
+                urllib.request.urlopen(base_url, timeout=2).close()
+                break
+            except urllib.error.HTTPError:
+                break  # answered, even if with an error status
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"server did not answer at {base_url} within {timeout}s")
+                time.sleep(0.5)
+        yield
+    finally:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+
+def run_hermetic(suites, workers=DEFAULT_WORKERS, server_cmd=None, base_url=None):
+    """
+    run() against a throwaway clone of the schema template
+    server_cmd starts the app on the clone at base_url; without a server on
+    the same database the scripts would check API results against data the
+    API never saw.
+    """
+    if not server_cmd:
+        raise ValueError('--hermetic needs --server-cmd to start the app on the cloned database')
+    base_url = base_url or DEFAULT_HERMETIC_BASE_URL
+    with pgtest.server() as admin_dsn:
+        template = pgtest.ensure_template(admin_dsn, pgtest.schema_files())
+        name = f"kg_run_{uuid.uuid4().hex[:12]}"
+        database_url = pgtest.clone(admin_dsn, template, name)
+        db.close_pool()
+        try:
+            with _environ(DATABASE_URL=database_url, **{BASE_URL_ENV: base_url}), \
+                    app_server(server_cmd, base_url, database_url):
+                return run(suites, workers=workers)
+        finally:
+            db.close_pool()
+            pgtest.drop(admin_dsn, name)
+
+
+def print_report(results, wall_seconds, verbose=False):
+    """Per-test timing table plus summary"""
+    print("=" * 70)
+    print("📊 PARALLEL TEST SUMMARY")
+    print("=" * 70)
+
+    for result in results:
+        status = "✅ PASS" if result['passed'] else "❌ FAIL"
+        label = f"{result['suite']}::{result['test']}"
+        print(f"{label:<55} {status} {result['seconds']:>7.2f}s")
+        if result['error']:
+            print(f"   {result['error']}")
+        if result['output'] and (verbose or not result['passed']):
+            for line in result['output'].rstrip().splitlines():
+                print(f"   | {line}")
+
+    passed = sum(1 for r in results if r['passed'])
+    serial_seconds = sum(r['seconds'] for r in results)
+    print(f"\nOverall: {passed}/{len(results)} tests passed")
+    print(f"Wall time: {wall_seconds:.2f}s (sum of test times {serial_seconds:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run backend test scripts in parallel')
+    parser.add_argument('suites', nargs='*', metavar='SUITE',
+                        help=f"{', '.join(sorted(SUITES))} (default: {' '.join(DEFAULT_SUITES)})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='worker processes')
+    parser.add_argument('--json', help='write per-test results to this file')
+    parser.add_argument('--base-url', default=os.environ.get(BASE_URL_ENV),
+                        help=f"server the scripts call (default: ${BASE_URL_ENV}, or the scripts' own; "
+                             f"{DEFAULT_HERMETIC_BASE_URL} with --hermetic)")
+    parser.add_argument('--hermetic', action='store_true',
+                        help='run against a fresh clone of the schema template (kg_finance.pgtest)')
+    parser.add_argument('--server-cmd',
+                        help="with --hermetic: shell command starting the app (e.g. 'yarn start'); "
+                             "it gets DATABASE_URL of the clone and PORT from --base-url")
+    parser.add_argument('--verbose', action='store_true', help='show output of passing tests too')
+    args = parser.parse_args(argv)
+    args.suites = args.suites or DEFAULT_SUITES
+    unknown = [suite for suite in args.suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+    if args.hermetic and not args.server_cmd:
+        parser.error('--hermetic needs --server-cmd: the scripts must call a server on the cloned database')
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    if args.hermetic:
+        results, wall_seconds = run_hermetic(args.suites, workers=args.workers,
+                                             server_cmd=args.server_cmd, base_url=args.base_url)
+    elif args.base_url:
+        with _environ(**{BASE_URL_ENV: args.base_url}):
+            results, wall_seconds = run(args.suites, workers=args.workers)
+    else:
+        results, wall_seconds = run(args.suites, workers=args.workers)
+    print_report(results, wall_seconds, verbose=args.verbose)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'suites': args.suites,
+                'workers': args.workers,
+                'wall_seconds': round(wall_seconds, 3),
+                'results': results,
+            }, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    return all(r['passed'] for r in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
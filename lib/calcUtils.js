@@ -102,9 +102,19 @@ export function calculateCategoryTotals(items, categories) {
   }
   */
 
-  console.log(items);
-  console.log(categories);
+  const accumulator = createCategoryTotalsAccumulator(categories);
+  items.forEach(item => accumulator.add(item));
+  return accumulator.result();
+}
 
+/**
+ * Running version of calculateCategoryTotals for items that arrive in batches
+ * (e.g. streamed CSV uploads). Feeding every item through add() gives exactly
+ * the same totals as calculateCategoryTotals on the full array.
+ * @param {Array} categories - Array of category configurations
+ * @returns {Object} { add(item), result(), count }
+ */
+export function createCategoryTotalsAccumulator(categories) {
 
   // Initialize dynamic accumulators for each category
   const categoryBreakdown = {};
@@ -125,43 +135,118 @@ export function calculateCategoryTotals(items, categories) {
   let totalItemsDiscount = 0;
   let totalKGCharges = 0;
   let totalKGDiscount = 0;
-  let totalDiscount = 0;
   let totalGST = 0;
   let grandTotal = 0;
 
-  // Accumulate for each item
-  items.forEach(item => {
-    const categoryId = item.category;
-
-    if (categoryBreakdown[categoryId]) {
-      categoryBreakdown[categoryId].subtotal += item.subtotal;
-      categoryBreakdown[categoryId].item_discount_amount += item.item_discount_amount;
-      categoryBreakdown[categoryId].karighar_charges_amount += item.karighar_charges_amount;
-      categoryBreakdown[categoryId].discount_kg_charges_amount += (item.discount_kg_charges_amount);
-      categoryBreakdown[categoryId].amount_before_gst += item.amount_before_gst;
-      categoryBreakdown[categoryId].gst_amount += item.gst_amount;
-      categoryBreakdown[categoryId].total += item.item_total;
+  return {
+    count: 0,
+
+    // Accumulate a single item
+    add(item) {
+      const categoryId = item.category;
+
+      if (categoryBreakdown[categoryId]) {
+        categoryBreakdown[categoryId].subtotal += item.subtotal;
+        categoryBreakdown[categoryId].item_discount_amount += item.item_discount_amount;
+        categoryBreakdown[categoryId].karighar_charges_amount += item.karighar_charges_amount;
+        categoryBreakdown[categoryId].discount_kg_charges_amount += (item.discount_kg_charges_amount);
+        categoryBreakdown[categoryId].amount_before_gst += item.amount_before_gst;
+        categoryBreakdown[categoryId].gst_amount += item.gst_amount;
+        categoryBreakdown[categoryId].total += item.item_total;
+      }
+
+      // Accumulate high-level totals
+      totalItemsValue += item.subtotal;
+      totalKGCharges += item.karighar_charges_amount;
+      totalItemsDiscount += item.item_discount_amount;
+      totalKGDiscount += (item.discount_kg_charges_amount);
+      totalGST += item.gst_amount;
+      grandTotal += item.item_total;
+      this.count += 1;
+    },
+
+    result() {
+      return {
+        category_breakdown: categoryBreakdown,
+        items_value: parseFloat(totalItemsValue.toFixed(2)),
+        kg_charges: parseFloat(totalKGCharges.toFixed(2)),
+        items_discount: parseFloat(totalItemsDiscount.toFixed(2)),
+        kg_discount: parseFloat(totalKGDiscount.toFixed(2)),
+        discount: parseFloat((totalItemsDiscount + totalKGDiscount).toFixed(2)),
+        gst_amount: parseFloat(totalGST.toFixed(2)),
+        final_value: parseFloat(grandTotal.toFixed(2))
+      };
     }
+  };
+}
 
-    // Accumulate high-level totals
-    totalItemsValue += item.subtotal;
-    totalKGCharges += item.karighar_charges_amount;
-    totalItemsDiscount += item.item_discount_amount;
-    totalKGDiscount += (item.discount_kg_charges_amount);
-    totalDiscount += (totalItemsDiscount + totalKGDiscount);
-    totalGST += item.gst_amount;
-    grandTotal += item.item_total;
+/**
+ * Apply item-level deltas to existing estimation totals
+ * Incremental counterpart of calculateCategoryTotals for revisions that only
+ * touch a few items: cost is O(changed items) instead of O(all items)
+ * @param {Object} estimation - Current project_estimations row (category_breakdown + headline totals)
+ * @param {Array} removedItems - Calculated items leaving the estimation (old rows of changed items included)
+ * @param {Array} addedItems - Calculated items entering the estimation (new rows of changed items included)
+ * @param {Array} categories - Array of category configurations
+ * @returns {Object} Category breakdown and overall totals (same shape as calculateCategoryTotals)
+ */
+export function applyCategoryTotalsDelta(estimation, removedItems, addedItems, categories) {
+  const existing = estimation.category_breakdown || {};
+  const fields = [
+    ['subtotal', 'subtotal'],
+    ['item_discount_amount', 'item_discount_amount'],
+    ['karighar_charges_amount', 'karighar_charges_amount'],
+    ['discount_kg_charges_amount', 'discount_kg_charges_amount'],
+    ['amount_before_gst', 'amount_before_gst'],
+    ['gst_amount', 'gst_amount'],
+    ['total', 'item_total']
+  ];
+
+  // Start from the stored breakdown (categories added to base rates start at 0)
+  const categoryBreakdown = {};
+  categories.forEach(cat => {
+    categoryBreakdown[cat.id] = {};
+    fields.forEach(([key]) => {
+      categoryBreakdown[cat.id][key] = parseFloat(existing[cat.id]?.[key]) || 0;
+    });
   });
 
+  const delta = {
+    subtotal: 0,
+    item_discount_amount: 0,
+    karighar_charges_amount: 0,
+    discount_kg_charges_amount: 0,
+    gst_amount: 0,
+    item_total: 0
+  };
+
+  const accumulate = (item, sign) => {
+    const breakdown = categoryBreakdown[item.category];
+    if (breakdown) {
+      fields.forEach(([key, source]) => {
+        breakdown[key] += sign * (parseFloat(item[source]) || 0);
+      });
+    }
+    Object.keys(delta).forEach(key => {
+      delta[key] += sign * (parseFloat(item[key]) || 0);
+    });
+  };
+
+  removedItems.forEach(item => accumulate(item, -1));
+  addedItems.forEach(item => accumulate(item, 1));
+
+  const itemsDiscount = (parseFloat(estimation.items_discount) || 0) + delta.item_discount_amount;
+  const kgDiscount = (parseFloat(estimation.kg_discount) || 0) + delta.discount_kg_charges_amount;
+
   return {
     category_breakdown: categoryBreakdown,
-    items_value: parseFloat(totalItemsValue.toFixed(2)),
-    kg_charges: parseFloat(totalKGCharges.toFixed(2)),
-    items_discount: parseFloat(totalItemsDiscount.toFixed(2)),
-    kg_discount: parseFloat(totalKGDiscount.toFixed(2)),
-    discount: parseFloat(totalItemsDiscount.toFixed(2) + totalKGDiscount.toFixed(2)),
-    gst_amount: parseFloat(totalGST.toFixed(2)),
-    final_value: parseFloat(grandTotal.toFixed(2))
+    items_value: parseFloat(((parseFloat(estimation.items_value) || 0) + delta.subtotal).toFixed(2)),
+    kg_charges: parseFloat(((parseFloat(estimation.kg_charges) || 0) + delta.karighar_charges_amount).toFixed(2)),
+    items_discount: parseFloat(itemsDiscount.toFixed(2)),
+    kg_discount: parseFloat(kgDiscount.toFixed(2)),
+    discount: parseFloat((itemsDiscount + kgDiscount).toFixed(2)),
+    gst_amount: parseFloat(((parseFloat(estimation.gst_amount) || 0) + delta.gst_amount).toFixed(2)),
+    final_value: parseFloat(((parseFloat(estimation.final_value) || 0) + delta.item_total).toFixed(2))
   };
 }
 
@@ -241,6 +326,8 @@ if (typeof module !== 'undefined' && module.exports) {
   module.exports = {
     calculateItemTotal,
     calculateCategoryTotals,
+    createCategoryTotalsAccumulator,
+    applyCategoryTotalsDelta,
     calculateAllTotals,
     validateItemDiscounts
   };
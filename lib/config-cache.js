@@ -0,0 +1,175 @@
+// In-process cache of pricing configuration
+//
+// Project base rates (the active project_base_rates row) and the biz model
+// category_rates a project was created with are read by most estimation and
+// payment requests but only change through base-rates/[baseRateId]/approve,
+// project creation and the biz-models routes, which invalidate the entries
+// they touch after committing. Entries also expire after CONFIG_CACHE_TTL_MS
+// (default 60s), which bounds staleness when several app instances run.
+// Cached rows are shared between requests: treat them as read-only.
+// GET /api/admin/cache-stats reports hits, misses and sizes.
+import { namedQuery } from '@/lib/db';
+
+const config = {
+  ttlMs: parseInt(process.env.CONFIG_CACHE_TTL_MS || '60000'),
+  maxEntries: parseInt(process.env.CONFIG_CACHE_MAX_ENTRIES || '5000')
+};
+
+/**
+ * LRU map with per-entry TTL and hit/miss counters
+ * get() shares one load between concurrent misses, and a load that was
+ * running when its key was invalidated is returned but not stored.
+ * Loaders returning null (e.g. unknown project) are not cached.
+ */
+export class LruTtlCache {
+  constructor({ ttlMs = config.ttlMs, maxEntries = config.maxEntries } = {}) {
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+    this.entries = new Map();
+    this.loading = new Map();
+    this.generation = 0;
+    this.resetStats();
+  }
+
+  resetStats() {
+    this.stats = { hits: 0, misses: 0, evictions: 0, expirations: 0, invalidations: 0 };
+  }
+
+  async get(key, loader, now = Date.now) {
+    const entry = this.entries.get(key);
+    if (entry && entry.expiresAt > now()) {
+      // Re-insert to mark as most recently used
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+      this.stats.hits++;
+      return entry.value;
+    }
+    if (entry) {
+      this.entries.delete(key);
+      this.stats.expirations++;
+    }
+    this.stats.misses++;
+
+    let pending = this.loading.get(key);
+    if (!pending) {
+      const generation = this.generation;
+      pending = loader().then(value => {
+        if (value !== null && value !== undefined && generation === this.generation) {
+          this.set(key, value, now);
+        }
+        return value;
+      }).finally(() => {
+        if (this.loading.get(key) === pending) this.loading.delete(key);
+      });
+      this.loading.set(key, pending);
+    }
+    return pending;
+  }
+
+  set(key, value, now = Date.now) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: now() + this.ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.stats.evictions++;
+    }
+  }
+
+  delete(key) {
+    this.generation++;
+    this.loading.delete(key);
+    if (this.entries.delete(key)) this.stats.invalidations++;
+  }
+
+  clear() {
+    this.generation++;
+    this.loading.clear();
+    this.stats.invalidations += this.entries.size;
+    this.entries.clear();
+  }
+
+  snapshot() {
+    const lookups = this.stats.hits + this.stats.misses;
+    return {
+      size: this.entries.size,
+      max_entries: this.maxEntries,
+      ttl_ms: this.ttlMs,
+      ...this.stats,
+      hit_rate: lookups ? Math.round((this.stats.hits / lookups) * 10000) / 10000 : 0
+    };
+  }
+}
+
+// Kept on globalThis so dev-server module reloads share one cache
+const caches = globalThis.__kgConfigCache || (globalThis.__kgConfigCache = {
+  baseRates: new LruTtlCache(),
+  bizModelRates: new LruTtlCache()
+});
+
+/**
+ * Active base rates of a project
+ * @param {number|string} projectId - Project id
+ * @returns {Promise<Object|null>} { rate } where rate is the active
+ *   project_base_rates row or null, or null when the project doesn't exist
+ */
+export function getProjectBaseRates(projectId) {
+  return caches.baseRates.get(String(projectId), async () => {
+    const result = await namedQuery('project_active_base_rate', `
+      SELECT p.id AS project_exists, pbr.*
+      FROM projects p
+      LEFT JOIN project_base_rates pbr ON pbr.project_id = p.id AND pbr.active = true
+      WHERE p.id = $1
+      LIMIT 1
+    `, [projectId]);
+    if (result.rows.length === 0) return null;
+    const { project_exists, ...rate } = result.rows[0];
+    return { rate: rate.id ? rate : null };
+  });
+}
+
+/**
+ * Biz model id and category_rates of a project's biz model
+ * @param {number|string} projectId - Project id
+ * @returns {Promise<Object|null>} { biz_model_id, category_rates }, or null
+ *   when the project or its biz model doesn't exist
+ */
+export function getProjectBizModelRates(projectId) {
+  return caches.bizModelRates.get(String(projectId), async () => {
+    const result = await namedQuery('project_category_rates', `
+      SELECT p.biz_model_id, bm.category_rates
+      FROM projects p
+      JOIN biz_models bm ON p.biz_model_id = bm.id
+      WHERE p.id = $1
+    `, [projectId]);
+    return result.rows[0] || null;
+  });
+}
+
+/** Drop a project's cached base rates (after approving or creating them) */
+export function invalidateProjectBaseRates(projectId) {
+  caches.baseRates.delete(String(projectId));
+}
+
+/** Drop every cached biz model configuration (after any biz model write) */
+export function invalidateBizModelRates() {
+  caches.bizModelRates.clear();
+}
+
+/**
+ * Hit/miss counters and sizes of the configuration caches
+ * @returns {Object} { base_rates: {...}, biz_model_rates: {...} }
+ */
+export function configCacheStats() {
+  return {
+    base_rates: caches.baseRates.snapshot(),
+    biz_model_rates: caches.bizModelRates.snapshot()
+  };
+}
+
+/** Empty the caches and reset their counters */
+export function resetConfigCache() {
+  for (const cache of Object.values(caches)) {
+    cache.clear();
+    cache.resetStats();
+  }
+}
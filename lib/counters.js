@@ -0,0 +1,47 @@
+// Per-scope number allocation (PR numbers, estimation and PR versions)
+import { query } from '@/lib/db';
+
+// Counter names; scope_id is the project id unless noted
+export const COUNTER = {
+  PR_NUMBER: 'pr_number',
+  ESTIMATION_VERSION: 'estimation_version',
+  PR_VERSION: 'pr_version' // scoped to purchase_requests.id
+};
+
+// Allocation statement ($1 = name, $2 = scope id)
+const NEXT_COUNTER_VALUE_SQL = `
+  INSERT INTO counters (name, scope_id, value)
+  VALUES ($1, $2, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = counters.value + 1, updated_at = NOW()
+  RETURNING value
+`;
+
+/**
+ * Allocate the next number of a counter
+ * A single upsert on the (name, scope_id) row: the row lock serializes
+ * concurrent callers, so two requests never get the same number.
+ *
+ * @param {string} name - One of COUNTER
+ * @param {number} scopeId - Project id (purchase request id for PR_VERSION)
+ * @param {Function} runQuery - Query function (defaults to the shared pool)
+ * @returns {Promise<number>} Allocated value (1 for a new scope)
+ */
+export async function nextCounterValue(name, scopeId, runQuery = query) {
+  const result = await runQuery(NEXT_COUNTER_VALUE_SQL, [name, scopeId]);
+  return parseInt(result.rows[0].value);
+}
+
+/**
+ * Last allocated number of a counter, without allocating
+ *
+ * @param {string} name - One of COUNTER
+ * @param {number} scopeId - Project id (purchase request id for PR_VERSION)
+ * @param {Function} runQuery - Query function (defaults to the shared pool)
+ * @returns {Promise<number>} Current value (0 if nothing was allocated yet)
+ */
+export async function currentCounterValue(name, scopeId, runQuery = query) {
+  const result = await runQuery(`
+    SELECT value FROM counters WHERE name = $1 AND scope_id = $2
+  `, [name, scopeId]);
+  return result.rows.length > 0 ? parseInt(result.rows[0].value) : 0;
+}
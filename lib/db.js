@@ -1,4 +1,6 @@
+import { createHash } from 'crypto';
 import { Pool } from 'pg';
+import { callingRoute, recordPreparedStatement, recordQuery } from '@/lib/query-stats';
 
 let pool;
 
@@ -14,13 +16,125 @@ export function getPool() {
   return pool;
 }
 
-export async function query(text, params) {
-  const pool = getPool();
+async function timedQuery(runner, text, params, route) {
+  const start = performance.now();
   try {
-    const result = await pool.query(text, params);
+    const result = await runner.query(text, params);
+    recordQuery({ text, route, durationMs: performance.now() - start, rows: result.rowCount });
     return result;
   } catch (error) {
+    recordQuery({ text, route, durationMs: performance.now() - start, error });
     console.error('Database query error:', error);
     throw error;
   }
 }
+
+// Every query is timed and recorded per statement fingerprint and route
+// (lib/query-stats.js, GET /api/admin/query-stats)
+export async function query(text, params) {
+  return timedQuery(getPool(), text, params, callingRoute());
+}
+
+// Named statements: name -> { text, statementName }. The server-side name
+// carries a hash of the text, so an edited statement (dev reload) never
+// collides with the old one still prepared on a pooled connection.
+const namedStatements = globalThis.__kgNamedStatements || (globalThis.__kgNamedStatements = new Map());
+
+// Pooled client -> server-side statement names already prepared on it
+const preparedOn = new WeakMap();
+
+function registerStatement(name, text) {
+  let entry = namedStatements.get(name);
+  if (!entry || entry.text !== text) {
+    const hash = createHash('sha1').update(text).digest('hex').slice(0, 8);
+    entry = { text, statementName: `${name}_${hash}` };
+    namedStatements.set(name, entry);
+  }
+  return entry;
+}
+
+/**
+ * Run a static statement as a named server-side prepared statement
+ * Each pooled connection parses and plans it on first use only; later calls
+ * on that connection skip straight to bind/execute. Hits and misses per name
+ * are reported by GET /api/admin/query-stats. Use query() for SQL that is
+ * assembled at run time - every distinct text would stay prepared.
+ * @param {string} name - Registry name, e.g. 'ledger_page'
+ * @param {string} text - SQL with $n placeholders (the same text on every call)
+ * @param {Array} params - Parameter values
+ * @returns {Promise<Object>} pg result
+ */
+export async function namedQuery(name, text, params = []) {
+  const { statementName } = registerStatement(name, text);
+  const route = callingRoute();
+  const start = performance.now();
+  const client = await getPool().connect();
+  let prepared = preparedOn.get(client);
+  if (!prepared) {
+    prepared = new Set();
+    preparedOn.set(client, prepared);
+  }
+  const hit = prepared.has(statementName);
+  try {
+    const result = await client.query({ name: statementName, text, values: params });
+    prepared.add(statementName);
+    recordPreparedStatement(name, hit);
+    recordQuery({ text, route, durationMs: performance.now() - start, rows: result.rowCount });
+    return result;
+  } catch (error) {
+    recordQuery({ text, route, durationMs: performance.now() - start, error });
+    console.error(`Database query error (${name}):`, error);
+    throw error;
+  } finally {
+    client.release();
+  }
+}
+
+/**
+ * Run callback(tx) in a transaction on one pooled connection
+ * tx(text, params) runs a statement with bound parameters on that
+ * connection (pass it as the runQuery of helpers such as nextCounterValue
+ * or insertEstimationItems). BEGIN goes out with the first statement.
+ * tx.pipeline([() => tx(...), () => nextCounterValue(..., tx), ...]) starts
+ * independent calls together instead of awaiting each before sending the
+ * next: node-postgres queues their statements on the connection in call
+ * order and writes each one the moment the previous completes. It resolves
+ * to their results in order, or throws the first error once all settled.
+ * COMMIT follows the callback; any error rolls back and is rethrown.
+ * @param {Function} callback - async tx => value
+ * @returns {Promise<*>} The callback's value
+ */
+export async function withTransaction(callback) {
+  const route = callingRoute();
+  const client = await getPool().connect();
+  let begin;
+
+  const tx = async (text, params) => {
+    // Concurrent first calls share one BEGIN and queue up behind it in order
+    begin = begin || client.query('BEGIN');
+    await begin;
+    return timedQuery(client, text, params, route);
+  };
+
+  tx.pipeline = async (calls) => {
+    const settled = await Promise.allSettled(calls.map(call => call()));
+    const failed = settled.find(outcome => outcome.status === 'rejected');
+    if (failed) throw failed.reason;
+    return settled.map(outcome => outcome.value);
+  };
+
+  let broken;
+  try {
+    const value = await callback(tx);
+    if (begin) await client.query('COMMIT');
+    return value;
+  } catch (error) {
+    if (begin) {
+      // A connection that can't roll back is dropped instead of reused
+      await client.query('ROLLBACK').catch(rollbackError => { broken = rollbackError; });
+    }
+    throw error;
+  } finally {
+    client.release(broken);
+  }
+}
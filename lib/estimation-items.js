@@ -0,0 +1,65 @@
+// Bulk write helpers for estimation_items
+import { query } from '@/lib/db';
+
+// Column name -> Postgres array type used by unnest()
+const ITEM_COLUMN_TYPES = [
+  ['category', 'text'],
+  ['room_name', 'text'],
+  ['vendor_type', 'text'],
+  ['item_name', 'text'],
+  ['unit', 'text'],
+  ['width', 'numeric'],
+  ['height', 'numeric'],
+  ['quantity', 'numeric'],
+  ['unit_price', 'numeric'],
+  ['subtotal', 'numeric'],
+  ['karighar_charges_percentage', 'numeric'],
+  ['karighar_charges_amount', 'numeric'],
+  ['item_discount_percentage', 'numeric'],
+  ['item_discount_amount', 'numeric'],
+  ['discount_kg_charges_percentage', 'numeric'],
+  ['discount_kg_charges_amount', 'numeric'],
+  ['gst_percentage', 'numeric'],
+  ['amount_before_gst', 'numeric'],
+  ['gst_amount', 'numeric'],
+  ['item_total', 'numeric'],
+  ['status', 'text']
+];
+
+export const ESTIMATION_ITEM_COLUMNS = ITEM_COLUMN_TYPES.map(([column]) => column);
+
+// Rows per INSERT; one array parameter per column, so this is not bounded
+// by the 65535 bind-parameter limit of multi-row VALUES
+export const ESTIMATION_ITEM_BATCH_SIZE = 2000;
+
+/**
+ * Insert calculated estimation items with one statement per batch
+ * Items are sent column-wise as arrays and expanded server-side with unnest(),
+ * the closest thing to COPY that node-postgres supports without extra packages.
+ *
+ * @param {number} estimationId - project_estimations.id the items belong to
+ * @param {Array} items - Items with input and calculated fields
+ * @param {Function} runQuery - Query function (defaults to the shared pool)
+ * @returns {Promise<number>} Number of rows inserted
+ */
+export async function insertEstimationItems(estimationId, items, runQuery = query) {
+  let inserted = 0;
+
+  for (let start = 0; start < items.length; start += ESTIMATION_ITEM_BATCH_SIZE) {
+    const batch = items.slice(start, start + ESTIMATION_ITEM_BATCH_SIZE);
+    const arrays = ITEM_COLUMN_TYPES.map(([column]) => batch.map(item => item[column] ?? null));
+    const unnestArgs = ITEM_COLUMN_TYPES.map(([, type], idx) => `$${idx + 2}::${type}[]`);
+
+    const result = await runQuery(`
+      INSERT INTO estimation_items (
+        estimation_id, ${ESTIMATION_ITEM_COLUMNS.join(', ')}, created_at, updated_at
+      )
+      SELECT $1, u.*, NOW(), NOW()
+      FROM unnest(${unnestArgs.join(', ')}) AS u
+    `, [estimationId, ...arrays]);
+
+    inserted += result.rowCount;
+  }
+
+  return inserted;
+}
@@ -0,0 +1,72 @@
+// Keyset (cursor) pagination helpers for list endpoints
+
+export const DEFAULT_PAGE_SIZE = 50;
+export const MAX_PAGE_SIZE = 200;
+
+/**
+ * Read ?limit= from the query string, clamped to [1, maxLimit]
+ *
+ * @param {URLSearchParams} searchParams - Request query parameters
+ * @param {number} defaultLimit - Used when limit is missing or invalid
+ * @param {number} maxLimit - Upper bound
+ * @returns {number} Page size
+ */
+export function parseLimit(searchParams, defaultLimit = DEFAULT_PAGE_SIZE, maxLimit = MAX_PAGE_SIZE) {
+  const limit = parseInt(searchParams.get('limit'));
+  if (!limit || limit < 1) {
+    return defaultLimit;
+  }
+  return Math.min(limit, maxLimit);
+}
+
+/**
+ * Encode the sort key of the last row on a page as an opaque cursor
+ *
+ * @param {Array} values - Sort key values, e.g. [entry_date, id]
+ * @returns {string} URL-safe cursor
+ */
+export function encodeCursor(values) {
+  return Buffer.from(JSON.stringify(values)).toString('base64url');
+}
+
+/**
+ * Decode a cursor produced by encodeCursor
+ *
+ * @param {string|null} cursor - Cursor from the query string
+ * @param {number} length - Expected number of sort key values
+ * @returns {Array|null} Sort key values, or null when no cursor was given
+ * @throws {Error} When the cursor is malformed
+ */
+export function decodeCursor(cursor, length) {
+  if (!cursor) {
+    return null;
+  }
+  let values;
+  try {
+    values = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf-8'));
+  } catch (error) {
+    throw new Error('Invalid cursor');
+  }
+  if (!Array.isArray(values) || values.length !== length) {
+    throw new Error('Invalid cursor');
+  }
+  return values;
+}
+
+/**
+ * Split a result fetched with LIMIT pageSize + 1 into the page and next cursor
+ *
+ * @param {Array} rows - Rows fetched with one extra row
+ * @param {number} limit - Page size
+ * @param {Function} keyOf - Row -> sort key values for the cursor
+ * @returns {{ rows: Array, next_cursor: string|null, has_more: boolean }}
+ */
+export function paginate(rows, limit, keyOf) {
+  const hasMore = rows.length > limit;
+  const page = hasMore ? rows.slice(0, limit) : rows;
+  return {
+    rows: page,
+    next_cursor: hasMore ? encodeCursor(keyOf(page[page.length - 1])) : null,
+    has_more: hasMore
+  };
+}
@@ -0,0 +1,37 @@
+// Per-project payment aggregates (project_payment_totals, migration 027)
+//
+// Collected (approved) and pending customer payment totals are kept up to
+// date by a trigger in the same transaction as the payment write, so callers
+// read one row instead of summing customer_payments.
+import { query } from '@/lib/db';
+
+// Lookup statement ($1 = project id); exported for namedQuery callers
+export const PROJECT_PAYMENT_TOTALS_SQL = `
+  SELECT collected, pending
+  FROM project_payment_totals
+  WHERE project_id = $1
+`;
+
+/**
+ * Totals from a PROJECT_PAYMENT_TOTALS_SQL result
+ * @param {Object} result - Query result (no row means nothing recorded yet)
+ * @returns {Object} { collected, pending } as numbers
+ */
+export function paymentTotalsFromResult(result) {
+  const row = result.rows[0] || {};
+  return {
+    collected: parseFloat(row.collected || 0),
+    pending: parseFloat(row.pending || 0)
+  };
+}
+
+/**
+ * Collected and pending payment totals of a project
+ *
+ * @param {number} projectId - Project id
+ * @param {Function} runQuery - Query function (defaults to the shared pool)
+ * @returns {Promise<Object>} { collected, pending }
+ */
+export async function projectPaymentTotals(projectId, runQuery = query) {
+  return paymentTotalsFromResult(await runQuery(PROJECT_PAYMENT_TOTALS_SQL, [projectId]));
+}
@@ -0,0 +1,251 @@
+// Per-statement query timing for lib/db.js
+//
+// Every query is fingerprinted by its normalised text (literals -> ?,
+// whitespace collapsed) and tagged with the API route that issued it.
+// Timings go into one-minute slices of a rolling window (QUERY_STATS_WINDOW_MINUTES,
+// default 15) read by GET /api/admin/query-stats. Queries slower than
+// DB_SLOW_QUERY_MS (default 500) are logged as one JSON line
+// ({"type":"slow_query",...}); DB_QUERY_LOG=all logs every query the same
+// way ({"type":"query",...}) and DB_QUERY_LOG=off disables logging.
+// kg_finance/querylog.py summarises those lines. Named prepared statements
+// (namedQuery in lib/db.js) also count statement-cache hits and misses.
+import { createHash } from 'crypto';
+
+// Histogram bucket upper bounds in ms (the last one is open-ended)
+export const LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, Infinity];
+
+const SLICE_MS = 60 * 1000;
+const MAX_STATEMENT_LENGTH = 500;
+const FINGERPRINT_CACHE_SIZE = 2000;
+
+const config = {
+  slowQueryMs: parseFloat(process.env.DB_SLOW_QUERY_MS || '500'),
+  logMode: process.env.DB_QUERY_LOG || 'slow',
+  windowSlices: parseInt(process.env.QUERY_STATS_WINDOW_MINUTES || '15')
+};
+
+// Kept on globalThis so dev-server module reloads don't reset the window
+const state = globalThis.__kgQueryStats || (globalThis.__kgQueryStats = {
+  slices: [],
+  fingerprints: new Map(),
+  prepared: new Map()
+});
+
+/**
+ * Statement text with literals replaced by ? and whitespace collapsed
+ * @param {string} text - SQL as passed to query()
+ * @returns {string} Normalised statement
+ */
+export function normalizeStatement(text) {
+  return text
+    .replace(/--[^\n]*/g, ' ')
+    .replace(/'(?:[^']|'')*'/g, '?')
+    .replace(/(?<![$\w])-?\d+(?:\.\d+)?\b/g, '?')
+    .replace(/\s+/g, ' ')
+    .trim();
+}
+
+/**
+ * Short stable id of a statement's normalised text (cached per text)
+ * @param {string} text - SQL as passed to query()
+ * @returns {{ fingerprint: string, statement: string }}
+ */
+export function fingerprintStatement(text) {
+  let entry = state.fingerprints.get(text);
+  if (!entry) {
+    const statement = normalizeStatement(text);
+    entry = {
+      fingerprint: createHash('sha1').update(statement).digest('hex').slice(0, 12),
+      statement: statement.slice(0, MAX_STATEMENT_LENGTH)
+    };
+    if (state.fingerprints.size >= FINGERPRINT_CACHE_SIZE) {
+      state.fingerprints.clear();
+    }
+    state.fingerprints.set(text, entry);
+  }
+  return entry;
+}
+
+/**
+ * API route that issued the current query, from the call stack
+ * @returns {string} e.g. '/api/projects/[id]/ledger', or 'unknown'
+ */
+export function callingRoute() {
+  const stack = new Error().stack || '';
+  const match = stack.match(/app[\\/]api[\\/](.+?)[\\/]route\.js/);
+  return match ? `/api/${match[1].replace(/\\/g, '/')}` : 'unknown';
+}
+
+function bucketIndex(durationMs) {
+  let i = 0;
+  while (durationMs > LATENCY_BUCKETS_MS[i]) i++;
+  return i;
+}
+
+function currentSlice(now) {
+  const start = now - (now % SLICE_MS);
+  let slice = state.slices[state.slices.length - 1];
+  if (!slice || slice.start !== start) {
+    slice = { start, statements: new Map() };
+    state.slices.push(slice);
+    while (state.slices.length > config.windowSlices) {
+      state.slices.shift();
+    }
+  }
+  return slice;
+}
+
+/**
+ * Record one finished (or failed) query
+ * @param {Object} sample - { text, route, durationMs, rows, error }
+ */
+export function recordQuery({ text, route, durationMs, rows = null, error = null }) {
+  const { fingerprint, statement } = fingerprintStatement(text);
+  const slice = currentSlice(Date.now());
+
+  let stats = slice.statements.get(fingerprint);
+  if (!stats) {
+    stats = { statement, calls: 0, errors: 0, totalMs: 0, maxMs: 0, rows: 0, buckets: new Array(LATENCY_BUCKETS_MS.length).fill(0), routes: {} };
+    slice.statements.set(fingerprint, stats);
+  }
+  stats.calls++;
+  stats.totalMs += durationMs;
+  stats.maxMs = Math.max(stats.maxMs, durationMs);
+  stats.rows += rows || 0;
+  stats.buckets[bucketIndex(durationMs)]++;
+  if (error) stats.errors++;
+  const routeStats = stats.routes[route] || (stats.routes[route] = { calls: 0, totalMs: 0 });
+  routeStats.calls++;
+  routeStats.totalMs += durationMs;
+
+  const slow = durationMs >= config.slowQueryMs;
+  if (config.logMode === 'all' || (config.logMode === 'slow' && slow)) {
+    console.warn(JSON.stringify({
+      type: slow ? 'slow_query' : 'query',
+      ts: new Date().toISOString(),
+      route,
+      fingerprint,
+      duration_ms: Math.round(durationMs * 1000) / 1000,
+      rows,
+      error: error ? error.message : undefined,
+      statement
+    }));
+  }
+}
+
+/**
+ * Count one execution of a named prepared statement (lib/db.js namedQuery)
+ * @param {string} name - Registry name
+ * @param {boolean} hit - Whether the connection had already prepared it
+ */
+export function recordPreparedStatement(name, hit) {
+  let counts = state.prepared.get(name);
+  if (!counts) {
+    counts = { hits: 0, misses: 0 };
+    state.prepared.set(name, counts);
+  }
+  counts[hit ? 'hits' : 'misses']++;
+}
+
+function preparedStatementStats() {
+  let hits = 0;
+  let misses = 0;
+  const statements = [];
+  for (const [name, counts] of state.prepared) {
+    hits += counts.hits;
+    misses += counts.misses;
+    statements.push({ name, ...counts, hit_rate: round(counts.hits / (counts.hits + counts.misses)) });
+  }
+  statements.sort((a, b) => (b.hits + b.misses) - (a.hits + a.misses));
+  return { hits, misses, hit_rate: hits + misses ? round(hits / (hits + misses)) : 0, statements };
+}
+
+function percentile(buckets, calls, maxMs, q) {
+  const target = Math.ceil(calls * q);
+  let seen = 0;
+  for (let i = 0; i < buckets.length; i++) {
+    seen += buckets[i];
+    if (seen >= target) return Math.min(LATENCY_BUCKETS_MS[i], maxMs);
+  }
+  return maxMs;
+}
+
+const round = value => Math.round(value * 100) / 100;
+
+/**
+ * Statements over the rolling window, slowest total time first
+ * Percentiles are histogram bucket upper bounds (capped at the max).
+ * @param {Object} options - { limit, route } to filter/trim the list
+ * @returns {Object} { window_start, statements: [...], routes: [...] }
+ */
+export function queryStatsSnapshot({ limit = 50, route = null } = {}) {
+  const merged = new Map();
+  const cutoff = Date.now() - config.windowSlices * SLICE_MS;
+  const slices = state.slices.filter(slice => slice.start > cutoff);
+  for (const slice of slices) {
+    for (const [fingerprint, stats] of slice.statements) {
+      let total = merged.get(fingerprint);
+      if (!total) {
+        total = { fingerprint, statement: stats.statement, calls: 0, errors: 0, totalMs: 0, maxMs: 0, rows: 0, buckets: new Array(LATENCY_BUCKETS_MS.length).fill(0), routes: {} };
+        merged.set(fingerprint, total);
+      }
+      total.calls += stats.calls;
+      total.errors += stats.errors;
+      total.totalMs += stats.totalMs;
+      total.maxMs = Math.max(total.maxMs, stats.maxMs);
+      total.rows += stats.rows;
+      stats.buckets.forEach((count, i) => { total.buckets[i] += count; });
+      for (const [name, routeStats] of Object.entries(stats.routes)) {
+        const r = total.routes[name] || (total.routes[name] = { calls: 0, totalMs: 0 });
+        r.calls += routeStats.calls;
+        r.totalMs += routeStats.totalMs;
+      }
+    }
+  }
+
+  const routeTotals = {};
+  const statements = [];
+  for (const s of merged.values()) {
+    for (const [name, r] of Object.entries(s.routes)) {
+      const t = routeTotals[name] || (routeTotals[name] = { route: name, calls: 0, total_ms: 0 });
+      t.calls += r.calls;
+      t.total_ms += r.totalMs;
+    }
+    if (route && !s.routes[route]) continue;
+    statements.push({
+      fingerprint: s.fingerprint,
+      statement: s.statement,
+      calls: s.calls,
+      errors: s.errors,
+      total_ms: round(s.totalMs),
+      mean_ms: round(s.totalMs / s.calls),
+      p50_ms: percentile(s.buckets, s.calls, s.maxMs, 0.5),
+      p95_ms: percentile(s.buckets, s.calls, s.maxMs, 0.95),
+      p99_ms: percentile(s.buckets, s.calls, s.maxMs, 0.99),
+      max_ms: round(s.maxMs),
+      rows: s.rows,
+      histogram: Object.fromEntries(LATENCY_BUCKETS_MS.map((bound, i) => [bound === Infinity ? 'inf' : `le_${bound}`, s.buckets[i]])),
+      routes: Object.entries(s.routes)
+        .map(([name, r]) => ({ route: name, calls: r.calls, total_ms: round(r.totalMs) }))
+        .sort((a, b) => b.total_ms - a.total_ms)
+    });
+  }
+  statements.sort((a, b) => b.total_ms - a.total_ms);
+
+  return {
+    window_start: new Date(slices[0]?.start ?? Date.now()).toISOString(),
+    window_minutes: config.windowSlices,
+    slow_query_ms: config.slowQueryMs,
+    statements: statements.slice(0, limit),
+    routes: Object.values(routeTotals)
+      .map(r => ({ ...r, total_ms: round(r.total_ms) }))
+      .sort((a, b) => b.total_ms - a.total_ms),
+    prepared_statements: preparedStatementStats()
+  };
+}
+
+/** Drop everything recorded so far */
+export function resetQueryStats() {
+  state.slices = [];
+  state.prepared = new Map();
+}
@@ -0,0 +1,110 @@
+// Opt-in API traffic capture for replay (kg_finance/replay.py)
+//
+// With TRAFFIC_CAPTURE=on, middleware.js logs one JSON line per authenticated
+// /api request: {"type":"traffic","t":<epoch ms>,"method","path","query","body"}.
+// The server log is the append-only capture file; kg_finance/replay.py reads
+// it directly (other lines are ignored). Middleware runs on the Edge runtime,
+// so this module must not use Node APIs.
+//
+// Only shapes are kept: keys, types, array lengths and string lengths. Free
+// text becomes same-length placeholders (letters -> x, digits -> 0), personal
+// fields (phone, email, PAN, bank...) are always masked, while ids, numbers,
+// dates and enum-like fields (status, unit, category...) are kept so replayed
+// requests still hit the same rows and code paths. Cookies and headers are
+// never recorded. Bodies over TRAFFIC_CAPTURE_MAX_BODY_BYTES (default 256 KB)
+// are recorded by size only; uploaded files always are.
+
+const config = {
+  enabled: process.env.TRAFFIC_CAPTURE === 'on',
+  maxBodyBytes: parseInt(process.env.TRAFFIC_CAPTURE_MAX_BODY_BYTES || '262144')
+};
+
+const SENSITIVE_KEY = /(phone|mobile|email|aadhar|aadhaar|pan_|^pan$|account|ifsc|gstin|gst_number|address|password|token|secret|upi)/i;
+const KEEP_KEY = /(^|_)(id|ids|status|type|unit|category|categories|role|stage|code|mode|sort|order|page|limit|offset|cursor|format|output|date|at|from|to|percentage|method|version)$/i;
+const ID_KEY = /(^|_)ids?$/i;
+const KEEP_VALUE = /^-?\d+(\.\d+)?$|^\d{4}-\d{2}-\d{2}([T ][\d:.]+(Z|[+-]\d{2}:?\d{2})?)?$|^(true|false|null)$/;
+
+/**
+ * Whether capture is on (TRAFFIC_CAPTURE=on) and the request is captured
+ * @param {string} path - Request pathname
+ * @returns {boolean}
+ */
+export function shouldCapture(path) {
+  return config.enabled && path.startsWith('/api/') && !path.startsWith('/api/auth');
+}
+
+const mask = text => text.replace(/[^\W\d_]/gu, 'x').replace(/\d/g, '0');
+
+/**
+ * Same-shape copy of a JSON value with personal and free-text content masked
+ * @param {*} value - Parsed JSON body, query value or form field
+ * @param {string} key - Name of the field holding the value
+ * @returns {*} Anonymised value
+ */
+export function anonymize(value, key = '') {
+  if (value === null || value === undefined || typeof value === 'boolean') return value;
+  if (Array.isArray(value)) return value.map(item => anonymize(item, key));
+  if (typeof value === 'object') {
+    return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, anonymize(v, k)]));
+  }
+  const sensitive = SENSITIVE_KEY.test(key) && !ID_KEY.test(key);
+  if (typeof value === 'number') return sensitive ? 0 : value;
+  const text = String(value);
+  if (!sensitive && (KEEP_KEY.test(key) || KEEP_VALUE.test(text))) return text;
+  return mask(text);
+}
+
+function queryShape(searchParams) {
+  const query = {};
+  for (const key of new Set(searchParams.keys())) {
+    const values = searchParams.getAll(key).map(value => anonymize(value, key));
+    query[key] = values.length === 1 ? values[0] : values;
+  }
+  return query;
+}
+
+async function bodyShape(req) {
+  const length = parseInt(req.headers.get('content-length') || '0');
+  const contentType = req.headers.get('content-type') || '';
+  if (!req.body || length > config.maxBodyBytes) {
+    return length ? { body_bytes: length } : {};
+  }
+  if (contentType.includes('multipart/form-data')) {
+    const form = {};
+    for (const [name, value] of (await req.clone().formData()).entries()) {
+      form[name] = typeof value === 'string'
+        ? anonymize(value, name)
+        : { file: true, size: value.size, content_type: value.type };
+    }
+    return { form, body_bytes: length };
+  }
+  const text = await req.clone().text();
+  if (!text) return {};
+  try {
+    return { body: anonymize(JSON.parse(text)), body_bytes: text.length };
+  } catch {
+    return { body_bytes: text.length };
+  }
+}
+
+/**
+ * Log one captured request (never throws - capture must not break requests)
+ * @param {Request} req - Incoming middleware request
+ */
+export async function captureRequest(req) {
+  try {
+    const url = new URL(req.url);
+    const record = {
+      type: 'traffic',
+      ts: new Date().toISOString(),
+      t: Date.now(),
+      method: req.method,
+      path: url.pathname,
+      query: queryShape(url.searchParams),
+      ...(await bodyShape(req))
+    };
+    console.log(JSON.stringify(record));
+  } catch (error) {
+    console.warn(`Traffic capture failed: ${error.message}`);
+  }
+}
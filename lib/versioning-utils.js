@@ -1,31 +1,81 @@
 // Versioning utilities for Purchase Requests
 import { query } from '@/lib/db';
 import { calculateItemPricing, calculatePRTotals } from '@/lib/pricing-utils';
+import { nextCounterValue, currentCounterValue, COUNTER } from '@/lib/counters';
+
+// Columns shared by purchase_request_items and purchase_request_items_history
+const PR_ITEM_VERSION_COLUMNS = `
+  id, stable_item_id, purchase_request_id, version,
+  purchase_request_item_name, category, room_name,
+  quantity, unit, width, height,
+  unit_price, subtotal, gst_percentage, gst_amount,
+  amount_before_gst, item_total,
+  lifecycle_status, is_direct_purchase, status,
+  created_at, created_by, updated_at, updated_by
+`;
+
+// Item fields that make up a version; a payload item equal on all of these
+// (and on its estimation links) is carried forward unchanged
+const NUMERIC_ITEM_FIELDS = ['quantity', 'width', 'height', 'unit_price', 'gst_percentage'];
+const TEXT_ITEM_FIELDS = [
+  'purchase_request_item_name', 'category', 'room_name', 'unit',
+  'lifecycle_status', 'is_direct_purchase', 'status'
+];
+
+function sameNumber(a, b) {
+  const x = a === null || a === undefined || a === '' ? null : parseFloat(a);
+  const y = b === null || b === undefined || b === '' ? null : parseFloat(b);
+  return x === y || (Number.isNaN(x) && Number.isNaN(y));
+}
+
+function sameText(a, b) {
+  return (a ?? null) === null ? (b ?? null) === null : String(a) === String(b ?? '');
+}
+
+function parseLinks(links) {
+  return typeof links === 'string' ? JSON.parse(links) : (links || []);
+}
+
+function linksKey(links) {
+  return links
+    .filter(link => link.estimation_item_id)
+    .map(link => [
+      link.estimation_item_id,
+      parseFloat(link.linked_qty || 0),
+      parseFloat(link.weightage || link.unit_purchase_request_item_weightage || 1.0),
+      link.notes || ''
+    ].join('|'))
+    .sort()
+    .join(';');
+}
+
+function itemChanged(currentItem, itemData) {
+  return NUMERIC_ITEM_FIELDS.some(field => !sameNumber(currentItem[field], itemData[field])) ||
+    TEXT_ITEM_FIELDS.some(field => !sameText(currentItem[field], itemData[field]));
+}
 
 /**
- * Create a new version for a PR by moving all current items to history
- * and re-inserting them with a new version number
+ * Create a new version for a PR from the full list of items it should contain
+ *
+ * Copy-on-write: only items whose fields or estimation links differ from the
+ * current row are archived to history and rewritten; unchanged items keep
+ * their row (and version) and carry forward into the new version. Items
+ * missing from the payload are archived and deleted, payload items without a
+ * stable_item_id are inserted. Each history row records the version that
+ * superseded it, so any version can be rebuilt (see getPRItemsAtVersion).
  * 
  * @param {number} prId - Purchase request ID
  * @param {Array} updatedItems - Array of items with updates (must include stable_item_id and estimation_links)
  * @param {number} userId - User making the change
  * @param {string} changeSummary - Description of what changed
- * @returns {Promise<number>} New version number
+ * @param {Function} runQuery - Query function; pass the withTransaction tx so
+ *   the version is written atomically (defaults to the shared pool)
+ * @returns {Promise<number>} New version number (current version if nothing changed)
  */
-export async function createNewPRVersion(prId, updatedItems, userId, changeSummary) {
+export async function createNewPRVersion(prId, updatedItems, userId, changeSummary, runQuery = query) {
   try {
-    // 1. Get current max version
-    const versionResult = await query(`
-      SELECT COALESCE(MAX(version), 0) as current_version
-      FROM purchase_request_items
-      WHERE purchase_request_id = $1
-    `, [prId]);
-    
-    const currentVersion = versionResult.rows[0].current_version;
-    const newVersion = currentVersion + 1;
-    
-    // 2. Get all current items with their links
-    const currentItemsResult = await query(`
+    // 1. Get all current items with their links
+    const currentItemsResult = await runQuery(`
       SELECT 
         pri.*,
         COALESCE(
@@ -44,13 +94,7 @@ export async function createNewPRVersion(prId, updatedItems, userId, changeSumma
       LEFT JOIN purchase_request_estimation_links prel 
         ON pri.stable_item_id = prel.stable_item_id
       WHERE pri.purchase_request_id = $1
-      GROUP BY pri.id, pri.stable_item_id, pri.purchase_request_id, pri.version,
-        pri.purchase_request_item_name, pri.category, pri.room_name,
-        pri.quantity, pri.unit, pri.width, pri.height,
-        pri.unit_price, pri.subtotal, pri.gst_percentage, pri.gst_amount,
-        pri.amount_before_gst, pri.item_total,
-        pri.lifecycle_status, pri.is_direct_purchase, pri.status,
-        pri.created_at, pri.created_by, pri.updated_at, pri.updated_by
+      GROUP BY pri.id
     `, [prId]);
     
     const currentItems = currentItemsResult.rows;
@@ -59,105 +103,93 @@ export async function createNewPRVersion(prId, updatedItems, userId, changeSumma
       throw new Error('No items found in purchase request');
     }
     
-    // 3. Move ALL current items to history
-    await query(`
-      INSERT INTO purchase_request_items_history (
-        id, stable_item_id, purchase_request_id, version,
-        purchase_request_item_name, category, room_name,
-        quantity, unit, width, height,
-        unit_price, subtotal, gst_percentage, gst_amount,
-        amount_before_gst, item_total,
-        lifecycle_status, is_direct_purchase, status,
-        created_at, created_by, updated_at, updated_by,
-        archived_at, archived_by
-      )
-      SELECT 
-        id, stable_item_id, purchase_request_id, version,
-        purchase_request_item_name, category, room_name,
-        quantity, unit, width, height,
-        unit_price, subtotal, gst_percentage, gst_amount,
-        amount_before_gst, item_total,
-        lifecycle_status, is_direct_purchase, status,
-        created_at, created_by, updated_at, updated_by,
-        NOW(), $2
-      FROM purchase_request_items
-      WHERE purchase_request_id = $1
-    `, [prId, userId]);
-    
-    // 4. Move ALL current links to history
-    await moveLinksToHistory(prId, userId);
-    
-    // 5. Delete from current tables
-    await query(`
-      DELETE FROM purchase_request_estimation_links
-      WHERE stable_item_id IN (
-        SELECT stable_item_id FROM purchase_request_items
-        WHERE purchase_request_id = $1
-      )
-    `, [prId]);
-    
-    await query(`
-      DELETE FROM purchase_request_items
-      WHERE purchase_request_id = $1
-    `, [prId]);
-    
-    // 6. Create map of current items by stable_item_id for reference
     const currentItemsMap = new Map();
     currentItems.forEach(item => {
       currentItemsMap.set(item.stable_item_id, item);
     });
     
-    // 7. Re-insert ONLY items from the payload (deleted items are not re-inserted)
-    const itemsAffected = [];
-    const newItemIdMap = new Map(); // Map stable_item_id to new purchase_request_item.id
+    // 2. Work out what actually changed
+    const changedItems = [];
+    const addedItems = [];
+    const keptIds = new Set();
     
     for (const payloadItem of updatedItems) {
-      // Get the current item data for fields not in payload
-      const currentItem = currentItemsMap.get(payloadItem.stable_item_id);
+      if (!payloadItem.stable_item_id) {
+        addedItems.push(payloadItem);
+        continue;
+      }
       
+      const currentItem = currentItemsMap.get(payloadItem.stable_item_id);
       if (!currentItem) {
-        // This is a new item (shouldn't happen in edit, but handle it)
         console.warn(`Item ${payloadItem.stable_item_id} not found in current items`);
         continue;
       }
+      keptIds.add(payloadItem.stable_item_id);
       
       // Merge current data with payload updates
       const itemData = { ...currentItem, ...payloadItem };
+      const currentLinks = parseLinks(currentItem.estimation_links);
+      const links = payloadItem.estimation_links !== undefined
+        ? parseLinks(payloadItem.estimation_links)
+        : currentLinks;
       
-      // Track that this item was affected (all items in payload are affected)
-      itemsAffected.push(payloadItem.stable_item_id);
-      
-      // Recalculate pricing if price/quantity changed
-      let pricing = {
-        subtotal: itemData.subtotal,
-        gst_percentage: itemData.gst_percentage,
-        gst_amount: itemData.gst_amount,
-        amount_before_gst: itemData.amount_before_gst,
-        item_total: itemData.item_total
-      };
-      
-      if (payloadItem.unit_price !== undefined || payloadItem.quantity !== undefined) {
-        pricing = calculateItemPricing(
-          itemData.quantity,
-          itemData.unit_price,
-          itemData.gst_percentage || 0
-        );
+      if (itemChanged(currentItem, itemData) || linksKey(currentLinks) !== linksKey(links)) {
+        changedItems.push({ itemData, payloadItem, links });
       }
+    }
+    
+    const deletedIds = currentItems
+      .map(item => item.stable_item_id)
+      .filter(stableItemId => !keptIds.has(stableItemId));
+    
+    if (changedItems.length === 0 && addedItems.length === 0 && deletedIds.length === 0) {
+      return currentCounterValue(COUNTER.PR_VERSION, prId, runQuery);
+    }
+    
+    // 3. Allocate the new version number
+    const newVersion = await nextCounterValue(COUNTER.PR_VERSION, prId, runQuery);
+    
+    // 4. Archive only the rows being replaced or removed
+    const supersededIds = [...changedItems.map(c => c.itemData.stable_item_id), ...deletedIds];
+    await archiveItems(prId, supersededIds, newVersion, userId, runQuery);
+    await archiveLinks(supersededIds, newVersion, runQuery);
+    
+    await runQuery(`
+      DELETE FROM purchase_request_estimation_links
+      WHERE stable_item_id = ANY($1::uuid[])
+    `, [supersededIds]);
+    
+    if (deletedIds.length > 0) {
+      await runQuery(`
+        DELETE FROM purchase_request_items
+        WHERE purchase_request_id = $1 AND stable_item_id = ANY($2::uuid[])
+      `, [prId, deletedIds]);
+    }
+    
+    // 5. Rewrite changed items in place (same row id, new version)
+    for (const { itemData, payloadItem, links } of changedItems) {
+      const pricing = payloadItem.unit_price !== undefined || payloadItem.quantity !== undefined
+        ? calculateItemPricing(itemData.quantity, itemData.unit_price, itemData.gst_percentage || 0)
+        : {
+            subtotal: itemData.subtotal,
+            gst_percentage: itemData.gst_percentage,
+            gst_amount: itemData.gst_amount,
+            amount_before_gst: itemData.amount_before_gst,
+            item_total: itemData.item_total
+          };
       
-      const insertResult = await query(`
-        INSERT INTO purchase_request_items (
-          stable_item_id, purchase_request_id, version,
-          purchase_request_item_name, category, room_name,
-          quantity, unit, width, height,
-          unit_price, subtotal, gst_percentage, gst_amount,
-          amount_before_gst, item_total,
-          lifecycle_status, is_direct_purchase, status,
-          created_at, created_by, updated_at, updated_by
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, NOW(), $22)
-        RETURNING id
+      await runQuery(`
+        UPDATE purchase_request_items
+        SET version = $2,
+            purchase_request_item_name = $3, category = $4, room_name = $5,
+            quantity = $6, unit = $7, width = $8, height = $9,
+            unit_price = $10, subtotal = $11, gst_percentage = $12, gst_amount = $13,
+            amount_before_gst = $14, item_total = $15,
+            lifecycle_status = $16, is_direct_purchase = $17, status = $18,
+            updated_at = NOW(), updated_by = $19
+        WHERE id = $1
       `, [
-        itemData.stable_item_id,
-        prId,
+        itemData.id,
         newVersion,
         itemData.purchase_request_item_name,
         itemData.category,
@@ -175,68 +207,69 @@ export async function createNewPRVersion(prId, updatedItems, userId, changeSumma
         itemData.lifecycle_status || 'pending',
         itemData.is_direct_purchase,
         itemData.status,
-        itemData.created_at,
-        itemData.created_by,
         userId
       ]);
       
-      const newPurchaseRequestItemId = insertResult.rows[0].id;
-      newItemIdMap.set(itemData.stable_item_id, newPurchaseRequestItemId);
-      
-      // 8. Re-insert estimation links for this item
-      // Use updated links if provided, otherwise use current links
-      let linksToInsert = [];
-      
-      if (payloadItem.estimation_links !== undefined) {
-        // Use the updated links from the payload
-        linksToInsert = payloadItem.estimation_links || [];
-      } else {
-        // Use existing links from current item
-        linksToInsert = typeof currentItem.estimation_links === 'string' 
-          ? JSON.parse(currentItem.estimation_links) 
-          : (currentItem.estimation_links || []);
-      }
+      await insertLinks(itemData.stable_item_id, itemData.id, newVersion, links, runQuery);
+    }
+    
+    // 6. Insert new items
+    const addedIds = [];
+    for (const item of addedItems) {
+      const insertResult = await runQuery(`
+        INSERT INTO purchase_request_items (
+          purchase_request_id, version,
+          purchase_request_item_name, category, room_name,
+          quantity, unit, width, height,
+          unit_price, subtotal, gst_percentage, gst_amount,
+          amount_before_gst, item_total,
+          lifecycle_status, is_direct_purchase, status,
+          created_at, created_by
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, NOW(), $19)
+        RETURNING id, stable_item_id
+      `, [
+        prId,
+        newVersion,
+        item.purchase_request_item_name,
+        item.category,
+        item.room_name,
+        item.quantity,
+        item.unit,
+        item.width,
+        item.height,
+        item.unit_price,
+        item.subtotal,
+        item.gst_percentage,
+        item.gst_amount,
+        item.amount_before_gst,
+        item.item_total,
+        item.lifecycle_status || 'pending',
+        item.is_direct_purchase,
+        item.status,
+        userId
+      ]);
       
-      // Insert each link
-      for (const link of linksToInsert) {
-        if (link.estimation_item_id) {
-          await query(`
-            INSERT INTO purchase_request_estimation_links (
-              stable_item_id,
-              version,
-              estimation_item_id,
-              purchase_request_item_id,
-              linked_qty,
-              unit_purchase_request_item_weightage,
-              notes
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-          `, [
-            itemData.stable_item_id,
-            newVersion,
-            link.estimation_item_id,
-            newPurchaseRequestItemId,
-            link.linked_qty || 0,
-            link.weightage || link.unit_purchase_request_item_weightage || 1.0,
-            link.notes || null
-          ]);
-        }
-      }
+      const { id, stable_item_id } = insertResult.rows[0];
+      addedIds.push(stable_item_id);
+      await insertLinks(stable_item_id, id, newVersion, parseLinks(item.estimation_links), runQuery);
     }
     
-    // 9. Update PR-level totals
-    await recalculatePRTotals(prId);
+    // 7. Update PR-level totals
+    await recalculatePRTotals(prId, runQuery);
     
-    // 10. Determine change type
-    const deletedCount = currentItems.length - updatedItems.length;
+    // 8. Determine change type
     let changeType = 'items_edited';
-    if (deletedCount > 0) {
-      changeType = deletedCount === currentItems.length ? 'all_items_deleted' : 'items_deleted';
-    } else if (updatedItems.length > currentItems.length) {
+    if (deletedIds.length > 0) {
+      changeType = deletedIds.length === currentItems.length && addedItems.length === 0
+        ? 'all_items_deleted'
+        : 'items_deleted';
+    } else if (addedItems.length > 0) {
       changeType = 'items_added';
     }
     
-    // 11. Create version record
-    await query(`
+    // 9. Create version record
+    const itemsAffected = [...changedItems.map(c => c.itemData.stable_item_id), ...addedIds, ...deletedIds];
+    await runQuery(`
       INSERT INTO purchase_request_versions (
         purchase_request_id, version, change_type,
         change_summary, items_affected, total_items,
@@ -248,7 +281,7 @@ export async function createNewPRVersion(prId, updatedItems, userId, changeSumma
       changeType,
       changeSummary,
       itemsAffected,
-      updatedItems.length, // Total items in new version
+      keptIds.size + addedItems.length, // Total items in new version
       userId
     ]);
     
@@ -261,56 +294,87 @@ export async function createNewPRVersion(prId, updatedItems, userId, changeSumma
 }
 
 /**
- * Move current estimation links to history
+ * Copy the current rows of the given items to history, marked as superseded
+ * by newVersion
  */
-async function moveLinksToHistory(prId, userId) {
-  try {
-    // Check if there are any links to move
-    const linksResult = await query(`
-      SELECT prel.*
-      FROM purchase_request_estimation_links prel
-      WHERE stable_item_id IN (
-        SELECT stable_item_id FROM purchase_request_items
-        WHERE purchase_request_id = $1
-      )
-    `, [prId]);
-    
-    if (linksResult.rows.length === 0) {
-      return; // No links to move
+async function archiveItems(prId, stableItemIds, newVersion, userId, runQuery = query) {
+  if (stableItemIds.length === 0) {
+    return;
+  }
+  
+  await runQuery(`
+    INSERT INTO purchase_request_items_history (
+      ${PR_ITEM_VERSION_COLUMNS},
+      archived_at, archived_by, superseded_in_version
+    )
+    SELECT 
+      ${PR_ITEM_VERSION_COLUMNS},
+      NOW(), $3, $4
+    FROM purchase_request_items
+    WHERE purchase_request_id = $1 AND stable_item_id = ANY($2::uuid[])
+  `, [prId, stableItemIds, userId, newVersion]);
+}
+
+/**
+ * Copy the current estimation links of the given items to history
+ */
+async function archiveLinks(stableItemIds, newVersion, runQuery = query) {
+  if (stableItemIds.length === 0) {
+    return;
+  }
+  
+  await runQuery(`
+    INSERT INTO purchase_request_estimation_links_history (
+      id, stable_item_id, version, estimation_item_id,
+      purchase_request_item_id, linked_qty,
+      unit_purchase_request_item_weightage, notes,
+      created_at, archived_at, superseded_in_version
+    )
+    SELECT 
+      id, stable_item_id, version, estimation_item_id,
+      purchase_request_item_id, linked_qty,
+      unit_purchase_request_item_weightage, notes,
+      created_at, NOW(), $2
+    FROM purchase_request_estimation_links
+    WHERE stable_item_id = ANY($1::uuid[])
+  `, [stableItemIds, newVersion]);
+}
+
+/**
+ * Insert the estimation links of one item version
+ */
+async function insertLinks(stableItemId, purchaseRequestItemId, version, links, runQuery = query) {
+  for (const link of links) {
+    if (link.estimation_item_id) {
+      await runQuery(`
+        INSERT INTO purchase_request_estimation_links (
+          stable_item_id,
+          version,
+          estimation_item_id,
+          purchase_request_item_id,
+          linked_qty,
+          unit_purchase_request_item_weightage,
+          notes
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+      `, [
+        stableItemId,
+        version,
+        link.estimation_item_id,
+        purchaseRequestItemId,
+        link.linked_qty || 0,
+        link.weightage || link.unit_purchase_request_item_weightage || 1.0,
+        link.notes || null
+      ]);
     }
-    
-    // Move current links to history
-    await query(`
-      INSERT INTO purchase_request_estimation_links_history (
-        id, stable_item_id, version, estimation_item_id,
-        purchase_request_item_id, linked_qty,
-        unit_purchase_request_item_weightage, notes,
-        created_at, archived_at
-      )
-      SELECT 
-        id, stable_item_id, version, estimation_item_id,
-        purchase_request_item_id, linked_qty,
-        unit_purchase_request_item_weightage, notes,
-        created_at, NOW()
-      FROM purchase_request_estimation_links prel
-      WHERE stable_item_id IN (
-        SELECT stable_item_id FROM purchase_request_items
-        WHERE purchase_request_id = $1
-      )
-    `, [prId]);
-    
-  } catch (error) {
-    console.error('Error moving links to history:', error);
-    throw error;
   }
 }
 
 /**
  * Recalculate PR-level totals from current items
  */
-async function recalculatePRTotals(prId) {
+async function recalculatePRTotals(prId, runQuery = query) {
   try {
-    const itemsResult = await query(`
+    const itemsResult = await runQuery(`
       SELECT subtotal, gst_amount, item_total
       FROM purchase_request_items
       WHERE purchase_request_id = $1
@@ -318,7 +382,7 @@ async function recalculatePRTotals(prId) {
     
     const prTotals = calculatePRTotals(itemsResult.rows);
     
-    await query(`
+    await runQuery(`
       UPDATE purchase_requests
       SET 
         items_value = $1,
@@ -373,13 +437,13 @@ export async function addItemsToPR(prId, newItems, gstPercentage, userId, mode =
       };
     });
     
-    // Current items stay as-is, new items get added
+    // Current items stay as-is (carried forward), new items get added
     const allItems = [...currentItemsResult.rows, ...itemsToAdd];
     
     // Create new version with all items
     const newVersion = await createNewPRVersion(
       prId,
-      itemsToAdd,
+      allItems,
       userId,
       `Added ${newItems.length} new item(s)`
     );
@@ -486,12 +550,20 @@ export async function getPRVersionHistory(prId) {
 
 /**
  * Get specific version of PR items
+ * Each item's row at that version is the one written at or before it and not
+ * yet superseded: either still current or in history with a later
+ * superseded_in_version.
  */
 export async function getPRItemsAtVersion(prId, version) {
   try {
     const result = await query(`
-      SELECT * FROM purchase_request_items_history
-      WHERE purchase_request_id = $1 AND version = $2
+      SELECT ${PR_ITEM_VERSION_COLUMNS}
+      FROM purchase_request_items_history
+      WHERE purchase_request_id = $1 AND version <= $2 AND superseded_in_version > $2
+      UNION ALL
+      SELECT ${PR_ITEM_VERSION_COLUMNS}
+      FROM purchase_request_items
+      WHERE purchase_request_id = $1 AND version <= $2
       ORDER BY id
     `, [prId, version]);
     
@@ -1,8 +1,9 @@
 import { withAuth } from 'next-auth/middleware';
 import { NextResponse } from 'next/server';
+import { captureRequest, shouldCapture } from '@/lib/traffic-capture';
 
 export default withAuth(
-  function middleware(req) {
+  async function middleware(req) {
     const token = req.nextauth.token;
     const path = req.nextUrl.pathname;
     
@@ -21,6 +22,11 @@ export default withAuth(
       return NextResponse.redirect(new URL('/auth/signin', req.url));
     }
     
+    // Opt-in traffic capture for replay (TRAFFIC_CAPTURE=on)
+    if (shouldCapture(path)) {
+      await captureRequest(req);
+    }
+    
     return NextResponse.next();
   },
   {
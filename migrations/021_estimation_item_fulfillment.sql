@@ -0,0 +1,147 @@
+-- Migration 021: Maintained fulfillment table for estimation items
+-- Date: 2026-10-16
+-- Purpose: The PR creation wizard (purchase-requests/available-items) used to
+-- aggregate links, PR items and PR status for every estimation item on every
+-- call. Confirmed/draft/available quantities are now kept per estimation item
+-- and updated by triggers whenever links, PR status or item quantity change.
+
+BEGIN;
+
+-- 1. Fulfillment table (one row per estimation item)
+CREATE TABLE IF NOT EXISTS estimation_item_fulfillment (
+    estimation_item_id INTEGER PRIMARY KEY REFERENCES estimation_items(id) ON DELETE CASCADE,
+    estimation_id INTEGER NOT NULL REFERENCES project_estimations(id) ON DELETE CASCADE,
+    confirmed_qty NUMERIC NOT NULL DEFAULT 0,
+    draft_qty NUMERIC NOT NULL DEFAULT 0,
+    available_qty NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_eif_estimation ON estimation_item_fulfillment(estimation_id);
+
+-- 2. Recompute the rows for a set of estimation items
+-- Same aggregation the available-items route used to run inline. The items
+-- are locked first (in id order) so concurrent link or PR changes for the
+-- same item recompute one after the other, each with a snapshot taken after
+-- the previous one committed. NO KEY UPDATE does not conflict with the
+-- KEY SHARE lock a link insert's foreign key check holds on the item.
+CREATE OR REPLACE FUNCTION refresh_estimation_item_fulfillment(p_item_ids INTEGER[])
+RETURNS void AS $$
+BEGIN
+    PERFORM 1
+    FROM estimation_items
+    WHERE id = ANY(p_item_ids)
+    ORDER BY id
+    FOR NO KEY UPDATE;
+
+    INSERT INTO estimation_item_fulfillment (
+        estimation_item_id, estimation_id, confirmed_qty, draft_qty, available_qty, updated_at
+    )
+    SELECT
+        ei.id,
+        ei.estimation_id,
+        COALESCE(SUM(prel.linked_qty * prel.unit_purchase_request_item_weightage)
+                 FILTER (WHERE pr.status = 'confirmed'), 0),
+        COALESCE(SUM(prel.linked_qty * prel.unit_purchase_request_item_weightage)
+                 FILTER (WHERE pr.status = 'draft'), 0),
+        COALESCE(ei.quantity, 0) - COALESCE(SUM(prel.linked_qty * prel.unit_purchase_request_item_weightage)
+                 FILTER (WHERE pr.status = 'confirmed'), 0),
+        NOW()
+    FROM estimation_items ei
+    LEFT JOIN purchase_request_estimation_links prel ON ei.id = prel.estimation_item_id
+    LEFT JOIN purchase_request_items pri ON prel.purchase_request_item_id = pri.id
+    LEFT JOIN purchase_requests pr ON pri.purchase_request_id = pr.id
+    WHERE ei.id = ANY(p_item_ids)
+      AND ei.estimation_id IS NOT NULL
+    GROUP BY ei.id
+    ON CONFLICT (estimation_item_id) DO UPDATE SET
+        estimation_id = EXCLUDED.estimation_id,
+        confirmed_qty = EXCLUDED.confirmed_qty,
+        draft_qty = EXCLUDED.draft_qty,
+        available_qty = EXCLUDED.available_qty,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Links added, changed or removed (also fires on cascades from PR items)
+CREATE OR REPLACE FUNCTION trg_prel_refresh_fulfillment()
+RETURNS trigger AS $$
+BEGIN
+    -- One call for both sides of an UPDATE so the items are locked in id order
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM refresh_estimation_item_fulfillment(ARRAY[OLD.estimation_item_id, NEW.estimation_item_id]);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_estimation_item_fulfillment(ARRAY[OLD.estimation_item_id]);
+    ELSE
+        PERFORM refresh_estimation_item_fulfillment(ARRAY[NEW.estimation_item_id]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prel_refresh_fulfillment ON purchase_request_estimation_links;
+CREATE TRIGGER prel_refresh_fulfillment
+    AFTER INSERT OR UPDATE OR DELETE ON purchase_request_estimation_links
+    FOR EACH ROW EXECUTE FUNCTION trg_prel_refresh_fulfillment();
+
+-- 4. PR status changes move quantities between draft and confirmed
+CREATE OR REPLACE FUNCTION trg_pr_status_refresh_fulfillment()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_estimation_item_fulfillment(ARRAY(
+        SELECT DISTINCT prel.estimation_item_id
+        FROM purchase_request_items pri
+        JOIN purchase_request_estimation_links prel ON prel.purchase_request_item_id = pri.id
+        WHERE pri.purchase_request_id = NEW.id
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS pr_status_refresh_fulfillment ON purchase_requests;
+CREATE TRIGGER pr_status_refresh_fulfillment
+    AFTER UPDATE OF status ON purchase_requests
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION trg_pr_status_refresh_fulfillment();
+
+-- 5. New estimation items start fully available (one call per INSERT statement)
+CREATE OR REPLACE FUNCTION trg_ei_insert_fulfillment()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_estimation_item_fulfillment(ARRAY(SELECT id FROM new_items));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ei_insert_fulfillment ON estimation_items;
+CREATE TRIGGER ei_insert_fulfillment
+    AFTER INSERT ON estimation_items
+    REFERENCING NEW TABLE AS new_items
+    FOR EACH STATEMENT EXECUTE FUNCTION trg_ei_insert_fulfillment();
+
+-- 6. Quantity edits change available_qty
+CREATE OR REPLACE FUNCTION trg_ei_quantity_fulfillment()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_estimation_item_fulfillment(ARRAY[NEW.id]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ei_quantity_fulfillment ON estimation_items;
+CREATE TRIGGER ei_quantity_fulfillment
+    AFTER UPDATE OF quantity, estimation_id ON estimation_items
+    FOR EACH ROW
+    WHEN (OLD.quantity IS DISTINCT FROM NEW.quantity OR OLD.estimation_id IS DISTINCT FROM NEW.estimation_id)
+    EXECUTE FUNCTION trg_ei_quantity_fulfillment();
+
+-- 7. Backfill existing estimation items
+SELECT refresh_estimation_item_fulfillment(ARRAY(SELECT id FROM estimation_items));
+
+COMMENT ON TABLE estimation_item_fulfillment IS 'Per estimation item PR fulfillment, maintained by triggers on links, PR status and item quantity';
+COMMENT ON COLUMN estimation_item_fulfillment.confirmed_qty IS 'SUM(linked_qty * weightage) over confirmed PRs';
+COMMENT ON COLUMN estimation_item_fulfillment.draft_qty IS 'SUM(linked_qty * weightage) over draft PRs';
+COMMENT ON COLUMN estimation_item_fulfillment.available_qty IS 'estimation_items.quantity - confirmed_qty';
+
+COMMIT;
@@ -0,0 +1,99 @@
+-- Migration 022: Persisted running balances and keyset index for project_ledger
+-- Date: 2026-10-16
+-- Purpose: The ledger API used to load a project's whole ledger and compute
+-- balances in JS. Each entry now stores the project balance after it
+-- (chronological by entry_date, id), kept current by a trigger, so a page of
+-- the ledger can be read with an index range scan.
+
+BEGIN;
+
+-- 1. Persisted balance
+ALTER TABLE project_ledger
+ADD COLUMN IF NOT EXISTS running_balance NUMERIC(20,2);
+
+-- 2. Keyset pagination index; INCLUDE lets the page scan skip most heap lookups
+CREATE INDEX IF NOT EXISTS idx_project_ledger_keyset
+    ON project_ledger (project_id, entry_date DESC, id DESC)
+    INCLUDE (entry_type, amount, running_balance, source_table, source_id);
+
+-- 3. Recompute balances for one project from (entry_date, id) onwards
+-- Entries are inserted with entry_date = now(), so normally only the new row
+-- is touched; back-dated entries and edits re-balance the rows after them.
+CREATE OR REPLACE FUNCTION recompute_ledger_balances(
+    p_project_id INTEGER,
+    p_from_date TIMESTAMPTZ,
+    p_from_id INTEGER
+)
+RETURNS void AS $$
+    WITH opening AS (
+        SELECT running_balance
+        FROM project_ledger
+        WHERE project_id = p_project_id
+          AND (entry_date, id) < (p_from_date, p_from_id)
+        ORDER BY entry_date DESC, id DESC
+        LIMIT 1
+    ),
+    recalculated AS (
+        SELECT
+            id,
+            COALESCE((SELECT running_balance FROM opening), 0)
+              + SUM(CASE WHEN LOWER(entry_type) = 'credit' THEN amount ELSE -amount END)
+                OVER (ORDER BY entry_date, id) AS balance
+        FROM project_ledger
+        WHERE project_id = p_project_id
+          AND (entry_date, id) >= (p_from_date, p_from_id)
+    )
+    UPDATE project_ledger pl
+    SET running_balance = r.balance
+    FROM recalculated r
+    WHERE pl.id = r.id
+      AND pl.running_balance IS DISTINCT FROM r.balance;
+$$ LANGUAGE sql;
+
+-- 4. Keep balances current (running_balance itself is not in the column list,
+--    so the UPDATE above does not re-fire the trigger). A transaction-scoped
+--    advisory lock per project serializes concurrent ledger writes, so each
+--    recompute starts from the balances the previous writer committed;
+--    projects are locked in id order when an entry moves between them.
+CREATE OR REPLACE FUNCTION trg_project_ledger_balance()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.project_id IS DISTINCT FROM NEW.project_id THEN
+        PERFORM pg_advisory_xact_lock(hashtext('project_ledger'), LEAST(OLD.project_id, NEW.project_id));
+        PERFORM pg_advisory_xact_lock(hashtext('project_ledger'), GREATEST(OLD.project_id, NEW.project_id));
+    ELSIF TG_OP = 'INSERT' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('project_ledger'), NEW.project_id);
+    ELSE
+        PERFORM pg_advisory_xact_lock(hashtext('project_ledger'), OLD.project_id);
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM recompute_ledger_balances(OLD.project_id, OLD.entry_date, OLD.id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM recompute_ledger_balances(NEW.project_id, NEW.entry_date, NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS project_ledger_balance ON project_ledger;
+CREATE TRIGGER project_ledger_balance
+    AFTER INSERT OR DELETE OR UPDATE OF project_id, entry_type, amount, entry_date ON project_ledger
+    FOR EACH ROW EXECUTE FUNCTION trg_project_ledger_balance();
+
+-- 5. Backfill
+UPDATE project_ledger pl
+SET running_balance = b.balance
+FROM (
+    SELECT
+        id,
+        SUM(CASE WHEN LOWER(entry_type) = 'credit' THEN amount ELSE -amount END)
+          OVER (PARTITION BY project_id ORDER BY entry_date, id) AS balance
+    FROM project_ledger
+) b
+WHERE pl.id = b.id;
+
+COMMENT ON COLUMN project_ledger.running_balance IS 'Project balance after this entry (credits minus debits, ordered by entry_date, id); maintained by trigger';
+
+COMMIT;
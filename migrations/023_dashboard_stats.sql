@@ -0,0 +1,176 @@
+-- Migration 023: Incrementally maintained dashboard stats
+-- Date: 2026-10-16
+-- Purpose: /api/dashboard?output=stats used to aggregate projects,
+-- project_estimations, customer_payments and payments_out on every load.
+-- The four figures are now kept as deltas in 16 shard rows, chosen by
+-- project_id % 16, that triggers adjust on every write; the dashboard sums
+-- the shards. Spreading the deltas keeps concurrent writes for different
+-- projects from queueing on one row lock, and all writes for one project
+-- land on the same shard so a transaction never waits on two of them.
+-- refresh_dashboard_stats() recomputes the shards from scratch and can be
+-- scheduled (e.g. nightly) as a safety net.
+
+BEGIN;
+
+-- 1. Shard rows (created on first use). The table only holds derived
+--    figures and is rebuilt by step 5, so any earlier layout is replaced.
+DROP TABLE IF EXISTS dashboard_stats;
+CREATE TABLE dashboard_stats (
+    shard SMALLINT PRIMARY KEY CHECK (shard >= 0 AND shard < 16),
+    active_projects BIGINT NOT NULL DEFAULT 0,
+    total_project_value NUMERIC NOT NULL DEFAULT 0,
+    total_received NUMERIC NOT NULL DEFAULT 0,
+    total_paid NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    refreshed_at TIMESTAMPTZ
+);
+
+-- 2. Delta upsert shared by the triggers; p_project_id picks the shard
+CREATE OR REPLACE FUNCTION adjust_dashboard_stats(
+    p_project_id INTEGER,
+    d_active_projects BIGINT,
+    d_project_value NUMERIC,
+    d_received NUMERIC,
+    d_paid NUMERIC
+)
+RETURNS void AS $$
+    INSERT INTO dashboard_stats (
+        shard, active_projects, total_project_value, total_received, total_paid, updated_at
+    )
+    VALUES (
+        COALESCE(p_project_id, 0) % 16, d_active_projects, d_project_value, d_received, d_paid, NOW()
+    )
+    ON CONFLICT (shard) DO UPDATE SET
+        active_projects = dashboard_stats.active_projects + EXCLUDED.active_projects,
+        total_project_value = dashboard_stats.total_project_value + EXCLUDED.total_project_value,
+        total_received = dashboard_stats.total_received + EXCLUDED.total_received,
+        total_paid = dashboard_stats.total_paid + EXCLUDED.total_paid,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+
+-- 3. Full recompute (same aggregates the dashboard route used to run, grouped
+--    by shard). Writes to the source tables are blocked meanwhile so no delta
+--    is lost.
+CREATE OR REPLACE FUNCTION refresh_dashboard_stats()
+RETURNS void AS $$
+BEGIN
+    LOCK TABLE projects, project_estimations, customer_payments, payments_out IN SHARE MODE;
+
+    DELETE FROM dashboard_stats;
+
+    INSERT INTO dashboard_stats (
+        shard, active_projects, total_project_value, total_received, total_paid, updated_at, refreshed_at
+    )
+    SELECT
+        shards.shard,
+        COALESCE(p.active_projects, 0),
+        COALESCE(e.total_project_value, 0),
+        COALESCE(r.total_received, 0),
+        COALESCE(o.total_paid, 0),
+        NOW(),
+        NOW()
+    FROM generate_series(0, 15) AS shards(shard)
+    LEFT JOIN (
+        SELECT id % 16 AS shard, COUNT(*) AS active_projects
+        FROM projects WHERE status = 'active'
+        GROUP BY 1
+    ) p ON p.shard = shards.shard
+    LEFT JOIN (
+        SELECT project_id % 16 AS shard, SUM(final_value) AS total_project_value
+        FROM project_estimations WHERE is_active = true
+        GROUP BY 1
+    ) e ON e.shard = shards.shard
+    LEFT JOIN (
+        SELECT project_id % 16 AS shard, SUM(amount) AS total_received
+        FROM customer_payments WHERE status = 'approved'
+        GROUP BY 1
+    ) r ON r.shard = shards.shard
+    LEFT JOIN (
+        SELECT COALESCE(project_id, 0) % 16 AS shard, SUM(amount) AS total_paid
+        FROM payments_out
+        GROUP BY 1
+    ) o ON o.shard = shards.shard;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 4. Delta triggers: subtract what the old row contributed, add the new row
+CREATE OR REPLACE FUNCTION trg_projects_dashboard_stats()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'active' THEN
+        PERFORM adjust_dashboard_stats(OLD.id, -1, 0, 0, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'active' THEN
+        PERFORM adjust_dashboard_stats(NEW.id, 1, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_estimations_dashboard_stats()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active THEN
+        PERFORM adjust_dashboard_stats(OLD.project_id, 0, -COALESCE(OLD.final_value, 0), 0, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active THEN
+        PERFORM adjust_dashboard_stats(NEW.project_id, 0, COALESCE(NEW.final_value, 0), 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_customer_payments_dashboard_stats()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        PERFORM adjust_dashboard_stats(OLD.project_id, 0, 0, -COALESCE(OLD.amount, 0), 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        PERFORM adjust_dashboard_stats(NEW.project_id, 0, 0, COALESCE(NEW.amount, 0), 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_payments_out_dashboard_stats()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM adjust_dashboard_stats(OLD.project_id, 0, 0, 0, -COALESCE(OLD.amount, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM adjust_dashboard_stats(NEW.project_id, 0, 0, 0, COALESCE(NEW.amount, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS projects_dashboard_stats ON projects;
+CREATE TRIGGER projects_dashboard_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status ON projects
+    FOR EACH ROW EXECUTE FUNCTION trg_projects_dashboard_stats();
+
+DROP TRIGGER IF EXISTS estimations_dashboard_stats ON project_estimations;
+CREATE TRIGGER estimations_dashboard_stats
+    AFTER INSERT OR DELETE OR UPDATE OF is_active, final_value, project_id ON project_estimations
+    FOR EACH ROW EXECUTE FUNCTION trg_estimations_dashboard_stats();
+
+DROP TRIGGER IF EXISTS customer_payments_dashboard_stats ON customer_payments;
+CREATE TRIGGER customer_payments_dashboard_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status, amount, project_id ON customer_payments
+    FOR EACH ROW EXECUTE FUNCTION trg_customer_payments_dashboard_stats();
+
+DROP TRIGGER IF EXISTS payments_out_dashboard_stats ON payments_out;
+CREATE TRIGGER payments_out_dashboard_stats
+    AFTER INSERT OR DELETE OR UPDATE OF amount, project_id ON payments_out
+    FOR EACH ROW EXECUTE FUNCTION trg_payments_out_dashboard_stats();
+
+-- 5. Initial snapshot
+SELECT refresh_dashboard_stats();
+
+COMMENT ON TABLE dashboard_stats IS 'Dashboard totals as per-shard deltas (shard = project_id % 16) maintained by triggers; read with SUM(), SELECT refresh_dashboard_stats() recomputes from scratch';
+COMMENT ON COLUMN dashboard_stats.updated_at IS 'Last incremental or full update of this shard';
+COMMENT ON COLUMN dashboard_stats.refreshed_at IS 'Last full recompute via refresh_dashboard_stats()';
+
+COMMIT;
@@ -0,0 +1,67 @@
+-- Migration 024: Indexed search, keyset paging and current estimation pointer for projects
+-- Date: 2026-10-16
+-- Purpose: GET /api/projects filtered with ILIKE '%x%' over projects and
+-- customers, ran a LATERAL "latest estimation" lookup per row and counted the
+-- whole filtered set on every page. Trigram indexes serve the ILIKE filters,
+-- (created_at, id) serves keyset paging, and projects.current_estimation_id
+-- replaces the LATERAL lookup.
+
+BEGIN;
+
+-- 1. Trigram indexes for substring search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_projects_code_trgm ON projects USING gin (project_code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_projects_location_trgm ON projects USING gin (location gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_customers_name_trgm ON customers USING gin (name gin_trgm_ops);
+
+-- 2. Keyset pagination (newest first)
+CREATE INDEX IF NOT EXISTS idx_projects_created_keyset ON projects (created_at DESC, id DESC);
+
+-- 3. Pointer to the latest estimation (by created_at, as the list used to compute it)
+ALTER TABLE projects
+ADD COLUMN IF NOT EXISTS current_estimation_id INTEGER REFERENCES project_estimations(id) ON DELETE SET NULL;
+
+CREATE OR REPLACE FUNCTION refresh_project_current_estimation(p_project_id INTEGER)
+RETURNS void AS $$
+    UPDATE projects p
+    SET current_estimation_id = (
+        SELECT pe.id
+        FROM project_estimations pe
+        WHERE pe.project_id = p.id
+        ORDER BY pe.created_at DESC, pe.id DESC
+        LIMIT 1
+    )
+    WHERE p.id = p_project_id;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION trg_estimations_current_pointer()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_project_current_estimation(NEW.project_id);
+    ELSE
+        PERFORM refresh_project_current_estimation(OLD.project_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS estimations_current_pointer ON project_estimations;
+CREATE TRIGGER estimations_current_pointer
+    AFTER INSERT OR DELETE ON project_estimations
+    FOR EACH ROW EXECUTE FUNCTION trg_estimations_current_pointer();
+
+-- 4. Backfill
+UPDATE projects p
+SET current_estimation_id = latest.id
+FROM (
+    SELECT DISTINCT ON (project_id) project_id, id
+    FROM project_estimations
+    ORDER BY project_id, created_at DESC, id DESC
+) latest
+WHERE latest.project_id = p.id;
+
+COMMENT ON COLUMN projects.current_estimation_id IS 'Latest project_estimations row by created_at; maintained by trigger';
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- Migration 025: Copy-on-write versioning for purchase request items
+-- Date: 2026-10-16
+-- Purpose: createNewPRVersion used to archive and re-insert every item and
+-- link of a PR on each edit. Only changed items are now archived and
+-- rewritten; unchanged items keep their row and version. A history row is
+-- valid from its version up to (excluding) the version that superseded it.
+
+BEGIN;
+
+-- 1. Version that replaced or deleted each archived row
+ALTER TABLE purchase_request_items_history
+ADD COLUMN IF NOT EXISTS superseded_in_version INTEGER;
+
+ALTER TABLE purchase_request_estimation_links_history
+ADD COLUMN IF NOT EXISTS superseded_in_version INTEGER;
+
+-- 2. Existing history holds full snapshots: each row was replaced by the next version
+UPDATE purchase_request_items_history
+SET superseded_in_version = version + 1
+WHERE superseded_in_version IS NULL;
+
+UPDATE purchase_request_estimation_links_history
+SET superseded_in_version = version + 1
+WHERE superseded_in_version IS NULL;
+
+-- 3. Point-in-time lookups (getPRItemsAtVersion)
+CREATE INDEX IF NOT EXISTS idx_prih_pr_superseded
+    ON purchase_request_items_history(purchase_request_id, superseded_in_version);
+
+COMMENT ON COLUMN purchase_request_items_history.superseded_in_version
+IS 'PR version in which this row was replaced or deleted; row is valid for versions [version, superseded_in_version)';
+
+COMMENT ON COLUMN purchase_request_items.version
+IS 'Version in which this item last changed; unchanged items carry forward into later PR versions';
+
+COMMIT;
@@ -0,0 +1,48 @@
+-- Migration 026: Per-scope counters for PR numbers and version numbers
+-- Date: 2026-10-16
+-- Purpose: PR numbers, estimation versions and PR item versions were derived
+-- with MAX(...) + 1 (PR numbers by regex-parsing every pr_number of the
+-- project), which scans history and lets concurrent creates collide. Numbers
+-- are now allocated with a single-row upsert:
+--   INSERT INTO counters (name, scope_id, value) VALUES ($1, $2, 1)
+--   ON CONFLICT (name, scope_id) DO UPDATE SET value = counters.value + 1
+--   RETURNING value;
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS counters (
+    name VARCHAR(50) NOT NULL,
+    scope_id INTEGER NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (name, scope_id)
+);
+
+-- Seed from existing data
+INSERT INTO counters (name, scope_id, value)
+SELECT 'pr_number', project_id,
+       MAX(CAST(SUBSTRING(pr_number FROM 'PR-\d+-(\d+)') AS INTEGER))
+FROM purchase_requests
+WHERE pr_number ~ 'PR-\d+-\d+'
+GROUP BY project_id
+ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value);
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'estimation_version', project_id, MAX(version)
+FROM project_estimations
+GROUP BY project_id
+ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value);
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'pr_version', purchase_request_id, MAX(version)
+FROM (
+    SELECT purchase_request_id, version FROM purchase_request_items
+    UNION ALL
+    SELECT purchase_request_id, version FROM purchase_request_versions
+) v
+GROUP BY purchase_request_id
+ON CONFLICT (name, scope_id) DO UPDATE SET value = GREATEST(counters.value, EXCLUDED.value);
+
+COMMENT ON TABLE counters IS 'Last allocated number per (name, scope_id): pr_number and estimation_version per project, pr_version per purchase request';
+
+COMMIT;
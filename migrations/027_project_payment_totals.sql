@@ -0,0 +1,101 @@
+-- Migration 027: Per-project payment aggregates
+-- Date: 2026-10-16
+-- Purpose: calculate-payment, check-overpayment, payment approval and every
+-- estimation save summed customer_payments for the project on each request.
+-- Collected (approved) and pending totals now live in one row per project
+-- that a trigger adjusts by delta in the same transaction as the payment
+-- write, so readers fetch a single row. refresh_project_payment_totals()
+-- recomputes from scratch. Invoiced totals stay in projects.invoiced_amount,
+-- which the invoice routes maintain.
+
+BEGIN;
+
+-- 1. One row per project; created on the first payment. No
+--    foreign key: deleting a project cascades to its payments, whose delete
+--    triggers still adjust this row afterwards.
+CREATE TABLE IF NOT EXISTS project_payment_totals (
+    project_id INTEGER PRIMARY KEY,
+    collected NUMERIC NOT NULL DEFAULT 0,
+    pending NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    refreshed_at TIMESTAMPTZ
+);
+
+-- 2. Delta upsert used by the trigger
+CREATE OR REPLACE FUNCTION adjust_project_payment_totals(
+    p_project_id INTEGER,
+    d_collected NUMERIC,
+    d_pending NUMERIC
+)
+RETURNS void AS $$
+    INSERT INTO project_payment_totals (project_id, collected, pending, updated_at)
+    VALUES (p_project_id, d_collected, d_pending, NOW())
+    ON CONFLICT (project_id) DO UPDATE SET
+        collected = project_payment_totals.collected + EXCLUDED.collected,
+        pending = project_payment_totals.pending + EXCLUDED.pending,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+
+-- 3. Full recompute for projects first_id..last_id (NULL = unbounded).
+--    Payment writes are blocked meanwhile so no delta is lost.
+CREATE OR REPLACE FUNCTION refresh_project_payment_totals(
+    first_id INTEGER DEFAULT NULL,
+    last_id INTEGER DEFAULT NULL
+)
+RETURNS void AS $$
+BEGIN
+    LOCK TABLE customer_payments IN SHARE MODE;
+
+    DELETE FROM project_payment_totals
+    WHERE (first_id IS NULL OR project_id >= first_id)
+      AND (last_id IS NULL OR project_id <= last_id);
+
+    INSERT INTO project_payment_totals (project_id, collected, pending, updated_at, refreshed_at)
+    SELECT
+        project_id,
+        COALESCE(SUM(amount) FILTER (WHERE status = 'approved'), 0),
+        COALESCE(SUM(amount) FILTER (WHERE status = 'pending'), 0),
+        NOW(),
+        NOW()
+    FROM customer_payments
+    WHERE (first_id IS NULL OR project_id >= first_id)
+      AND (last_id IS NULL OR project_id <= last_id)
+    GROUP BY project_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 4. Delta trigger: subtract what the old row contributed, add the new row
+CREATE OR REPLACE FUNCTION trg_customer_payments_payment_totals()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IN ('approved', 'pending') THEN
+        PERFORM adjust_project_payment_totals(
+            OLD.project_id,
+            CASE WHEN OLD.status = 'approved' THEN -COALESCE(OLD.amount, 0) ELSE 0 END,
+            CASE WHEN OLD.status = 'pending' THEN -COALESCE(OLD.amount, 0) ELSE 0 END
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IN ('approved', 'pending') THEN
+        PERFORM adjust_project_payment_totals(
+            NEW.project_id,
+            CASE WHEN NEW.status = 'approved' THEN COALESCE(NEW.amount, 0) ELSE 0 END,
+            CASE WHEN NEW.status = 'pending' THEN COALESCE(NEW.amount, 0) ELSE 0 END
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customer_payments_payment_totals ON customer_payments;
+CREATE TRIGGER customer_payments_payment_totals
+    AFTER INSERT OR DELETE OR UPDATE OF status, amount, project_id ON customer_payments
+    FOR EACH ROW EXECUTE FUNCTION trg_customer_payments_payment_totals();
+
+-- 5. Initial snapshot
+SELECT refresh_project_payment_totals();
+
+COMMENT ON TABLE project_payment_totals IS 'Per-project collected/pending totals maintained by a trigger on customer_payments; SELECT refresh_project_payment_totals() recomputes from scratch';
+COMMENT ON COLUMN project_payment_totals.collected IS 'SUM(customer_payments.amount) with status approved (reversals are negative)';
+COMMENT ON COLUMN project_payment_totals.pending IS 'SUM(customer_payments.amount) with status pending';
+
+COMMIT;
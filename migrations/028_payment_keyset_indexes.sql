@@ -0,0 +1,26 @@
+-- Migration 028: Keyset paging and date-range filters for /api/all-payments
+-- Date: 2026-10-16
+-- Purpose: /api/all-payments returned every customer_payments or payments_out
+-- row (payments_out unordered) joined to projects, customers and users. It
+-- now pages newest first on (payment_date, id), optionally within a project
+-- and a payment_date range, so each request reads one index range.
+
+BEGIN;
+
+-- 1. Every insert path sets payment_date; fill any legacy gaps so the keyset
+--    (payment_date, id) is total
+UPDATE customer_payments SET payment_date = COALESCE(created_at, NOW()) WHERE payment_date IS NULL;
+UPDATE payments_out SET payment_date = COALESCE(created_at, NOW()) WHERE payment_date IS NULL;
+
+ALTER TABLE customer_payments ALTER COLUMN payment_date SET NOT NULL;
+ALTER TABLE payments_out ALTER COLUMN payment_date SET NOT NULL;
+
+-- 2. All payments, newest first (also serves from/to without a project)
+CREATE INDEX IF NOT EXISTS idx_customer_payments_date_keyset ON customer_payments (payment_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payments_out_date_keyset ON payments_out (payment_date DESC, id DESC);
+
+-- 3. One project's payments, newest first
+CREATE INDEX IF NOT EXISTS idx_customer_payments_project_date_keyset ON customer_payments (project_id, payment_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payments_out_project_date_keyset ON payments_out (project_id, payment_date DESC, id DESC);
+
+COMMIT;
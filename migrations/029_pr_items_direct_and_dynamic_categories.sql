@@ -0,0 +1,33 @@
+-- Migration 029: Schema the PR routes and dynamic categories already rely on
+-- Date: 2026-10-16
+-- Purpose: Brings a database built from schema.sql + migrations in line with
+-- what the application writes, without editing migrations that have already
+-- run:
+--   * purchase_request_items.estimation_item_id is nullable. Direct purchase
+--     items (migration 015) have no estimation item, and full unit/component
+--     items link to estimation items through purchase_request_estimation_links
+--     (migration 013); the PR routes insert items without this column.
+--   * purchase_request_items.created_by exists; the PR create/add-items routes
+--     insert it alongside updated_by/deleted_by (migration 019).
+--   * estimation_items.category is no longer limited to the original four
+--     values. Categories are the ids in biz_models.category_rates (migration
+--     007) and project_base_rates.category_rates, e.g. 'misc', 'shopping'.
+-- Every statement is a no-op where the change is already present.
+
+BEGIN;
+
+ALTER TABLE purchase_request_items
+ALTER COLUMN estimation_item_id DROP NOT NULL;
+
+ALTER TABLE purchase_request_items
+ADD COLUMN IF NOT EXISTS created_by INTEGER;
+
+ALTER TABLE estimation_items
+DROP CONSTRAINT IF EXISTS estimation_items_category_check;
+
+COMMENT ON COLUMN purchase_request_items.estimation_item_id
+IS 'Unused for new items - estimation links live in purchase_request_estimation_links; NULL for direct purchase items';
+COMMENT ON COLUMN estimation_items.category
+IS 'Category id from the project base rates (biz_models.category_rates); categories are dynamic';
+
+COMMIT;
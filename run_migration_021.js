@@ -0,0 +1,52 @@
+// Script to execute migration 021
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 021_estimation_item_fulfillment.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/021_estimation_item_fulfillment.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 021 completed successfully!');
+    
+    // Verify the table was backfilled
+    console.log('\n📋 Verifying fulfillment rows...');
+    const verifyResult = await client.query(`
+      SELECT
+        (SELECT COUNT(*) FROM estimation_items WHERE estimation_id IS NOT NULL) as item_count,
+        (SELECT COUNT(*) FROM estimation_item_fulfillment) as fulfillment_count;
+    `);
+    
+    const { item_count, fulfillment_count } = verifyResult.rows[0];
+    if (item_count === fulfillment_count) {
+      console.log(`\n✓ Fulfillment rows created for all ${item_count} estimation items!`);
+    } else {
+      console.log(`\n⚠️  Warning: ${fulfillment_count} fulfillment rows for ${item_count} estimation items`);
+    }
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,51 @@
+// Script to execute migration 022
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 022_ledger_running_balance.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/022_ledger_running_balance.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 022 completed successfully!');
+    
+    // Verify every ledger entry has a balance
+    console.log('\n📋 Verifying running balances...');
+    const verifyResult = await client.query(`
+      SELECT COUNT(*) as missing
+      FROM project_ledger
+      WHERE running_balance IS NULL;
+    `);
+    
+    if (verifyResult.rows[0].missing === '0') {
+      console.log('\n✓ Running balances populated for all ledger entries!');
+    } else {
+      console.log(`\n⚠️  Warning: ${verifyResult.rows[0].missing} ledger entries without a running balance`);
+    }
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,56 @@
+// Script to execute migration 023
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 023_dashboard_stats.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/023_dashboard_stats.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 023 completed successfully!');
+    
+    // Show the initial snapshot
+    console.log('\n📋 Verifying dashboard stats...');
+    const verifyResult = await client.query(`
+      SELECT COUNT(*)::int as shards,
+             SUM(active_projects) as active_projects,
+             SUM(total_project_value) as total_project_value,
+             SUM(total_received) as total_received,
+             SUM(total_paid) as total_paid,
+             MIN(refreshed_at) as refreshed_at
+      FROM dashboard_stats;
+    `);
+    
+    if (verifyResult.rows[0].shards > 0) {
+      console.log('\n✓ Dashboard stats snapshot created:');
+      console.log(verifyResult.rows[0]);
+    } else {
+      console.log('\n⚠️  Warning: dashboard_stats shards not found');
+    }
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
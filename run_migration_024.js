@@ -0,0 +1,52 @@
+// Script to execute migration 024
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 024_projects_search.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/024_projects_search.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 024 completed successfully!');
+    
+    // Verify the estimation pointer was backfilled
+    console.log('\n📋 Verifying current_estimation_id...');
+    const verifyResult = await client.query(`
+      SELECT COUNT(*) as missing
+      FROM projects p
+      WHERE p.current_estimation_id IS NULL
+      AND EXISTS (SELECT 1 FROM project_estimations pe WHERE pe.project_id = p.id);
+    `);
+    
+    if (verifyResult.rows[0].missing === '0') {
+      console.log('\n✓ current_estimation_id set for all projects with estimations!');
+    } else {
+      console.log(`\n⚠️  Warning: ${verifyResult.rows[0].missing} projects without current_estimation_id`);
+    }
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
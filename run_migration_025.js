@@ -0,0 +1,52 @@
+// Script to execute migration 025
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 025_pr_copy_on_write_versions.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/025_pr_copy_on_write_versions.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 025 completed successfully!');
+    
+    // Verify history rows were backfilled
+    console.log('\n📋 Verifying superseded_in_version...');
+    const verifyResult = await client.query(`
+      SELECT
+        (SELECT COUNT(*) FROM purchase_request_items_history WHERE superseded_in_version IS NULL) as items_missing,
+        (SELECT COUNT(*) FROM purchase_request_estimation_links_history WHERE superseded_in_version IS NULL) as links_missing;
+    `);
+    
+    const { items_missing, links_missing } = verifyResult.rows[0];
+    if (items_missing === '0' && links_missing === '0') {
+      console.log('\n✓ superseded_in_version set on all history rows!');
+    } else {
+      console.log(`\n⚠️  Warning: ${items_missing} item and ${links_missing} link history rows without superseded_in_version`);
+    }
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,51 @@
+// Script to execute migration 026
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 026_counters.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/026_counters.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 026 completed successfully!');
+    
+    // Show seeded counters
+    console.log('\n📋 Verifying counters...');
+    const verifyResult = await client.query(`
+      SELECT name, COUNT(*) as scopes, MAX(value) as max_value
+      FROM counters
+      GROUP BY name
+      ORDER BY name;
+    `);
+    
+    console.log('\n✓ Counters seeded:');
+    verifyResult.rows.forEach(row => {
+      console.log(`  - ${row.name}: ${row.scopes} scopes (max ${row.max_value})`);
+    });
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,48 @@
+// Script to execute migration 027
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 027_project_payment_totals.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/027_project_payment_totals.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 027 completed successfully!');
+    
+    // Show the initial snapshot
+    console.log('\n📋 Verifying payment totals...');
+    const verifyResult = await client.query(`
+      SELECT COUNT(*) as projects, SUM(collected) as collected,
+             SUM(pending) as pending
+      FROM project_payment_totals;
+    `);
+    
+    console.log('\n✓ Payment totals snapshot created:');
+    console.log(verifyResult.rows[0]);
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
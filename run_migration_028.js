@@ -0,0 +1,51 @@
+// Script to execute migration 028
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 028_payment_keyset_indexes.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/028_payment_keyset_indexes.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 028 completed successfully!');
+    
+    // Show the new indexes
+    console.log('\n📋 Verifying indexes...');
+    const verifyResult = await client.query(`
+      SELECT tablename, indexname
+      FROM pg_indexes
+      WHERE indexname LIKE '%_date_keyset'
+      ORDER BY tablename, indexname;
+    `);
+    
+    console.log('\n✓ Keyset indexes:');
+    verifyResult.rows.forEach(row => {
+      console.log(`  - ${row.tablename}: ${row.indexname}`);
+    });
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,52 @@
+// Script to execute migration 029
+const { Client } = require('pg');
+const fs = require('fs');
+const path = require('path');
+
+async function executeMigration() {
+  process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
+  
+  const client = new Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: {
+      rejectUnauthorized: false
+    }
+  });
+
+  try {
+    await client.connect();
+    console.log('✓ Connected to database');
+
+    console.log('\n📋 Executing migration 029_pr_items_direct_and_dynamic_categories.sql...');
+    const migrationSQL = fs.readFileSync(
+      path.join(__dirname, 'migrations/029_pr_items_direct_and_dynamic_categories.sql'), 
+      'utf8'
+    );
+    await client.query(migrationSQL);
+    console.log('✓ Migration 029 completed successfully!');
+    
+    // Show the resulting columns
+    console.log('\n📋 Verifying purchase_request_items columns...');
+    const verifyResult = await client.query(`
+      SELECT column_name, is_nullable
+      FROM information_schema.columns
+      WHERE table_name = 'purchase_request_items'
+        AND column_name IN ('estimation_item_id', 'created_by')
+      ORDER BY column_name;
+    `);
+    
+    console.log('\n✓ Columns:');
+    verifyResult.rows.forEach(row => {
+      console.log(`  - ${row.column_name} (nullable: ${row.is_nullable})`);
+    });
+
+  } catch (error) {
+    console.error('❌ Migration failed:', error.message);
+    console.error(error);
+    process.exit(1);
+  } finally {
+    await client.end();
+  }
+}
+
+executeMigration();
@@ -0,0 +1,39 @@
+"""
+Shared fixtures: hermetic Postgres (kg_finance.pgtest)
+
+pg_db gives a test its own database cloned from the schema template and points
+DATABASE_URL (and so kg_finance.db) at it. Tests using it are skipped when no
+server is configured (KG_TEST_PG_URL) and no local PostgreSQL is installed.
+"""
+
+import uuid
+
+import pytest
+
+from kg_finance import db, pgtest
+
+
+@pytest.fixture(scope='session')
+def pg_server():
+    if not pgtest.available():
+        pytest.skip(f"no PostgreSQL: install it or set {pgtest.SERVER_ENV}")
+    with pgtest.server() as admin_dsn:
+        yield admin_dsn
+
+
+@pytest.fixture(scope='session')
+def pg_template(pg_server):
+    return pgtest.ensure_template(pg_server, pgtest.schema_files())
+
+
+@pytest.fixture
+def pg_db(pg_server, pg_template, monkeypatch):
+    name = f"kg_test_{uuid.uuid4().hex[:12]}"
+    dsn = pgtest.clone(pg_server, pg_template, name)
+    db.close_pool()
+    monkeypatch.setenv('DATABASE_URL', dsn)
+    try:
+        yield dsn
+    finally:
+        db.close_pool()
+        pgtest.drop(pg_server, name)
@@ -0,0 +1,10 @@
+-- Test-only fix-ups applied between schema.sql and the migrations when
+-- kg_finance.pgtest builds a template. Never run this against a real database.
+--
+-- schema.sql is a dump taken after migration 010, so pgtest replays
+-- migrations from 011 on. The dump's purchase_request_items already carries
+-- unique_pr_estimation_item, which 011 adds without a guard; drop it so 011
+-- applies unchanged and recreates it.
+
+ALTER TABLE purchase_request_items
+DROP CONSTRAINT IF EXISTS unique_pr_estimation_item;
@@ -0,0 +1,66 @@
+"""
+Tests for the pricing micro-benchmarks (kg_finance.bench)
+"""
+
+import shutil
+
+import pytest
+
+from kg_finance.bench import (
+    FUNCTIONS, append_history, find_regressions, load_history, main, measure, run_js, run_python,
+)
+
+
+def result(function, median_ms, engine='python', items=100, categories=3):
+    return {'engine': engine, 'function': function, 'items': items, 'categories': categories,
+            'median_ms': median_ms}
+
+
+def test_measure_repeats_at_least_three_times():
+    calls = []
+    times = measure(lambda: calls.append(1), min_time=0)
+    assert len(times) >= 3
+    assert len(calls) == len(times) + 1  # warm-up
+
+
+def test_python_engine_covers_every_case():
+    results = run_python(items=(10, 50), categories=(3, 5), min_time=0)
+    cases = {(r['function'], r['items'], r['categories']) for r in results}
+    # PR functions are category independent and run once per item count
+    assert len(results) == len(cases) == 3 * 2 * 2 + 2 * 2
+    assert ('pr_totals', 50, None) in cases
+    assert all(r['median_ms'] > 0 and r['repeats'] >= 3 for r in results)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+def test_js_engine_reports_the_same_cases():
+    options = dict(items=(10,), categories=(3, 4), min_time=0)
+    js = run_js(**options)
+    python = run_python(**options)
+    assert {r['engine'] for r in js} == {'js'}
+    key = lambda r: (r['function'], r['items'], r['categories'])  # noqa: E731
+    assert sorted(map(key, js)) == sorted(map(key, python))
+
+
+def test_regressions_beyond_threshold():
+    previous = [result('all_totals', 10), result('pr_totals', 2), result('item_total', 5, engine='js')]
+    current = [result('all_totals', 12.5), result('pr_totals', 2.2), result('item_total', 5, engine='js'),
+               result('category_totals', 99)]
+    regressions = find_regressions(current, previous, threshold=0.2)
+    assert [(r['function'], r['change_pct']) for r in regressions] == [('all_totals', 25.0)]
+
+
+def test_runs_are_appended_to_history(tmp_path, capsys):
+    history = tmp_path / 'bench' / 'pricing.jsonl'
+    argv = ['--items', '10', '--categories', '3', '--engines', 'python', '--min-time', '0',
+            '--history', str(history), '--functions', ','.join(FUNCTIONS[:2])]
+    assert main(argv)
+    assert main(argv)
+
+    runs = load_history(str(history))
+    assert len(runs) == 2
+    assert {r['function'] for r in runs[1]['results']} == set(FUNCTIONS[:2])
+    assert 'Compared with' in capsys.readouterr().out
+
+    append_history(str(history), {'host': 'elsewhere', 'results': []})
+    assert len(load_history(str(history))) == 3
@@ -0,0 +1,192 @@
+"""
+Tests for the synthetic data generator (kg_finance.datagen)
+"""
+
+import csv
+import io
+import itertools
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from kg_finance import datagen, db
+from kg_finance.datagen import TABLE_COLUMNS, CopyWriter, DatasetGenerator
+from kg_finance.pricing import calculate_all_totals
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class Ids:
+    def __init__(self):
+        self._counters = defaultdict(lambda: itertools.count(1))
+
+    def __call__(self, table):
+        return next(self._counters[table])
+
+
+def generate(seed=7, projects=4, items=60):
+    tables = defaultdict(list)
+    order = {}  # (table, id) -> emission position
+
+    def emit(table, row):
+        assert set(row) <= set(TABLE_COLUMNS[table]), set(row) - set(TABLE_COLUMNS[table])
+        tables[table].append(row)
+        order[(table, row['id'])] = len(order)
+
+    generator = DatasetGenerator(np.random.default_rng(seed), Ids(), emit,
+                                 items_per_estimation=items, max_versions=3, now=NOW)
+    generator.setup(biz_models=2, customers=3, vendors=4)
+    for _ in range(projects):
+        generator.project()
+    return tables, order
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return generate()
+
+
+def test_same_seed_same_rows():
+    first, _ = generate(seed=3, projects=2, items=20)
+    second, _ = generate(seed=3, projects=2, items=20)
+    assert json.dumps(first, default=str) == json.dumps(second, default=str)
+
+
+def test_references_point_at_earlier_rows(dataset):
+    tables, order = dataset
+    # Every child row is emitted after the parent it references
+    references = {
+        'projects': [('customer_id', 'customers'), ('biz_model_id', 'biz_models')],
+        'project_estimations': [('project_id', 'projects')],
+        'estimation_items': [('estimation_id', 'project_estimations')],
+        'purchase_requests': [('estimation_id', 'project_estimations'), ('vendor_id', 'vendors')],
+        'purchase_request_items': [('purchase_request_id', 'purchase_requests')],
+        'purchase_request_estimation_links': [('estimation_item_id', 'estimation_items'),
+                                              ('purchase_request_item_id', 'purchase_request_items')],
+        'customer_payments': [('milestone_id', 'biz_model_milestones')],
+    }
+    for table, refs in references.items():
+        for row in tables[table]:
+            for column, parent in refs:
+                assert order[(parent, row[column])] < order[(table, row['id'])], (table, column)
+
+
+def test_milestone_percentages_are_cumulative(dataset):
+    tables, _ = dataset
+    by_model = defaultdict(list)
+    for row in tables['biz_model_milestones']:
+        if row['direction'] == 'inflow':
+            by_model[row['biz_model_id']].append(json.loads(row['category_percentages']))
+    for milestones in by_model.values():
+        for category in milestones[0]:
+            values = [m[category] for m in milestones]
+            assert values == sorted(values) and values[-1] == 100
+
+
+def test_estimations_are_versioned_and_priced(dataset):
+    tables, _ = dataset
+    items = defaultdict(list)
+    for item in tables['estimation_items']:
+        items[item['estimation_id']].append(item)
+    by_project = defaultdict(list)
+    for estimation in tables['project_estimations']:
+        by_project[estimation['project_id']].append(estimation)
+    for estimations in by_project.values():
+        assert [e['version'] for e in estimations] == list(range(1, len(estimations) + 1))
+        assert [e['is_active'] for e in estimations] == [False] * (len(estimations) - 1) + [True]
+
+    for estimation in tables['project_estimations']:
+        rows = items[estimation['id']]
+        categories = json.loads(estimation['category_breakdown'])
+        rates = next(json.loads(b['category_rates']) for b in tables['biz_models']
+                     if set(categories) == {c['id'] for c in json.loads(b['category_rates'])['categories']})
+        columns = {
+            'category': np.array([r['category'] for r in rows], dtype=object),
+            'unit': np.array([r['unit'] for r in rows], dtype=object),
+            **{name: np.array([np.nan if r[name] is None else r[name] for r in rows], dtype=np.float64) for name in
+               ('width', 'height', 'quantity', 'unit_price', 'item_discount_percentage',
+                'discount_kg_charges_percentage')},
+            'gst_percentage': np.full(len(rows), np.nan),
+        }
+        totals = calculate_all_totals(columns, {'category_rates': rates, 'gst_percentage': 18})
+        assert totals['final_value'] == estimation['final_value']
+        assert [float(r['item_total']) for r in rows] == list(totals['items']['item_total'])
+
+
+def test_links_never_overfill_items(dataset):
+    tables, _ = dataset
+    quantity = {item['id']: float(item['quantity']) for item in tables['estimation_items']}
+    status = {pr['id']: pr['status'] for pr in tables['purchase_requests']}
+    pr_of_item = {item['id']: item['purchase_request_id'] for item in tables['purchase_request_items']}
+    assert tables['purchase_request_estimation_links']
+
+    linked = defaultdict(float)
+    for link in tables['purchase_request_estimation_links']:
+        assert 0 < link['unit_purchase_request_item_weightage'] <= 1
+        if status[pr_of_item[link['purchase_request_item_id']]] == 'confirmed':
+            linked[link['estimation_item_id']] += link['linked_qty'] * link['unit_purchase_request_item_weightage']
+    for item_id, qty in linked.items():
+        assert qty <= quantity[item_id] + 1e-9
+
+    numbers = [pr['pr_number'] for pr in tables['purchase_requests']]
+    assert len(numbers) == len(set(numbers))
+
+
+def test_ledger_mirrors_payments(dataset):
+    tables, _ = dataset
+    approved = {p['id']: p['amount'] for p in tables['customer_payments'] if p['status'] == 'approved'}
+    paid_out = {p['id']: p['amount'] for p in tables['payments_out']}
+    credits = {e['source_id']: e['amount'] for e in tables['project_ledger'] if e['entry_type'] == 'credit'}
+    debits = {e['source_id']: e['amount'] for e in tables['project_ledger'] if e['entry_type'] == 'debit'}
+    assert credits == approved
+    assert debits == paid_out
+
+    active_value = {e['project_id']: e['final_value'] for e in tables['project_estimations'] if e['is_active']}
+    collected = defaultdict(float)
+    for payment in tables['customer_payments']:
+        collected[payment['project_id']] += payment['amount']
+    for project_id, amount in collected.items():
+        assert amount <= active_value[project_id] + 0.05
+
+
+class FakeCursor:
+    def __init__(self):
+        self.copies = []
+
+    def copy_expert(self, sql, buf):
+        self.copies.append((sql.split()[1], buf.read()))
+
+
+def test_copy_writer_flushes_parents_first():
+    cursor = FakeCursor()
+    writer = CopyWriter(cursor, batch_rows=3)
+    writer('estimation_items', {'id': 1, 'estimation_id': 5, 'width': float('nan'), 'room_name': ''})
+    writer('project_estimations', {'id': 5, 'is_active': True})
+    writer('projects', {'id': 9, 'name': 'A "quoted" name'})
+
+    assert [table for table, _ in cursor.copies] == ['projects', 'project_estimations', 'estimation_items']
+    fields = cursor.copies[2][1].rstrip('\n').split(',')
+    columns = TABLE_COLUMNS['estimation_items']
+    assert fields[columns.index('width')] == ''          # bare field: NULL
+    assert fields[columns.index('room_name')] == '""'    # quoted: empty string
+    projects = next(csv.reader(io.StringIO(cursor.copies[0][1])))
+    assert projects[TABLE_COLUMNS['projects'].index('name')] == 'A "quoted" name'
+    assert writer.counts['projects'] == 1
+
+
+def test_generate_loads_into_postgres(pg_db):
+    conn = db.connect()
+    try:
+        counts = datagen.generate(conn, projects=2, items_per_estimation=20, biz_models=1, vendors=3,
+                                  seed=3, chunk_projects=1, batch_rows=100)
+        cursor = conn.cursor()
+        for table in ('projects', 'estimation_items', 'purchase_request_items', 'customer_payments'):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            assert cursor.fetchone()[0] == counts[table]
+        cursor.execute("SELECT COUNT(*) FROM estimation_items WHERE width IS NULL")
+        assert cursor.fetchone()[0] > 0
+    finally:
+        conn.close()
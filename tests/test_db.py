@@ -0,0 +1,81 @@
+"""
+Tests for the shared connection pool wrapper (kg_finance.db)
+"""
+
+import pytest
+
+from kg_finance import db
+
+
+class FakeConnection:
+    def __init__(self, closed=0):
+        self.closed = closed
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cursor(self):
+        return 'cursor'
+
+
+class FakePool:
+    def __init__(self):
+        self.returned = []
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+def test_close_returns_connection_to_pool():
+    pool, raw = FakePool(), FakeConnection()
+    conn = db.PooledConnection(pool, raw)
+
+    assert conn.cursor() == 'cursor'
+    conn.close()
+    conn.close()  # second close is a no-op
+
+    assert raw.rollbacks == 1
+    assert pool.returned == [(raw, False)]
+    assert conn.closed
+    with pytest.raises(AttributeError):
+        conn.cursor()
+
+
+def test_broken_connection_is_discarded():
+    pool, raw = FakePool(), FakeConnection(closed=2)
+    with db.PooledConnection(pool, raw):
+        pass
+    assert pool.returned == [(raw, True)]
+
+
+def test_context_manager_commits_on_clean_exit():
+    pool, raw = FakePool(), FakeConnection()
+    with db.PooledConnection(pool, raw):
+        pass
+    assert raw.commits == 1
+    assert pool.returned == [(raw, False)]
+
+
+def test_context_manager_rolls_back_on_error():
+    pool, raw = FakePool(), FakeConnection()
+    with pytest.raises(ValueError):
+        with db.PooledConnection(pool, raw):
+            raise ValueError('boom')
+    assert raw.commits == 0
+    assert raw.rollbacks >= 1
+    assert pool.returned == [(raw, False)]
+
+
+def test_database_url_required(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    with pytest.raises(RuntimeError):
+        db.database_url()
+
+
+def test_copy_line_keeps_null_and_empty_string_apart():
+    assert db.copy_line([None, float('nan'), '', 'say "hi"', 1.5, True]) == ',,"","say ""hi""","1.5","True"\n'
@@ -0,0 +1,113 @@
+"""
+Tests for the estimation CSV bulk loader (kg_finance.estimation_loader)
+"""
+
+import json
+
+from kg_finance import db
+from kg_finance.estimation_loader import (
+    copy_items,
+    load_estimation_csv,
+    normalize_row,
+    project_id_from_path,
+    read_csv_batches,
+)
+from kg_finance.pricing import (
+    CategoryTotalsAccumulator,
+    calculate_all_totals,
+    calculate_item_totals,
+    items_to_columns,
+)
+
+from tests.test_pricing import BASE_RATES
+
+CSV = (
+    "Category,Room_Name,Item_Name,Unit,Width,Height,Quantity,Unit_Price, Item_Discount_Percentage\n"
+    "woodwork,Kitchen,Base unit,SQFT,10,5,,1500,10\n"
+    "\n"
+    "misc,Living,Painting,lumpsum,,,1,25000,\n"
+    "shopping,Bedroom,Lamp,no,,,2,3499.5,5\n"
+)
+
+
+def test_normalize_row_matches_upload_route():
+    row = normalize_row({'category': ' woodwork ', 'unit': ' SQFT', 'width': '10', 'height': '',
+                         'quantity': 'abc', 'unit_price': '12.5x', 'status': ''})
+    assert row['category'] == 'woodwork'
+    assert row['unit'] == 'sqft'
+    assert row['width'] == 10 and row['height'] is None
+    assert row['quantity'] == 0 and row['unit_price'] == 12.5
+    assert row['status'] == 'Queued'
+
+
+def test_read_csv_batches_lowercases_headers_and_skips_blank_lines(tmp_path):
+    path = tmp_path / 'v1_upload.csv'
+    path.write_text(CSV)
+
+    batches = list(read_csv_batches(path, batch_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert batches[0][0]['item_discount_percentage'] == 10
+    assert batches[1][0]['unit_price'] == 3499.5
+
+
+def test_batched_totals_match_single_pass(tmp_path):
+    path = tmp_path / 'v1_upload.csv'
+    path.write_text(CSV)
+    categories = BASE_RATES['category_rates']['categories']
+
+    accumulator = CategoryTotalsAccumulator(categories)
+    for rows in read_csv_batches(path, batch_size=1):
+        accumulator.add(calculate_item_totals(items_to_columns(rows), BASE_RATES))
+
+    rows = [row for batch in read_csv_batches(path) for row in batch]
+    expected = calculate_all_totals(items_to_columns(rows), BASE_RATES)
+    expected.pop('items')
+    assert accumulator.count == 3
+    assert accumulator.result() == expected
+
+
+def test_project_id_from_path():
+    assert project_id_from_path('uploads/estimations/12/v3_upload.csv') == 12
+
+
+class FakeCursor:
+    def copy_expert(self, sql, buf):
+        self.sql, self.data = sql, buf.read()
+
+
+def test_copy_items_writes_missing_dimensions_as_null(tmp_path):
+    path = tmp_path / 'v1_upload.csv'
+    path.write_text(CSV)
+    rows = next(read_csv_batches(path))
+    cursor = FakeCursor()
+    copy_items(cursor, 7, rows, calculate_item_totals(items_to_columns(rows), BASE_RATES))
+
+    lumpsum = cursor.data.splitlines()[1]
+    assert lumpsum.startswith('"7","misc","Living","Painting","lumpsum",,,"1.0",')
+
+
+def test_load_estimation_csv_into_postgres(pg_db, tmp_path):
+    path = tmp_path / 'v1_upload.csv'
+    path.write_text(CSV)
+
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO projects (project_code, name) VALUES ('KG-LOAD-1', 'Loader') RETURNING id")
+        project_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO project_base_rates (project_id, category_rates, gst_percentage, active)
+            VALUES (%s, %s, %s, true)
+        """, (project_id, json.dumps(BASE_RATES['category_rates']), BASE_RATES['gst_percentage']))
+
+    with db.connection() as conn:
+        result = load_estimation_csv(conn, str(path), project_id)
+        assert result['version'] == 1 and result['items_count'] == 3
+
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT unit, width, height, room_name FROM estimation_items
+            WHERE estimation_id = %s ORDER BY id
+        """, (result['estimation_id'],))
+        items = cursor.fetchall()
+    assert [unit for unit, *_ in items] == ['sqft', 'lumpsum', 'no']
+    assert items[1][1:] == (None, None, 'Living')
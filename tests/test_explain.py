@@ -0,0 +1,187 @@
+"""
+Tests for the EXPLAIN plan regression suite (kg_finance.explain)
+"""
+
+import pytest
+
+from kg_finance import db
+from kg_finance.explain import (
+    bind_params, explain_statement, extract_file, extract_statements, flag_statement, resolve_samples,
+    sample_key, summarize_plan,
+)
+
+ROUTE = """
+import { query } from '@/lib/db';
+import { PAYMENT_STATUS } from '@/app/constants';
+
+const matchSql = (param) => `SELECT id FROM projects WHERE name ILIKE ${param}`;
+
+export async function GET(request, { params }) {
+  const projectId = params.id;
+  await query('BEGIN');
+  const a = await query(`
+    SELECT * FROM customer_payments WHERE project_id = $1 AND status = $2
+  `, [projectId, PAYMENT_STATUS.APPROVED]);
+
+  let text = `SELECT * FROM purchase_requests pr`;
+  const values = [];
+  if (filter) {
+    text += ' WHERE pr.project_id = $1';
+    values.push(projectId);
+  }
+  text += ` ORDER BY pr.id ${desc ? `DESC` : ''}`;
+  await query(text, values);
+
+  await query(`SELECT COUNT(*) FROM (${matchSql('$1')}) m`, [filterValue]);
+  await query(`UPDATE projects SET ${updates.join(', ')} WHERE id = $1`, [projectId]);
+  await query(`INSERT INTO activity_logs (actor_id, action) VALUES ($1, $2)`, [
+    session.user.id, // who
+    'created'
+  ]);
+  await query('COMMIT');
+}
+"""
+
+CONSTANTS = {'PAYMENT_STATUS.APPROVED': 'approved'}
+
+
+@pytest.fixture
+def statements(tmp_path):
+    route = tmp_path / 'app' / 'api' / 'projects' / '[id]' / 'thing'
+    route.mkdir(parents=True)
+    (route / 'route.js').write_text(ROUTE)
+    return extract_file(str(route / 'route.js'), str(tmp_path), CONSTANTS)
+
+
+def test_extracts_literal_built_and_helper_sql(statements):
+    assert len(statements) == 5  # BEGIN / COMMIT dropped
+    first, built, helper, dynamic, insert = statements
+
+    assert first['kind'] == 'SELECT' and first['params'] == ['projectId', 'PAYMENT_STATUS.APPROVED']
+    assert first['file'] == 'app/api/projects/[id]/thing/route.js' and first['line'] == 10
+    assert ' '.join(built['sql'].split()) == 'SELECT * FROM purchase_requests pr WHERE pr.project_id = $1 ORDER BY pr.id DESC'
+    assert built['params'] == ['projectId']
+    assert helper['sql'] == 'SELECT COUNT(*) FROM (SELECT id FROM projects WHERE name ILIKE $1) m'
+    assert dynamic['skip'].startswith('dynamic SQL') and dynamic['id'] is None
+    assert insert['params'] == ['session.user.id', "'created'"]
+
+
+def test_extracts_transaction_statements(tmp_path):
+    path = tmp_path / 'lib' / 'thing.js'
+    path.parent.mkdir()
+    path.write_text("""
+await withTransaction(async (tx) => {
+  const a = await tx(`SELECT * FROM projects WHERE id = $1`, [projectId]);
+  await tx(`UPDATE project_estimations SET is_active = false WHERE project_id = $1`, [projectId]);
+  await tx(`DELETE FROM estimation_items WHERE estimation_id = $1`, [estimationId]);
+});
+""")
+    statements = extract_file(str(path), str(tmp_path))
+    assert [(s['kind'], s['params'], s['line']) for s in statements] == [
+        ('SELECT', ['projectId'], 3), ('UPDATE', ['projectId'], 4), ('DELETE', ['estimationId'], 5),
+    ]
+
+
+def test_binds_by_name_literal_and_type(statements):
+    first, _, _, _, insert = statements
+    samples = {'project_id': 42, 'user_id': 7, 'cursor': None, 'limit': 51}
+    assert bind_params(first, ['integer', 'text'], samples, CONSTANTS) == ['42', 'approved']
+    assert bind_params(insert, ['integer', 'text'], samples, CONSTANTS) == ['7', 'created']
+
+    unknown = {'params': ['body.amount', 'touchedIds', 'cursor?.[0] ?? null', 'limit + 1'], 'route_key': None}
+    assert bind_params(unknown, ['numeric', 'integer[]', 'timestamp with time zone', 'integer'], samples) == \
+        ['1', '{}', None, '51']
+
+
+def test_sample_key_uses_the_last_property():
+    assert sample_key('estimation.project_id') == 'project_id'
+    assert sample_key('session.user.id') == 'user_id'
+    assert sample_key('body.milestone_id || null') == 'milestone_id'
+    assert sample_key('params.id', 'vendor_id') == 'vendor_id'
+    assert sample_key('item.width') is None
+
+
+def test_route_statements_are_extracted():
+    statements = extract_statements()
+    by_location = {loc: s for s in statements for loc in s['locations']}
+    ledger = by_location['app/api/projects/[id]/ledger/route.js:34']
+    assert ledger['kind'] == 'WITH' and len(ledger['params']) == 4 and not ledger['skip']
+    named = by_location['app/api/projects/[id]/purchase-requests/available-items/route.js:35']
+    assert named['params'] == ['estimationId'] and 'FROM estimation_items ei' in named['sql']
+
+    projects = next(s for loc, s in by_location.items() if loc.startswith('app/api/projects/route.js')
+                    and s['sql'] and 'ORDER BY p.created_at DESC' in s['sql'])
+    assert 'ILIKE $4' in projects['sql']
+    assert len({s['id'] for s in statements if s['id']}) == len([s for s in statements if s['id']])
+
+
+PLAN = [{
+    'Plan': {
+        'Node Type': 'Limit', 'Actual Rows': 51, 'Plan Rows': 51, 'Shared Hit Blocks': 900, 'Shared Read Blocks': 100,
+        'Plans': [{
+            'Node Type': 'Nested Loop', 'Actual Rows': 51, 'Actual Loops': 1,
+            'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': 'projects', 'Actual Rows': 50, 'Actual Loops': 2},
+                {'Node Type': 'Index Scan', 'Relation Name': 'users', 'Index Name': 'users_pkey', 'Actual Rows': 1},
+            ],
+        }],
+    },
+    'Planning Time': 0.2, 'Execution Time': 12.5, 'Triggers': [],
+}]
+
+
+def test_plan_summary_and_flags():
+    plan = summarize_plan(PLAN, {'projects': 50000, 'users': 10})
+    assert plan['shape'] == 'Limit > Nested Loop > [Seq Scan(projects), Index Scan(users_pkey)]'
+    assert plan['seq_scans'] == [{'relation': 'projects', 'rows': 100, 'table_rows': 50000}]
+    assert plan['execution_ms'] == 12.5 and plan['rows'] == 51
+
+    result = {'plan': plan}
+    assert flag_statement(result, large_table=10000) == ['seq_scan: projects (~50,000 rows)']
+    assert flag_statement(result, large_table=100000) == []
+
+    baseline = {'plan': {**plan, 'shape': 'Limit > Index Scan(projects_pkey)', 'execution_ms': 2.0,
+                         'shared_hit': 100, 'shared_read': 0}}
+    flags = flag_statement(result, baseline, large_table=100000, threshold=0.5)
+    assert [flag.split(':')[0] for flag in flags] == ['plan_changed', 'slower', 'more_buffers']
+
+    assert flag_statement({'error': 'boom'}) == ['error: boom']
+    assert flag_statement({'error': 'boom'}, {'error': 'boom'}) == []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return [['integer']] if 'pg_prepared_statements' in self.executed[-1][0] else [PLAN]
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_explain_runs_prepared_and_rolls_back():
+    conn = FakeConnection()
+    statement = {'sql': 'DELETE FROM projects WHERE id = $1', 'params': ['projectId'], 'route_key': None}
+    explained, values = explain_statement(conn, statement, {'project_id': 5})
+
+    assert explained == PLAN and values == ['5']
+    sqls = [sql for sql, _ in conn.executed]
+    assert sqls[1] == 'PREPARE kg_explain AS DELETE FROM projects WHERE id = $1'
+    assert conn.executed[3] == ('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE kg_explain(%s)', ['5'])
+    assert sqls[-1] == 'DEALLOCATE ALL' and conn.rollbacks == 2
+
+
+def test_explain_against_database(pg_db):
+    with db.connection() as conn:
+        samples = resolve_samples(conn)
+        statement = {'sql': 'SELECT * FROM projects WHERE id = $1', 'params': ['projectId'], 'route_key': None}
+        explained, _ = explain_statement(conn, statement, samples)
+    assert summarize_plan(explained)['rows'] == 0
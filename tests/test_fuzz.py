@@ -0,0 +1,50 @@
+"""
+Tests for the pricing differential fuzzer (kg_finance.fuzz)
+"""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from kg_finance.fuzz import ITEM_FIELDS, compare, fuzz, make_batch, price_python
+
+
+def test_batches_are_reproducible():
+    assert make_batch(7, 3, 50) == make_batch(7, 3, 50)
+    assert make_batch(7, 3, 50) != make_batch(7, 4, 50)
+
+
+def test_batches_cover_the_edge_cases():
+    items = [item for index in range(10) for item in make_batch(1, index, 500)['items']]
+    assert {'sqft', 'no'} <= {item['unit'] for item in items}
+    assert any(isinstance(item['unit_price'], str) for item in items)
+    assert any(item['gst_percentage'] in (0, '0', '') for item in items)
+    assert any(item['item_discount_percentage'] for item in items)
+
+
+def test_compare_treats_nan_and_null_as_equal():
+    batch = make_batch(1, 0, 200)
+    py = price_python(batch)
+    js = {
+        'items': {field: [None if np.isnan(v) else float(v) for v in py['items'][field]] for field in ITEM_FIELDS},
+        'totals': py['totals'],
+        'pr_items': {field: [None if np.isnan(v) else float(v) for v in values]
+                     for field, values in py['pr_items'].items()},
+        'pr_totals': py['pr_totals'],
+    }
+    assert compare(py, js) == []
+
+    js['items']['item_total'][5] += 0.01
+    js['pr_totals'] = {**py['pr_totals'], 'final_value': py['pr_totals']['final_value'] + 0.001}
+    found = compare(py, js)
+    assert [(d['kind'], d['where'], d['field'], d['index']) for d in found] == [
+        ('paise', 'items', 'item_total', 5), ('float', 'pr_totals', 'final_value', 0),
+    ]
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+def test_engines_agree_on_a_small_run():
+    report = fuzz(items=4000, batch_size=1000, workers=2, seed=11)
+    assert report['items'] == 4000 and report['pr_items'] == 800
+    assert report['paise'] == 0, report['examples']
@@ -0,0 +1,121 @@
+"""
+Tests for the load generator (kg_finance.loadtest) against a fake sender
+"""
+
+import asyncio
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from kg_finance.datagen import CATEGORY_POOL
+from kg_finance.loadtest import (
+    ENDPOINTS, LATENCY_BUCKETS_MS, UPLOAD_COLUMNS, Planner, Recorder, compare, histogram, parse_mix,
+    run_closed_loop, run_open_loop, upload_csv,
+)
+
+TARGETS = [
+    {'project_id': 11, 'categories': CATEGORY_POOL[:3], 'milestone_ids': [101, 102]},
+    {'project_id': 12, 'categories': CATEGORY_POOL[:2], 'milestone_ids': []},
+]
+
+
+def fake_sender(delay=0.001, status_of=lambda request: 200):
+    sent = []
+
+    async def send(request):
+        sent.append(request)
+        await asyncio.sleep(delay)
+        status = status_of(request)
+        return (None, 'ClientConnectorError: refused') if status is None else (status, None)
+
+    return send, sent
+
+
+def test_parse_mix():
+    assert parse_mix(['ledger=2', 'dashboard']) == {'ledger': 2.0, 'dashboard': 1.0}
+    assert 'upload' not in parse_mix([])
+    with pytest.raises(ValueError):
+        parse_mix(['nope'])
+    with pytest.raises(ValueError):
+        parse_mix(['ledger=0'])
+
+
+def test_requests_match_routes():
+    rng = np.random.default_rng(1)
+    payment = ENDPOINTS['calculate-payment'](TARGETS[0], rng)
+    assert payment['path'] == '/projects/11/calculate-payment'
+    assert payment['params']['milestone_id'] in (101, 102)
+    assert ENDPOINTS['calculate-payment'](TARGETS[1], rng)['params'] == {}
+    assert ENDPOINTS['available-items'](TARGETS[1], rng)['path'] == '/projects/12/purchase-requests/available-items'
+    assert ENDPOINTS['upload'](TARGETS[0], rng)['method'] == 'POST'
+
+
+def test_upload_csv_uses_project_categories():
+    content = upload_csv(TARGETS[0], np.random.default_rng(2), rows=40).decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert tuple(rows[0]) == UPLOAD_COLUMNS
+    assert len(rows) == 40
+    assert {row['category'] for row in rows} <= {cat['id'] for cat in CATEGORY_POOL[:3]}
+    for row in rows:
+        assert (row['width'] == '') == (row['unit'] != 'sqft')
+
+
+def test_planner_follows_weights():
+    plan = Planner({'ledger': 3, 'dashboard': 1}, TARGETS, np.random.default_rng(3))
+    names = [plan()[0] for _ in range(4000)]
+    assert 0.7 < names.count('ledger') / len(names) < 0.8
+    with pytest.raises(ValueError):
+        Planner({'ledger': 1}, [], np.random.default_rng())
+
+
+def test_histogram_buckets():
+    counts = histogram(np.array([1, 5, 6, 10000, 20000]))
+    assert counts['<=5'] == 2
+    assert counts['<=10'] == 1
+    assert counts[f"<={LATENCY_BUCKETS_MS[-1]}"] == 1
+    assert counts[f">{LATENCY_BUCKETS_MS[-1]}"] == 1
+    assert sum(counts.values()) == 5
+
+
+def test_closed_loop_records_every_request():
+    send, sent = fake_sender(status_of=lambda r: 500 if r['path'] == '/dashboard' else 200)
+    recorder = Recorder()
+    plan = Planner({'dashboard': 1, 'ledger': 1}, TARGETS, np.random.default_rng(4))
+    asyncio.run(run_closed_loop(send, plan, recorder, concurrency=4, duration=0.1))
+
+    report = recorder.summary(0.1)
+    assert report['overall']['requests'] == len(sent) > 0
+    assert report['endpoints']['dashboard']['error_rate'] == 1.0
+    assert report['endpoints']['dashboard']['error_sample'] == 'HTTP 500'
+    assert report['endpoints']['ledger']['errors'] == 0
+    latency = report['endpoints']['ledger']['latency_ms']
+    assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+
+
+def test_open_loop_counts_queueing_as_latency():
+    # One slot, 20ms service time, ~200 arrivals/s: the backlog shows up as latency
+    send, sent = fake_sender(delay=0.02, status_of=lambda r: None if len(sent) == 1 else 200)
+    recorder = Recorder()
+    plan = Planner({'projects': 1}, TARGETS, np.random.default_rng(5))
+    asyncio.run(run_open_loop(send, plan, recorder, rate=200, duration=0.2, max_in_flight=1,
+                              rng=np.random.default_rng(5)))
+
+    summary = recorder.summary(0.2)['endpoints']['projects']
+    assert summary['requests'] == len(sent) > 20
+    assert summary['statuses']['exception'] == 1
+    assert summary['latency_ms']['p99'] > 100
+
+
+def test_compare_against_baseline():
+    before = {'endpoints': {'ledger': {'latency_ms': {'p50': 10, 'p95': 40, 'p99': 80},
+                                       'throughput_rps': 100, 'error_rate': 0.0}}}
+    after = {'endpoints': {'ledger': {'latency_ms': {'p50': 5, 'p95': 50, 'p99': 80},
+                                      'throughput_rps': 150, 'error_rate': 0.01},
+                           'upload': {'latency_ms': {'p50': 1}}}}
+    changes = compare(after, before)
+    assert list(changes) == ['ledger']
+    assert changes['ledger']['p50_ms']['change_pct'] == -50.0
+    assert changes['ledger']['p95_ms']['change_pct'] == 25.0
+    assert changes['ledger']['throughput_rps'] == {'before': 100, 'after': 150}
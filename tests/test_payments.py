@@ -0,0 +1,78 @@
+"""
+Tests for the portfolio payment target engine (kg_finance.payments)
+"""
+
+from kg_finance.payments import compute_payment_targets
+
+CATEGORY_RATES = {
+    'categories': [
+        {'id': 'misc', 'category_name': 'Misc', 'sort_order': 2},
+        {'id': 'woodwork', 'category_name': 'Woodwork', 'sort_order': 1},
+    ]
+}
+
+
+def make_portfolio():
+    return {
+        'projects': [
+            {'id': 1, 'project_code': 'P1', 'biz_model_id': 10, 'category_rates': CATEGORY_RATES},
+            {'id': 2, 'project_code': 'P2', 'biz_model_id': 10, 'category_rates': CATEGORY_RATES},
+            {'id': 3, 'project_code': 'P3', 'biz_model_id': 10, 'category_rates': CATEGORY_RATES},
+            {'id': 4, 'project_code': 'P4', 'biz_model_id': 20, 'category_rates': {'categories': []}},
+        ],
+        'estimations': {
+            1: {'id': 100, 'category_breakdown': {'woodwork': {'total': 100000}, 'misc': {'total': 33333.33}}},
+            2: {'id': 200, 'category_breakdown': {'woodwork': {'total': 50000}}},
+        },
+        'milestones': {
+            10: [
+                {'id': 1000, 'milestone_code': 'ADV', 'milestone_name': 'Advance',
+                 'category_percentages': {'woodwork': 10, 'misc': 10}},
+                {'id': 1001, 'milestone_code': 'EXEC', 'milestone_name': 'Execution',
+                 'category_percentages': {'woodwork': 50, 'misc': '100'}},
+            ],
+        },
+        'collected': {1: 20000.0},
+    }
+
+
+def route_target(breakdown, categories, percentages, collected):
+    """The calculate-payment route's arithmetic, one (project, milestone) at a time"""
+    target_total = 0
+    for category in sorted(categories, key=lambda c: c.get('sort_order') or 0):
+        total = (breakdown.get(category['id']) or {}).get('total') or 0
+        target_total += (total * float(percentages.get(category['id']) or 0)) / 100
+    return target_total, max(0, target_total - collected)
+
+
+def test_grid_matches_per_request_route_logic():
+    portfolio = make_portfolio()
+    result = compute_payment_targets(portfolio)
+    targets = {(t['project_id'], t['milestone_id']): t for t in result['targets']}
+
+    assert sorted(targets) == [(1, 1000), (1, 1001), (2, 1000), (2, 1001)]
+
+    for (project_id, milestone_id), target in targets.items():
+        milestone = next(m for m in portfolio['milestones'][10] if m['id'] == milestone_id)
+        expected_target, expected_remaining = route_target(
+            portfolio['estimations'][project_id]['category_breakdown'],
+            CATEGORY_RATES['categories'],
+            milestone['category_percentages'],
+            portfolio['collected'].get(project_id, 0),
+        )
+        assert target['target_total'] == round(expected_target, 2)
+        assert target['expected_total'] == round(expected_remaining, 2)
+
+    assert targets[(1, 1001)]['target_total'] == 83333.33
+    assert targets[(1, 1001)]['collected_total'] == 20000
+    assert targets[(1, 1000)]['expected_total'] == 0
+    assert list(targets[(1, 1000)]['categories']) == ['woodwork', 'misc']
+
+
+def test_projects_the_route_rejects_are_skipped():
+    result = compute_payment_targets(make_portfolio())
+
+    assert result['skipped'] == [
+        (3, 'No estimation found'),
+        (4, 'No categories defined in BizModel'),
+    ]
@@ -0,0 +1,137 @@
+"""
+Tests for the hermetic Postgres fixture (kg_finance.pgtest)
+"""
+
+import os
+
+import pytest
+
+from kg_finance import db, pgtest
+
+
+def make_repo(tmp_path):
+    (tmp_path / 'schema.sql').write_text('CREATE TABLE a (id INT);')
+    (tmp_path / 'tests').mkdir()
+    (tmp_path / 'tests' / 'schema_bootstrap.sql').write_text('-- bootstrap')
+    migrations = tmp_path / 'migrations'
+    migrations.mkdir()
+    for name in ['010_b.sql', '002_a.sql', '021_c.sql', 'notes.sql']:
+        (migrations / name).write_text(f'-- {name}')
+    return tmp_path
+
+
+def test_schema_files_orders_migrations_by_number(tmp_path, monkeypatch):
+    monkeypatch.delenv(pgtest.SCHEMA_ENV, raising=False)
+    monkeypatch.delenv(pgtest.MIGRATIONS_FROM_ENV, raising=False)
+    root = make_repo(tmp_path)
+
+    files = [os.path.basename(path) for path in pgtest.schema_files(str(root), migrations_from=0)]
+    assert files == ['schema.sql', 'schema_bootstrap.sql', '002_a.sql', '010_b.sql', '021_c.sql']
+
+    # schema.sql already contains the migrations before SCHEMA_MIGRATIONS_FROM
+    files = [os.path.basename(path) for path in pgtest.schema_files(str(root))]
+    assert files == ['schema.sql', 'schema_bootstrap.sql', '021_c.sql']
+
+    files = pgtest.schema_files(str(root), schema='/tmp/dump.sql', migrations_from=10)
+    assert files[0] == '/tmp/dump.sql'
+    assert [os.path.basename(path) for path in files[1:]] == ['010_b.sql', '021_c.sql']
+
+
+def test_fingerprint_follows_content(tmp_path):
+    root = make_repo(tmp_path)
+    files = pgtest.schema_files(str(root), migrations_from=0)
+    before = pgtest.fingerprint(files)
+    assert pgtest.fingerprint(files) == before
+
+    (root / 'migrations' / '021_c.sql').write_text('-- edited')
+    assert pgtest.fingerprint(files) != before
+
+
+@pytest.mark.parametrize('attempt', [1, 2])
+def test_clones_are_isolated(pg_db, attempt):
+    # Each run sees an empty table even though the other one inserted a row
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM counters")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("INSERT INTO counters (name, scope_id, value) VALUES ('pr_number', 1, 1)")
+
+
+def test_template_builds(pg_server):
+    # schema.sql plus every migration must load; a failure here is an error, not a skip
+    template = pgtest.ensure_template(pg_server, pgtest.schema_files())
+
+    import psycopg2
+
+    conn = psycopg2.connect(pgtest.dsn_for(pg_server, template))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
+        tables = {row[0] for row in cursor.fetchall()}
+        assert {'projects', 'project_base_rates', 'estimation_items', 'purchase_requests',
+                'purchase_request_items', 'purchase_request_estimation_links',
+                'estimation_item_fulfillment', 'dashboard_stats', 'counters',
+                'project_payment_totals'} <= tables
+
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'purchase_request_items'
+        """)
+        columns = {row[0] for row in cursor.fetchall()}
+        assert {'purchase_request_item_name', 'stable_item_id', 'version', 'created_by'} <= columns
+        assert 'item_name' not in columns
+
+        # Migration 029: direct purchase items and dynamic categories
+        cursor.execute("""
+            SELECT is_nullable FROM information_schema.columns
+            WHERE table_name = 'purchase_request_items' AND column_name = 'estimation_item_id'
+        """)
+        assert cursor.fetchone()[0] == 'YES'
+        cursor.execute("SELECT COUNT(*) FROM pg_constraint WHERE conname = 'estimation_items_category_check'")
+        assert cursor.fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+class FakeCluster(pgtest.LocalCluster):
+    """LocalCluster whose tools are recorded instead of run"""
+
+    def __init__(self, fail=None):
+        self.bindir = '/nonexistent'
+        self.user = None
+        self.base_dir = None
+        self.fail = fail
+        self.calls = []
+
+    def _run(self, tool, *args):
+        self.calls.append((tool, args[-1]))
+        if tool == self.fail:
+            raise RuntimeError(f"{tool} failed: boom")
+        if args[-1] == 'start':
+            open(os.path.join(self.data_dir, 'postmaster.pid'), 'w').close()
+        elif tool == 'initdb':
+            os.mkdir(self.data_dir)
+
+
+def test_failed_start_keeps_its_error():
+    cluster = FakeCluster(fail='initdb')
+    with pytest.raises(RuntimeError, match='initdb failed'):
+        cluster.start()
+    # Nothing was started, so nothing is stopped
+    assert [tool for tool, _ in cluster.calls] == ['initdb']
+    assert cluster.base_dir is None
+
+
+def test_stop_only_stops_a_running_server():
+    cluster = FakeCluster()
+    cluster.start()
+    base_dir = cluster.base_dir
+    cluster.stop()
+    assert cluster.calls[-1] == ('pg_ctl', 'stop')
+    assert not os.path.exists(base_dir)
+
+    cluster = FakeCluster(fail='pg_ctl')
+    with pytest.raises(RuntimeError, match='pg_ctl failed'):
+        cluster.start()
+    assert cluster.calls == [('initdb', '--no-sync'), ('pg_ctl', 'start')]
+    assert cluster.base_dir is None
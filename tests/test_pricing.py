@@ -0,0 +1,145 @@
+"""
+Tests for the vectorized pricing engine (kg_finance.pricing)
+Expected values are the ones lib/calcUtils.js produces for the same items.
+"""
+
+import numpy as np
+import pytest
+
+from kg_finance.pricing import (
+    calculate_all_totals,
+    calculate_item_pricing,
+    calculate_pr_totals,
+    items_to_columns,
+    js_round2,
+    js_to_fixed2,
+    pr_items_to_columns,
+)
+
+BASE_RATES = {
+    'category_rates': {
+        'categories': [
+            {'id': 'woodwork', 'kg_percentage': 10, 'pay_to_vendor_directly': False, 'sort_order': 1},
+            {'id': 'misc', 'kg_percentage': 8, 'pay_to_vendor_directly': False, 'sort_order': 2},
+            {'id': 'shopping', 'kg_percentage': 5, 'pay_to_vendor_directly': True, 'sort_order': 3},
+        ]
+    },
+    'gst_percentage': '18.00',
+}
+
+
+def test_sqft_item_matches_calc_utils_example():
+    """The worked example documented in calculateCategoryTotals"""
+    items = [{
+        'category': 'woodwork', 'unit': 'sqft', 'width': 20, 'height': 5, 'quantity': 0,
+        'unit_price': 4000, 'item_discount_percentage': 10, 'discount_kg_charges_percentage': 0,
+    }]
+    result = calculate_all_totals(items_to_columns(items), BASE_RATES)
+    priced = result['items']
+
+    assert priced['subtotal'][0] == 400000
+    assert priced['item_discount_amount'][0] == 40000
+    assert priced['karighar_charges_amount'][0] == 40000
+    assert priced['amount_before_gst'][0] == 400000
+    assert priced['gst_amount'][0] == 72000
+    assert priced['item_total'][0] == 472000
+    assert result['final_value'] == 472000
+    assert result['category_breakdown']['woodwork']['total'] == 472000
+    assert result['category_breakdown']['misc']['total'] == 0
+
+
+def test_pay_to_vendor_directly_bills_only_kg_charges():
+    items = [{
+        'category': 'shopping', 'unit': 'no', 'quantity': 10, 'unit_price': 400,
+        'item_discount_percentage': 0, 'discount_kg_charges_percentage': 50,
+    }]
+    priced = calculate_all_totals(items_to_columns(items), BASE_RATES)['items']
+
+    # 4000 subtotal, 5% KG = 200, 50% KG discount = 100 billed
+    assert priced['amount_before_gst'][0] == 100
+    assert priced['gst_amount'][0] == 18
+    assert priced['item_total'][0] == 118
+
+
+def test_gst_override_follows_js_truthiness():
+    common = {'category': 'misc', 'unit': 'no', 'quantity': 1, 'unit_price': 100,
+              'item_discount_percentage': 0, 'discount_kg_charges_percentage': 0}
+    items = [
+        {**common, 'gst_percentage': None},  # falls back to base rate
+        {**common, 'gst_percentage': 0},     # falsy number, falls back too
+        {**common, 'gst_percentage': '0'},   # truthy string, zero GST
+        {**common, 'gst_percentage': 5},
+    ]
+    priced = calculate_all_totals(items_to_columns(items), BASE_RATES)['items']
+
+    assert priced['gst_percentage'].tolist() == [18, 18, 0, 5]
+
+
+def test_to_fixed_rounds_like_javascript():
+    # Values whose exact binary expansion sits just below/at the .5 boundary
+    values = [0.125, 0.375, 1.005, 1.115, 2.675, -0.125, 123456.785]
+    expected = [0.13, 0.38, 1.0, 1.11, 2.67, -0.13, 123456.79]
+
+    assert js_to_fixed2(values).tolist() == expected
+
+
+def test_unknown_category_raises():
+    items = [{'category': 'plumbing', 'unit': 'no', 'quantity': 1, 'unit_price': 1,
+              'item_discount_percentage': 0, 'discount_kg_charges_percentage': 0}]
+
+    with pytest.raises(ValueError, match='Category plumbing not found'):
+        calculate_all_totals(items_to_columns(items), BASE_RATES)
+
+
+def test_category_sums_accumulate_in_item_order():
+    rng = np.random.default_rng(7)
+    n = 1000
+    columns = {
+        'category': rng.choice(['woodwork', 'misc', 'shopping'], n).astype(object),
+        'unit': np.full(n, 'no', dtype=object),
+        'width': np.full(n, np.nan),
+        'height': np.full(n, np.nan),
+        'quantity': rng.integers(1, 20, n).astype(float),
+        'unit_price': rng.uniform(10, 5000, n).round(2),
+        'item_discount_percentage': rng.choice([0.0, 5.0, 12.5], n),
+        'discount_kg_charges_percentage': rng.choice([0.0, 25.0], n),
+        'gst_percentage': np.full(n, np.nan),
+    }
+    result = calculate_all_totals(columns, BASE_RATES)
+
+    for cat_id, breakdown in result['category_breakdown'].items():
+        mask = columns['category'] == cat_id
+        running = 0.0
+        for value in result['items']['item_total'][mask]:
+            running += value
+        assert breakdown['total'] == running
+
+
+def test_math_round_halves_go_up():
+    assert list(js_round2([0.125, -0.125, 1.005, 0.0049999999999999994])) == [0.13, -0.12, 1.0, 0.0]
+
+
+def test_pr_item_pricing_matches_pricing_utils():
+    """Values from calculateItemPricing / calculatePRTotals for the same items"""
+    priced = calculate_item_pricing(
+        [3, 1.5, 7, 2, 10], [33.335, np.nan, 0.1, 1.005, 123.456], [18, 18, 5, 0, 12]
+    )
+    assert list(priced['subtotal'][[0, 2, 3, 4]]) == [100.01, 0.7, 2.01, 1234.56]
+    assert list(priced['gst_amount'][[0, 2, 3, 4]]) == [18, 0.04, 0, 148.15]
+    assert list(priced['item_total'][[0, 2, 3, 4]]) == [118.01, 0.74, 2.01, 1382.71]
+    assert np.isnan(priced['item_total'][1])
+
+    assert calculate_pr_totals(priced) == {'items_value': 1337.28, 'gst_amount': 166.19, 'final_value': 1503.47}
+
+
+def test_pr_string_zero_price_is_truthy():
+    # pricing-utils.js: !'0.00' is false, so the item is priced at zero instead of null
+    items = [{'quantity': 4, 'unit_price': '0.00', 'gst_percentage': '18.00'},
+             {'quantity': 4, 'unit_price': 0, 'gst_percentage': 18},
+             {'quantity': '2.5', 'unit_price': '', 'gst_percentage': None},
+             {'quantity': '2.5', 'unit_price': '40.10', 'gst_percentage': None}]
+    priced = calculate_item_pricing(**pr_items_to_columns(items))
+    assert priced['item_total'][0] == 0
+    assert np.isnan(priced['item_total'][1]) and np.isnan(priced['item_total'][2])
+    assert priced['item_total'][3] == 100.25
+    assert list(priced['gst_percentage']) == [18, 18, 0, 0]
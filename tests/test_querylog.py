@@ -0,0 +1,62 @@
+"""
+Tests for the query log analyzer (kg_finance.querylog)
+"""
+
+import json
+
+from kg_finance.querylog import main, parse_line, read_records, summarize, top_statements
+
+
+def line(fingerprint, duration, route='/api/projects', kind='query', **extra):
+    record = {'type': kind, 'ts': '2026-10-01T00:00:00Z', 'route': route, 'fingerprint': fingerprint,
+              'duration_ms': duration, 'rows': 1, 'statement': f"SELECT {fingerprint}", **extra}
+    return f"2026-10-01 00:00:00 web-1 | {json.dumps(record)}\n"
+
+
+LOG = (
+    [line('aaa', 1.0) for _ in range(99)] + [line('aaa', 100.0)]
+    + [line('bbb', 50.0, route='/api/projects/[id]/ledger') for _ in range(4)]
+    + [line('ccc', 5.0, error='boom')]
+    + ['Database query error: something\n', '{"not": "a query"}\n', 'GET /api/projects 200\n']
+)
+
+
+def test_parse_line_skips_non_records():
+    assert parse_line(LOG[0])['fingerprint'] == 'aaa'
+    assert parse_line('no json here') is None
+    assert parse_line('{"type": "other"}') is None
+    assert parse_line('{broken') is None
+
+
+def test_summary_ranks_statements_and_routes():
+    summary = summarize(read_records(LOG))
+    assert summary['total_ms'] == 99 + 100 + 200 + 5
+    assert not summary['slow_only']
+
+    by_total = [row['fingerprint'] for row in top_statements(summary, 'total')]
+    assert by_total == ['bbb', 'aaa', 'ccc']
+    assert [row['fingerprint'] for row in top_statements(summary, 'calls', top=1)] == ['aaa']
+
+    aaa = next(row for row in summary['statements'] if row['fingerprint'] == 'aaa')
+    assert aaa['calls'] == 100 and aaa['p50_ms'] == 1.0 and aaa['max_ms'] == 100.0
+    assert 1.0 < aaa['p99_ms'] <= 100.0
+    assert next(row for row in summary['statements'] if row['fingerprint'] == 'ccc')['errors'] == 1
+
+    assert [route['route'] for route in summary['routes']] == ['/api/projects', '/api/projects/[id]/ledger']
+    assert summary['routes'][1]['share'] == round(200 / 404, 4)
+
+
+def test_route_filter_and_slow_only():
+    records = list(read_records(LOG, route='/api/projects/[id]/ledger'))
+    assert {r['fingerprint'] for r in records} == {'bbb'}
+    assert summarize(read_records([line('x', 900, kind='slow_query')]))['slow_only']
+
+
+def test_cli_writes_json(tmp_path, capsys):
+    log = tmp_path / 'server.log'
+    log.write_text(''.join(LOG))
+    out = tmp_path / 'summary.json'
+    assert main([str(log), '--sort', 'p99', '--json', str(out)])
+    assert json.loads(out.read_text())['statements']
+    assert 'TOP STATEMENTS BY P99' in capsys.readouterr().out
+    assert not main([str(tmp_path / 'summary.json')])
@@ -0,0 +1,77 @@
+"""
+Tests for the traffic replayer (kg_finance.replay)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from kg_finance.loadtest import Recorder
+from kg_finance.replay import build_request, parse_line, read_records, route_template, run_schedule, schedule
+
+
+def line(t, method='GET', path='/api/projects', prefix='', **fields):
+    record = {'type': 'traffic', 'ts': '', 't': t, 'method': method, 'path': path, 'query': {}, **fields}
+    return prefix + json.dumps(record) + '\n'
+
+
+def test_parse_line_skips_other_log_lines():
+    assert parse_line('ready - started server on 0.0.0.0:3000\n') is None
+    assert parse_line('{"type": "slow_query", "duration_ms": 900}') is None
+    assert parse_line(line(5, prefix='web-1 | '))['t'] == 5
+
+
+def test_read_records_filters_and_orders():
+    start = 1_760_428_800_000  # 2025-10-14T08:00:00Z
+    lines = [
+        line(start + 3000, path='/api/projects/7/ledger'),
+        line(start + 1000, 'POST', '/api/projects/7/customer-payments', body={'amount': 10}),
+        line(start - 1000),
+        line(start + 2000, 'POST', '/api/upload', form={'file': {'file': True, 'size': 4}}),
+        'not json\n',
+    ]
+    records = read_records(lines, since='2025-10-14T08:00')
+    assert [r['t'] - start for r in records] == [1000, 3000]
+    assert [r['t'] - start for r in read_records(lines, since='2025-10-14T08:00', reads_only=True)] == [3000]
+    assert len(read_records(lines, uploads=True)) == 4
+    assert len(read_records(lines, routes=['/api/projects/7/ledger'])) == 1
+    assert len(read_records(lines, until='2025-10-14T08:00:01')) == 1
+
+
+def test_route_template():
+    assert route_template('/api/projects/12/purchase-requests/345/edit') == '/api/projects/[id]/purchase-requests/[id]/edit'
+    assert route_template('/api/all-payments') == '/api/all-payments'
+
+
+def test_build_request_json_and_form():
+    request = build_request(parse_line(line(0, 'PUT', '/api/projects/3', query={'x': '1'}, body={'name': 'xxx'})))
+    assert request == {'method': 'PUT', 'path': '/api/projects/3', 'params': {'x': '1'}, 'json': {'name': 'xxx'}}
+
+    form = {'file': {'file': True, 'size': 3, 'content_type': 'text/csv'}, 'project_id': '3'}
+    request = build_request(parse_line(line(0, 'POST', '/api/upload', form=form)))
+    assert request['form'] == {'project_id': '3'}
+    assert request['files']['file'][1:] == (b'xxx', 'text/csv')
+
+
+def test_schedule_compresses_inter_arrival_times():
+    records = [parse_line(line(t)) for t in (10_000, 10_500, 12_000)]
+    assert [offset for offset, _, _ in schedule(records, speed=5)] == pytest.approx([0, 0.1, 0.4])
+    assert schedule([], speed=5) == []
+
+
+def test_run_schedule_sends_on_time_without_waiting_for_answers():
+    sent = []
+
+    async def send(request):
+        sent.append((request['path'], asyncio.get_running_loop().time()))
+        await asyncio.sleep(0.2)  # slower than the gaps between arrivals
+        return 200, None
+
+    plan = [(0.0, 'a', {'path': 'a'}), (0.05, 'b', {'path': 'b'}), (0.1, 'a', {'path': 'c'})]
+    recorder = Recorder()
+    lags = asyncio.run(run_schedule(send, plan, recorder))
+    assert [path for path, _ in sent] == ['a', 'b', 'c']
+    assert sent[2][1] - sent[0][1] == pytest.approx(0.1, abs=0.05)
+    assert len(lags) == 3 and max(lags) < 0.05
+    assert len(recorder.latencies['a']) == 2
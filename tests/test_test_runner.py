@@ -0,0 +1,96 @@
+"""
+Tests for the parallel backend test runner (kg_finance.test_runner)
+"""
+
+import socket
+import sys
+import types
+import urllib.request
+
+import pytest
+
+from kg_finance import test_runner
+
+SCRIPT = '''
+RUNNER_SETUP = ['test_setup']
+RUNNER_CHAINS = [('test_create', 'test_read')]
+
+def helper():
+    return False
+
+def test_setup():
+    return True
+
+def test_create():
+    print("created")
+    return True
+
+def test_read():
+    return True
+
+def test_standalone():
+    raise SystemExit(1)
+'''
+
+
+def make_script(name='fake_backend_test'):
+    module = types.ModuleType(name)
+    exec(SCRIPT, module.__dict__)
+    sys.modules[name] = module
+    return module
+
+
+def test_plan_splits_setup_chains_and_singles():
+    setup, units = test_runner.plan(make_script())
+    assert setup == ['test_setup']
+    assert units == [('test_create', 'test_read'), ('test_standalone',)]
+
+
+def test_run_unit_captures_output_and_failures(monkeypatch):
+    make_script()
+    monkeypatch.setenv(test_runner.NAMESPACE_ENV, 'abc')
+
+    created, read = test_runner.run_unit('fake_backend_test', ['test_create', 'test_read'])
+    assert created['passed'] and created['output'] == 'created\n'
+    assert created['namespace'] == 'abc'
+    assert read['passed']
+
+    [standalone] = test_runner.run_unit('fake_backend_test', ['test_standalone'])
+    assert not standalone['passed']
+    assert standalone['error'].startswith('SystemExit')
+
+
+def test_namespaced(monkeypatch):
+    monkeypatch.delenv(test_runner.NAMESPACE_ENV, raising=False)
+    assert test_runner.namespaced('TEST_4CAT') == 'TEST_4CAT'
+    monkeypatch.setenv(test_runner.NAMESPACE_ENV, 'r1w42')
+    assert test_runner.namespaced('TEST_4CAT') == 'TEST_4CAT_r1w42'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_app_server_waits_for_the_server_and_stops_it():
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = f"{sys.executable} -m http.server {port} --bind 127.0.0.1"
+
+    with test_runner.app_server(command, base_url, 'postgresql://unused', timeout=30):
+        assert urllib.request.urlopen(base_url, timeout=5).status == 200
+
+    with pytest.raises(OSError):
+        urllib.request.urlopen(base_url, timeout=1)
+
+
+def test_app_server_reports_a_command_that_exits():
+    with pytest.raises(RuntimeError, match='exited'):
+        with test_runner.app_server('exit 3', f"http://127.0.0.1:{free_port()}", 'postgresql://unused', timeout=30):
+            pass
+
+
+def test_hermetic_requires_a_server_command():
+    with pytest.raises(ValueError):
+        test_runner.run_hermetic(['pr'])